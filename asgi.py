@@ -0,0 +1,300 @@
+# asgi.py at repo root
+"""
+FundiMatch - ASGI Entry Point
+=============================
+
+Serves the same API as wsgi.py from an event loop. The read-heavy and
+streaming endpoints below run as coroutines on SQLAlchemy's asyncio engine
+(aiosqlite for SQLite, asyncpg for PostgreSQL), so a slow client or an idle
+notification stream holds a socket and a few KB, not a worker process.
+Every other route is handed to the Flask app through asgiref's WsgiToAsgi,
+which runs it on a thread pool (ASGI_THREADS).
+
+Async endpoints (same responses and ETags as the Flask views):
+- GET /api/fundis, /api/fundis/nearby, /api/fundis/search
+- GET /api/bookings
+- GET /api/notifications/<user_id>/inbox and /unread-count
+- GET /api/notifications/<user_id>/stream (Server-Sent Events)
+
+Usage:
+    uvicorn asgi:app --host 0.0.0.0 --port 5000 --workers 2
+    gunicorn asgi:app -k uvicorn.workers.UvicornWorker --workers 2
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import asyncio
+import os
+
+from asgiref.wsgi import WsgiToAsgi
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.http import http_date, parse_date, parse_etags
+
+from flask_backend_template import (
+    app as flask_app, database_url, allowed_origins, notification_hub,
+    Category, Fundi, Job, Notification, NotificationCounter, User,
+    BOOKING_LIST_COLUMNS, FUNDI_LIST_COLUMNS, NOTIFICATION_COLUMNS, SECURITY_HEADERS,
+    SSE_HEARTBEAT_SECONDS, SSE_MAX_DURATION_SECONDS,
+    fundi_filters, fundi_rows_by_id, get_table_versions, notification_backlog, point_from_args,
+    serialize_booking_row, serialize_fundi_row, serialize_notification, sse_live_frames, sse_opening_frames,
+    table_validators,
+)
+from metrics import metrics
+from asgi_routing import ASGIApp, Response, Router, StreamingResponse, async_database_url, json_response
+from db.search_index import search_fundi_ids
+from db.spatial import nearest, within_radius
+
+ASYNC_POOL_SIZE = int(os.environ.get('ASYNC_DB_POOL_SIZE', 10))
+ASYNC_MAX_OVERFLOW = int(os.environ.get('ASYNC_DB_MAX_OVERFLOW', 20))
+
+async_url = async_database_url(database_url)
+# aiosqlite opens a connection per checkout (NullPool); PostgreSQL gets a real pool
+engine = create_async_engine(async_url) if async_url.startswith('sqlite') else \
+    create_async_engine(async_url, pool_size=ASYNC_POOL_SIZE, max_overflow=ASYNC_MAX_OVERFLOW, pool_pre_ping=True)
+Session = async_sessionmaker(engine, expire_on_commit=False)
+router = Router()
+
+
+def api_route(pattern, *tables):
+    """
+    Register an async read endpoint
+    ===============================
+
+    The handler gets the Request, a short-lived AsyncSession (closed before
+    a streamed body starts) and the path parameters. With tables given, it
+    gets the same conditional GET handling as the Flask conditional()
+    decorator: matching If-None-Match / If-Modified-Since returns 304
+    without running the handler. ValueError becomes a 400.
+    """
+    def decorator(handler):
+        endpoint = handler.__name__
+
+        async def view(request, **params):
+            try:
+                async with Session() as session:
+                    if not tables:
+                        return await handler(request, session, **params)
+                    versions = await session.run_sync(lambda sync_session: get_table_versions(tables, sync_session))
+                    etag, last_modified = table_validators(request.full_path, tables, versions)
+                    if_none_match = request.headers.get('if-none-match')
+                    if_modified_since = parse_date(request.headers.get('if-modified-since'))
+                    if if_none_match:
+                        fresh = parse_etags(if_none_match).contains_weak(etag)
+                    elif if_modified_since and last_modified:
+                        fresh = last_modified <= if_modified_since.replace(tzinfo=None)
+                    else:
+                        fresh = False
+
+                    if fresh:
+                        metrics.inc('conditional_requests_total', endpoint=endpoint, result='not_modified')
+                        response = Response(status=304)
+                    else:
+                        metrics.inc('conditional_requests_total', endpoint=endpoint, result='full')
+                        response = await handler(request, session, **params)
+                        if response.status != 200:
+                            return response
+            except ValueError as e:
+                return json_response({'error': str(e)}, 400)
+            response.headers['ETag'] = f'W/"{etag}"'
+            if last_modified:
+                response.headers['Last-Modified'] = http_date(last_modified)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        router.add(pattern, view)
+        return handler
+    return decorator
+
+
+# Fundis
+# ======
+# Query building is shared with the Flask views; it runs inside run_sync(),
+# which drives the sync helpers over the async connection without a thread.
+@api_route('/api/fundis', 'fundis', 'users')
+async def get_fundis(request, session):
+    """Fundi list with the Flask view's filters and optional radius search"""
+    args = request.args
+    is_available = args.get('is_available')
+    point = point_from_args(args=args)
+    if point and point[2] is None:
+        return json_response({'error': 'radius_km is required with lat/lng (use /api/fundis/nearby for nearest)'}, 400)
+
+    def query(sync_session):
+        filters = fundi_filters(
+            specialization=args.get('specialization'),
+            location=args.get('location'),
+            is_available=None if is_available is None else is_available.lower() == 'true'
+        )
+        if point:
+            hits = within_radius(sync_session, Fundi.__table__, point[0], point[1], point[2], where=filters)
+            rows = fundi_rows_by_id([fundi_id for fundi_id, _ in hits], sync_session)
+            return [dict(serialize_fundi_row(rows[fundi_id]), distance_km=distance)
+                    for fundi_id, distance in hits if fundi_id in rows]
+        rows = sync_session.execute(select(*FUNDI_LIST_COLUMNS).join(User, Fundi.user_id == User.id).where(*filters))
+        return [serialize_fundi_row(row) for row in rows]
+
+    return json_response(await session.run_sync(query))
+
+
+@api_route('/api/fundis/nearby', 'fundis', 'users')
+async def get_nearby_fundis(request, session):
+    """Nearest fundis to lat/lng"""
+    args = request.args
+    latitude, longitude, radius_km = point_from_args(require=True, args=args)
+    k = max(1, min(args.get('k', 10, type=int), 100))
+
+    def query(sync_session):
+        filters = fundi_filters(
+            specialization=args.get('specialization'),
+            is_available=True if args.get('available', 'true').lower() == 'true' else None
+        )
+        hits = nearest(sync_session, Fundi.__table__, latitude, longitude, k=k, where=filters,
+                       max_radius_km=radius_km)
+        rows = fundi_rows_by_id([fundi_id for fundi_id, _ in hits], sync_session)
+        return {'items': [dict(serialize_fundi_row(rows[fundi_id]), distance_km=distance)
+                          for fundi_id, distance in hits if fundi_id in rows]}
+
+    return json_response(await session.run_sync(query))
+
+
+@api_route('/api/fundis/search', 'fundis', 'users')
+async def search_fundis(request, session):
+    """Ranked full-text fundi search"""
+    args = request.args
+    query_text = args.get('q', '')
+    fields = {'specialization': args.get('specialization'), 'location': args.get('location')}
+    limit = max(1, min(args.get('limit', 20, type=int), 100))
+    offset = max(0, args.get('offset', 0, type=int))
+    available_only = args.get('available', 'false').lower() == 'true'
+
+    def query(sync_session):
+        page = search_fundi_ids(sync_session, query_text, fields, limit=limit, offset=offset,
+                                available_only=available_only)
+        rows = fundi_rows_by_id([fundi_id for fundi_id, _ in page.items], sync_session)
+        return {
+            'items': [dict(serialize_fundi_row(rows[fundi_id]), score=round(score, 4))
+                      for fundi_id, score in page.items if fundi_id in rows],
+            'next_offset': offset + limit if page.has_more else None,
+            'backend': page.backend
+        }
+
+    return json_response(await session.run_sync(query))
+
+
+# Bookings
+# ========
+@api_route('/api/bookings', 'jobs', 'categories')
+async def get_bookings(request, session):
+    """All bookings, optionally filtered by client_id, fundi_id and status"""
+    args = request.args
+    statement = select(*BOOKING_LIST_COLUMNS).select_from(Job).outerjoin(Category, Job.category_id == Category.id)
+    if args.get('client_id', type=int):
+        statement = statement.where(Job.client_id == args.get('client_id', type=int))
+    if args.get('fundi_id', type=int):
+        statement = statement.where(Job.fundi_id == args.get('fundi_id', type=int))
+    if args.get('status'):
+        statement = statement.where(Job.status == args.get('status'))
+    result = await session.stream(statement)
+    return json_response([serialize_booking_row(job) async for job in result])
+
+
+# Notifications
+# =============
+async def unread_count(session, user_id):
+    """The user's unread counter, or a COUNT when the Flask app has not created it yet"""
+    counter = await session.get(NotificationCounter, user_id)
+    if counter is not None:
+        return max(counter.unread, 0)
+    return await session.scalar(select(func.count(Notification.id)).where(
+        Notification.user_id == user_id, Notification.is_read == False))
+
+
+@api_route('/api/notifications/<int:user_id>/inbox')
+async def get_notification_inbox(request, session, user_id):
+    """Paginated notification inbox (limit, before, unread_only)"""
+    args = request.args
+    limit = max(1, min(args.get('limit', 20, type=int), 100))
+    before = args.get('before', type=int)
+    statement = select(*NOTIFICATION_COLUMNS).where(Notification.user_id == user_id)
+    if args.get('unread_only', 'false').lower() == 'true':
+        statement = statement.where(Notification.is_read == False)
+    if before:
+        statement = statement.where(Notification.id < before)
+    # Fetch one extra row to know whether another page exists
+    rows = (await session.execute(statement.order_by(Notification.id.desc()).limit(limit + 1))).all()
+    items = rows[:limit]
+    return json_response({
+        'items': [serialize_notification(n) for n in items],
+        'next_cursor': items[-1].id if len(rows) > limit else None,
+        'unread_count': await unread_count(session, user_id)
+    })
+
+
+@api_route('/api/notifications/<int:user_id>/unread-count')
+async def get_notification_unread_count(request, session, user_id):
+    """Unread notification count from the per-user counter"""
+    return json_response({'user_id': user_id, 'unread': await unread_count(session, user_id)})
+
+
+@api_route('/api/notifications/<int:user_id>/stream')
+async def stream_notifications(request, session, user_id):
+    """
+    Server-Sent Events stream of new notifications for a user
+
+    Same protocol as the Flask view (Last-Event-ID resume, resync, ready,
+    heartbeats). The database session is released before streaming starts;
+    an idle stream then costs one pub/sub subscription and a parked coroutine.
+    """
+    raw_cursor = request.headers.get('last-event-id') or request.args.get('last_event_id')
+    cursor = int(raw_cursor) if raw_cursor and raw_cursor.isdigit() else None
+
+    # Subscribe before reading the backlog so nothing committed in between is lost
+    subscription = notification_hub.subscribe(user_id)
+    try:
+        backlog, cursor, resync = await session.run_sync(
+            lambda sync_session: notification_backlog(user_id, cursor, sync_session))
+    except Exception:
+        subscription.close()
+        raise
+
+    metrics.inc('sse_connections_total', resumed=str(raw_cursor is not None).lower())
+    return StreamingResponse(notification_events(subscription, backlog, cursor, resync),
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+                             content_type='text/event-stream')
+
+
+async def notification_events(subscription, backlog, cursor, resync):
+    """Async twin of notification_event_stream(): awaits the subscription instead of blocking"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + SSE_MAX_DURATION_SECONDS
+    try:
+        for frame in sse_opening_frames(backlog, cursor, resync):
+            yield frame
+        while loop.time() < deadline and not subscription.overflowed:
+            messages = await subscription.get_async(
+                timeout=min(SSE_HEARTBEAT_SECONDS, max(deadline - loop.time(), 0)))
+            frames, cursor = sse_live_frames(messages, cursor)
+            for frame in frames:
+                yield frame
+    finally:
+        subscription.close()
+
+
+async def dispose_engine():
+    await engine.dispose()
+
+
+app = ASGIApp(
+    router,
+    WsgiToAsgi(flask_app),
+    headers=SECURITY_HEADERS,
+    allowed_origins=allowed_origins,
+    compression={
+        'min_size': int(os.environ.get('COMPRESSION_MIN_SIZE', 1024)),
+        'level': int(os.environ.get('COMPRESSION_LEVEL', 6)),
+        'brotli_quality': int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4)),
+    } if os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true' else None,
+    on_shutdown=[dispose_engine],
+)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Vectorized Analytics vs ORM Loops
+============================================
+
+Seeds N jobs and payments and times each report two ways:
+
+- orm    - load Payment/Job entities and aggregate in Python loops (what a
+           straightforward ORM implementation would do)
+- numpy  - lib/analytics.py: stream only the needed columns in chunks and
+           aggregate with NumPy (what /api/analytics/* uses)
+
+Both results are compared, and peak Python memory for each earnings run is
+reported to show the effect of streaming.
+
+Usage:
+    python benchmarks/bench_analytics.py --jobs 200000 --payments 500000
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import argparse
+import math
+import os
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+
+from common import ROOT_DIR, load_backend, seed, measure
+
+sys.path.insert(0, os.path.join(ROOT_DIR, "lib"))
+import analytics  # noqa: E402
+
+
+def percentile(sorted_values, p):
+    """Linear-interpolation percentile, same definition as numpy's default"""
+    rank = (len(sorted_values) - 1) * p / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def orm_reports(backend):
+    Payment, Job = backend.Payment, backend.Job
+
+    def earnings():
+        totals, counts = {}, {}
+        for payment in Payment.query.filter(Payment.status == "completed").all():
+            totals[payment.fundi_id] = totals.get(payment.fundi_id, 0.0) + payment.amount
+            counts[payment.fundi_id] = counts.get(payment.fundi_id, 0) + 1
+        return sorted(((round(total, 2), fundi_id, counts[fundi_id]) for fundi_id, total in totals.items()),
+                      key=lambda row: (-row[0], row[1]))
+
+    def categories():
+        totals = {}
+        for payment in Payment.query.filter(Payment.status == "completed").all():
+            category_id = payment.job.category_id
+            totals[category_id] = totals.get(category_id, 0.0) + payment.amount
+        return sorted(((round(total, 2), category_id) for category_id, total in totals.items()), reverse=True)
+
+    def completion():
+        hours = sorted((job.completed_at - job.created_at).total_seconds() / 3600
+                       for job in Job.query.filter(Job.status == "completed", Job.completed_at.isnot(None)).all())
+        return [round(percentile(hours, p), 2) for p in analytics.DEFAULT_PERCENTILES]
+
+    def daily(start, end):
+        days = {}
+        for job in Job.query.filter(Job.created_at >= start, Job.created_at < end).all():
+            key = job.created_at.date().isoformat()
+            days[key] = days.get(key, 0) + 1
+        revenue = {}
+        for payment in Payment.query.filter(Payment.status == "completed",
+                                            Payment.created_at >= start, Payment.created_at < end).all():
+            key = payment.created_at.date().isoformat()
+            revenue[key] = revenue.get(key, 0.0) + payment.amount
+        return days, revenue
+
+    return earnings, categories, completion, daily
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analytics benchmark")
+    parser.add_argument("--jobs", type=int, default=200000)
+    parser.add_argument("--payments", type=int, default=500000)
+    parser.add_argument("--fundis", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    backend = load_backend()
+    seed(backend, users=1000, fundis=args.fundis, jobs=args.jobs, payments=args.payments, text_size=40)
+    print(f"Seeded {args.jobs:,} jobs and {args.payments:,} payments\n")
+
+    with backend.app.app_context():
+        session = backend.db.session
+        orm_earnings, orm_categories, orm_completion, orm_daily = orm_reports(backend)
+        end = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        start = end - timedelta(days=30)
+
+        cases = [
+            ("earnings", orm_earnings, lambda: analytics.earnings_by_fundi(session)),
+            ("categories", orm_categories, lambda: analytics.revenue_by_category(session)),
+            ("completion times", orm_completion, lambda: analytics.completion_time_percentiles(session)),
+            ("daily (30 days)", lambda: orm_daily(start, end), lambda: analytics.daily_series(session, start, end)),
+        ]
+        print(f"{'Report':<18} {'orm ms':>10} {'numpy ms':>10} {'Speed-up':>9}")
+        print("-" * 50)
+        results = {}
+        for name, orm_fn, numpy_fn in cases:
+            t_orm, orm_result = measure(orm_fn, args.repeat, setup=session.expunge_all)
+            t_numpy, numpy_result = measure(numpy_fn, args.repeat, setup=session.expunge_all)
+            results[name] = (orm_result, numpy_result)
+            print(f"{name:<18} {t_orm * 1000:>10.1f} {t_numpy * 1000:>10.1f} {t_orm / t_numpy:>8.1f}x")
+
+        # Same answers both ways
+        orm_result, numpy_result = results["earnings"]
+        earnings_ok = [(r[0], r[1], r[2]) for r in orm_result] == \
+            [(e["total"], e["fundi_id"], e["payments"]) for e in numpy_result]
+        orm_result, numpy_result = results["categories"]
+        categories_ok = orm_result == [(r["revenue"], r["category_id"]) for r in numpy_result]
+        orm_result, numpy_result = results["completion times"]
+        completion_ok = orm_result == [numpy_result["overall"][f"p{p}"] for p in analytics.DEFAULT_PERCENTILES]
+        orm_result, numpy_result = results["daily (30 days)"]
+        daily_ok = all(orm_result[0].get(d["date"], 0) == d["jobs_created"]
+                       and abs(orm_result[1].get(d["date"], 0.0) - d["revenue"]) < 0.01 for d in numpy_result)
+        print(f"\nResults match: earnings {earnings_ok}, categories {categories_ok}, "
+              f"completion {completion_ok}, daily {daily_ok}")
+
+        for name, fn in (("orm", orm_earnings), ("numpy", lambda: analytics.earnings_by_fundi(session))):
+            session.expunge_all()
+            tracemalloc.start()
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"Peak Python memory, earnings ({name}): {peak / 1e6:,.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
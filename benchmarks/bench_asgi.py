@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Benchmark: WSGI vs ASGI Under Long-Lived Connections
+====================================================
+
+Starts each deployment on the same synthetic dataset (datagen.py) and:
+
+1. Opens --streams idle notification streams (SSE) and holds them
+2. While they are open, runs --clients concurrent readers against
+   GET /api/fundis/search for --requests requests each
+3. Reports how many streams the server accepted, read latency and
+   timeouts while the streams were held, and server RSS per open stream
+
+Deployments (override with --wsgi-cmd / --asgi-cmd; {port} is replaced):
+- wsgi  gunicorn wsgi:app with --workers sync workers (the Procfile setup)
+- asgi  uvicorn asgi:app with one worker
+
+With sync workers every open stream pins a worker, so readers queue behind
+them; on the event loop a stream is a parked coroutine.
+
+Usage:
+    python benchmarks/bench_asgi.py --streams 500 --clients 16
+    python benchmarks/bench_asgi.py --db /tmp/bench.db --only asgi --streams 5000
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import argparse
+import http.client
+import os
+import random
+import selectors
+import shutil
+import socket
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import SKILLS
+from loadtest import GunicornTarget, dataset, percentile, proc_memory_kb, process_tree
+
+
+def server_rss_kb(target):
+    return sum(proc_memory_kb(pid, "VmRSS") for pid in process_tree(target.process.pid))
+
+
+def open_streams(port, count, user_ids, wait):
+    """Open idle SSE connections; returns (selector, accepted count)"""
+    selector = selectors.DefaultSelector()
+    for i in range(count):
+        try:
+            sock = socket.create_connection(("127.0.0.1", port), timeout=10)
+        except OSError:
+            continue
+        sock.sendall(f"GET /api/notifications/{user_ids[i % len(user_ids)]}/stream HTTP/1.1\r\n"
+                     f"Host: bench\r\nAccept: text/event-stream\r\n\r\n".encode())
+        sock.setblocking(False)
+        selector.register(sock, selectors.EVENT_READ, {"accepted": False})
+
+    accepted, deadline = 0, time.monotonic() + wait
+    while time.monotonic() < deadline and accepted < len(selector.get_map()):
+        for key, _ in selector.select(timeout=0.2):
+            try:
+                data = key.fileobj.recv(65536)
+            except OSError:
+                data = b""
+            if not data:
+                selector.unregister(key.fileobj)
+                key.fileobj.close()
+            elif not key.data["accepted"] and data.startswith(b"HTTP/1.1 200"):
+                key.data["accepted"] = True
+                accepted += 1
+    return selector, accepted
+
+
+def close_streams(selector):
+    for key in list(selector.get_map().values()):
+        selector.unregister(key.fileobj)
+        key.fileobj.close()
+
+
+def read_while_held(port, clients, requests, timeout, seed):
+    """Concurrent search requests; returns (latencies in ms, timeouts/errors, req/s)"""
+    def reader(n):
+        rng = random.Random(f"{seed}:{n}")
+        latencies, failed = [], 0
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+        for _ in range(requests):
+            started = time.perf_counter()
+            try:
+                connection.request("GET", f"/api/fundis/search?q={rng.choice(SKILLS)}&limit=20")
+                response = connection.getresponse()
+                response.read()
+                if response.status == 200:
+                    latencies.append((time.perf_counter() - started) * 1000)
+                else:
+                    failed += 1
+            except (http.client.HTTPException, OSError):
+                failed += 1
+                connection.close()
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+        connection.close()
+        return latencies, failed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        results = list(pool.map(reader, range(clients)))
+    wall = time.perf_counter() - started
+    latencies = sorted(ms for found, _ in results for ms in found)
+    return latencies, sum(failed for _, failed in results), len(latencies) / wall
+
+
+def run(name, command, source, manifest, args):
+    workdir = tempfile.mkdtemp(prefix=f"fundimatch-{name}-")
+    db_path = os.path.join(workdir, "bench.db")
+    shutil.copyfile(source, db_path)
+    target = GunicornTarget(db_path, server_cmd=command)
+    try:
+        baseline = server_rss_kb(target)
+        selector, accepted = open_streams(target.port, args.streams, manifest["client_ids"], args.accept_wait)
+        held = server_rss_kb(target)
+        latencies, failed, throughput = read_while_held(target.port, args.clients, args.requests,
+                                                        args.timeout, args.seed)
+        close_streams(selector)
+    finally:
+        target.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "accepted": accepted,
+        "rss_mb": baseline / 1024,
+        "kb_per_stream": (held - baseline) / accepted if accepted else None,
+        "p50": percentile(latencies, 50), "p99": percentile(latencies, 99),
+        "failed": failed, "req_per_s": throughput,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WSGI vs ASGI under long-lived connections")
+    parser.add_argument("--db", help="Dataset made by datagen.py")
+    parser.add_argument("--scale", default="small")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--streams", type=int, default=200, help="Idle SSE connections to hold")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent readers while streams are held")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per reader")
+    parser.add_argument("--timeout", type=float, default=5.0, help="Per-request timeout (s)")
+    parser.add_argument("--accept-wait", type=float, default=10.0, help="Seconds to wait for streams to open")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn sync workers")
+    parser.add_argument("--wsgi-cmd")
+    parser.add_argument("--asgi-cmd")
+    parser.add_argument("--only", choices=["wsgi", "asgi"])
+    args = parser.parse_args()
+
+    source, manifest = dataset(args)
+    commands = {
+        "wsgi": args.wsgi_cmd or f"{sys.executable} -m gunicorn wsgi:app --bind 127.0.0.1:{{port}} "
+                                 f"--workers {args.workers} --worker-class sync",
+        "asgi": args.asgi_cmd or f"{sys.executable} -m uvicorn asgi:app --port {{port}} --log-level warning",
+    }
+    os.environ["SSE_MAX_DURATION_SECONDS"] = "3600"
+
+    print(f"{args.streams} idle streams, {args.clients} readers x {args.requests} requests\n")
+    print(f"{'Server':<6} {'streams ok':>10} {'base MB':>8} {'KB/stream':>10} {'p50 ms':>9} {'p99 ms':>9} "
+          f"{'failed':>7} {'req/s':>8}")
+    print("-" * 74)
+    for name in ([args.only] if args.only else ["wsgi", "asgi"]):
+        result = run(name, commands[name], source, manifest, args)
+        per_stream = "-" if result["kb_per_stream"] is None else f"{result['kb_per_stream']:.1f}"
+        p50 = "-" if result["p50"] is None else f"{result['p50']:.1f}"
+        p99 = "-" if result["p99"] is None else f"{result['p99']:.1f}"
+        print(f"{name:<6} {result['accepted']:>10} {result['rss_mb']:>8.1f} {per_stream:>10} {p50:>9} {p99:>9} "
+              f"{result['failed']:>7} {result['req_per_s']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
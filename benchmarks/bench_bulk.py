@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Bulk Booking Updates vs the Per-Item Endpoints
+=========================================================
+
+Applies --updates assignments (to jobs reset to pending first) and then
+--updates status changes to the jobs of a synthetic dataset (datagen.py)
+two ways:
+
+- per-item  - one PUT /api/bookings/<id>/assign (or /status) per job, the
+              way admin tooling does it today
+- bulk      - PUT /api/bookings/bulk/assign (or /bulk/status) with
+              --batch items per request
+
+It reports wall time, updates per second and database statements (read
+from the Server-Timing header, PROFILING_ENABLED=true). The outbox
+dispatcher is off, so both paths only pay for writing their events.
+
+Usage:
+    python benchmarks/bench_bulk.py                       # 10k updates, small dataset
+    python benchmarks/bench_bulk.py --updates 2000 --batch 500
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+os.environ["OUTBOX_DISPATCHER"] = "off"
+os.environ["PROFILING_ENABLED"] = "true"
+
+from common import STATUSES, load_backend  # noqa: E402
+from loadtest import SERVER_TIMING_QUERIES, dataset  # noqa: E402
+
+
+def queries(response):
+    match = SERVER_TIMING_QUERIES.search(response.headers.get("Server-Timing", ""))
+    return int(match.group(1)) if match else 0
+
+
+def per_item(client, kind, items):
+    statements = 0
+    for item in items:
+        body = {"fundi_id": item["fundi_id"]} if kind == "assign" else {"status": item["status"]}
+        response = client.put(f"/api/bookings/{item['job_id']}/{kind}", json=body)
+        assert response.status_code == 200, response.get_data(as_text=True)
+        statements += queries(response)
+    return len(items), statements
+
+
+def bulk(client, kind, items, batch):
+    field = "assignments" if kind == "assign" else "changes"
+    statements = requests = 0
+    for start in range(0, len(items), batch):
+        response = client.put(f"/api/bookings/bulk/{kind}", json={field: items[start:start + batch]})
+        assert response.status_code == 200 and not response.get_json()["failed"], response.get_data(as_text=True)
+        statements += queries(response)
+        requests += 1
+    return requests, statements
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk vs per-item booking updates")
+    parser.add_argument("--db", help="Dataset made by datagen.py")
+    parser.add_argument("--scale", default="small")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--updates", type=int, default=10000)
+    parser.add_argument("--batch", type=int, default=10000, help="Items per bulk request")
+    args = parser.parse_args()
+
+    source, manifest = dataset(args)
+    workdir = tempfile.mkdtemp(prefix="fundimatch-bulk-")
+    db_path = os.path.join(workdir, "bench.db")
+    shutil.copyfile(source, db_path)
+    backend = load_backend(db_path)
+    client = backend.app.test_client()
+
+    with backend.app.app_context():
+        job_ids = backend.db.session.execute(
+            backend.db.select(backend.Job.id).order_by(backend.Job.id).limit(args.updates)).scalars().all()
+        fundi_ids = backend.db.session.execute(backend.db.select(backend.Fundi.id)).scalars().all()
+    rng = random.Random(args.seed)
+    print(f"{len(job_ids):,} jobs, {len(fundi_ids)} fundis, bulk batches of {args.batch:,}\n")
+    print(f"{'Update':<8} {'Path':<9} {'requests':>9} {'seconds':>9} {'updates/s':>10} {'statements':>11}")
+    print("-" * 61)
+
+    try:
+        for kind in ("assign", "status"):
+            for path in ("per-item", "bulk"):
+                if kind == "assign":
+                    # Only pending jobs can be assigned; reset them outside the timed part
+                    with backend.app.app_context():
+                        backend.db.session.execute(backend.db.update(backend.Job)
+                                                   .where(backend.Job.id.in_(job_ids)).values(status="pending"))
+                        backend.db.session.commit()
+                    items = [{"job_id": job_id, "fundi_id": rng.choice(fundi_ids)} for job_id in job_ids]
+                else:
+                    items = [{"job_id": job_id, "status": rng.choice(STATUSES)} for job_id in job_ids]
+                started = time.perf_counter()
+                requests, statements = (per_item(client, kind, items) if path == "per-item"
+                                        else bulk(client, kind, items, args.batch))
+                seconds = time.perf_counter() - started
+                print(f"{kind:<8} {path:<9} {requests:>9,} {seconds:>9.2f} {len(items) / seconds:>10,.0f} "
+                      f"{statements:>11,}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Streaming CLI Lists
+==============================
+
+Compares the old interactive job and payment lists (query(...).all(),
+then lazy relationship loads per printed row) with the streamed joined
+projections the helpers use today (lib/db/listings.py + lib/render.py).
+
+For each it reports, with output going to an in-memory sink:
+- first row  - seconds until the first data row is printed
+- total      - seconds for the whole list
+- peak MB    - peak Python memory while listing (tracemalloc, in a
+               separate run so it doesn't slow the timed one)
+
+Usage:
+    python benchmarks/bench_cli_lists.py --jobs 100000
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import argparse
+import shutil
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+from bench_cli_startup import WORKDIR, seed  # noqa: F401  (points the CLI models at WORKDIR)
+
+FIRST_ROW = "Bench job 0 "
+
+
+class Sink:
+    """A stdout replacement that notes when the first data row arrives"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_row = None
+
+    def write(self, text):
+        if self.first_row is None and FIRST_ROW in text:
+            self.first_row = time.perf_counter() - self.started
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+def old_list_jobs(session):
+    from db.models import Job
+
+    jobs = session.query(Job).all()
+    print("-" * 90)
+    for job in jobs:
+        print(f"{job.id:<5} {job.title:<25} {job.client.username:<15} {job.category.name:<12} "
+              f"{job.status:<12} {job.location:<15}")
+
+
+def old_list_payments(session):
+    from db.models import Payment
+
+    payments = session.query(Payment).all()
+    print("-" * 80)
+    for payment in payments:
+        print(f"{payment.id:<5} {payment.job.title:<25} {payment.client.username:<15} "
+              f"{payment.fundi.user.username:<15} KES{payment.amount:<11} {payment.status:<10}")
+
+
+def seed_payments(count):
+    from sqlalchemy import select
+    from db.models import Job, Payment, session_scope
+
+    with session_scope() as session:
+        jobs = session.execute(select(Job.id, Job.client_id).order_by(Job.id).limit(count)).all()
+        Payment.create_many(session, [dict(job_id=job_id, client_id=client_id, fundi_id=1 + i % 200,
+                                           amount=1500, payment_method="M-Pesa", status="completed")
+                                      for i, (job_id, client_id) in enumerate(jobs)])
+
+
+def run(fn):
+    from db.models import session_scope
+
+    sink = Sink()
+    with session_scope(read_only=True) as session, redirect_stdout(sink):
+        fn(session)
+    return sink.first_row, time.perf_counter() - sink.started
+
+
+def measure(fn):
+    """Times from one run, peak memory from a second one (tracemalloc slows Python down)"""
+    first_row, total = run(fn)
+    tracemalloc.start()
+    run(fn)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first_row, total, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming CLI list benchmark")
+    parser.add_argument("--jobs", type=int, default=100000)
+    args = parser.parse_args()
+
+    try:
+        seed(args.jobs)
+        seed_payments(args.jobs // 2)
+        from helpers import list_jobs, list_payments
+
+        print(f"🧪 {args.jobs:,} jobs and {args.jobs // 2:,} payments, SQLite file in {WORKDIR}\n")
+        print(f"{'list':<10} {'version':<10} {'first row':>10} {'total':>8} {'peak MB':>9}")
+        for name, old, new in [("jobs", old_list_jobs, list_jobs),
+                               ("payments", old_list_payments, list_payments)]:
+            for version, fn in [("old .all()", old), ("streamed", new)]:
+                first_row, total, peak = measure(fn)
+                print(f"{name:<10} {version:<10} {first_row:>10.3f} {total:>8.3f} {peak:>9.1f}")
+    finally:
+        shutil.rmtree(WORKDIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
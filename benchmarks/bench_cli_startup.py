@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark: CLI Startup and Listing Time
+=======================================
+
+Runs each command as a fresh process (so interpreter start-up and imports
+count, as they do for a user or a cron job) against a throwaway SQLite
+file seeded with --jobs jobs, and reports the median wall time:
+
+- fundimatch --help            - argument parsing only, no database imports
+- fundimatch jobs list -l 1    - imports the models, one joined SELECT
+- fundimatch jobs list (csv)   - every job, streamed with yield_per
+- main.py < /dev/null          - the interactive CLI up to its first menu
+- helpers.list_jobs            - every job through the interactive CLI's
+                                 list (which imports every helper module)
+
+Usage:
+    python benchmarks/bench_cli_startup.py --jobs 20000 --repeat 5
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import common
+
+WORKDIR = tempfile.mkdtemp(prefix="fundimatch-startup-bench-")
+os.environ["FUNDIMATCH_DATABASE_URL"] = f"sqlite:///{os.path.join(WORKDIR, 'fundimatch.db')}"
+
+LIB_DIR = os.path.join(common.ROOT_DIR, "lib")
+FUNDIMATCH = os.path.join(LIB_DIR, "fundimatch.py")
+INTERACTIVE_LIST = ("import sys; sys.path.insert(0, %r)\n"
+               "from db.models import session_scope\n"
+               "from helpers import list_jobs\n"
+               "with session_scope(read_only=True) as session:\n"
+               "    list_jobs(session)\n") % LIB_DIR
+
+
+def seed(jobs, users=200):
+    """Users, fundis and jobs through the CLI models (create_many per table)"""
+    from db.models import Category, Fundi, Job, User, session_scope
+
+    with session_scope() as session:
+        categories = Category.create_many(session, [dict(name=name) for name in common.SPECIALIZATIONS])
+        clients = User.create_many(session, [dict(username=f"client{i}", email=f"client{i}@bench.test",
+                                                  password="x", phone="254700000000", role="client")
+                                             for i in range(users)])
+        fundi_users = User.create_many(session, [dict(username=f"fundi{i}", email=f"fundi{i}@bench.test",
+                                                      password="x", phone="254700000000", role="fundi")
+                                                 for i in range(users)])
+        Fundi.create_many(session, [dict(user_id=user.id, specialization=common.SPECIALIZATIONS[i % 7],
+                                         experience="5 years", hourly_rate=1000, location="Nairobi")
+                                    for i, user in enumerate(fundi_users)])
+        Job.create_many(session, [dict(title=f"Bench job {i}", description="Synthetic startup benchmark job",
+                                       location=common.LOCATIONS[i % len(common.LOCATIONS)],
+                                       client_id=clients[i % users].id,
+                                       category_id=categories[i % len(categories)].id)
+                                  for i in range(jobs)])
+
+
+def median_seconds(command, repeat, stdin=None):
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run(command, cwd=WORKDIR, stdin=stdin, stdout=subprocess.DEVNULL, check=True)
+        runs.append(time.perf_counter() - started)
+    return statistics.median(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI startup benchmark")
+    parser.add_argument("--jobs", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    try:
+        seed(args.jobs)
+        python = sys.executable
+        cases = [
+            ("fundimatch --help", [python, FUNDIMATCH, "--help"], None),
+            ("fundimatch jobs list -l 1", [python, FUNDIMATCH, "jobs", "list", "--limit", "1"], None),
+            (f"fundimatch jobs list ({args.jobs:,})", [python, FUNDIMATCH, "jobs", "list", "--format", "csv"], None),
+            ("main.py to first menu", [python, os.path.join(LIB_DIR, "main.py")], subprocess.DEVNULL),
+            (f"helpers.list_jobs ({args.jobs:,})", [python, "-c", INTERACTIVE_LIST], None),
+        ]
+        print(f"🧪 {args.jobs:,} jobs, median of {args.repeat} runs, SQLite file in {WORKDIR}\n")
+        print(f"{'command':<34} {'seconds':>9}")
+        for name, command, stdin in cases:
+            print(f"{name:<34} {median_seconds(command, args.repeat, stdin):>9.3f}")
+    finally:
+        shutil.rmtree(WORKDIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark: CLI Model Writes - Commit per Call vs Caller-Owned Transactions
+==========================================================================
+
+Runs the CLI models (lib/db/models.py) against a fresh SQLite file and
+times the same inserts three ways:
+
+- commit-each  - Model.create() followed by a commit for every row, which
+                 is what every create() used to do internally
+- one-commit   - Model.create() per row (each flushes) and one commit at
+                 the end, as a session_scope() does
+- create_many  - Model.create_many() for the whole batch and one commit
+
+It also times the review flow (insert a review, then update the fundi's
+rating) with two commits per review against one.
+
+Usage:
+    python benchmarks/bench_cli_writes.py --rows 2000 --reviews 500
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import common  # noqa: F401  (puts lib/ on sys.path)
+
+WORKDIR = tempfile.mkdtemp(prefix="fundimatch-cli-bench-")
+os.chdir(WORKDIR)  # lib/db/models.py opens fundimatch.db in the working directory
+
+from sqlalchemy import func  # noqa: E402
+from db.models import Category, Fundi, Job, Review, User, session_scope  # noqa: E402
+
+
+def user_rows(mode, n):
+    return [dict(username=f"{mode}-user-{i}", email=f"{mode}-{i}@bench.test", password="x",
+                 phone="254700000000", role="client") for i in range(n)]
+
+
+def job_rows(n, client_id, category_id):
+    return [dict(title=f"Bench job {i}", description="Synthetic CLI benchmark job", location="Nairobi",
+                 client_id=client_id, category_id=category_id) for i in range(n)]
+
+
+def timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def commit_each(model, rows):
+    with session_scope() as session:
+        for row in rows:
+            model.create(session, **row)
+            session.commit()
+
+
+def one_commit(model, rows):
+    with session_scope() as session:
+        for row in rows:
+            model.create(session, **row)
+
+
+def create_many(model, rows):
+    with session_scope() as session:
+        model.create_many(session, rows)
+
+
+def review(session, job_id, client_id, fundi_id, commit_twice):
+    Review.create(session, job_id=job_id, client_id=client_id, fundi_id=fundi_id, rating=4)
+    if commit_twice:
+        session.commit()
+    fundi = session.get(Fundi, fundi_id)
+    fundi.update_rating(session, float(session.query(func.avg(Review.rating))
+                                       .filter(Review.fundi_id == fundi_id).scalar()))
+    session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI model write benchmark")
+    parser.add_argument("--rows", type=int, default=2000, help="Users and jobs inserted per mode")
+    parser.add_argument("--reviews", type=int, default=500)
+    args = parser.parse_args()
+
+    try:
+        with session_scope(expire_on_commit=False) as session:
+            category = Category.create(session, name="Plumbing")
+            client = User.create(session, **user_rows("setup", 1)[0])
+            fundi_user = User.create(session, **dict(user_rows("setup-fundi", 1)[0], role="fundi"))
+            fundi = Fundi.create(session, user_id=fundi_user.id, specialization="Plumbing", experience="5 years",
+                                 hourly_rate=1000, location="Nairobi")
+
+        print(f"🧪 {args.rows:,} rows per mode, SQLite file in {WORKDIR}\n")
+        print(f"{'model':<8} {'mode':<12} {'seconds':>9} {'rows/s':>10} {'speed-up':>9}")
+        for name, model, rows_for in [
+            ("users", User, lambda mode: user_rows(mode, args.rows)),
+            ("jobs", Job, lambda mode: job_rows(args.rows, client.id, category.id)),
+        ]:
+            baseline = None
+            for mode, write in [("commit-each", commit_each), ("one-commit", one_commit),
+                                ("create_many", create_many)]:
+                rows = rows_for(mode)
+                seconds = timed(lambda: write(model, rows))
+                baseline = baseline or seconds
+                print(f"{name:<8} {mode:<12} {seconds:>9.3f} {args.rows / seconds:>10,.0f} "
+                      f"{baseline / seconds:>8.1f}x")
+
+        with session_scope() as session:
+            job_ids = [job.id for job in Job.create_many(session, job_rows(args.reviews * 2, client.id, category.id))]
+        print()
+        baseline = None
+        for mode, commit_twice, ids in [("2 commits", True, job_ids[:args.reviews]),
+                                        ("1 commit", False, job_ids[args.reviews:])]:
+            def run():
+                with session_scope() as session:
+                    for job_id in ids:
+                        review(session, job_id, client.id, fundi.id, commit_twice)
+            seconds = timed(run)
+            baseline = baseline or seconds
+            print(f"{'reviews':<8} {mode:<12} {seconds:>9.3f} {args.reviews / seconds:>10,.0f} "
+                  f"{baseline / seconds:>8.1f}x")
+    finally:
+        shutil.rmtree(WORKDIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Response Compression Cost vs Bytes Saved
+===================================================
+
+Fetches typical /api/fundis and /api/bookings payloads from the backend and
+compresses them with gzip (levels 1/6/9) and, when installed, brotli
+(qualities 1/4/11). Reports compressed size, ratio and CPU time per response.
+
+Usage:
+    python benchmarks/bench_compression.py --fundis 2000 --jobs 5000
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import argparse
+import os
+import sys
+
+from common import ROOT_DIR, load_backend, seed, measure
+
+sys.path.insert(0, os.path.join(ROOT_DIR, "lib"))
+import compression  # noqa: E402
+
+SETTINGS = [("gzip", 1), ("gzip", 6), ("gzip", 9), ("br", 1), ("br", 4), ("br", 11)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compression benchmark")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--fundis", type=int, default=1000)
+    parser.add_argument("--jobs", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    backend = load_backend()
+    seed(backend, users=args.users, fundis=args.fundis, jobs=args.jobs)
+    client = backend.app.test_client()
+
+    payloads = {
+        "/api/fundis": client.get("/api/fundis").data,
+        "/api/bookings": client.get("/api/bookings").data,
+        "/api/bookings?status=pending": client.get("/api/bookings?status=pending").data,
+    }
+
+    print(f"{'Payload':<30} {'Encoding':<9} {'Raw KB':>9} {'Out KB':>9} {'Ratio':>7} {'CPU ms':>8} {'MB/s':>8}")
+    print("-" * 86)
+    for path, body in payloads.items():
+        for encoding, level in SETTINGS:
+            if encoding == "br" and compression.brotli is None:
+                continue
+            t, out = measure(lambda: compression.compress_body(body, encoding, level=level, brotli_quality=level),
+                             args.repeat)
+            label = f"{encoding}-{level}"
+            print(f"{path:<30} {label:<9} {len(body) / 1024:>9.1f} {len(out) / 1024:>9.1f} "
+                  f"{len(body) / len(out):>6.1f}x {t * 1000:>8.2f} {len(body) / t / 1e6:>8.1f}")
+        print()
+
+    if compression.brotli is None:
+        print("(brotli not installed - pip install Brotli to include it)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Geohash Radius and Nearest-Neighbour Queries
+=======================================================
+
+Loads N located fundis (1,000,000 by default) into a throwaway SQLite
+table shaped like the fundis location columns (id, latitude, longitude,
+indexed geohash, is_available) and compares:
+
+kNN (k nearest available fundis)
+- scan     - read every row and sort by haversine distance in Python
+- geohash  - db.spatial.nearest (what /api/fundis/nearby uses)
+
+Radius (every available fundi within --radius km)
+- bbox     - latitude/longitude bounding box on a (latitude, longitude)
+             index, then an exact distance filter
+- geohash  - db.spatial.within_radius (what GET /api/fundis?lat&lng&radius_km uses)
+
+Points are spread around the towns in geo.TOWN_COORDINATES, so query
+density ranges from city centres to empty countryside. Results are checked
+against the scan for the first few queries.
+
+Usage:
+    python benchmarks/bench_geo.py --fundis 1000000 --queries 200
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+from common import ROOT_DIR
+
+sys.path.insert(0, os.path.join(ROOT_DIR, "lib"))
+from sqlalchemy import (Boolean, Column, Float, Index, Integer, MetaData, String, Table,  # noqa: E402
+                        and_, create_engine, select)
+
+import geo  # noqa: E402
+from db.spatial import nearest, within_radius  # noqa: E402
+
+TOWNS = list(geo.TOWN_COORDINATES.values())
+
+
+def build_table(path, count, rng):
+    engine = create_engine(f"sqlite:///{path}")
+    metadata = MetaData()
+    fundis = Table(
+        "fundis", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("latitude", Float),
+        Column("longitude", Float),
+        Column("geohash", String(12), index=True),
+        Column("is_available", Boolean, nullable=False),
+        Index("ix_fundis_lat_lng", "latitude", "longitude"),
+    )
+    metadata.create_all(engine)
+
+    start = time.perf_counter()
+    with engine.begin() as connection:
+        batch = []
+        for i in range(1, count + 1):
+            lat0, lng0 = rng.choice(TOWNS)
+            spread = rng.choice((0.05, 0.2, 1.0))  # dense centres, suburbs, rural
+            latitude, longitude = lat0 + rng.gauss(0, spread), lng0 + rng.gauss(0, spread)
+            batch.append({"id": i, "latitude": latitude, "longitude": longitude,
+                          "geohash": geo.encode(latitude, longitude), "is_available": rng.random() < 0.7})
+            if len(batch) == 50000:
+                connection.execute(fundis.insert(), batch)
+                batch = []
+        if batch:
+            connection.execute(fundis.insert(), batch)
+    return engine, fundis, time.perf_counter() - start
+
+
+def query_points(count, rng):
+    points = []
+    for i in range(count):
+        lat0, lng0 = rng.choice(TOWNS)
+        spread = (0.02, 0.3, 1.5)[i % 3]
+        points.append((lat0 + rng.uniform(-spread, spread), lng0 + rng.uniform(-spread, spread)))
+    return points
+
+
+def percentiles(times):
+    times = sorted(times)
+    return times[len(times) // 2] * 1000, times[min(len(times) - 1, int(len(times) * 0.99))] * 1000
+
+
+def report(name, times):
+    p50, p99 = percentiles(times)
+    print(f"{name:<22} {p50:>10.2f} {p99:>10.2f} {len(times) / sum(times):>11.0f}")
+
+
+def timed(fn, points):
+    times, results = [], []
+    for latitude, longitude in points:
+        start = time.perf_counter()
+        results.append(fn(latitude, longitude))
+        times.append(time.perf_counter() - start)
+    return times, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Geohash spatial query benchmark")
+    parser.add_argument("--fundis", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--radius", type=float, default=5.0, help="Radius query size in km")
+    parser.add_argument("--scan-queries", type=int, default=5, help="Full scans to time (each reads every row)")
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    path = os.path.join(tempfile.mkdtemp(prefix="fundimatch-geo-"), "geo.db")
+    engine, fundis, load_time = build_table(path, args.fundis, rng)
+    print(f"Loaded {args.fundis:,} located fundis in {load_time:.1f}s ({os.path.getsize(path) / 1e6:.0f} MB)\n")
+    points = query_points(args.queries, rng)
+    available = (fundis.c.is_available == True,)  # noqa: E712
+
+    with engine.connect() as connection:
+        def scan_knn(latitude, longitude):
+            rows = connection.execute(select(fundis.c.id, fundis.c.latitude, fundis.c.longitude)
+                                      .where(*available)).all()
+            hits = sorted((geo.haversine_km(latitude, longitude, r.latitude, r.longitude), r.id) for r in rows)
+            return [(row_id, round(d, 3)) for d, row_id in hits[:args.k]]
+
+        def geohash_knn(latitude, longitude):
+            return nearest(connection, fundis, latitude, longitude, k=args.k, where=available)
+
+        def bbox_radius(latitude, longitude):
+            dlat = args.radius / geo.KM_PER_DEGREE
+            dlng = args.radius / (geo.KM_PER_DEGREE * math.cos(math.radians(latitude)))
+            rows = connection.execute(select(fundis.c.id, fundis.c.latitude, fundis.c.longitude).where(and_(
+                fundis.c.latitude.between(latitude - dlat, latitude + dlat),
+                fundis.c.longitude.between(longitude - dlng, longitude + dlng), *available))).all()
+            hits = sorted((geo.haversine_km(latitude, longitude, r.latitude, r.longitude), r.id) for r in rows)
+            return [(row_id, round(d, 3)) for d, row_id in hits if d <= args.radius]
+
+        def geohash_radius(latitude, longitude):
+            return within_radius(connection, fundis, latitude, longitude, args.radius, where=available)
+
+        print(f"{'Query':<22} {'p50 ms':>10} {'p99 ms':>10} {'Queries/s':>11}")
+        print("-" * 56)
+        scan_times, scan_results = timed(scan_knn, points[:args.scan_queries])
+        report(f"kNN k={args.k} scan", scan_times)
+        knn_times, knn_results = timed(geohash_knn, points)
+        report(f"kNN k={args.k} geohash", knn_times)
+        bbox_times, bbox_results = timed(bbox_radius, points)
+        report(f"{args.radius:g} km bbox", bbox_times)
+        radius_times, radius_results = timed(geohash_radius, points)
+        report(f"{args.radius:g} km geohash", radius_times)
+
+        knn_mismatches = sum(1 for a, b in zip(scan_results, knn_results) if [d for _, d in a] != [d for _, d in b])
+        radius_mismatches = sum(1 for a, b in zip(bbox_results, radius_results) if sorted(a) != sorted(b))
+        hits = sum(len(r) for r in radius_results) / len(radius_results)
+        print(f"\nAverage fundis within {args.radius:g} km: {hits:.1f}")
+        print(f"kNN mismatches vs scan ({len(scan_results)} queries): {knn_mismatches}")
+        print(f"Radius mismatches vs bbox ({len(radius_results)} queries): {radius_mismatches}")
+
+
+if __name__ == "__main__":
+    main()
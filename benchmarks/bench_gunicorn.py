@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Gunicorn Startup Time and Per-Worker Memory
+======================================================
+
+Starts `gunicorn -c gunicorn.conf.py wsgi:app` with GUNICORN_PRELOAD on and
+off on the same synthetic dataset (datagen.py) and reports:
+
+- boot       - seconds until /api/health answers
+- all ready  - seconds until every worker has logged "Worker ready"
+- RSS / PSS / USS per worker, and the total PSS of master plus workers,
+  right after boot and again after --warmup mixed read requests
+
+RSS counts shared pages in full for every process, so it hides what preload
+saves. PSS splits each shared page between the processes mapping it and USS
+counts only private pages (/proc/<pid>/smaps_rollup), so a lower USS per
+worker and a lower total PSS are the copy-on-write win.
+
+Usage:
+    python benchmarks/bench_gunicorn.py --workers 4
+    python benchmarks/bench_gunicorn.py --workers 8 --worker-class sync --warmup 2000
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from loadtest import GunicornTarget, dataset, fundi_search, process_tree
+
+
+def smaps_kb(pid):
+    """(RSS, PSS, USS) of a process in KiB from /proc/<pid>/smaps_rollup"""
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if value.strip().endswith("kB"):
+                    fields[name] = int(value.split()[0])
+    except OSError:
+        return 0, 0, 0
+    return fields.get("Rss", 0), fields.get("Pss", 0), fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+
+
+def log_text(target):
+    # pread leaves the file offset alone - the server shares it and is still writing
+    return os.pread(target.log.fileno(), 1 << 24, 0).decode(errors="replace")
+
+
+def memory(target):
+    """Master and per-worker (RSS, PSS, USS) in KiB"""
+    master = target.process.pid
+    workers = [pid for pid in process_tree(master) if pid != master]
+    return smaps_kb(master), [smaps_kb(pid) for pid in workers]
+
+
+def warm_up(target, manifest, requests, seed):
+    """Search, nearby and filtered-listing reads spread over all workers"""
+    def reader(n):
+        rng = random.Random(f"{seed}:{n}")
+        for _ in range(requests // 8):
+            target.request(*fundi_search(rng, manifest))
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(reader, range(8)))
+
+
+def summarize(master, workers):
+    count = len(workers) or 1
+    return {
+        "worker_rss_mb": sum(rss for rss, _, _ in workers) / count / 1024,
+        "worker_pss_mb": sum(pss for _, pss, _ in workers) / count / 1024,
+        "worker_uss_mb": sum(uss for _, _, uss in workers) / count / 1024,
+        "total_pss_mb": (master[1] + sum(pss for _, pss, _ in workers)) / 1024,
+    }
+
+
+def run(preload, source, manifest, args):
+    workdir = tempfile.mkdtemp(prefix="fundimatch-gunicorn-")
+    db_path = os.path.join(workdir, "bench.db")
+    shutil.copyfile(source, db_path)
+    os.environ.update(GUNICORN_PRELOAD="true" if preload else "false", GUNICORN_MAX_REQUESTS="0",
+                      GUNICORN_WORKER_CLASS=args.worker_class)
+    command = (f"{sys.executable} -m gunicorn -c gunicorn.conf.py wsgi:app --bind 127.0.0.1:{{port}} "
+               f"--workers {args.workers}")
+
+    started = time.perf_counter()
+    target = GunicornTarget(db_path, server_cmd=command)
+    try:
+        boot = time.perf_counter() - started
+        deadline = time.monotonic() + 120
+        while log_text(target).count("Worker ready") < args.workers:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Workers did not all start within 120s")
+            time.sleep(0.05)
+        all_ready = time.perf_counter() - started
+        time.sleep(0.5)  # let the last worker settle before reading its memory
+
+        booted = summarize(*memory(target))
+        warm_up(target, manifest, args.warmup, args.seed)
+        warmed = summarize(*memory(target))
+    finally:
+        target.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return boot, all_ready, booted, warmed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gunicorn startup time and per-worker memory, preload on/off")
+    parser.add_argument("--db", help="Dataset made by datagen.py")
+    parser.add_argument("--scale", default="small")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--worker-class", default="gthread", choices=["sync", "gthread", "gevent"])
+    parser.add_argument("--warmup", type=int, default=400, help="Read requests after boot")
+    args = parser.parse_args()
+
+    source, manifest = dataset(args)
+    print(f"{args.workers} {args.worker_class} workers, {args.warmup} warm-up requests\n")
+    print(f"{'preload':<8} {'stage':<7} {'boot s':>7} {'ready s':>8} {'RSS/wkr':>8} {'PSS/wkr':>8} "
+          f"{'USS/wkr':>8} {'total PSS':>10}")
+    print("-" * 72)
+    for preload in (False, True):
+        boot, all_ready, booted, warmed = run(preload, source, manifest, args)
+        for stage, result in (("boot", booted), ("warm", warmed)):
+            timing = f"{boot:>7.2f} {all_ready:>8.2f}" if stage == "boot" else f"{'':>7} {'':>8}"
+            print(f"{'on' if preload else 'off':<8} {stage:<7} {timing} {result['worker_rss_mb']:>8.1f} "
+                  f"{result['worker_pss_mb']:>8.1f} {result['worker_uss_mb']:>8.1f} {result['total_pss_mb']:>10.1f}")
+    print("\nMemory in MB. RSS counts shared pages in every process; PSS and USS show what preload shares")
+
+
+if __name__ == "__main__":
+    main()
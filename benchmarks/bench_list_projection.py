@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Column Projection for List Endpoints
+===============================================
+
+Compares the old list queries (full ORM entities plus lazy relationship
+loads per row) with the column projections used by the API today, and
+reports rows/sec for each list shape.
+
+Usage:
+    python benchmarks/bench_list_projection.py --jobs 20000 --fundis 5000
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import argparse
+
+from common import load_backend, seed, measure
+
+
+def build_cases(backend):
+    """Return (name, before, after) query callables for each list shape"""
+    User, Fundi, Job, Category = backend.User, backend.Fundi, backend.Job, backend.Category
+
+    def users_before():
+        return [(u.id, u.username, u.email, u.phone, u.role, u.is_active, u.created_at)
+                for u in User.query.all()]
+
+    def users_after():
+        return User.query.with_entities(*backend.USER_LIST_COLUMNS).all()
+
+    def fundis_before():
+        return [(f.id, f.user.username, f.user.email, f.specialization, f.bio, f.user.is_active)
+                for f in Fundi.query.all()]
+
+    def fundis_after():
+        return Fundi.query.join(User, Fundi.user_id == User.id).with_entities(*backend.FUNDI_LIST_COLUMNS).all()
+
+    def bookings_before():
+        return [(j.id, j.title, j.status, j.category.name if j.category else 'General')
+                for j in Job.query.all()]
+
+    def bookings_after():
+        return (Job.query.outerjoin(Category, Job.category_id == Category.id)
+                .with_entities(*backend.BOOKING_LIST_COLUMNS).all())
+
+    def fundi_matching_before():
+        jobs = Job.query.filter_by(status='pending').all()
+        return [j for j in jobs if 'nairobi' in j.location.lower()][:10]
+
+    def fundi_matching_after():
+        return (Job.query.with_entities(Job.id, Job.title, Job.status, Job.location)
+                .filter_by(status='pending').filter(Job.location.ilike('%Nairobi%')).limit(10).all())
+
+    return [
+        ("GET /api/users", users_before, users_after),
+        ("GET /api/fundis", fundis_before, fundis_after),
+        ("GET /api/bookings", bookings_before, bookings_after),
+        ("dashboard fundi matching_jobs", fundi_matching_before, fundi_matching_after),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Column projection benchmark")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--fundis", type=int, default=2000)
+    parser.add_argument("--jobs", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    backend = load_backend()
+    seed(backend, users=args.users, fundis=args.fundis, jobs=args.jobs)
+
+    print(f"{'Endpoint':<32} {'Rows':>7} {'Before rows/s':>15} {'After rows/s':>15} {'Speedup':>8}")
+    print("-" * 82)
+    with backend.app.app_context():
+        for name, before, after in build_cases(backend):
+            # Start every run with an empty identity map, as a fresh request would
+            reset = backend.db.session.expunge_all
+            t_before, rows = measure(before, args.repeat, setup=reset)
+            t_after, _ = measure(after, args.repeat, setup=reset)
+            count = max(len(rows), 1)
+            print(f"{name:<32} {len(rows):>7} {count / t_before:>15,.0f} {count / t_after:>15,.0f} {t_before / t_after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Fundi Matching Engine
+================================
+
+Seeds N fundis and compares three ways of ranking fundis for a job:
+
+- naive   - query every available fundi and score each one per request
+- scan    - score every entry of the cached index (no pruning)
+- top_k   - the cached index with best-first bucket pruning (what the API uses)
+
+Half the jobs carry coordinates, which switches the location part to
+distance scoring and loosens the bucket bounds. Also reports how long
+building the index takes (paid once per fundis table change).
+
+Usage:
+    python benchmarks/bench_matching.py --fundis 100000
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+from common import ROOT_DIR, LOCATIONS, SPECIALIZATIONS, load_backend, seed, measure, scatter_point
+
+sys.path.insert(0, os.path.join(ROOT_DIR, "lib"))
+import matching  # noqa: E402
+
+
+def random_jobs(count, rng):
+    jobs = []
+    for i in range(count):
+        town = rng.choice(LOCATIONS)
+        latitude, longitude = scatter_point(rng, town) if i % 2 else (None, None)
+        jobs.append(matching.JobSpec(
+            rng.choice(SPECIALIZATIONS),
+            f"{town}, Estate {rng.randint(1, 50)}",
+            rng.choice([None, float(rng.randint(5, 40) * 100)]),
+            None, None, None, latitude, longitude
+        ))
+    return jobs
+
+
+def score_row(spec, target, row):
+    w = matching.WEIGHTS
+    location = matching.location_score(spec.location, row[2])
+    if spec.latitude is not None and row[7] is not None:
+        location = matching.proximity_score(matching.geo.haversine_km(spec.latitude, spec.longitude, row[7], row[8]))
+    return (w['specialization'] * matching.specialization_score(spec.category, row[1])
+            + w['location'] * location
+            + matching.static_score(row[4], row[5], row[6])
+            + w['rate_fit'] * matching.rate_fit(row[3], target))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Matching engine benchmark")
+    parser.add_argument("--fundis", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    backend = load_backend()
+    seed(backend, users=100, fundis=args.fundis, jobs=0)
+    Fundi = backend.Fundi
+    jobs = random_jobs(args.queries, random.Random(7))
+
+    with backend.app.app_context():
+        def load_rows():
+            return Fundi.query.with_entities(
+                Fundi.id, Fundi.specialization, Fundi.location, Fundi.hourly_rate,
+                Fundi.rating, Fundi.total_jobs, Fundi.completed_jobs, Fundi.latitude, Fundi.longitude
+            ).filter(Fundi.is_available == True).all()
+
+        t_build, index = measure(lambda: matching.MatchIndex.build(load_rows()), 3)
+        rows = load_rows()
+        print(f"Available fundis indexed: {index.size:,}")
+        print(f"Index build (query + bucket + sort): {t_build * 1000:.1f} ms\n")
+
+        def naive(spec):
+            target = matching.target_rate(spec)
+            scored = sorted(((score_row(spec, target, r), r[0]) for r in load_rows()), reverse=True)
+            return scored[:args.k]
+
+        def scan(spec):
+            target = matching.target_rate(spec)
+            return sorted(((score_row(spec, target, r), r[0]) for r in rows), reverse=True)[:args.k]
+
+        def top_k(spec):
+            return index.top_k(spec, k=args.k)
+
+        print(f"{'Method':<10} {'p50 ms':>10} {'p99 ms':>10} {'Queries/s':>11}")
+        print("-" * 44)
+        for name, fn, sample in (("naive", naive, jobs[:10]), ("scan", scan, jobs[:20]), ("top_k", top_k, jobs)):
+            times = []
+            for spec in sample:
+                start = time.perf_counter()
+                fn(spec)
+                times.append(time.perf_counter() - start)
+            times.sort()
+            p50, p99 = times[len(times) // 2], times[min(len(times) - 1, int(len(times) * 0.99))]
+            print(f"{name:<10} {p50 * 1000:>10.2f} {p99 * 1000:>10.2f} {len(times) / sum(times):>11.0f}")
+
+        # Sanity check: pruning must not change the ranking
+        mismatches = sum(1 for spec in jobs[:20]
+                         if [round(s, 4) for s, _ in scan(spec)] != [m.score for m in top_k(spec)])
+        print(f"\nRanking mismatches vs full scan: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
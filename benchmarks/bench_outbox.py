@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Outbox Notification Fan-out
+======================================
+
+Times POST /api/bookings with the outbox dispatcher switched off, so the
+request only writes the job and its outbox row (admins are notified of
+every new job). It compares two costs:
+
+- inline  - request time + delivering that one event right away (what the
+            request paid before, when it committed twice)
+- outbox  - request time only; delivery cost per event when batched
+
+Both paths go through dispatch_outbox() end to end. It exits 1 unless every
+event was delivered on the first try and every admin got a notification
+per job, so a small run doubles as a check of the dispatcher.
+
+Usage:
+    python benchmarks/bench_outbox.py --users 20000 --requests 500
+    python benchmarks/bench_outbox.py --users 500 --requests 10   # quick check
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import argparse
+import os
+import time
+
+os.environ["OUTBOX_DISPATCHER"] = "off"
+
+from common import load_backend, seed  # noqa: E402
+
+
+def percentile(times, p):
+    times = sorted(times)
+    return times[min(len(times) - 1, int(len(times) * p / 100))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Outbox benchmark")
+    parser.add_argument("--users", type=int, default=20000, help="1 in 100 users is an admin")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    backend = load_backend()
+    seed(backend, users=args.users, fundis=200, jobs=1000, text_size=40)
+    client = backend.app.test_client()
+    admins = args.users // 100
+    print(f"Seeded {args.users:,} users ({admins} admins)\n")
+
+    def post_booking(i):
+        return client.post("/api/bookings", json={"description": f"Bench job {i}", "location": "Nairobi",
+                                                   "client_id": 2, "total_amount": 1500})
+
+    def notification_count():
+        with backend.app.app_context():
+            return backend.Notification.query.count()
+
+    notifications_before = notification_count()
+
+    # inline: each request followed by delivering its own event
+    inline = []
+    inline_delivered = 0
+    for i in range(args.requests // 2):
+        start = time.perf_counter()
+        post_booking(i)
+        with backend.app.app_context():
+            inline_delivered += backend.dispatch_outbox(batch_size=1)['delivered']
+        inline.append(time.perf_counter() - start)
+
+    # outbox: requests only, then one batched drain
+    requests = []
+    for i in range(args.requests // 2):
+        start = time.perf_counter()
+        post_booking(i)
+        requests.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    with backend.app.app_context():
+        totals = backend.dispatch_outbox(batch_size=args.batch_size)
+    drain = time.perf_counter() - start
+
+    print(f"{'Path':<26} {'p50 ms':>10} {'p99 ms':>10}")
+    print("-" * 48)
+    print(f"{'request + inline fan-out':<26} {percentile(inline, 50):>10.2f} {percentile(inline, 99):>10.2f}")
+    print(f"{'request (outbox)':<26} {percentile(requests, 50):>10.2f} {percentile(requests, 99):>10.2f}")
+    print(f"\nBatched drain: {totals['delivered']} events ({totals['delivered'] * admins:,} notifications) "
+          f"in {drain * 1000:.0f} ms = {drain * 1000 / max(totals['delivered'], 1):.2f} ms/event")
+
+    with backend.app.app_context(), backend.db.engine.connect() as connection:
+        left = backend.outbox.pending_count(connection)
+    events = 2 * (args.requests // 2)
+    delivered = inline_delivered + totals['delivered']
+    notified = notification_count() - notifications_before
+    ok = delivered == events and not totals['retried'] and not totals['dead'] and not left \
+        and notified == events * admins
+    print(f"Delivered {delivered}/{events} events, {notified:,} notifications, {left} left in the outbox: "
+          f"{'OK' if ok else 'FAILED'}")
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
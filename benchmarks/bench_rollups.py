@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Dashboard Rollups vs Raw Aggregation
+===============================================
+
+Seeds N jobs and payments and times the admin dashboard numbers (job counts
+per status plus a 30-day jobs/revenue series) two ways:
+
+- raw     - GROUP BY over the jobs and payments tables on every request
+- rollup  - sums over rollup_jobs_daily / rollup_earnings_daily
+
+It also times a full rebuild and an incremental refresh after a handful of
+job updates, then checks the rollups against the raw aggregation and
+rollups.verify(). It exits 1 if anything differs, so a small run doubles as
+a correctness check of the refresh on a seeded database.
+
+Usage:
+    python benchmarks/bench_rollups.py --jobs 500000 --payments 500000
+    python benchmarks/bench_rollups.py --jobs 2000 --payments 2000 --fundis 100 --repeat 1   # quick check
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import argparse
+import time
+
+from common import load_backend, seed, measure
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rollup benchmark")
+    parser.add_argument("--jobs", type=int, default=500000)
+    parser.add_argument("--payments", type=int, default=500000)
+    parser.add_argument("--fundis", type=int, default=5000)
+    parser.add_argument("--updates", type=int, default=100, help="Jobs changed before the incremental refresh")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    backend = load_backend()
+    seed(backend, users=1000, fundis=args.fundis, jobs=args.jobs, payments=args.payments, text_size=40)
+    print(f"Seeded {args.jobs:,} jobs and {args.payments:,} payments\n")
+
+    db, Job, Payment, rollups = backend.db, backend.Job, backend.Payment, backend.rollups
+    with backend.app.app_context():
+        session = db.session
+        since = backend.dashboard_since()
+
+        def raw():
+            statuses = dict(session.query(Job.status, db.func.count()).group_by(Job.status).all())
+            day = db.func.date(Job.created_at)
+            created = dict(session.query(day, db.func.count()).filter(Job.created_at >= since).group_by(day).all())
+            pay_day = db.func.date(Payment.created_at)
+            revenue = dict(session.query(pay_day, db.func.sum(Payment.amount))
+                           .filter(Payment.status == "completed", Payment.created_at >= since).group_by(pay_day).all())
+            return statuses, created, revenue
+
+        def rollup():
+            return backend.rollup_job_totals(), backend.rollup_daily_series(since)
+
+        # Seeded rows were all "updated" just now; untouched rows really carry their creation time
+        with db.engine.begin() as connection:
+            for table in (Job.__table__, Payment.__table__):
+                connection.execute(table.update().values(updated_at=table.c.created_at))
+
+        start = time.perf_counter()
+        with db.engine.begin() as connection:
+            rollups.rebuild(connection)
+        rebuild_time = time.perf_counter() - start
+        backend.refresh_rollups()
+
+        t_raw, (statuses, created, revenue) = measure(raw, args.repeat)
+        t_rollup, (totals, series) = measure(rollup, args.repeat)
+
+        for job in Job.query.order_by(Job.id.desc()).limit(args.updates):
+            job.status = "completed" if job.status != "completed" else "cancelled"
+        session.commit()
+        start = time.perf_counter()
+        refreshed = backend.refresh_rollups()
+        refresh_time = time.perf_counter() - start
+
+        print(f"{'Query':<28} {'ms':>10}")
+        print("-" * 40)
+        print(f"{'dashboard (raw)':<28} {t_raw * 1000:>10.1f}")
+        print(f"{'dashboard (rollup)':<28} {t_rollup * 1000:>10.1f}")
+        print(f"{'full rebuild':<28} {rebuild_time * 1000:>10.1f}")
+        print(f"{f'refresh after {args.updates} updates':<28} {refresh_time * 1000:>10.1f}")
+        print(f"\nSpeed-up: {t_raw / t_rollup:.1f}x; days recomputed by the refresh: {refreshed}")
+
+        series_ok = all(created.get(d["date"], 0) == d["jobs_created"]
+                        and abs(revenue.get(d["date"], 0.0) - d["revenue"]) < 0.01 for d in series)
+        print(f"Results match: statuses {statuses == totals}, daily {series_ok}")
+        with db.engine.connect() as connection:
+            report = rollups.verify(connection)
+        print(f"verify() after refresh: {sum(len(m) for m in report.values())} mismatched rows")
+        if statuses != totals or not series_ok or any(report.values()):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
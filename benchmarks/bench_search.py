@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Full-Text Fundi Search vs ILIKE Filters
+==================================================
+
+Seeds N fundis and compares the old ILIKE '%term%' filters (full scans,
+no ranking) with the search index (SQLite FTS5 here, tsvector on
+PostgreSQL) for typical searches:
+
+- specialization/location filters, all matching rows (GET /api/fundis
+  ILIKE vs the index behind /api/fundis/search; match_subquery here)
+- Free-text search, first page of 20 (ILIKE across fields vs ranked index)
+- A rare term (one username) and a bio keyword
+
+Also reports how long a full index rebuild takes.
+
+Usage:
+    python benchmarks/bench_search.py --fundis 100000
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import argparse
+import time
+
+from common import load_backend, seed, measure
+from db.search_index import match_subquery
+
+
+def build_cases(backend, rare_username):
+    db, Fundi, User = backend.db, backend.Fundi, backend.User
+
+    def ilike_filter(**fields):
+        def run():
+            q = Fundi.query.join(User, Fundi.user_id == User.id).with_entities(Fundi.id)
+            for column, value in fields.items():
+                q = q.filter(getattr(Fundi, column).ilike(f"%{value}%"))
+            return q.all()
+        return run
+
+    def index_filter(**fields):
+        def run():
+            q = Fundi.query.join(User, Fundi.user_id == User.id).with_entities(Fundi.id)
+            return q.filter(Fundi.id.in_(match_subquery(db.session, fields=fields))).all()
+        return run
+
+    def ilike_text(query, limit=20):
+        def run():
+            q = Fundi.query.join(User, Fundi.user_id == User.id).with_entities(Fundi.id)
+            for term in query.split():
+                pattern = f"%{term}%"
+                q = q.filter(db.or_(User.username.ilike(pattern), Fundi.specialization.ilike(pattern),
+                                    Fundi.location.ilike(pattern), Fundi.bio.ilike(pattern)))
+            return q.order_by(Fundi.rating.desc()).limit(limit).all()
+        return run
+
+    def index_text(query, limit=20):
+        def run():
+            return backend.search_fundi_ids(db.session, query, limit=limit).items
+        return run
+
+    return [
+        ("specialization=plumb (all rows)", ilike_filter(specialization="plumb"), index_filter(specialization="plumb")),
+        ("spec=elec & location=momb (all)", ilike_filter(specialization="elec", location="momb"),
+         index_filter(specialization="elec", location="momb")),
+        ("q='plumbing nairobi' (page 1)", ilike_text("plumbing nairobi"), index_text("plumbing nairobi")),
+        ("q='solar' bio keyword (page 1)", ilike_text("solar"), index_text("solar")),
+        (f"q='{rare_username}' (rare term)", ilike_text(rare_username), index_text(rare_username)),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fundi search benchmark")
+    parser.add_argument("--fundis", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    backend = load_backend()
+    start = time.perf_counter()
+    seed(backend, users=args.users, fundis=args.fundis, jobs=0)
+    print(f"Seeded {args.fundis:,} fundis in {time.perf_counter() - start:.1f}s (index kept in sync by triggers)")
+
+    with backend.app.app_context():
+        print(f"Search backend: {backend.search_fundi_ids(backend.db.session, 'x').backend}")
+        with backend.db.engine.begin() as connection:
+            start = time.perf_counter()
+            backend.rebuild_search_index(connection)
+            print(f"Full index rebuild: {time.perf_counter() - start:.2f}s\n")
+
+        rare = f"user{args.users + args.fundis // 2}"
+        print(f"{'Search':<36} {'ILIKE ms':>10} {'Index ms':>10} {'Speedup':>9} {'Rows':>8}")
+        print("-" * 77)
+        for name, before, after in build_cases(backend, rare):
+            t_before, rows_before = measure(before, args.repeat)
+            t_after, rows_after = measure(after, args.repeat)
+            print(f"{name:<36} {t_before * 1000:>10.2f} {t_after * 1000:>10.2f} "
+                  f"{t_before / t_after:>8.1f}x {len(rows_after):>8,}")
+
+
+if __name__ == "__main__":
+    main()
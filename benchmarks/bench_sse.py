@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Idle Notification Streams (SSE)
+==========================================
+
+Two modes:
+
+hub  - In-process. Opens thousands of idle subscriptions on the pub/sub hub,
+       parks a waiting consumer thread on a sample of them (like the SSE
+       generator does) and measures memory per subscription, targeted and
+       broadcast publish cost, and publish -> consumer wake-up latency.
+
+http - Against a running server. Opens N raw HTTP connections to
+       /api/notifications/<user_id>/stream, keeps them idle for --hold
+       seconds and reports how many connected, how many are still open at
+       the end and how many heartbeats arrived. Thousands of idle streams
+       need an async worker class, e.g.:
+           gunicorn -k gevent --worker-connections 5000 wsgi:app
+
+Usage:
+    python benchmarks/bench_sse.py hub --subscriptions 5000
+    python benchmarks/bench_sse.py http --url http://127.0.0.1:5000 --connections 2000 --hold 60
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import argparse
+import os
+import selectors
+import socket
+import sys
+import threading
+import time
+import tracemalloc
+from urllib.parse import urlparse
+
+from common import ROOT_DIR
+
+sys.path.insert(0, os.path.join(ROOT_DIR, "lib"))
+import pubsub  # noqa: E402
+
+
+def run_hub(args):
+    hub = pubsub.create_hub("local")
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    subscriptions = [hub.subscribe(i % args.users) for i in range(args.subscriptions)]
+    subscribe_time = time.perf_counter() - start
+    per_sub = (tracemalloc.get_traced_memory()[0] - before) / args.subscriptions
+    tracemalloc.stop()
+
+    # Consumer threads waiting on a sample of subscriptions, as SSE generators would
+    latencies, lock = [], threading.Lock()
+    stop = threading.Event()
+
+    def consume(subscription):
+        while not stop.is_set():
+            for _, sent_at in subscription.get(timeout=0.5):
+                with lock:
+                    latencies.append(time.perf_counter() - sent_at)
+
+    consumers = [threading.Thread(target=consume, args=(s,), daemon=True)
+                 for s in subscriptions[:args.threads]]
+    for t in consumers:
+        t.start()
+    time.sleep(0.5)
+
+    # Targeted: one notification for one user, repeated
+    start = time.perf_counter()
+    for i in range(args.messages):
+        hub.publish([(i % args.users, i, time.perf_counter())])
+    targeted = (time.perf_counter() - start) / args.messages
+
+    # Broadcast: one notification to every user (notify_clients_of_new_fundi)
+    start = time.perf_counter()
+    hub.publish([(u, args.messages + u, time.perf_counter()) for u in range(args.users)])
+    broadcast = time.perf_counter() - start
+
+    time.sleep(1.0)
+    stop.set()
+    for t in consumers:
+        t.join()
+    for s in subscriptions:
+        s.close()
+
+    latencies.sort()
+    print(f"Idle subscriptions:       {args.subscriptions:,} across {args.users:,} users")
+    print(f"Subscribe:                {subscribe_time * 1e6 / args.subscriptions:.1f} us each")
+    print(f"Memory:                   {per_sub:,.0f} bytes per subscription")
+    print(f"Targeted publish:         {targeted * 1e6:.1f} us per message")
+    print(f"Broadcast to all users:   {broadcast * 1000:.2f} ms")
+    if latencies:
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[int(len(latencies) * 0.99)]
+        print(f"Wake-up latency ({args.threads} waiting consumers, {len(latencies):,} deliveries): "
+              f"p50 {p50 * 1000:.2f} ms, p99 {p99 * 1000:.2f} ms")
+
+
+def run_http(args):
+    url = urlparse(args.url)
+    host, port = url.hostname, url.port or 80
+    selector = selectors.DefaultSelector()
+    state = {"connected": 0, "failed": 0, "closed": 0, "heartbeats": 0, "events": 0}
+
+    start = time.perf_counter()
+    for i in range(args.connections):
+        user_id = 1 + i % args.users
+        try:
+            sock = socket.create_connection((host, port), timeout=10)
+        except OSError:
+            state["failed"] += 1
+            continue
+        sock.sendall(f"GET /api/notifications/{user_id}/stream HTTP/1.1\r\nHost: {host}\r\n"
+                     f"Accept: text/event-stream\r\n\r\n".encode())
+        sock.setblocking(False)
+        selector.register(sock, selectors.EVENT_READ, {"header": True})
+    connect_time = time.perf_counter() - start
+    print(f"Opened {args.connections - state['failed']:,} connections in {connect_time:.2f}s "
+          f"({state['failed']} failed)")
+
+    deadline = time.monotonic() + args.hold
+    while time.monotonic() < deadline and selector.get_map():
+        for key, _ in selector.select(timeout=1.0):
+            try:
+                data = key.fileobj.recv(65536)
+            except OSError:
+                data = b""
+            if not data:
+                selector.unregister(key.fileobj)
+                key.fileobj.close()
+                state["closed"] += 1
+                continue
+            if key.data["header"] and b" 200 " in data.split(b"\r\n", 1)[0]:
+                state["connected"] += 1
+            key.data["header"] = False
+            state["heartbeats"] += data.count(b": keepalive")
+            state["events"] += data.count(b"event: notification")
+
+    still_open = len(selector.get_map())
+    for key in list(selector.get_map().values()):
+        key.fileobj.close()
+    print(f"Connected (HTTP 200):     {state['connected']:,}")
+    print(f"{f'Open after {args.hold}s:':<26}{still_open:,}")
+    print(f"Closed by server:         {state['closed']:,}")
+    print(f"Heartbeats received:      {state['heartbeats']:,}")
+    print(f"Notifications received:   {state['events']:,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SSE idle connection benchmark")
+    sub = parser.add_subparsers(dest="mode", required=True)
+
+    hub = sub.add_parser("hub", help="In-process pub/sub hub")
+    hub.add_argument("--subscriptions", type=int, default=5000)
+    hub.add_argument("--users", type=int, default=5000)
+    hub.add_argument("--threads", type=int, default=500, help="Subscriptions with a waiting consumer thread")
+    hub.add_argument("--messages", type=int, default=10000)
+
+    http = sub.add_parser("http", help="Idle streams against a running server")
+    http.add_argument("--url", default="http://127.0.0.1:5000")
+    http.add_argument("--connections", type=int, default=1000)
+    http.add_argument("--users", type=int, default=100)
+    http.add_argument("--hold", type=int, default=30, help="Seconds to keep connections idle")
+
+    args = parser.parse_args()
+    if args.mode == "hub":
+        run_hub(args)
+    else:
+        run_http(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+FundiMatch Benchmarks - Shared Setup
+====================================
+
+Helpers shared by the benchmark scripts in this folder:
+- Point the Flask backend at a throwaway SQLite database
+- Seed that database with synthetic rows using bulk inserts
+- Time a callable and report throughput
+
+The backend reads DATABASE_URL at import time, so load_backend() must run
+before anything else imports flask_backend_template.
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, "lib"))
+import geo  # noqa: E402
+
+SPECIALIZATIONS = ["Plumbing", "Electrical", "Carpentry", "Painting", "Cleaning", "Masonry", "Welding"]
+LOCATIONS = ["Nairobi", "Mombasa", "Kisumu", "Nakuru", "Eldoret", "Thika", "Machakos", "Nyeri"]
+STATUSES = ["pending", "assigned", "in_progress", "completed", "cancelled"]
+SKILLS = ["tiling", "roofing", "wiring", "solar", "boreholes", "gypsum", "welding", "furniture",
+          "geysers", "cctv", "fencing", "landscaping", "drainage", "glazing", "waterproofing"]
+
+
+def scatter_point(rng, town, spread=0.15):
+    """A random (latitude, longitude) within about spread degrees of a town centre"""
+    latitude, longitude = geo.TOWN_COORDINATES[town.lower()]
+    return latitude + rng.uniform(-spread, spread), longitude + rng.uniform(-spread, spread)
+
+
+def located(rng, town):
+    """latitude/longitude/geohash columns for a bulk-inserted row near a town"""
+    latitude, longitude = scatter_point(rng, town)
+    return {"latitude": latitude, "longitude": longitude, "geohash": geo.encode(latitude, longitude)}
+
+
+def load_backend(db_path=None):
+    """
+    Import the Flask backend against a benchmark database
+    ====================================================
+
+    Args:
+        db_path (str, optional): SQLite file to use (a temp file by default)
+
+    Returns:
+        module: The imported flask_backend_template module
+    """
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix="fundimatch-bench-"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.abspath(db_path)}"
+
+    import flask_backend_template as backend
+
+    # Benchmarks hammer the API far beyond the per-IP limits
+    backend.limiter.enabled = False
+    with backend.app.app_context():
+        backend.db.create_all()
+    return backend
+
+
+def seed(backend, users=1000, fundis=500, jobs=5000, text_size=400, rng=None, payments=0):
+    """
+    Seed the benchmark database with synthetic data
+    ==============================================
+
+    Rows are written with executemany-style bulk inserts so seeding large
+    datasets stays fast. Text columns are padded to text_size characters to
+    mimic real bios and job descriptions. Bulk inserts skip ORM listeners,
+    so fundi and job coordinates and geohashes are filled in here.
+
+    Returns:
+        dict: Row counts per table
+    """
+    rng = rng or random.Random(42)
+    db = backend.db
+    now = datetime.utcnow()
+    filler = ("lorem ipsum dolor sit amet " * (text_size // 27 + 1))[:text_size]
+    password = "$2b$12$" + "x" * 53  # bcrypt-sized hash
+
+    with backend.app.app_context():
+        db.session.execute(backend.Category.__table__.insert(), [
+            {"name": name, "description": f"{name} services. {filler}", "icon": "tools"}
+            for name in SPECIALIZATIONS
+        ])
+
+        user_rows = []
+        for i in range(users + fundis):
+            role = "fundi" if i >= users else ("admin" if i % 100 == 0 else "client")
+            user_rows.append({
+                "username": f"user{i}", "email": f"user{i}@example.com", "password": password,
+                "phone": f"+2547{i:08d}", "role": role, "is_active": True,
+                "created_at": now - timedelta(minutes=i),
+            })
+        db.session.execute(backend.User.__table__.insert(), user_rows)
+
+        fundi_rows = []
+        for i in range(fundis):
+            town = rng.choice(LOCATIONS)
+            fundi_rows.append({
+                **located(rng, town),
+                "user_id": users + i + 1,
+                "specialization": rng.choice(SPECIALIZATIONS),
+                "experience": f"{rng.randint(1, 20)} years",
+                "hourly_rate": float(rng.randint(5, 40) * 100),
+                "location": town,
+                "bio": (" ".join(rng.sample(SKILLS, 3)) + ". " + filler)[:text_size],
+                "rating": round(rng.uniform(2.5, 5.0), 1),
+                "total_jobs": 0, "completed_jobs": 0,
+                "is_available": rng.random() < 0.7, "is_verified": False,
+                "created_at": now - timedelta(minutes=i),
+            })
+        if fundi_rows:
+            db.session.execute(backend.Fundi.__table__.insert(), fundi_rows)
+
+        job_rows = []
+        for i in range(jobs):
+            status = rng.choice(STATUSES)
+            town = rng.choice(LOCATIONS)
+            created_at = now - timedelta(minutes=i)
+            job_rows.append({
+                **located(rng, town),
+                "title": f"Job {i} needs a fundi",
+                "description": filler,
+                "location": f"{town}, Estate {i % 50}",
+                "status": status, "priority": "medium",
+                "budget": float(rng.randint(10, 200) * 100),
+                "hourly_rate": float(rng.randint(5, 40) * 100),
+                "estimated_hours": float(rng.randint(1, 16)),
+                "total_amount": float(rng.randint(10, 200) * 100),
+                "created_at": created_at,
+                "completed_at": created_at + timedelta(hours=rng.uniform(1, 240)) if status == "completed" else None,
+                "client_id": rng.randint(1, max(users, 1)),
+                "fundi_id": rng.randint(1, fundis) if status != "pending" and fundis else None,
+                "category_id": rng.randint(1, len(SPECIALIZATIONS)),
+            })
+        if job_rows:
+            db.session.execute(backend.Job.__table__.insert(), job_rows)
+
+        payment_rows = [{
+            "amount": float(rng.randint(5, 500) * 100),
+            "payment_method": rng.choice(["M-Pesa", "Card", "Cash"]),
+            "transaction_id": f"TX{i:010d}",
+            "status": "completed" if rng.random() < 0.9 else rng.choice(["pending", "failed"]),
+            "job_id": rng.randint(1, jobs),
+            "client_id": rng.randint(1, max(users, 1)),
+            "fundi_id": rng.randint(1, fundis),
+            "created_at": now - timedelta(minutes=rng.randint(0, jobs)),
+        } for i in range(payments if jobs and fundis else 0)]
+        if payment_rows:
+            db.session.execute(backend.Payment.__table__.insert(), payment_rows)
+        db.session.commit()
+
+    return {"users": users + fundis, "fundis": fundis, "jobs": jobs, "payments": len(payment_rows)}
+
+
+def measure(fn, repeat=5, setup=None):
+    """
+    Run fn several times and return the best wall time in seconds
+    ============================================================
+
+    Taking the best of several runs filters out warm-up and scheduler noise.
+    setup, if given, runs untimed before every repetition.
+    """
+    best = None
+    result = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
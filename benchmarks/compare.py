@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+FundiMatch Benchmarks - Compare Load Test Results
+=================================================
+
+Compares two loadtest.py result files scenario by scenario and flags
+regressions:
+- p95 latency up by more than --threshold percent
+- req/s down by more than --threshold percent
+- more queries per request (any increase of 0.5 or more)
+- new errors
+
+Exits with status 1 when anything regressed, so it can gate CI. Runs that
+used a different target, dataset or concurrency are still compared, with a
+warning, since their numbers are not directly comparable.
+
+Usage:
+    python benchmarks/compare.py benchmarks/results/OLD.json benchmarks/results/NEW.json
+    python benchmarks/compare.py OLD.json NEW.json --threshold 20
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import argparse
+import json
+import sys
+
+
+def change(old, new):
+    """Percent change from old to new (None when either side is missing)"""
+    if old is None or new is None or old == 0:
+        return None
+    return (new - old) / old * 100
+
+
+def fmt_change(value):
+    return "    n/a" if value is None else f"{value:+6.1f}%"
+
+
+def compare(old, new, threshold):
+    """Print a comparison table and return a list of regression messages"""
+    for key in ("target", "concurrency", "dataset"):
+        if old["meta"].get(key) != new["meta"].get(key):
+            print(f"⚠️  {key} differs: {old['meta'].get(key)} -> {new['meta'].get(key)}")
+
+    regressions = []
+    print(f"\n{'Scenario':<16} {'metric':<20} {'old':>11} {'new':>11} {'change':>8}")
+    print("-" * 70)
+    for name in sorted(set(old["scenarios"]) | set(new["scenarios"])):
+        before, after = old["scenarios"].get(name), new["scenarios"].get(name)
+        if before is None or after is None:
+            print(f"{name:<16} {'only in ' + ('new' if before is None else 'old')}")
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "req_per_s", "queries_per_request", "errors"):
+            old_value, new_value = before.get(metric), after.get(metric)
+            print(f"{name:<16} {metric:<20} {str(old_value):>11} {str(new_value):>11} "
+                  f"{fmt_change(change(old_value, new_value)):>8}")
+
+        p95 = change(before["p95_ms"], after["p95_ms"])
+        if p95 is not None and p95 > threshold:
+            regressions.append(f"{name}: p95 {before['p95_ms']} -> {after['p95_ms']} ms ({p95:+.1f}%)")
+        throughput = change(before["req_per_s"], after["req_per_s"])
+        if throughput is not None and throughput < -threshold:
+            regressions.append(f"{name}: {before['req_per_s']} -> {after['req_per_s']} req/s ({throughput:+.1f}%)")
+        queries_before, queries_after = before.get("queries_per_request"), after.get("queries_per_request")
+        if queries_before is not None and queries_after is not None and queries_after - queries_before >= 0.5:
+            regressions.append(f"{name}: {queries_before} -> {queries_after} queries per request")
+        if after["errors"] > before["errors"]:
+            regressions.append(f"{name}: errors {before['errors']} -> {after['errors']}")
+
+    rss = change(old.get("peak_rss_mb"), new.get("peak_rss_mb"))
+    print(f"\nPeak RSS: {old.get('peak_rss_mb')} -> {new.get('peak_rss_mb')} MB {fmt_change(rss)}")
+    if rss is not None and rss > threshold:
+        regressions.append(f"peak RSS {old['peak_rss_mb']} -> {new['peak_rss_mb']} MB ({rss:+.1f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two loadtest.py result files")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed percent change (default 10)")
+    args = parser.parse_args()
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    print(f"Old: {(old['meta'].get('commit') or '?')[:10]} {old['meta'].get('subject') or ''}")
+    print(f"New: {(new['meta'].get('commit') or '?')[:10]} {new['meta'].get('subject') or ''}")
+
+    regressions = compare(old, new, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s):")
+        for message in regressions:
+            print(f"   - {message}")
+        sys.exit(1)
+    print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+FundiMatch Benchmarks - Synthetic Data Generator
+================================================
+
+Fills a database with realistic-looking FundiMatch data for load tests:
+users, fundis, jobs, reviews, payments and notifications, written in chunks
+with Core bulk inserts (the same executemany path as common.seed()).
+
+The data is skewed the way marketplace data usually is:
+- A few towns (Nairobi, Mombasa) hold most fundis and jobs
+- Job, review and payment counts per fundi and per client follow a Zipf
+  curve - a handful of very busy fundis, a long tail of quiet ones
+- Jobs are denser in recent days; old jobs are mostly completed or
+  cancelled, recent ones mostly pending or in progress
+- Every job has the status history its status implies (job_status_events),
+  with the stages spread between creation and completion
+- Ratings lean towards 4 and 5 stars; amounts are log-normal
+- Notifications pile up on active users; older ones are mostly read
+
+Generation is deterministic for a given --seed, so two commits benchmarked
+on the same scale see identical data. Every user's password is
+BENCH_PASSWORD (hashed once) so the login scenario can sign in.
+
+Usage:
+    python benchmarks/datagen.py --db /tmp/fundimatch-bench.db --scale medium
+    python benchmarks/datagen.py --db /tmp/x.db --users 50000 --fundis 5000 --jobs 200000
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import argparse
+import bisect
+import itertools
+import json
+import math
+import random
+import time
+from datetime import datetime, timedelta
+
+from common import LOCATIONS, SKILLS, SPECIALIZATIONS, load_backend, located
+
+BENCH_PASSWORD = "BenchPass123!"
+CHUNK_SIZE = 20000
+
+# Rough share of fundis and jobs per town (same order as common.LOCATIONS)
+TOWN_WEIGHTS = [40, 15, 10, 9, 8, 7, 6, 5]
+SPECIALIZATION_WEIGHTS = [25, 20, 15, 12, 12, 9, 7]
+RATING_WEIGHTS = {5: 45, 4: 30, 3: 15, 2: 6, 1: 4}
+
+SCALES = {
+    "small": {"users": 2000, "fundis": 300, "jobs": 10000, "reviews": 4000, "payments": 8000,
+              "notifications": 20000},
+    "medium": {"users": 20000, "fundis": 3000, "jobs": 100000, "reviews": 40000, "payments": 80000,
+               "notifications": 200000},
+    "large": {"users": 200000, "fundis": 30000, "jobs": 1000000, "reviews": 400000, "payments": 800000,
+              "notifications": 2000000},
+}
+
+
+class Zipf:
+    """Draw 1-based ranks from a Zipf(s) distribution over n items"""
+
+    def __init__(self, n, s=1.1):
+        self.cumulative = list(itertools.accumulate(1.0 / (rank ** s) for rank in range(1, n + 1)))
+
+    def draw(self, rng):
+        return bisect.bisect(self.cumulative, rng.random() * self.cumulative[-1]) + 1
+
+
+def weighted(rng, values, weights):
+    return rng.choices(values, weights=weights)[0]
+
+
+def insert_chunked(backend, table, rows):
+    """Bulk insert an iterable of row dicts in CHUNK_SIZE batches; returns rows written"""
+    db = backend.db
+    written, batch = 0, []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == CHUNK_SIZE:
+            db.session.execute(table.insert(), batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(table.insert(), batch)
+        written += len(batch)
+    db.session.commit()
+    return written
+
+
+LIFECYCLE = ["pending", "assigned", "in_progress", "completed"]
+
+
+def status_events(rng, job_id, status, created_at, completed_at, now):
+    """job_status_events rows for a synthetic job: the lifecycle up to its status, oldest first"""
+    if status == "cancelled":
+        path = LIFECYCLE[:rng.randint(1, 3)] + ["cancelled"]
+    else:
+        path = LIFECYCLE[:LIFECYCLE.index(status) + 1]
+    end = completed_at or min(created_at + timedelta(hours=rng.lognormvariate(math.log(24), 0.8)), now)
+    offsets = [0.0] + sorted(rng.random() for _ in range(len(path) - 2)) + [1.0]
+    previous = None
+    for to_status, offset in zip(path, offsets):
+        yield {"job_id": job_id, "from_status": previous, "to_status": to_status,
+               "at": created_at + (end - created_at) * offset}
+        previous = to_status
+
+
+def generate(backend, users=2000, fundis=300, jobs=10000, reviews=4000, payments=8000, notifications=20000,
+             days=180, seed=7, skew=1.1):
+    """
+    Generate a full synthetic dataset
+    =================================
+
+    Args:
+        backend: Module returned by common.load_backend()
+        users (int): Client/admin accounts (1 in 100 is an admin)
+        fundis (int): Fundi accounts, each with a fundi profile
+        jobs, reviews, payments, notifications (int): Rows to create
+            (reviews and payments are capped by the completed jobs)
+        days (int): How far back created_at goes
+        seed (int): Random seed - the same seed gives the same data
+        skew (float): Zipf exponent for per-fundi and per-client activity
+
+    Returns:
+        dict: Manifest with row counts and id ranges, used by loadtest.py
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    password = backend.bcrypt.generate_password_hash(BENCH_PASSWORD).decode("utf-8")
+    timings = {}
+
+    with backend.app.app_context():
+        started = time.perf_counter()
+        insert_chunked(backend, backend.Category.__table__, (
+            {"name": name, "description": f"{name} services", "icon": "tools"} for name in SPECIALIZATIONS))
+
+        def user_rows():
+            for i in range(users + fundis):
+                role = "fundi" if i >= users else ("admin" if i % 100 == 0 else "client")
+                yield {"username": f"user{i}", "email": f"user{i}@example.com", "password": password,
+                       "phone": f"+2547{i:08d}", "role": role, "is_active": i % 50 != 49,
+                       "created_at": now - timedelta(days=days * rng.random() ** 0.5)}
+        insert_chunked(backend, backend.User.__table__, user_rows())
+        timings["users"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        fundi_towns = []
+
+        def fundi_rows():
+            for i in range(fundis):
+                town = weighted(rng, LOCATIONS, TOWN_WEIGHTS)
+                fundi_towns.append(town)
+                yield {
+                    **located(rng, town),
+                    "user_id": users + i + 1,
+                    "specialization": weighted(rng, SPECIALIZATIONS, SPECIALIZATION_WEIGHTS),
+                    "experience": f"{min(int(rng.expovariate(1 / 6)) + 1, 40)} years",
+                    "hourly_rate": float(round(rng.lognormvariate(math.log(1200), 0.5), -1)),
+                    "location": town,
+                    "bio": " ".join(rng.sample(SKILLS, 3)) + f". Serving {town} and nearby estates.",
+                    "rating": 0.0, "total_jobs": 0, "completed_jobs": 0,
+                    "is_available": rng.random() < 0.7, "is_verified": rng.random() < 0.3,
+                    "created_at": now - timedelta(days=days * rng.random()),
+                }
+        insert_chunked(backend, backend.Fundi.__table__, fundi_rows())
+        timings["fundis"] = time.perf_counter() - started
+
+        # Busy fundis and clients are spread over the id range, not the lowest ids
+        fundi_rank = list(range(1, fundis + 1))
+        rng.shuffle(fundi_rank)
+        client_ids = [i + 1 for i in range(users) if i % 100 != 0]
+        rng.shuffle(client_ids)
+        active_clients = [user_id for user_id in client_ids if user_id % 50 != 0]  # 1 in 50 users is inactive
+        pick_fundi, pick_client = Zipf(fundis, skew), Zipf(len(client_ids), skew)
+
+        started = time.perf_counter()
+        completed = []  # (job_id, client_id, fundi_id, completed_at, total_amount)
+
+        def job_rows():
+            for job_id in range(1, jobs + 1):
+                age_days = days * rng.random() ** 1.5  # recent days are busier
+                created_at = now - timedelta(days=age_days)
+                if age_days < 3:
+                    status = weighted(rng, ["pending", "assigned", "in_progress", "completed", "cancelled"],
+                                      [50, 20, 15, 10, 5])
+                else:
+                    status = weighted(rng, ["pending", "assigned", "in_progress", "completed", "cancelled"],
+                                      [5, 5, 5, 70, 15])
+                fundi_id = fundi_rank[pick_fundi.draw(rng) - 1] if status != "pending" else None
+                town = fundi_towns[fundi_id - 1] if fundi_id else weighted(rng, LOCATIONS, TOWN_WEIGHTS)
+                client_id = client_ids[pick_client.draw(rng) - 1]
+                hours = float(rng.randint(1, 16))
+                rate = float(round(rng.lognormvariate(math.log(1200), 0.5), -1))
+                completed_at = None
+                if status == "completed":
+                    completed_at = min(created_at + timedelta(hours=rng.lognormvariate(math.log(48), 0.8)), now)
+                    completed.append((job_id, client_id, fundi_id, completed_at, rate * hours))
+                yield {
+                    **located(rng, town),
+                    "title": f"{weighted(rng, SPECIALIZATIONS, SPECIALIZATION_WEIGHTS)} job {job_id}",
+                    "description": f"Need help with {' and '.join(rng.sample(SKILLS, 2))} in {town}.",
+                    "location": f"{town}, Estate {rng.randint(1, 60)}",
+                    "status": status, "priority": weighted(rng, ["low", "medium", "high"], [20, 60, 20]),
+                    "budget": rate * hours, "hourly_rate": rate, "estimated_hours": hours,
+                    "total_amount": rate * hours,
+                    "created_at": created_at, "updated_at": completed_at or created_at,
+                    "completed_at": completed_at,
+                    "client_id": client_id, "fundi_id": fundi_id,
+                    "category_id": weighted(rng, range(1, len(SPECIALIZATIONS) + 1), SPECIALIZATION_WEIGHTS),
+                }
+        job_count = insert_chunked(backend, backend.Job.__table__, job_rows())
+        timings["jobs"] = time.perf_counter() - started
+
+        # Status histories are derived from the stored jobs, a chunk of ids at a
+        # time, with their own generator so the rows above stay as they were
+        started = time.perf_counter()
+        events_rng = random.Random(f"{seed}-status-events")
+        job_table = backend.Job.__table__
+
+        def status_event_rows():
+            for first in range(1, job_count + 1, CHUNK_SIZE):
+                chunk = backend.db.session.execute(
+                    backend.db.select(job_table.c.id, job_table.c.status, job_table.c.created_at,
+                                      job_table.c.completed_at)
+                    .where(job_table.c.id.between(first, first + CHUNK_SIZE - 1)).order_by(job_table.c.id)
+                ).all()
+                for job_id, status, created_at, completed_at in chunk:
+                    yield from status_events(events_rng, job_id, status, created_at, completed_at, now)
+        event_count = insert_chunked(backend, backend.job_events.table, status_event_rows())
+        timings["status events"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        reviewed = rng.sample(completed, min(reviews, len(completed)))
+
+        def review_rows():
+            for job_id, client_id, fundi_id, completed_at, _ in reviewed:
+                created_at = min(completed_at + timedelta(hours=rng.expovariate(1 / 24)), now)
+                yield {"rating": weighted(rng, list(RATING_WEIGHTS), list(RATING_WEIGHTS.values())),
+                       "comment": rng.choice(["Great work", "On time", "Fair price", "Would hire again", None]),
+                       "job_id": job_id, "client_id": client_id, "fundi_id": fundi_id,
+                       "created_at": created_at, "updated_at": created_at}
+        review_count = insert_chunked(backend, backend.Review.__table__, review_rows())
+
+        paid = rng.sample(completed, min(payments, len(completed)))
+
+        def payment_rows():
+            for n, (job_id, client_id, fundi_id, completed_at, amount) in enumerate(paid):
+                created_at = min(completed_at + timedelta(hours=rng.expovariate(1 / 6)), now)
+                yield {"amount": round(amount, 2),
+                       "payment_method": weighted(rng, ["M-Pesa", "Card", "Cash"], [75, 15, 10]),
+                       "transaction_id": f"BX{seed:03d}{n:010d}",
+                       "status": weighted(rng, ["completed", "pending", "failed"], [92, 5, 3]),
+                       "job_id": job_id, "client_id": client_id, "fundi_id": fundi_id,
+                       "created_at": created_at, "updated_at": created_at}
+        payment_count = insert_chunked(backend, backend.Payment.__table__, payment_rows())
+        timings["reviews+payments"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        pick_user = Zipf(users + fundis, skew)
+        user_rank = list(range(1, users + fundis + 1))
+        rng.shuffle(user_rank)
+        unread = {}
+
+        def notification_rows():
+            for _ in range(notifications):
+                user_id = user_rank[pick_user.draw(rng) - 1]
+                created_at = now - timedelta(days=days * rng.random() ** 2)
+                is_read = rng.random() < (0.2 if (now - created_at).days < 2 else 0.9)
+                if not is_read:
+                    unread[user_id] = unread.get(user_id, 0) + 1
+                kind = weighted(rng, ["job_created", "job_assigned", "status_changed", "fundi_available"],
+                                [20, 25, 40, 15])
+                yield {"user_id": user_id, "title": kind.replace("_", " ").title(),
+                       "message": f"Synthetic {kind} notification", "type": kind,
+                       "is_read": is_read, "created_at": created_at}
+        notification_count = insert_chunked(backend, backend.Notification.__table__, notification_rows())
+        insert_chunked(backend, backend.NotificationCounter.__table__, (
+            {"user_id": user_id, "unread": count} for user_id, count in unread.items()))
+        timings["notifications"] = time.perf_counter() - started
+
+        # Fundi counters and ratings as the refresh_fundi_stats task would leave them
+        started = time.perf_counter()
+        db, Job, Review = backend.db, backend.Job, backend.Review
+        stats = {}
+        for fundi_id, status, count in db.session.execute(
+                db.select(Job.fundi_id, Job.status, db.func.count()).where(Job.fundi_id.isnot(None))
+                .group_by(Job.fundi_id, Job.status)):
+            row = stats.setdefault(fundi_id, {"b_id": fundi_id, "total_jobs": 0, "completed_jobs": 0, "rating": 0.0})
+            row["total_jobs"] += count if status != "cancelled" else 0
+            row["completed_jobs"] += count if status == "completed" else 0
+        for fundi_id, average in db.session.execute(
+                db.select(Review.fundi_id, db.func.avg(Review.rating)).group_by(Review.fundi_id)):
+            stats[fundi_id]["rating"] = round(float(average), 2)
+        fundi_table = backend.Fundi.__table__
+        if stats:
+            db.session.execute(
+                fundi_table.update().where(fundi_table.c.id == db.bindparam("b_id"))
+                .values(total_jobs=db.bindparam("total_jobs"), completed_jobs=db.bindparam("completed_jobs"),
+                        rating=db.bindparam("rating")),
+                list(stats.values()))
+        db.session.commit()
+        timings["fundi stats"] = time.perf_counter() - started
+
+    return {
+        "seed": seed, "skew": skew, "days": days, "password": BENCH_PASSWORD,
+        "generated_at": now.isoformat(),
+        "counts": {"users": users + fundis, "clients": len(client_ids), "fundis": fundis, "jobs": job_count,
+                   "status_events": event_count,
+                   "reviews": review_count, "payments": payment_count, "notifications": notification_count},
+        "client_ids": active_clients[:200],  # the busiest active clients, busiest first
+        "admin_ids": [i + 1 for i in range(0, users, 100)][:20],
+        "fundi_user_ids": [users + fundi_id for fundi_id in fundi_rank[:200]],  # the busiest fundis, busiest first
+        "timings": {name: round(seconds, 2) for name, seconds in timings.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic FundiMatch dataset")
+    parser.add_argument("--db", required=True, help="SQLite file to create (must not exist)")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    for name in SCALES["small"]:
+        parser.add_argument(f"--{name}", type=int, help=f"Override the scale's {name} count")
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent for activity per user")
+    args = parser.parse_args()
+
+    counts = dict(SCALES[args.scale])
+    counts.update({name: getattr(args, name) for name in counts if getattr(args, name) is not None})
+    backend = load_backend(args.db)
+    started = time.perf_counter()
+    manifest = generate(backend, days=args.days, seed=args.seed, skew=args.skew, **counts)
+    with open(args.db + ".manifest.json", "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Generated {manifest['counts']} in {time.perf_counter() - started:.1f}s")
+    print(f"Manifest: {args.db}.manifest.json")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+FundiMatch Benchmarks - API Load Test
+=====================================
+
+Runs scripted API scenarios against a synthetic dataset (datagen.py) and
+writes the results as JSON, so two commits can be compared with compare.py.
+
+Scenarios:
+- fundi_search    - ranked text search, nearest-fundi and filtered listings
+- booking_create  - POST /api/bookings from the busiest clients
+- dashboard       - admin, client and fundi dashboards
+- login           - POST /api/auth/login (a real bcrypt check per request)
+
+Targets:
+- client    - the Flask test client, in this process, one request at a time
+- gunicorn  - a real `gunicorn -c gunicorn.conf.py wsgi:app` process (the
+              production config) on a local port, driven by
+              --concurrency threads over keep-alive HTTP connections
+
+Both targets run with PROFILING_ENABLED=true, so the query count per
+request is read from the Server-Timing header, and RATELIMIT_ENABLED=false.
+Each scenario reports p50/p95/p99 latency, req/s, queries per request and
+status codes; the run also records peak RSS (this process for the client
+target, the gunicorn master plus workers for the gunicorn target).
+
+The database is generated once per scale/seed (or taken from --db) and
+copied before every run, so booking inserts never leak into the next run.
+
+Usage:
+    python benchmarks/loadtest.py                              # client, small scale
+    python benchmarks/loadtest.py --target gunicorn --workers 2 --concurrency 8
+    python benchmarks/loadtest.py --scale medium --requests 500 --scenarios fundi_search,dashboard
+    python benchmarks/compare.py benchmarks/results/OLD.json benchmarks/results/NEW.json
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import re
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlencode
+
+from common import LOCATIONS, ROOT_DIR, SKILLS, SPECIALIZATIONS, scatter_point
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) quer')
+SERVER_TIMING_DB = re.compile(r"db;dur=([\d.]+)")
+
+Scenario = namedtuple("Scenario", "name build requests_share")
+
+
+# Scenarios
+# =========
+# Each build(rng, manifest) returns (method, path, json_body or None)
+
+def fundi_search(rng, manifest):
+    town = rng.choice(LOCATIONS)
+    kind = rng.random()
+    if kind < 0.5:
+        params = {"q": " ".join(rng.sample(SKILLS, rng.randint(1, 2))), "limit": 20}
+        if rng.random() < 0.3:
+            params["location"] = town
+        return "GET", "/api/fundis/search?" + urlencode(params), None
+    if kind < 0.8:
+        latitude, longitude = scatter_point(rng, town)
+        params = {"lat": round(latitude, 5), "lng": round(longitude, 5), "k": 10}
+        if rng.random() < 0.5:
+            params["specialization"] = rng.choice(SPECIALIZATIONS)
+        return "GET", "/api/fundis/nearby?" + urlencode(params), None
+    params = {"specialization": rng.choice(SPECIALIZATIONS), "location": town, "is_available": "true"}
+    return "GET", "/api/fundis?" + urlencode(params), None
+
+
+def booking_create(rng, manifest):
+    town = rng.choice(LOCATIONS)
+    latitude, longitude = scatter_point(rng, town)
+    hours = rng.randint(1, 8)
+    return "POST", "/api/bookings", {
+        "description": f"Need {rng.choice(SKILLS)} done this week",
+        "location": f"{town}, Estate {rng.randint(1, 60)}",
+        "latitude": latitude, "longitude": longitude,
+        "client_id": rng.choice(manifest["client_ids"]),
+        "category_id": rng.randint(1, len(SPECIALIZATIONS)),
+        "hourly_rate": 1000.0, "estimated_hours": float(hours), "total_amount": 1000.0 * hours,
+    }
+
+
+def dashboard(rng, manifest):
+    role = rng.choices(["admin", "client", "fundi"], weights=[10, 60, 30])[0]
+    user_id = rng.choice(manifest[f"{role}_ids" if role != "fundi" else "fundi_user_ids"])
+    return "GET", f"/api/dashboard/{role}/{user_id}", None
+
+
+def login(rng, manifest):
+    user_id = rng.choice(manifest["client_ids"])
+    return "POST", "/api/auth/login", {"email": f"user{user_id - 1}@example.com", "password": manifest["password"]}
+
+
+# login pays for a bcrypt check per request, so it gets a fifth of the requests
+SCENARIOS = {scenario.name: scenario for scenario in [
+    Scenario("fundi_search", fundi_search, 1.0),
+    Scenario("booking_create", booking_create, 1.0),
+    Scenario("dashboard", dashboard, 1.0),
+    Scenario("login", login, 0.2),
+]}
+
+
+# Targets
+# =======
+
+class ClientTarget:
+    """Requests through the Flask test client, in this process"""
+
+    concurrency = 1
+
+    def __init__(self, db_path):
+        from common import load_backend
+        self.backend = load_backend(db_path)
+        self.client = self.backend.app.test_client()
+
+    def request(self, method, path, body):
+        response = self.client.open(path, method=method, json=body)
+        response.get_data()
+        return response.status_code, response.headers.get("Server-Timing", "")
+
+    def peak_rss_mb(self):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+    def close(self):
+        pass
+
+
+class GunicornTarget:
+    """Requests over HTTP to a gunicorn process started for the run"""
+
+    def __init__(self, db_path, workers=2, threads=1, concurrency=4, server_cmd=None):
+        self.concurrency = concurrency
+        self.port = free_port()
+        command = server_cmd or (f"{sys.executable} -m gunicorn -c gunicorn.conf.py wsgi:app "
+                                 f"--bind 127.0.0.1:{{port}} --workers {workers} --threads {threads}")
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", PROFILING_ENABLED="true",
+                   RATELIMIT_ENABLED="false")
+        self.log = tempfile.TemporaryFile()  # a pipe nobody reads would stall a chatty server
+        self.process = subprocess.Popen(command.format(port=self.port).split(), cwd=ROOT_DIR, env=env,
+                                        stdout=self.log, stderr=subprocess.STDOUT)
+        self.local = threading.local()
+        self.wait_until_ready()
+
+    def wait_until_ready(self, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                self.log.seek(0)
+                raise RuntimeError(f"Server exited: {self.log.read().decode(errors='replace')[-2000:]}")
+            try:
+                status, _ = self.request("GET", "/api/health", None)
+                if status == 200:
+                    return
+            except OSError:
+                self.local.connection = None
+            time.sleep(0.2)
+        self.close()
+        raise RuntimeError(f"Server did not answer /api/health within {timeout}s")
+
+    def request(self, method, path, body):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = self.local.connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=60)
+        payload = json.dumps(body) if body is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        try:
+            connection.request(method, path, body=payload, headers=headers)
+            response = connection.getresponse()
+            response.read()
+        except (http.client.HTTPException, OSError):
+            connection.close()
+            self.local.connection = None
+            raise
+        return response.status, response.getheader("Server-Timing", "")
+
+    def peak_rss_mb(self):
+        """Sum of the peak RSS (VmHWM) of the gunicorn master and its workers"""
+        return sum(proc_memory_kb(pid) for pid in process_tree(self.process.pid)) / 1024
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.log.close()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def process_tree(root_pid):
+    """root_pid and all its descendants (Linux /proc)"""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+    pids, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(children.get(pid, []))
+    return pids
+
+
+def proc_memory_kb(pid, field="VmHWM"):
+    """A memory field of /proc/<pid>/status in KiB (VmHWM = peak RSS, VmRSS = current)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+# Running
+# =======
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+
+def run_scenario(target, scenario, manifest, requests, warmup, seed):
+    """Send warmup + requests requests for one scenario and summarise them"""
+    rng = random.Random(f"{seed}:{scenario.name}")
+    planned = [scenario.build(rng, manifest) for _ in range(warmup + requests)]
+    for method, path, body in planned[:warmup]:
+        target.request(method, path, body)
+
+    def send(call):
+        started = time.perf_counter()
+        try:
+            status, timing = target.request(*call)
+        except (http.client.HTTPException, OSError):
+            status, timing = "failed", ""
+        return time.perf_counter() - started, status, timing
+
+    started = time.perf_counter()
+    if target.concurrency > 1:
+        with ThreadPoolExecutor(target.concurrency) as pool:
+            outcomes = list(pool.map(send, planned[warmup:]))
+    else:
+        outcomes = [send(call) for call in planned[warmup:]]
+    wall = time.perf_counter() - started
+
+    latencies = sorted(seconds * 1000 for seconds, _, _ in outcomes)
+    statuses = Counter(str(status) for _, status, _ in outcomes)
+    queries = [int(m.group(1)) for _, _, timing in outcomes for m in [SERVER_TIMING_QUERIES.search(timing)] if m]
+    db_ms = [float(m.group(1)) for _, _, timing in outcomes for m in [SERVER_TIMING_DB.search(timing)] if m]
+    return {
+        "requests": len(outcomes),
+        "errors": sum(count for status, count in statuses.items() if not status.isdigit() or int(status) >= 400),
+        "status_codes": dict(sorted(statuses.items())),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "max_ms": round(latencies[-1], 3),
+        "req_per_s": round(len(outcomes) / wall, 2),
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+        "db_ms_per_request": round(sum(db_ms) / len(db_ms), 3) if db_ms else None,
+    }
+
+
+def dataset(args):
+    """Path of the generated (or given) database and its manifest"""
+    source = args.db or os.path.join(tempfile.gettempdir(), f"fundimatch-bench-{args.scale}-{args.seed}.db")
+    if not os.path.exists(source + ".manifest.json"):
+        if args.db:
+            sys.exit(f"{args.db} has no manifest - generate it with datagen.py")
+        print(f"🔧 Generating {args.scale} dataset at {source}...")
+        for leftover in (source, source + "-wal", source + "-shm"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        subprocess.run([sys.executable, os.path.join(BENCH_DIR, "datagen.py"), "--db", source,
+                        "--scale", args.scale, "--seed", str(args.seed)], check=True)
+    with open(source + ".manifest.json") as f:
+        return source, json.load(f)
+
+
+def git_info():
+    def git(*argv):
+        result = subprocess.run(["git", *argv], cwd=ROOT_DIR, capture_output=True, text=True)
+        return result.stdout.strip() if result.returncode == 0 else None
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {"commit": git("rev-parse", "HEAD"), "subject": git("log", "-1", "--format=%s"),
+            "dirty": bool(status) if status is not None else None}
+
+
+def package_versions(*names):
+    from importlib import metadata
+    versions = {}
+    for name in names:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FundiMatch API load test")
+    parser.add_argument("--target", choices=["client", "gunicorn"], default="client")
+    parser.add_argument("--scale", default="small", help="datagen.py scale (ignored with --db)")
+    parser.add_argument("--db", help="Dataset made by datagen.py (copied before the run)")
+    parser.add_argument("--seed", type=int, default=7, help="Seed for the dataset and request mix")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenario names")
+    parser.add_argument("--requests", type=int, default=300, help="Requests per scenario (login gets a fifth)")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4, help="Client threads (gunicorn target)")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    parser.add_argument("--threads", type=int, default=1, help="gunicorn threads per worker")
+    parser.add_argument("--server-cmd", help="Server command instead of gunicorn; {port} is replaced")
+    parser.add_argument("--output", help="Result file (default benchmarks/results/<commit>-<target>-<scale>.json)")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s) {', '.join(unknown)}; choose from {', '.join(SCENARIOS)}")
+
+    source, manifest = dataset(args)
+    workdir = tempfile.mkdtemp(prefix="fundimatch-loadtest-")
+    db_path = os.path.join(workdir, "bench.db")
+    shutil.copyfile(source, db_path)
+
+    os.environ["PROFILING_ENABLED"] = "true"
+    os.environ["RATELIMIT_ENABLED"] = "false"
+    print(f"🚀 {args.target} target, dataset {manifest['counts']}")
+    if args.target == "client":
+        target = ClientTarget(db_path)
+    else:
+        target = GunicornTarget(db_path, args.workers, args.threads, args.concurrency, args.server_cmd)
+
+    results = {}
+    try:
+        print(f"\n{'Scenario':<16} {'req':>6} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+              f"{'req/s':>9} {'queries':>8}")
+        print("-" * 76)
+        for name in names:
+            scenario = SCENARIOS[name]
+            requests = max(1, int(args.requests * scenario.requests_share))
+            warmup = max(1, int(args.warmup * scenario.requests_share))
+            summary = results[name] = run_scenario(target, scenario, manifest, requests, warmup, args.seed)
+            queries = summary["queries_per_request"]
+            print(f"{name:<16} {summary['requests']:>6} {summary['errors']:>5} {summary['p50_ms']:>9.2f} "
+                  f"{summary['p95_ms']:>9.2f} {summary['p99_ms']:>9.2f} {summary['req_per_s']:>9.1f} "
+                  f"{'-' if queries is None else queries:>8}")
+        peak_rss_mb = target.peak_rss_mb()
+    finally:
+        target.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    git = git_info()
+    report = {
+        "meta": {
+            **git,
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "target": args.target,
+            "concurrency": target.concurrency,
+            "workers": args.workers if args.target == "gunicorn" else None,
+            "threads": args.threads if args.target == "gunicorn" else None,
+            "server_cmd": args.server_cmd,
+            "seed": args.seed,
+            "dataset": {"scale": None if args.db else args.scale, "counts": manifest["counts"],
+                        "manifest_seed": manifest["seed"], "skew": manifest["skew"]},
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "packages": package_versions("Flask", "Flask-SQLAlchemy", "SQLAlchemy", "gunicorn"),
+        },
+        "peak_rss_mb": round(peak_rss_mb, 1),
+        "scenarios": results,
+    }
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        commit = (git["commit"] or "unknown")[:10] + ("-dirty" if git["dirty"] else "")
+        output = os.path.join(RESULTS_DIR, f"{commit}-{args.target}-{args.scale if not args.db else 'custom'}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nPeak RSS: {peak_rss_mb:.1f} MB")
+    print(f"💾 Results: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Stress Check: Concurrent Job Assignment
+=======================================
+
+Resets --jobs jobs to pending and starts gunicorn with several workers
+and threads. --clients threads then race to assign every one of those
+jobs, each to a random fundi, through PUT /api/bookings/<id>/assign.
+
+Afterwards it checks that:
+- every job was won by exactly one request (one 200, the rest 409)
+- the stored fundi_id is the winner's and the version moved by exactly one
+- exactly one job_assigned outbox event was written per job
+
+Exits with status 1 if any job was double-assigned or lost, so it can
+gate a deploy.
+
+Usage:
+    python benchmarks/stress_assign.py
+    python benchmarks/stress_assign.py --jobs 2000 --clients 64 --workers 4 --threads 8
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from loadtest import GunicornTarget, dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent assignment stress check")
+    parser.add_argument("--db", help="Dataset made by datagen.py")
+    parser.add_argument("--scale", default="small")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--jobs", type=int, default=500, help="Jobs every client tries to assign")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    source, _ = dataset(args)
+    workdir = tempfile.mkdtemp(prefix="fundimatch-assign-")
+    db_path = os.path.join(workdir, "bench.db")
+    shutil.copyfile(source, db_path)
+    with sqlite3.connect(db_path) as connection:
+        job_ids = [row[0] for row in connection.execute("SELECT id FROM jobs ORDER BY id LIMIT ?", (args.jobs,))]
+        fundi_ids = [row[0] for row in connection.execute("SELECT id FROM fundis")]
+        marks = ",".join("?" * len(job_ids))
+        connection.execute(f"UPDATE jobs SET status = 'pending', version = 0 WHERE id IN ({marks})", job_ids)
+        outbox_before = connection.execute("SELECT COALESCE(MAX(id), 0) FROM outbox_events").fetchone()[0]
+
+    # No worker recycling: a connection dropped mid-request would hide who won
+    os.environ.update(OUTBOX_DISPATCHER="off", GUNICORN_MAX_REQUESTS="0")
+    target = GunicornTarget(db_path, workers=args.workers, threads=args.threads)
+    wins = defaultdict(list)  # job_id -> fundi ids of the 200 responses
+    statuses = Counter()
+    lock = threading.Lock()
+
+    def client(n):
+        rng = random.Random(f"{args.seed}:{n}")
+        order = job_ids[:]
+        rng.shuffle(order)
+        connection = http.client.HTTPConnection("127.0.0.1", target.port, timeout=60)
+        for job_id in order:
+            fundi_id = rng.choice(fundi_ids)
+            try:
+                connection.request("PUT", f"/api/bookings/{job_id}/assign", body=json.dumps({"fundi_id": fundi_id}),
+                                   headers={"Content-Type": "application/json"})
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except (http.client.HTTPException, OSError):
+                connection.close()
+                connection = http.client.HTTPConnection("127.0.0.1", target.port, timeout=60)
+                status = "error"
+            with lock:
+                statuses[status] += 1
+                if status == 200:
+                    wins[job_id].append(fundi_id)
+        connection.close()
+
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(args.clients) as pool:
+            list(pool.map(client, range(args.clients)))
+    finally:
+        target.close()
+    elapsed = time.perf_counter() - started
+
+    with sqlite3.connect(db_path) as connection:
+        stored = {row[0]: row[1:] for row in connection.execute(
+            f"SELECT id, fundi_id, status, version FROM jobs WHERE id IN ({marks})", job_ids)}
+        events = Counter(json.loads(payload)["job_id"] for (payload,) in connection.execute(
+            "SELECT payload FROM outbox_events WHERE topic = 'job_assigned' AND id > ?", (outbox_before,)))
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    problems = []
+    for job_id in job_ids:
+        won = wins.get(job_id, [])
+        fundi_id, status, version = stored[job_id]
+        if len(won) != 1:
+            problems.append(f"job {job_id}: {len(won)} successful assignments")
+        elif (fundi_id, status, version) != (won[0], "assigned", 1):
+            problems.append(f"job {job_id}: stored fundi {fundi_id}/{status}/v{version}, winner assigned {won[0]}")
+        if events[job_id] != 1:
+            problems.append(f"job {job_id}: {events[job_id]} job_assigned events")
+
+    total = sum(statuses.values())
+    print(f"{args.clients} clients x {len(job_ids)} jobs against {args.workers} workers x {args.threads} threads")
+    print(f"{total:,} requests in {elapsed:.1f}s ({total / elapsed:,.0f} req/s): "
+          + ", ".join(f"{status}: {count:,}" for status, count in sorted(statuses.items(), key=str)))
+    if problems:
+        print(f"❌ {len(problems)} problems:")
+        for problem in problems[:20]:
+            print(f"   {problem}")
+        sys.exit(1)
+    print(f"✅ Every job assigned exactly once ({len(job_ids)} winners, {statuses[409]:,} conflicts)")
+
+
+if __name__ == "__main__":
+    main()
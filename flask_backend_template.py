@@ -17,7 +17,7 @@ Author: Gibson Giteru
 Class: Moringa School Phase 3
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, g, request, jsonify, make_response, Response
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 from flask_bcrypt import Bcrypt
@@ -25,10 +25,41 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from marshmallow import Schema, fields, validate, ValidationError
 from datetime import datetime, timedelta
+from functools import wraps
+import click
+import hashlib
+import json
+import logging
 import os
+import sys
+import threading
+import time
+from sqlalchemy import bindparam, event
+from sqlalchemy.orm.exc import StaleDataError
 from google.auth.transport import requests as google_requests
 from google.oauth2 import id_token
 
+# Shared modules (metrics, caches) live in lib/ next to the CLI
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lib'))
+from metrics import metrics
+from cache import ReferenceCache, reference_cache
+from compression import CompressionMiddleware
+import profiling
+from pubsub import create_hub
+from matching import MatchIndex, job_spec, match_index_cache
+import analytics
+from db.search_index import ensure_search_index, rebuild_search_index, search_fundi_ids
+from db.schema import add_missing_columns
+from db.spatial import within_radius, nearest
+from db.rollups import Rollups
+from db.outbox import Outbox, BATCH_SIZE as OUTBOX_BATCH_SIZE
+from db.task_queue import TaskQueue, Worker, record_depth
+from db.job_events import JobStatusEvents
+from db.table_versions import TableVersions, upsert_increment
+from db.idempotency import IdempotencyStore, request_fingerprint, MAX_KEY_LENGTH as MAX_IDEMPOTENCY_KEY_LENGTH
+import geo
+from job_states import STATUSES as JOB_STATUSES, InvalidTransition, can_transition, check_status_change
+
 # Initialize Flask app
 app = Flask(__name__)
 
@@ -48,6 +79,8 @@ if not secret_key:
     else:
         secret_key = 'dev-secret-key-change-in-production'
 app.config['SECRET_KEY'] = secret_key
+# Rate limiting can be switched off for load tests (benchmarks/loadtest.py)
+app.config['RATELIMIT_ENABLED'] = os.environ.get('RATELIMIT_ENABLED', 'true').lower() == 'true'
 
 # Initialize extensions
 db = SQLAlchemy(app)
@@ -59,14 +92,46 @@ limiter = Limiter(
 )
 
 # SECURITY: Add security headers
+SECURITY_HEADERS = {
+    'X-Content-Type-Options': 'nosniff',
+    'X-Frame-Options': 'DENY',
+    'X-XSS-Protection': '1; mode=block',
+    'Strict-Transport-Security': 'max-age=31536000; includeSubDomains',
+}
+
 @app.after_request
 def add_security_headers(response):
-    response.headers['X-Content-Type-Options'] = 'nosniff'
-    response.headers['X-Frame-Options'] = 'DENY'
-    response.headers['X-XSS-Protection'] = '1; mode=block'
-    response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
+    response.headers.update(SECURITY_HEADERS)
     return response
 
+# PERFORMANCE: Opt-in request profiling (PROFILING_ENABLED=true)
+# Adds a Server-Timing header (app/db time, query count), per-endpoint latency,
+# DB time and query-count histograms on /api/metrics, and logs statements over
+# SLOW_QUERY_MS and requests over SLOW_REQUEST_MS. Nothing is hooked when off.
+if profiling.ENABLED:
+    with app.app_context():
+        profiling.install(db.engine)
+    
+    @app.before_request
+    def start_request_profile():
+        g.profile_token = profiling.start_request()
+    
+    @app.after_request
+    def finish_request_profile(response):
+        token = g.pop('profile_token', None)
+        if token is not None:
+            profile = profiling.finish_request(token)
+            response.headers.add('Server-Timing', profiling.server_timing(profile))
+            profiling.record_request(profile, request.endpoint or 'unmatched', request.method, response.status_code)
+        return response
+    
+    @app.teardown_request
+    def discard_request_profile(error=None):
+        # after_request is skipped when a view raises
+        token = g.pop('profile_token', None)
+        if token is not None:
+            profiling.finish_request(token)
+
 # SECURITY: Error handling middleware
 @app.errorhandler(ValidationError)
 def handle_validation_error(error):
@@ -82,7 +147,16 @@ def internal_error(error):
 
 # SECURITY: Configure CORS for production
 allowed_origins = os.environ.get('ALLOWED_ORIGINS', 'http://localhost:5173,http://localhost:3000').split(',')
-CORS(app, origins=allowed_origins)
+CORS(app, origins=allowed_origins, expose_headers=['Idempotent-Replayed'])
+
+# PERFORMANCE: gzip/brotli response compression for clients that accept it
+if os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true':
+    app.wsgi_app = CompressionMiddleware(
+        app.wsgi_app,
+        min_size=int(os.environ.get('COMPRESSION_MIN_SIZE', 1024)),
+        level=int(os.environ.get('COMPRESSION_LEVEL', 6)),
+        brotli_quality=int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4))
+    )
 
 # SECURITY: Input validation schemas
 class UserSchema(Schema):
@@ -98,6 +172,8 @@ class FundiSchema(Schema):
     hourly_rate = fields.Float(required=True, validate=validate.Range(min=0))
     location = fields.Str(required=True, validate=validate.Length(min=2, max=100))
     bio = fields.Str(allow_none=True, validate=validate.Length(max=1000))
+    latitude = fields.Float(allow_none=True, validate=validate.Range(min=-90, max=90))
+    longitude = fields.Float(allow_none=True, validate=validate.Range(min=-180, max=180))
 
 class JobSchema(Schema):
     title = fields.Str(required=True, validate=validate.Length(min=5, max=200))
@@ -105,6 +181,8 @@ class JobSchema(Schema):
     location = fields.Str(required=True, validate=validate.Length(min=2, max=200))
     budget = fields.Float(allow_none=True, validate=validate.Range(min=0))
     hourly_rate = fields.Float(allow_none=True, validate=validate.Range(min=0))
+    latitude = fields.Float(allow_none=True, validate=validate.Range(min=-90, max=90))
+    longitude = fields.Float(allow_none=True, validate=validate.Range(min=-180, max=180))
 
 # Import models (same as CLI)
 # We need to redefine the models for Flask-SQLAlchemy
@@ -129,6 +207,9 @@ class Fundi(db.Model):
     experience = db.Column(db.String(50), nullable=False)
     hourly_rate = db.Column(db.Float, nullable=False)
     location = db.Column(db.String(100), nullable=False)
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+    geohash = db.Column(db.String(12), nullable=True, index=True)  # set from latitude/longitude
     bio = db.Column(db.Text, nullable=True)
     rating = db.Column(db.Float, default=0.0, nullable=False)
     total_jobs = db.Column(db.Integer, default=0, nullable=False)
@@ -154,15 +235,21 @@ class Job(db.Model):
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=False)
     location = db.Column(db.String(200), nullable=False)
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+    geohash = db.Column(db.String(12), nullable=True, index=True)  # set from latitude/longitude
     status = db.Column(db.String(20), default="pending", nullable=False)
     priority = db.Column(db.String(20), default="medium", nullable=False)
     budget = db.Column(db.Float, nullable=True)
     hourly_rate = db.Column(db.Float, nullable=True)
     estimated_hours = db.Column(db.Float, nullable=True)
     total_amount = db.Column(db.Float, nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=True, index=True)
     scheduled_date = db.Column(db.DateTime, nullable=True)
     completed_at = db.Column(db.DateTime, nullable=True)
+    # Bumped on every write; assignment and ORM flushes only apply to the version they read
+    version = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     client_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     fundi_id = db.Column(db.Integer, db.ForeignKey("fundis.id"), nullable=True)
     category_id = db.Column(db.Integer, db.ForeignKey("categories.id"), nullable=False)
@@ -171,6 +258,8 @@ class Job(db.Model):
     fundi = db.relationship("Fundi", foreign_keys=[fundi_id])
     category = db.relationship("Category")
 
+    __mapper_args__ = {'version_id_col': version}
+
 class Review(db.Model):
     __tablename__ = "reviews"
     
@@ -180,7 +269,8 @@ class Review(db.Model):
     job_id = db.Column(db.Integer, db.ForeignKey("jobs.id"), nullable=False)
     client_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     fundi_id = db.Column(db.Integer, db.ForeignKey("fundis.id"), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=True, index=True)
     
     job = db.relationship("Job", backref="reviews")
     client = db.relationship("User", foreign_keys=[client_id])
@@ -197,7 +287,8 @@ class Payment(db.Model):
     job_id = db.Column(db.Integer, db.ForeignKey("jobs.id"), nullable=False)
     client_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     fundi_id = db.Column(db.Integer, db.ForeignKey("fundis.id"), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=True, index=True)
     
     job = db.relationship("Job")
     client = db.relationship("User", foreign_keys=[client_id])
@@ -216,76 +307,756 @@ class Notification(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     
     user = db.relationship("User")
+    
+    # Inbox pages and unread scans walk (user_id, is_read, id) in index order
+    __table_args__ = (db.Index('ix_notifications_user_read_id', 'user_id', 'is_read', 'id'),)
+
+# Unread notification counter per user, kept in step with notification writes
+class NotificationCounter(db.Model):
+    __tablename__ = "notification_counters"
+    
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    unread = db.Column(db.Integer, default=0, nullable=False)
+
+# Fundis and jobs keep their geohash in step with their coordinates
+for _located in (Fundi, Job):
+    event.listen(_located, 'before_insert', geo.sync_geohash)
+    event.listen(_located, 'before_update', geo.sync_geohash)
+
+# Daily rollup tables read by the dashboards (see refresh_rollups)
+rollups = Rollups(db.metadata)
+
+# Append-only job status history (lib/db/job_events.py); transitions are
+# checked against lib/job_states.py and recorded in the same transaction
+job_events = JobStatusEvents(db.metadata)
+
+def record_status_events(events, at=None):
+    """Append (job_id, from_status, to_status) rows in the current transaction"""
+    job_events.record(db.session.connection(), events, at)
+
+@event.listens_for(db.session, 'before_flush')
+def _queue_deleted_rollup_days(session, flush_context, instances):
+    # Deleted rows leave no updated_at behind, so queue their days for the next refresh
+    if session.deleted:
+        rollups.mark_deleted_days(session.connection(), session.deleted)
+
+# Columns/indexes added to existing tables since they were first created
+@event.listens_for(db.metadata, 'after_create')
+def _upgrade_schema(target, connection, **kw):
+    add_missing_columns(connection, target)
+
+# Full-text fundi search index (FTS5 / tsvector) - created with the tables
+@event.listens_for(db.metadata, 'after_create')
+def _create_search_index(target, connection, **kw):
+    ensure_search_index(connection)
+
+# Column projections for list endpoints
+# =====================================
+# List endpoints only need a handful of columns, so they select exactly those
+# instead of loading full ORM entities (password hashes, bio/description Text
+# columns, identity-map bookkeeping). Rows keep attribute access by name.
+USER_LIST_COLUMNS = (
+    User.id, User.username, User.email, User.phone,
+    User.role, User.is_active, User.created_at
+)
+
+FUNDI_LIST_COLUMNS = (
+    Fundi.id, Fundi.user_id, User.username, User.email, User.phone, User.role,
+    Fundi.specialization, Fundi.experience, Fundi.hourly_rate, Fundi.location,
+    Fundi.latitude, Fundi.longitude,
+    Fundi.bio, Fundi.rating, Fundi.is_available, User.is_active, Fundi.created_at
+)
+
+def serialize_fundi_row(fundi):
+    """Serialise one FUNDI_LIST_COLUMNS row"""
+    return {
+        'id': fundi.id,
+        'user_id': fundi.user_id,
+        'username': fundi.username,
+        'email': fundi.email,
+        'phone': fundi.phone,
+        'role': fundi.role,
+        'specialization': fundi.specialization,
+        'experience': fundi.experience,
+        'hourly_rate': fundi.hourly_rate,
+        'location': fundi.location,
+        'latitude': fundi.latitude,
+        'longitude': fundi.longitude,
+        'bio': fundi.bio,
+        'rating': fundi.rating,
+        'is_available': fundi.is_available,
+        'is_active': fundi.is_active,
+        'created_at': fundi.created_at.isoformat()
+    }
+
+def fundi_rows_by_id(ids, session=None):
+    """FUNDI_LIST_COLUMNS rows for the given ids, keyed by id"""
+    if not ids:
+        return {}
+    rows = (session or db.session).execute(
+        db.select(*FUNDI_LIST_COLUMNS).join(User, Fundi.user_id == User.id).where(Fundi.id.in_(ids)))
+    return {row.id: row for row in rows}
+
+BOOKING_LIST_COLUMNS = (
+    Job.id, Job.title, Job.location, Job.status, Job.client_id, Job.fundi_id,
+    Category.name.label('category_name'), Job.total_amount, Job.hourly_rate,
+    Job.estimated_hours, Job.created_at, Job.scheduled_date, Job.version
+)
+
+def serialize_booking_row(job):
+    """Serialise one BOOKING_LIST_COLUMNS row"""
+    return {
+        'id': job.id,
+        'description': job.title,
+        'location': job.location,
+        'status': job.status,
+        'client_id': job.client_id,
+        'fundi_id': job.fundi_id,
+        'service_type': job.category_name or 'General',
+        'total_amount': job.total_amount,
+        'hourly_rate': job.hourly_rate,
+        'estimated_hours': job.estimated_hours,
+        'created_at': job.created_at.isoformat(),
+        'scheduled_date': job.scheduled_date.isoformat() if job.scheduled_date else None,
+        'version': job.version
+    }
+
+# Table versions and conditional GET
+# ===================================
+# Every committed write bumps a per-table version row (lib/db/table_versions.py),
+# right after the commit and in its own short transaction. The CLI session
+# factory is tracked the same way, so CLI writes invalidate these caches too.
+# Read endpoints derive their ETag/Last-Modified from the versions of the
+# tables they read, so a repeat request can be answered with 304 Not Modified
+# after a single primary-key lookup, without running the main query.
+# Writes made outside a session (raw connections, SQL) must call
+# bump_table_versions().
+table_versions = TableVersions(db.metadata)
+table_versions.track(db.session)
+
+def bump_table_versions(connection, tables):
+    """Increment the version row of each table name on the given connection"""
+    table_versions.bump(connection, tables)
+
+def get_table_versions(tables, session=None):
+    """Return {table: (version, updated_at)} for the given table names"""
+    return table_versions.get((session or db.session).connection(), tables)
+
+def table_validators(full_path, tables, versions, varies=None):
+    """
+    Weak ETag value and Last-Modified for a conditional read
+    ========================================================
+    
+    Shared by conditional() and the ASGI app so both deployments hand out
+    the same validators for the same request.
+    
+    Returns:
+        tuple: (etag, last_modified or None)
+    """
+    fingerprint = full_path + '|' + ','.join(f"{name}:{versions[name][0]}" for name in tables)
+    if varies is not None:
+        fingerprint += '|' + str(varies)
+    stamps = [stamp for _, stamp in versions.values() if stamp]
+    last_modified = max(stamps).replace(microsecond=0) if stamps else None
+    return hashlib.sha1(fingerprint.encode('utf-8')).hexdigest(), last_modified
+
+def conditional(*tables, vary=None):
+    """
+    Add ETag / Last-Modified support to a read endpoint
+    ==================================================
+    
+    The validator is built from the request path plus the versions of the
+    given tables. Matching If-None-Match (or, without it, If-Modified-Since)
+    returns 304 before the view runs.
+    
+    vary, if given, is a callable whose result is mixed into the ETag for
+    responses that also change without a write (e.g. "last 30 days" windows);
+    such endpoints skip the If-Modified-Since shortcut.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag, last_modified = table_validators(request.full_path, tables, get_table_versions(tables),
+                                                   None if vary is None else vary())
+            endpoint = request.endpoint
+            
+            if request.if_none_match:
+                fresh = request.if_none_match.contains_weak(etag)
+            elif request.if_modified_since and last_modified and vary is None:
+                fresh = last_modified <= request.if_modified_since.replace(tzinfo=None)
+            else:
+                fresh = False
+            
+            if fresh:
+                metrics.inc('conditional_requests_total', endpoint=endpoint, result='not_modified')
+                response = Response(status=304)
+            else:
+                metrics.inc('conditional_requests_total', endpoint=endpoint, result='full')
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            if last_modified:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
+
+metrics.describe('conditional_requests_total', 'Conditional GET outcomes per endpoint (not_modified = 304 served)')
+
+# Idempotency keys
+# ================
+# Create endpoints accept an Idempotency-Key header (lib/db/idempotency.py).
+# A retry with the same key and body gets the first response back instead of
+# creating a duplicate; `flask prune-idempotency-keys` deletes expired keys.
+idempotency = IdempotencyStore(db.metadata)
+
+def idempotent(view):
+    """
+    Replay the stored response for a repeated Idempotency-Key
+    ========================================================
+
+    Requests without the header run as before. The key is claimed before the
+    view runs; a duplicate that arrives while the first request is still
+    running gets 409, and a key reused with a different body gets 422.
+    Responses below 500 are stored and replayed with Idempotent-Replayed: true.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if key is None:
+            return view(*args, **kwargs)
+        endpoint = request.endpoint
+        if not key or len(key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+            return jsonify({'error': f'Idempotency-Key must be 1-{MAX_IDEMPOTENCY_KEY_LENGTH} characters'}), 400
+
+        scope = f"{request.method} {request.path}"
+        outcome, row = idempotency.claim(db.engine, scope, key, request_fingerprint(request.get_data()))
+        metrics.inc('idempotency_requests_total', endpoint=endpoint,
+                    result='replayed' if outcome == 'replay' else outcome)
+        if outcome == 'mismatch':
+            return jsonify({'error': 'Idempotency-Key was already used with a different request body'}), 422
+        if outcome == 'in_progress':
+            response = jsonify({'error': 'A request with this Idempotency-Key is still in progress'})
+            response.headers['Retry-After'] = '1'
+            return response, 409
+        if outcome == 'replay':
+            response = Response(row.response_body, status=row.status_code, content_type=row.content_type)
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            idempotency.release(db.engine, scope, key)
+            raise
+        if response.status_code >= 500 or response.is_streamed:
+            idempotency.release(db.engine, scope, key)
+            metrics.inc('idempotency_requests_total', endpoint=endpoint, result='released')
+        else:
+            idempotency.complete(db.engine, scope, key, response.status_code, response.content_type,
+                                 response.get_data(as_text=True))
+        return response
+    return wrapper
+
+# Reference data cache
+# ====================
+# Categories change a few times a year but are read on every page. They are
+# cached per worker and reloaded whenever the categories table version moves.
+def cached_categories():
+    """Return all categories as (id, name, description, icon) rows"""
+    version = get_table_versions(['categories'])['categories'][0]
+    return reference_cache.get(
+        'categories',
+        lambda: Category.query.with_entities(Category.id, Category.name, Category.description, Category.icon)
+                              .order_by(Category.id).all(),
+        version=version
+    )
+
+def category_name(category_id, default='General'):
+    """Resolve a category id to its name from the cache"""
+    for category in cached_categories():
+        if category.id == category_id:
+            return category.name
+    return default
 
 # Notification helpers
-def notify_admins_of_new_fundi(new_fundi):
-    admins = User.query.filter_by(role='admin', is_active=True).all()
-    for admin in admins:
-        n = Notification(
-            user_id=admin.id,
+# ====================
+# Every notification insert goes through add_notifications(), which also
+# moves the per-user unread counters in the same transaction: an upsert adds
+# to the user's row or creates it. Reads never write. When create_all()
+# first creates the counters table, it is seeded from a COUNT of the unread
+# notifications already there (see seed_unread_counters), so a new row only
+# ever starts from notifications it has seen.
+def adjust_unread_counts(deltas):
+    """Apply {user_id: delta} to existing unread counters in the current transaction"""
+    rows = [{'uid': user_id, 'delta': delta} for user_id, delta in deltas.items() if delta]
+    if rows:
+        counter_table = NotificationCounter.__table__
+        db.session.connection().execute(
+            counter_table.update().where(counter_table.c.user_id == bindparam('uid'))
+            .values(unread=counter_table.c.unread + bindparam('delta')),
+            rows
+        )
+
+def add_notifications(user_ids, title, message, type):
+    """Queue one notification per user id and bump their unread counters"""
+    deltas = {}
+    for uid in user_ids:
+        db.session.add(Notification(user_id=uid, title=title, message=message, type=type))
+        deltas[uid] = deltas.get(uid, 0) + 1
+    # Upsert, so a user's first notification creates their counter row and
+    # the decrements in adjust_unread_counts always find one
+    upsert_increment(db.session.connection(), NotificationCounter.__table__, 'user_id', 'unread',
+                     [{'user_id': uid, 'unread': delta} for uid, delta in deltas.items()])
+
+def active_user_ids(role):
+    """Ids of all active users with the given role"""
+    return [row.id for row in User.query.with_entities(User.id).filter_by(role=role, is_active=True).all()]
+
+# Outbox: notification side effects
+# =================================
+# Routes record what happened with notify_*() in the same transaction as the
+# change and commit once; the outbox dispatcher (lib/db/outbox.py) fans the
+# notifications out afterwards, in batches, with retries. By default each
+# worker runs a dispatcher thread that wakes on every commit that enqueued
+# events; with OUTBOX_DISPATCHER=off run `flask dispatch-outbox --loop`
+# instead (or call dispatch_outbox() directly, e.g. from tests).
+outbox = Outbox(db.metadata)
+OUTBOX_DISPATCHER = os.environ.get('OUTBOX_DISPATCHER', 'thread').lower()  # thread | off
+OUTBOX_POLL_SECONDS = float(os.environ.get('OUTBOX_POLL_SECONDS', 5))
+
+def notify_on_fundi_registered(new_fundi):
+    outbox.enqueue(db.session, 'fundi_registered', fundi_id=new_fundi.id, username=new_fundi.user.username,
+                   specialization=new_fundi.specialization, location=new_fundi.location)
+
+def notify_on_job_created(job):
+    outbox.enqueue(db.session, 'job_created', job_id=job.id, title=job.title, client_id=job.client_id)
+
+def notify_on_job_assigned(job, fundi_id):
+    outbox.enqueue(db.session, 'job_assigned', job_id=job.id, title=job.title,
+                   client_id=job.client_id, fundi_id=fundi_id)
+
+def notify_on_status_change(job):
+    outbox.enqueue(db.session, 'job_status_changed', job_id=job.id, title=job.title, status=job.status,
+                   client_id=job.client_id, fundi_id=job.fundi_id)
+
+# Delivery handlers get every due event of their topic at once. They run all
+# their queries before adding notifications so nothing is autoflushed early.
+def fundi_user_ids(fundi_ids):
+    """{fundi_id: user_id} for the given fundi ids"""
+    ids = {fundi_id for fundi_id in fundi_ids if fundi_id}
+    if not ids:
+        return {}
+    return dict(Fundi.query.with_entities(Fundi.id, Fundi.user_id).filter(Fundi.id.in_(ids)).all())
+
+def deliver_fundi_registered(events):
+    admins, clients = active_user_ids('admin'), active_user_ids('client')
+    for e in events:
+        add_notifications(
+            admins,
             title="New Fundi Registration",
-            message=f"New fundi {new_fundi.user.username} ({new_fundi.specialization}) in {new_fundi.location}",
+            message=f"New fundi {e['username']} ({e['specialization']}) in {e['location']}",
             type="fundi_registered"
         )
-        db.session.add(n)
-    db.session.commit()
-
-def notify_clients_of_new_fundi(new_fundi):
-    clients = User.query.filter_by(role='client', is_active=True).all()
-    for client in clients:
-        n = Notification(
-            user_id=client.id,
+        add_notifications(
+            clients,
             title="New Fundi Available",
-            message=f"{new_fundi.specialization} fundi available in {new_fundi.location}",
+            message=f"{e['specialization']} fundi available in {e['location']}",
             type="fundi_available"
         )
-        db.session.add(n)
-    db.session.commit()
 
-def notify_on_job_created(job):
-    admins = User.query.filter_by(role='admin', is_active=True).all()
-    for admin in admins:
-        n = Notification(
-            user_id=admin.id,
+def deliver_job_created(events):
+    admins = active_user_ids('admin')
+    for e in events:
+        add_notifications(
+            admins,
             title="New Job Created",
-            message=f"Job '{job.title}' created by client #{job.client_id}",
+            message=f"Job '{e['title']}' created by client #{e['client_id']}",
             type="job_created"
         )
-        db.session.add(n)
-    db.session.commit()
 
-def notify_on_job_assigned(job):
-    targets = []
-    if job.fundi_id:
-        fundi = Fundi.query.get(job.fundi_id)
-        if fundi:
-            targets.append(fundi.user_id)
-    targets.append(job.client_id)
-    for uid in targets:
-        n = Notification(
-            user_id=uid,
+def deliver_job_assigned(events):
+    fundi_users = fundi_user_ids(e['fundi_id'] for e in events)
+    for e in events:
+        targets = [fundi_users[e['fundi_id']]] if e['fundi_id'] in fundi_users else []
+        add_notifications(
+            targets + [e['client_id']],
             title="Job Assigned",
-            message=f"Job '{job.title}' assigned to fundi #{job.fundi_id}",
+            message=f"Job '{e['title']}' assigned to fundi #{e['fundi_id']}",
             type="job_assigned"
         )
-        db.session.add(n)
-    db.session.commit()
 
-def notify_on_status_change(job):
-    targets = [job.client_id]
-    if job.fundi_id:
-        fundi = Fundi.query.get(job.fundi_id)
-        if fundi:
-            targets.append(fundi.user_id)
-    for uid in targets:
-        n = Notification(
-            user_id=uid,
+def deliver_job_status_changed(events):
+    fundi_users = fundi_user_ids(e['fundi_id'] for e in events)
+    for e in events:
+        targets = [e['client_id']]
+        if e['fundi_id'] in fundi_users:
+            targets.append(fundi_users[e['fundi_id']])
+        add_notifications(
+            targets,
             title="Job Status Updated",
-            message=f"Job '{job.title}' is now {job.status}",
+            message=f"Job '{e['title']}' is now {e['status']}",
             type="status_changed"
         )
-        db.session.add(n)
+
+OUTBOX_HANDLERS = {
+    'fundi_registered': deliver_fundi_registered,
+    'job_created': deliver_job_created,
+    'job_assigned': deliver_job_assigned,
+    'job_status_changed': deliver_job_status_changed,
+}
+
+def dispatch_outbox(batch_size=OUTBOX_BATCH_SIZE, max_batches=None):
+    """
+    Deliver due outbox events until none are left
+    ============================================
+    
+    Runs in the calling thread (needs an app context) and commits once per
+    batch. Returns the summed claimed/delivered/retried/dead counts.
+    """
+    totals = {'claimed': 0, 'delivered': 0, 'retried': 0, 'dead': 0}
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        stats = outbox.dispatch_batch(db.session, OUTBOX_HANDLERS, batch_size)
+        batches += 1
+        for key, value in stats.items():
+            totals[key] += value
+        if stats['claimed'] < batch_size:
+            break
+    return totals
+
+_outbox_wakeup = threading.Event()
+_outbox_dispatcher = {'thread': None, 'lock': threading.Lock()}
+
+def _run_outbox_dispatcher():
+    while True:
+        _outbox_wakeup.wait(OUTBOX_POLL_SECONDS)
+        _outbox_wakeup.clear()
+        try:
+            with app.app_context():
+                dispatch_outbox()
+        except Exception:
+            logging.getLogger(__name__).exception("Outbox dispatch failed")
+
+def start_outbox_dispatcher():
+    """Start this worker's dispatcher thread if it is not running yet"""
+    with _outbox_dispatcher['lock']:
+        thread = _outbox_dispatcher['thread']
+        if thread is None or not thread.is_alive():
+            thread = threading.Thread(target=_run_outbox_dispatcher, name='outbox-dispatcher', daemon=True)
+            thread.start()
+            _outbox_dispatcher['thread'] = thread
+
+@event.listens_for(db.session, 'after_commit')
+def _wake_outbox_dispatcher(session):
+    if session.info.pop('outbox_enqueued', 0) and OUTBOX_DISPATCHER == 'thread':
+        start_outbox_dispatcher()
+        _outbox_wakeup.set()
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_outbox_events(session):
+    session.info.pop('outbox_enqueued', None)
+
+# Background tasks
+# ================
+# Work that can happen after the response goes out is enqueued as a task
+# (lib/db/task_queue.py) in the request's transaction and run by worker.py,
+# the Procfile `worker:` process. `flask run-tasks` runs due tasks in-process.
+tasks = TaskQueue(db.metadata)
+
+@tasks.task('refresh_fundi_stats')
+def refresh_fundi_stats(fundi_id):
+    """Recompute a fundi's job counters and average review rating"""
+    fundi = db.session.get(Fundi, fundi_id)
+    if fundi is None:
+        return
+    counts = dict(Job.query.with_entities(Job.status, db.func.count())
+                  .filter(Job.fundi_id == fundi_id).group_by(Job.status).all())
+    fundi.total_jobs = sum(count for status, count in counts.items() if status != 'cancelled')
+    fundi.completed_jobs = counts.get('completed', 0)
+    average = db.session.query(db.func.avg(Review.rating)).filter(Review.fundi_id == fundi_id).scalar()
+    if average is not None:
+        fundi.rating = round(float(average), 2)
+
+def queue_fundi_stats(*fundi_ids):
+    """Enqueue refresh_fundi_stats for each distinct fundi id"""
+    tasks.enqueue_many(db.session, 'refresh_fundi_stats',
+                       [{'fundi_id': fundi_id} for fundi_id in sorted({fundi_id for fundi_id in fundi_ids if fundi_id})])
+
+def task_worker(concurrency=None):
+    """A Worker running this app's tasks inside an app context"""
+    return Worker(tasks, db.engine, lambda: db.session, concurrency=concurrency, context=app.app_context)
+
+# The depth gauges need a GROUP BY over background_tasks, so the counts are
+# reused for TASK_DEPTH_TTL seconds instead of being queried on every scrape
+task_depth_cache = ReferenceCache('task_depth', ttl=float(os.environ.get('TASK_DEPTH_TTL', 15)))
+
+def _load_task_depth():
+    with app.app_context(), db.engine.connect() as connection:
+        return tasks.depth(connection)
+
+def _collect_task_depth(registry):
+    record_depth(tasks, task_depth_cache.get('depth', _load_task_depth), registry)
+
+metrics.register_collector(_collect_task_depth)
+
+def serialize_notification(n):
+    return {
+        'id': n.id,
+        'title': n.title,
+        'message': n.message,
+        'type': n.type,
+        'is_read': n.is_read,
+        'created_at': n.created_at.isoformat()
+    }
+
+NOTIFICATION_COLUMNS = (
+    Notification.id, Notification.title, Notification.message,
+    Notification.type, Notification.is_read, Notification.created_at
+)
+
+# Location queries
+# ================
+# Radius and nearest-neighbour lookups run on the geohash index (db/spatial.py)
+# and return (id, distance_km) pairs; callers load the columns they need.
+MAX_SEARCH_RADIUS_KM = 500
+FUNDI_JOB_RADIUS_KM = float(os.environ.get('FUNDI_JOB_RADIUS_KM', 25))
+
+def point_from_args(require=False, args=None):
+    """
+    Read lat/lng/radius_km query params
+    
+    Returns (latitude, longitude, radius_km or None), or None when no point
+    was given. Raises ValueError for partial or out-of-range input. args
+    defaults to request.args (the ASGI app passes its own MultiDict).
+    """
+    args = request.args if args is None else args
+    latitude = args.get('lat', type=float)
+    longitude = args.get('lng', type=float)
+    radius_km = args.get('radius_km', type=float)
+    if latitude is None and longitude is None and not require:
+        if radius_km is not None:
+            raise ValueError('radius_km needs lat and lng')
+        return None
+    if not geo.valid_coordinates(latitude, longitude):
+        raise ValueError('lat and lng must both be given as valid coordinates')
+    if radius_km is not None and not 0 < radius_km <= MAX_SEARCH_RADIUS_KM:
+        raise ValueError(f'radius_km must be between 0 and {MAX_SEARCH_RADIUS_KM}')
+    return latitude, longitude, radius_km
+
+def coordinates_from_json(data):
+    """Optional (latitude, longitude) from a request body; ValueError if invalid"""
+    latitude, longitude = data.get('latitude'), data.get('longitude')
+    if latitude is None and longitude is None:
+        return None, None
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        raise ValueError('latitude and longitude must both be numbers')
+    if not geo.valid_coordinates(latitude, longitude):
+        raise ValueError('latitude/longitude out of range')
+    return latitude, longitude
+
+# Fundi matching
+# ==============
+def get_match_index():
+    """Candidate lists for matching, rebuilt when the fundis table changes"""
+    def load():
+        rows = Fundi.query.with_entities(
+            Fundi.id, Fundi.specialization, Fundi.location, Fundi.hourly_rate,
+            Fundi.rating, Fundi.total_jobs, Fundi.completed_jobs, Fundi.latitude, Fundi.longitude
+        ).filter(Fundi.is_available == True).all()
+        return MatchIndex.build(rows)
+    version = get_table_versions(['fundis'])['fundis'][0]
+    return match_index_cache.get('fundis', load, version=version)
+
+def busy_fundi_ids(scheduled_date, exclude_job_id=None):
+    """Fundis with an active job on the same day as scheduled_date"""
+    if scheduled_date is None:
+        return set()
+    day_start = datetime(scheduled_date.year, scheduled_date.month, scheduled_date.day)
+    q = Job.query.with_entities(Job.fundi_id).filter(
+        Job.fundi_id.isnot(None),
+        Job.status.in_(('assigned', 'in_progress')),
+        Job.scheduled_date >= day_start,
+        Job.scheduled_date < day_start + timedelta(days=1)
+    )
+    if exclude_job_id is not None:
+        q = q.filter(Job.id != exclude_job_id)
+    return {row.fundi_id for row in q.all()}
+
+# Live notification push (Server-Sent Events)
+# ===========================================
+# New notifications are serialised when they are flushed and published to the
+# pub/sub hub once the transaction commits, so streams never see rolled-back
+# rows. PUBSUB_BACKEND picks how messages reach the other gunicorn workers.
+notification_hub = create_hub(dsn=database_url)
+SSE_HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', 15))
+SSE_MAX_DURATION_SECONDS = float(os.environ.get('SSE_MAX_DURATION_SECONDS', 300))
+SSE_RETRY_MS = int(os.environ.get('SSE_RETRY_MS', 3000))
+SSE_BACKLOG_LIMIT = 100
+
+@event.listens_for(db.session, 'after_flush')
+def _queue_notification_push(session, flush_context):
+    pending = [(n.user_id, n.id, serialize_notification(n))
+               for n in session.new if isinstance(n, Notification)]
+    if pending:
+        session.info.setdefault('notification_push', []).extend(pending)
+
+@event.listens_for(db.session, 'after_commit')
+def _publish_notification_push(session):
+    pending = session.info.pop('notification_push', None)
+    if pending:
+        try:
+            notification_hub.publish(pending)
+        except Exception as e:
+            # Clients catch up from the database on their next reconnect
+            logging.getLogger(__name__).warning("Notification push failed: %s", e)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_notification_push(session):
+    session.info.pop('notification_push', None)
+
+def format_sse(data, event_id=None, event_type=None):
+    """Render one Server-Sent Events frame"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event_type:
+        lines.append(f'event: {event_type}')
+    lines.append('data: ' + json.dumps(data, separators=(',', ':')))
+    return '\n'.join(lines) + '\n\n'
+
+def notification_event_stream(subscription, backlog, cursor, resync=False):
+    """
+    Generate the SSE body for one connection
+    =======================================
+    
+    Sends the missed backlog first, then live notifications from the
+    subscription, with a comment line as heartbeat while idle. Live events
+    already covered by the backlog (id <= cursor) are skipped. The stream
+    ends after SSE_MAX_DURATION_SECONDS or when the subscriber falls behind;
+    EventSource then reconnects with Last-Event-ID and resumes.
+    """
+    deadline = time.monotonic() + SSE_MAX_DURATION_SECONDS
+    try:
+        yield from sse_opening_frames(backlog, cursor, resync)
+        while time.monotonic() < deadline and not subscription.overflowed:
+            messages = subscription.get(timeout=min(SSE_HEARTBEAT_SECONDS, max(deadline - time.monotonic(), 0)))
+            frames, cursor = sse_live_frames(messages, cursor)
+            yield from frames
+    finally:
+        subscription.close()
+
+def sse_opening_frames(backlog, cursor, resync=False):
+    """Retry hint, then the missed backlog (or a resync/ready event)"""
+    frames = [f'retry: {SSE_RETRY_MS}\n\n']
+    if resync:
+        frames.append(format_sse({'reason': 'backlog_truncated'}, cursor, 'resync'))
+    frames.extend(format_sse(item, item['id'], 'notification') for item in backlog)
+    if not backlog and not resync:
+        frames.append(format_sse({'connected': True}, cursor, 'ready'))
+    return frames
+
+def sse_live_frames(messages, cursor):
+    """Frames for live messages newer than cursor, or a keepalive; returns (frames, cursor)"""
+    frames = []
+    for event_id, data in messages:
+        if cursor is not None and event_id <= cursor:
+            continue
+        cursor = event_id
+        frames.append(format_sse(data, event_id, 'notification'))
+    return frames or [': keepalive\n\n'], cursor
+
+def notification_backlog(user_id, cursor, session=None):
+    """
+    What a (re)connecting stream must replay
+    =======================================
+    
+    A first connection (cursor None) starts from the user's newest
+    notification. A reconnect gets every notification after its cursor, or
+    a resync when it is more than SSE_BACKLOG_LIMIT behind.
+    
+    Returns:
+        tuple: (backlog, cursor, resync)
+    """
+    session = session or db.session
+    newest = db.select(db.func.max(Notification.id)).where(Notification.user_id == user_id)
+    if cursor is None:
+        return [], session.execute(newest).scalar() or 0, False
+    rows = session.execute(
+        db.select(*NOTIFICATION_COLUMNS).where(Notification.user_id == user_id, Notification.id > cursor)
+        .order_by(Notification.id).limit(SSE_BACKLOG_LIMIT + 1)).all()
+    if len(rows) > SSE_BACKLOG_LIMIT:
+        # Too far behind to replay - tell the client to reload its inbox
+        return [], session.execute(newest).scalar(), True
+    backlog = [serialize_notification(n) for n in rows]
+    return backlog, backlog[-1]['id'] if backlog else cursor, False
+
+metrics.describe('sse_connections', 'Open notification streams in this worker')
+metrics.describe('sse_connections_total', 'Notification streams opened (resumed = reconnected with Last-Event-ID)')
+metrics.register_collector(lambda registry: registry.set_gauge('sse_connections', notification_hub.subscriber_count()))
+
+def get_unread_count(user_id):
+    """
+    Read a user's unread counter (one primary-key lookup)
+    ====================================================
+    
+    add_notifications creates the row with a user's first notification,
+    and older notifications are counted in when the counters table is
+    created. Without a row the unread notifications are counted instead;
+    nothing is written here.
+    """
+    counter = db.session.get(NotificationCounter, user_id)
+    if counter is None:
+        return Notification.query.filter_by(user_id=user_id, is_read=False).count()
+    return max(counter.unread, 0)
+
+def seed_unread_counters(connection):
+    """Insert one counter row per user with unread notifications; returns rows inserted"""
+    counter_table = NotificationCounter.__table__
+    counts = db.select(Notification.user_id, db.func.count(Notification.id)) \
+        .where(Notification.is_read == False).group_by(Notification.user_id)
+    return connection.execute(counter_table.insert().from_select(['user_id', 'unread'], counts)).rowcount
+
+# Upgrading from a version without counters: count the existing notifications in
+@event.listens_for(NotificationCounter.__table__, 'after_create')
+def _seed_new_counter_table(target, connection, **kw):
+    seed_unread_counters(connection)
+
+def rebuild_unread_counters():
+    """Recompute every unread counter from the notifications table"""
+    connection = db.session.connection()
+    connection.execute(NotificationCounter.__table__.delete())
+    users = seed_unread_counters(connection)
     db.session.commit()
+    return users
+
+def prune_read_notifications(older_than_days=30, batch_size=1000):
+    """
+    Delete read notifications older than the retention window, in batches
+    ====================================================================
+    
+    Each batch is its own short transaction so the table is never locked
+    for long. Unread notifications are never pruned.
+    
+    Returns:
+        int: Number of notifications deleted
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    deleted = 0
+    while True:
+        ids = [row.id for row in Notification.query.with_entities(Notification.id)
+               .filter(Notification.is_read == True, Notification.created_at < cutoff)
+               .order_by(Notification.id).limit(batch_size).all()]
+        if not ids:
+            break
+        Notification.query.filter(Notification.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        deleted += len(ids)
+    return deleted
 
 # API Routes
 # ==========
@@ -295,9 +1066,9 @@ def get_users():
     """Get all users"""
     try:
         role = request.args.get('role')
-        q = User.query
+        q = User.query.with_entities(*USER_LIST_COLUMNS)
         if role:
-            q = q.filter_by(role=role)
+            q = q.filter(User.role == role)
         users = q.all()
         return jsonify([{
             'id': user.id,
@@ -313,6 +1084,7 @@ def get_users():
 
 @app.route('/api/users', methods=['POST'])
 @limiter.limit("10 per minute")
+@idempotent
 def create_user():
     """Create a new user"""
     try:
@@ -361,45 +1133,117 @@ def create_user():
         db.session.rollback()
         return jsonify({'error': 'Internal server error'}), 500
 
+def fundi_filters(specialization=None, location=None, is_available=None):
+    """
+    WHERE clauses on the fundis table shared by the list endpoints
+    
+    specialization and location match substrings ("robi" finds Nairobi).
+    Word-prefix matching through the search index is /api/fundis/search,
+    which takes the same two filters.
+    """
+    filters = []
+    if is_available is not None:
+        filters.append(Fundi.is_available == is_available)
+    if specialization:
+        filters.append(Fundi.specialization.ilike(f"%{specialization}%"))
+    if location:
+        filters.append(Fundi.location.ilike(f"%{location}%"))
+    return filters
+
 @app.route('/api/fundis', methods=['GET'])
+@conditional('fundis', 'users')
 def get_fundis():
-    """Get all fundis"""
+    """
+    Get all fundis
+    
+    Query params: is_available, specialization, location, and optionally
+    lat + lng + radius_km to keep only fundis within radius_km (nearest
+    first, each with distance_km).
+    """
     try:
         is_available = request.args.get('is_available')
-        specialization = request.args.get('specialization')
-        location = request.args.get('location')
-
-        q = Fundi.query
-        if is_available is not None:
-            q = q.filter(Fundi.is_available == (is_available.lower() == 'true'))
-        if specialization:
-            q = q.filter(Fundi.specialization.ilike(f"%{specialization}%"))
-        if location:
-            q = q.filter(Fundi.location.ilike(f"%{location}%"))
-
-        fundis = q.all()
-        return jsonify([{
-            'id': fundi.id,
-            'user_id': fundi.user_id,
-            'username': fundi.user.username,
-            'email': fundi.user.email,
-            'phone': fundi.user.phone,
-            'role': fundi.user.role,
-            'specialization': fundi.specialization,
-            'experience': fundi.experience,
-            'hourly_rate': fundi.hourly_rate,
-            'location': fundi.location,
-            'bio': fundi.bio,
-            'rating': fundi.rating,
-            'is_available': fundi.is_available,
-            'is_active': fundi.user.is_active,
-            'created_at': fundi.created_at.isoformat()
-        } for fundi in fundis])
+        filters = fundi_filters(
+            specialization=request.args.get('specialization'),
+            location=request.args.get('location'),
+            is_available=None if is_available is None else is_available.lower() == 'true'
+        )
+        
+        point = point_from_args()
+        if point and point[2] is not None:
+            hits = within_radius(db.session, Fundi.__table__, point[0], point[1], point[2], where=filters)
+            rows = fundi_rows_by_id([fundi_id for fundi_id, _ in hits])
+            return jsonify([dict(serialize_fundi_row(rows[fundi_id]), distance_km=distance)
+                            for fundi_id, distance in hits if fundi_id in rows])
+        if point:
+            return jsonify({'error': 'radius_km is required with lat/lng (use /api/fundis/nearby for nearest)'}), 400
+
+        fundis = Fundi.query.join(User, Fundi.user_id == User.id).with_entities(*FUNDI_LIST_COLUMNS) \
+            .filter(*filters).all()
+        return jsonify([serialize_fundi_row(fundi) for fundi in fundis])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/fundis/nearby', methods=['GET'])
+@conditional('fundis', 'users')
+def get_nearby_fundis():
+    """
+    Nearest fundis to a point
+    
+    Query params: lat, lng (required), k (default 10, max 100), radius_km
+    (optional cut-off), specialization, available (default true).
+    """
+    try:
+        latitude, longitude, radius_km = point_from_args(require=True)
+        k = max(1, min(request.args.get('k', 10, type=int), 100))
+        filters = fundi_filters(
+            specialization=request.args.get('specialization'),
+            is_available=True if request.args.get('available', 'true').lower() == 'true' else None
+        )
+        hits = nearest(db.session, Fundi.__table__, latitude, longitude, k=k, where=filters, max_radius_km=radius_km)
+        rows = fundi_rows_by_id([fundi_id for fundi_id, _ in hits])
+        return jsonify({
+            'items': [dict(serialize_fundi_row(rows[fundi_id]), distance_km=distance)
+                      for fundi_id, distance in hits if fundi_id in rows]
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/fundis/search', methods=['GET'])
+@conditional('fundis', 'users')
+def search_fundis():
+    """
+    Ranked full-text fundi search
+    
+    Query params: q (free text, word prefixes), specialization, location,
+    available (true/false), limit (default 20, max 100), offset.
+    """
+    try:
+        query = request.args.get('q', '')
+        fields = {'specialization': request.args.get('specialization'), 'location': request.args.get('location')}
+        limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+        offset = max(0, request.args.get('offset', 0, type=int))
+        available_only = request.args.get('available', 'false').lower() == 'true'
+        
+        page = search_fundi_ids(db.session, query, fields, limit=limit, offset=offset, available_only=available_only)
+        rows = fundi_rows_by_id([fundi_id for fundi_id, _ in page.items])
+        return jsonify({
+            'items': [dict(serialize_fundi_row(rows[fundi_id]), score=round(score, 4))
+                      for fundi_id, score in page.items if fundi_id in rows],
+            'next_offset': offset + limit if page.has_more else None,
+            'backend': page.backend
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/fundis', methods=['POST'])
 @limiter.limit("10 per minute")
+@idempotent
 def create_fundi():
     """Create a new fundi"""
     try:
@@ -426,11 +1270,16 @@ def create_fundi():
                 'experience': data['experience'],
                 'hourly_rate': data['hourly_rate'],
                 'location': data['location'],
-                'bio': data.get('bio', '')
+                'bio': data.get('bio', ''),
+                'latitude': data.get('latitude'),
+                'longitude': data.get('longitude')
             })
         except ValidationError as e:
             return jsonify({'error': 'Fundi Validation Error', 'details': e.messages}), 400
         
+        if (validated_fundi_data.get('latitude') is None) != (validated_fundi_data.get('longitude') is None):
+            return jsonify({'error': 'Fundi Validation Error', 'details': {'latitude': ['latitude and longitude go together']}}), 400
+        
         # Check if user already exists
         existing_user = User.query.filter_by(email=validated_user_data['email']).first()
         if existing_user:
@@ -449,7 +1298,7 @@ def create_fundi():
             is_active=True
         )
         db.session.add(new_user)
-        db.session.commit()
+        db.session.flush()  # assigns new_user.id; user and fundi commit together below
         
         # Create fundi profile
         new_fundi = Fundi(
@@ -458,17 +1307,19 @@ def create_fundi():
             experience=validated_fundi_data['experience'],
             hourly_rate=validated_fundi_data['hourly_rate'],
             location=validated_fundi_data['location'],
+            latitude=validated_fundi_data.get('latitude'),
+            longitude=validated_fundi_data.get('longitude'),
             bio=validated_fundi_data.get('bio', ''),
             rating=data.get('rating', 0.0),
             is_available=data.get('is_available', True)
         )
         
         db.session.add(new_fundi)
+        db.session.flush()
+        
+        # Admin/client notifications go out through the outbox with this commit
+        notify_on_fundi_registered(new_fundi)
         db.session.commit()
-
-        # Trigger notifications
-        notify_admins_of_new_fundi(new_fundi)
-        notify_clients_of_new_fundi(new_fundi)
         
         return jsonify({
             'id': new_fundi.id,
@@ -480,6 +1331,8 @@ def create_fundi():
             'experience': new_fundi.experience,
             'hourly_rate': new_fundi.hourly_rate,
             'location': new_fundi.location,
+            'latitude': new_fundi.latitude,
+            'longitude': new_fundi.longitude,
             'bio': new_fundi.bio,
             'rating': new_fundi.rating,
             'is_available': new_fundi.is_available,
@@ -488,9 +1341,11 @@ def create_fundi():
         }), 201
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/bookings', methods=['GET'])
+@conditional('jobs', 'categories')
 def get_bookings():
     """Get all bookings/jobs"""
     try:
@@ -498,7 +1353,7 @@ def get_bookings():
         fundi_id = request.args.get('fundi_id', type=int)
         status = request.args.get('status')
 
-        q = Job.query
+        q = Job.query.outerjoin(Category, Job.category_id == Category.id).with_entities(*BOOKING_LIST_COLUMNS)
         if client_id:
             q = q.filter(Job.client_id == client_id)
         if fundi_id:
@@ -507,33 +1362,27 @@ def get_bookings():
             q = q.filter(Job.status == status)
 
         jobs = q.all()
-        return jsonify([{
-            'id': job.id,
-            'description': job.title,
-            'location': job.location,
-            'status': job.status,
-            'client_id': job.client_id,
-            'fundi_id': job.fundi_id,
-            'service_type': job.category.name if job.category else 'General',
-            'total_amount': job.total_amount,
-            'hourly_rate': job.hourly_rate,
-            'estimated_hours': job.estimated_hours,
-            'created_at': job.created_at.isoformat(),
-            'scheduled_date': job.scheduled_date.isoformat() if job.scheduled_date else None
-        } for job in jobs])
+        return jsonify([serialize_booking_row(job) for job in jobs])
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/bookings', methods=['POST'])
+@idempotent
 def create_booking():
     """Create a new booking/job"""
     try:
         data = request.get_json()
+        try:
+            latitude, longitude = coordinates_from_json(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         new_job = Job(
             title=data['description'],
             description=data['description'],
             location=data['location'],
+            latitude=latitude,
+            longitude=longitude,
             status='pending',
             priority='medium',
             budget=data.get('total_amount'),
@@ -546,19 +1395,23 @@ def create_booking():
         )
         
         db.session.add(new_job)
-        db.session.commit()
-
-        # Notify admins on job creation
+        db.session.flush()
+        record_status_events([(new_job.id, None, new_job.status)], at=new_job.created_at)
+        
+        # Notify admins on job creation (delivered from the outbox after commit)
         notify_on_job_created(new_job)
+        db.session.commit()
 
         return jsonify({
             'id': new_job.id,
             'description': new_job.title,
             'location': new_job.location,
+            'latitude': new_job.latitude,
+            'longitude': new_job.longitude,
             'status': new_job.status,
             'client_id': new_job.client_id,
             'fundi_id': new_job.fundi_id,
-            'service_type': new_job.category.name if new_job.category else 'General',
+            'service_type': category_name(new_job.category_id),
             'total_amount': new_job.total_amount,
             'hourly_rate': new_job.hourly_rate,
             'estimated_hours': new_job.estimated_hours,
@@ -567,28 +1420,102 @@ def create_booking():
         }), 201
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/bookings/<int:job_id>/assign', methods=['PUT'])
 def assign_booking(job_id):
-    """Assign a job to a fundi"""
+    """
+    Assign a pending job to a fundi
+
+    Body: {"fundi_id": 7, "version": 3}; version is optional and defaults to
+    the one read here. The write is one conditional UPDATE on (id, pending,
+    version), so of two concurrent assignments exactly one wins and the
+    other gets 409 with the job's current status, fundi and version.
+    """
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         fundi_id = data.get('fundi_id')
-        job = Job.query.get_or_404(job_id)
-        job.fundi_id = fundi_id
-        job.status = 'assigned'
+        expected_version = data.get('version')
+        if not isinstance(fundi_id, int) or isinstance(fundi_id, bool):
+            return jsonify({'error': 'fundi_id must be an integer'}), 400
+        if expected_version is not None and (not isinstance(expected_version, int) or isinstance(expected_version, bool)):
+            return jsonify({'error': 'version must be an integer'}), 400
+        if db.session.get(Fundi, fundi_id) is None:
+            return jsonify({'error': 'Fundi not found'}), 404
+
+        job = db.session.execute(
+            db.select(Job.id, Job.title, Job.status, Job.client_id, Job.fundi_id, Job.version)
+            .where(Job.id == job_id)).first()
+        if job is None:
+            return jsonify({'error': 'Not found'}), 404
+        version = job.version if expected_version is None else expected_version
+
+        # Atomic without row locks: only one writer can move the job off this version
+        updated = db.session.execute(
+            db.update(Job).where(Job.id == job_id, Job.status == 'pending', Job.version == version)
+            .values(fundi_id=fundi_id, status='assigned', version=version + 1, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not updated:
+            db.session.rollback()
+            current = db.session.execute(
+                db.select(Job.status, Job.fundi_id, Job.version).where(Job.id == job_id)).first()
+            if current is None:
+                return jsonify({'error': 'Not found'}), 404
+            metrics.inc('job_assignment_conflicts_total')
+            reason = 'Job is no longer pending' if current.status != 'pending' else 'Job was changed by another request'
+            return jsonify({'error': reason, 'status': current.status, 'fundi_id': current.fundi_id,
+                            'version': current.version}), 409
+
+        record_status_events([(job_id, 'pending', 'assigned')])
+        notify_on_job_assigned(job, fundi_id)
+        queue_fundi_stats(job.fundi_id, fundi_id)
         db.session.commit()
-        notify_on_job_assigned(job)
-        return jsonify({'success': True})
+        return jsonify({'success': True, 'version': version + 1})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+metrics.describe('job_assignment_conflicts_total', 'Assignments refused because the job was no longer pending or had moved on')
+
+@app.route('/api/bookings/<int:job_id>/matches', methods=['GET'])
+@conditional('jobs', 'fundis', 'categories')
+def get_booking_matches(job_id):
+    """
+    Top-ranked available fundis for a job
+    
+    Query params: k (default 10, max 50). Each match carries its score and
+    the weighted parts it is made of.
+    """
+    try:
+        k = max(1, min(request.args.get('k', 10, type=int), 50))
+        job = Job.query.with_entities(
+            Job.id, Job.category_id, Job.location, Job.hourly_rate, Job.budget,
+            Job.estimated_hours, Job.scheduled_date, Job.latitude, Job.longitude
+        ).filter(Job.id == job_id).first()
+        if not job:
+            return jsonify({'error': 'Not found'}), 404
+        
+        matches = get_match_index().top_k(
+            job_spec(job, category_name(job.category_id, default=None)),
+            k=k, exclude=busy_fundi_ids(job.scheduled_date, exclude_job_id=job.id)
+        )
+        rows = fundi_rows_by_id([m.fundi_id for m in matches])
+        return jsonify({
+            'job_id': job_id,
+            'matches': [dict(serialize_fundi_row(rows[m.fundi_id]), score=m.score, score_parts=m.parts)
+                        for m in matches if m.fundi_id in rows]
+        })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/categories', methods=['GET'])
+@conditional('categories')
 def get_categories():
     """Get all categories"""
     try:
-        categories = Category.query.all()
+        categories = cached_categories()
         return jsonify([{
             'id': category.id,
             'name': category.name,
@@ -600,82 +1527,556 @@ def get_categories():
 
 @app.route('/api/bookings/<int:job_id>/status', methods=['PUT'])
 def update_booking_status(job_id):
-    """Update job status"""
+    """
+    Move a job along its lifecycle (lib/job_states.py)
+
+    Body: {"status": "in_progress"}. An unknown status is 400; a transition
+    the state machine does not allow from the job's current status is 409,
+    as is "assigned" (use PUT /api/bookings/<id>/assign, which sets the
+    fundi). The change and its job_status_events row commit together.
+    """
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         status = data.get('status')
-        job = Job.query.get_or_404(job_id)
+        job = db.session.get(Job, job_id)
+        if job is None:
+            return jsonify({'error': 'Not found'}), 404
+        try:
+            check_status_change(job.status, status)
+        except InvalidTransition as e:
+            return jsonify({'error': str(e), 'status': job.status, 'version': job.version}), \
+                400 if e.unknown_status else 409
+
+        now = datetime.utcnow()
+        record_status_events([(job.id, job.status, status)], at=now)
         job.status = status
         if status == 'completed':
-            job.completed_at = datetime.utcnow()
-        db.session.commit()
+            job.completed_at = now
         notify_on_status_change(job)
-        return jsonify({'success': True})
+        queue_fundi_stats(job.fundi_id)
+        db.session.commit()
+        return jsonify({'success': True, 'version': job.version})
+    except StaleDataError:
+        # The flush is conditional on the version read above (version_id_col)
+        db.session.rollback()
+        return jsonify({'error': 'Job was changed by another request'}), 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/bookings/<int:job_id>/history', methods=['GET'])
+def get_booking_history(job_id):
+    """A job's status changes, oldest first"""
+    try:
+        if db.session.get(Job, job_id) is None:
+            return jsonify({'error': 'Not found'}), 404
+        return jsonify([
+            {'from': row.from_status, 'to': row.to_status, 'at': row.at.isoformat()}
+            for row in job_events.history(db.session.connection(), job_id)
+        ])
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Bulk booking updates
+# ====================
+# Admin tooling assigns or moves many jobs at once. Items are validated in
+# one pass (one SELECT per chunk of ids instead of one per item), applied
+# with set-based UPDATEs (not one per item), and their notifications are
+# written to the outbox with a single INSERT - all in one transaction.
+# Invalid items are reported and skipped; the valid ones are applied.
+BULK_MAX_ITEMS = int(os.environ.get('BULK_MAX_ITEMS', 10000))
+BULK_CHUNK_SIZE = 500  # ids per IN (...) list
+BULK_CASE_SIZE = 100  # jobs per CASE update
+
+def chunked(values, size=BULK_CHUNK_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+def bulk_items(data, field):
+    """The item list of a bulk request body, or raise ValueError"""
+    items = data.get(field) if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        raise ValueError(f"'{field}' must be a non-empty list")
+    if len(items) > BULK_MAX_ITEMS:
+        raise ValueError(f"At most {BULK_MAX_ITEMS} items per request")
+    return items
+
+def validate_bulk_items(items, value_field, check_value):
+    """
+    Validate bulk items in one pass
+    ===============================
+
+    Args:
+        items (list): Request items, each with job_id and value_field
+        value_field (str): 'fundi_id' or 'status'
+        check_value (callable): value -> error message or None
+
+    Returns:
+        tuple: (results list with an entry per item, {index: (job row, value)} of valid items)
+    """
+    results = [None] * len(items)
+    candidates = {}
+    seen = set()
+    for index, item in enumerate(items):
+        job_id = item.get('job_id') if isinstance(item, dict) else None
+        value = item.get(value_field) if isinstance(item, dict) else None
+        if not isinstance(job_id, int) or isinstance(job_id, bool):
+            error = 'job_id must be an integer'
+        elif job_id in seen:
+            error = 'Duplicate job_id in this request'
+        else:
+            error = check_value(value)
+        if error:
+            results[index] = {'index': index, 'job_id': job_id, 'ok': False, 'error': error}
+        else:
+            seen.add(job_id)
+            candidates[index] = (job_id, value)
+
+    jobs = {}
+    for ids in chunked(job_id for job_id, _ in candidates.values()):
+        jobs.update((row.id, row) for row in db.session.execute(
+            db.select(Job.id, Job.title, Job.status, Job.client_id, Job.fundi_id).where(Job.id.in_(ids))))
+    valid = {}
+    for index, (job_id, value) in candidates.items():
+        if job_id in jobs:
+            valid[index] = (jobs[job_id], value)
+        else:
+            results[index] = {'index': index, 'job_id': job_id, 'ok': False, 'error': 'Job not found'}
+    return results, valid
+
+def reject_bulk_items(valid, results, check):
+    """Move items failing check(job row, value) -> error message from valid to results"""
+    for index, (job, value) in list(valid.items()):
+        error = check(job, value)
+        if error:
+            results[index] = {'index': index, 'job_id': job.id, 'ok': False, 'error': error}
+            del valid[index]
+
+def apply_bulk_update(valid, results, values_for):
+    """
+    Set-based UPDATEs for the valid items; fills in results for them
+
+    Jobs getting the same values (e.g. 'completed') share one plain UPDATE
+    per chunk of ids. Values shared by only a few jobs (e.g. one fundi per
+    assignment) are written BULK_CASE_SIZE jobs at a time with a CASE on the
+    job id - a CASE is scanned per row, so those chunks stay small. Every
+    job's version is bumped, and each UPDATE only matches jobs still in the
+    status they were validated in.
+
+    Returns:
+        int: Rows updated; fewer than len(valid) means another request
+             moved some of the jobs first
+    """
+    bump = {'version': Job.version + 1}
+    updated = 0
+    groups = {}
+    for index, (job, value) in valid.items():
+        results[index] = {'index': index, 'job_id': job.id, 'ok': True}
+        values = values_for(value)
+        groups.setdefault((tuple(sorted(values.items())), job.status), []).append(job.id)
+
+    scattered = []
+    for (values, from_status), job_ids in groups.items():
+        if len(job_ids) < BULK_CASE_SIZE:
+            scattered.extend((job_id, dict(values, status_was=from_status)) for job_id in job_ids)
+            continue
+        for ids in chunked(job_ids):
+            updated += db.session.execute(
+                db.update(Job).where(Job.id.in_(ids), Job.status == from_status).values(**dict(values), **bump)
+                .execution_options(synchronize_session=False)).rowcount
+
+    for chunk in chunked(scattered, BULK_CASE_SIZE):
+        by_column = {}
+        for job_id, values in chunk:
+            for name, value in values.items():
+                by_column.setdefault(name, {})[job_id] = value
+        expressions = {}
+        for name, by_id in by_column.items():
+            distinct = set(by_id.values())
+            column = Job.status if name == 'status_was' else getattr(Job, name)
+            if len(by_id) == len(chunk) and len(distinct) == 1:
+                expressions[name] = distinct.pop()
+            else:
+                expressions[name] = db.case(by_id, value=Job.id, else_=column)
+        status_was = expressions.pop('status_was')
+        updated += db.session.execute(
+            db.update(Job).where(Job.id.in_([job_id for job_id, _ in chunk]), Job.status == status_was)
+            .values(**expressions, **bump)
+            .execution_options(synchronize_session=False)).rowcount
+    return updated
+
+def bulk_response(results):
+    updated = sum(1 for result in results if result['ok'])
+    metrics.inc('bulk_booking_items_total', updated, endpoint=request.endpoint, result='updated')
+    metrics.inc('bulk_booking_items_total', len(results) - updated, endpoint=request.endpoint, result='failed')
+    return jsonify({'updated': updated, 'failed': len(results) - updated, 'results': results})
+
+@app.route('/api/bookings/bulk/assign', methods=['PUT'])
+def bulk_assign_bookings():
+    """
+    Assign many jobs at once
+
+    Body: {"assignments": [{"job_id": 1, "fundi_id": 7}, ...]}. Returns a
+    result per item, in request order.
+    """
+    try:
+        try:
+            items = bulk_items(request.get_json(silent=True), 'assignments')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        fundi_ids = {item.get('fundi_id') for item in items if isinstance(item, dict)}
+        existing = set()
+        for ids in chunked(fundi_id for fundi_id in fundi_ids if isinstance(fundi_id, int)):
+            existing.update(db.session.execute(db.select(Fundi.id).where(Fundi.id.in_(ids))).scalars())
+
+        def check_fundi(fundi_id):
+            if not isinstance(fundi_id, int) or isinstance(fundi_id, bool):
+                return 'fundi_id must be an integer'
+            if fundi_id not in existing:
+                return 'Fundi not found'
+
+        results, valid = validate_bulk_items(items, 'fundi_id', check_fundi)
+        reject_bulk_items(valid, results,
+                          lambda job, _: None if can_transition(job.status, 'assigned') else 'Job is no longer pending')
+        now = datetime.utcnow()
+        updated = apply_bulk_update(valid, results,
+                                    lambda fundi_id: {'fundi_id': fundi_id, 'status': 'assigned', 'updated_at': now})
+        if updated != len(valid):
+            # A concurrent request moved some of these jobs after they were validated
+            db.session.rollback()
+            metrics.inc('job_assignment_conflicts_total')
+            return jsonify({'error': 'Some jobs were changed by another request; retry the batch'}), 409
+        record_status_events([(job.id, job.status, 'assigned') for job, _ in valid.values()], at=now)
+        outbox.enqueue_many(db.session, 'job_assigned', [
+            {'job_id': job.id, 'title': job.title, 'client_id': job.client_id, 'fundi_id': fundi_id}
+            for job, fundi_id in valid.values()
+        ])
+        queue_fundi_stats(*(job.fundi_id for job, _ in valid.values()),
+                          *(fundi_id for _, fundi_id in valid.values()))
+        db.session.commit()
+        return bulk_response(results)
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/bookings/bulk/status', methods=['PUT'])
+def bulk_update_booking_status():
+    """
+    Change the status of many jobs at once
+
+    Body: {"changes": [{"job_id": 1, "status": "completed"}, ...]}. Returns
+    a result per item, in request order. "assigned" is rejected per item;
+    jobs are assigned with PUT /api/bookings/bulk/assign.
+    """
+    try:
+        try:
+            items = bulk_items(request.get_json(silent=True), 'changes')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        def check_status(status):
+            if status not in JOB_STATUSES:
+                return f"status must be one of: {', '.join(JOB_STATUSES)}"
+
+        def check_transition_from(job, status):
+            try:
+                check_status_change(job.status, status)
+            except InvalidTransition as e:
+                return str(e)
+
+        results, valid = validate_bulk_items(items, 'status', check_status)
+        reject_bulk_items(valid, results, check_transition_from)
+        now = datetime.utcnow()
+
+        def values_for(status):
+            values = {'status': status, 'updated_at': now}
+            if status == 'completed':
+                values['completed_at'] = now
+            return values
+
+        if apply_bulk_update(valid, results, values_for) != len(valid):
+            db.session.rollback()
+            return jsonify({'error': 'Some jobs were changed by another request; retry the batch'}), 409
+        record_status_events([(job.id, job.status, status) for job, status in valid.values()], at=now)
+        outbox.enqueue_many(db.session, 'job_status_changed', [
+            {'job_id': job.id, 'title': job.title, 'status': status,
+             'client_id': job.client_id, 'fundi_id': job.fundi_id}
+            for job, status in valid.values()
+        ])
+        queue_fundi_stats(*(job.fundi_id for job, _ in valid.values()))
+        db.session.commit()
+        return bulk_response(results)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+metrics.describe('bulk_booking_items_total', 'Items in bulk booking requests (updated or failed validation)')
+
 @app.route('/api/notifications/<int:user_id>', methods=['GET'])
 def get_user_notifications(user_id):
-    """Get unread notifications for a user"""
+    """Get unread notifications for a user (newest first, bounded by ?limit=)"""
     try:
-        notifs = Notification.query.filter_by(user_id=user_id, is_read=False).order_by(Notification.created_at.desc()).all()
-        return jsonify([{
-            'id': n.id,
-            'title': n.title,
-            'message': n.message,
-            'type': n.type,
-            'is_read': n.is_read,
-            'created_at': n.created_at.isoformat()
-        } for n in notifs])
+        limit = min(request.args.get('limit', 100, type=int), 500)
+        notifs = Notification.query.with_entities(*NOTIFICATION_COLUMNS) \
+            .filter_by(user_id=user_id, is_read=False) \
+            .order_by(Notification.id.desc()).limit(limit).all()
+        return jsonify([serialize_notification(n) for n in notifs])
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/notifications/<int:user_id>/inbox', methods=['GET'])
+def get_notification_inbox(user_id):
+    """
+    Paginated notification inbox
+    
+    Query params: limit (default 20, max 100), before (cursor: id of the last
+    item on the previous page), unread_only (true/false).
+    """
+    try:
+        limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+        before = request.args.get('before', type=int)
+        unread_only = request.args.get('unread_only', 'false').lower() == 'true'
+        
+        q = Notification.query.with_entities(*NOTIFICATION_COLUMNS).filter(Notification.user_id == user_id)
+        if unread_only:
+            q = q.filter(Notification.is_read == False)
+        if before:
+            q = q.filter(Notification.id < before)
+        # Fetch one extra row to know whether another page exists
+        rows = q.order_by(Notification.id.desc()).limit(limit + 1).all()
+        items = rows[:limit]
+        return jsonify({
+            'items': [serialize_notification(n) for n in items],
+            'next_cursor': items[-1].id if len(rows) > limit else None,
+            'unread_count': get_unread_count(user_id)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/notifications/<int:user_id>/unread-count', methods=['GET'])
+def get_notification_unread_count(user_id):
+    """Unread notification count from the per-user counter"""
+    try:
+        return jsonify({'user_id': user_id, 'unread': get_unread_count(user_id)})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/notifications/<int:user_id>/mark-read', methods=['PUT'])
+def mark_notifications_as_read(user_id):
+    """
+    Mark many notifications as read in one UPDATE
+    
+    Body: {"ids": [1, 2, 3]} or {"up_to": <id>} (everything up to and
+    including that id), or {} to mark the whole inbox read.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        ids = data.get('ids')
+        up_to = data.get('up_to')
+        if ids is not None and (not isinstance(ids, list) or not all(isinstance(i, int) for i in ids)):
+            return jsonify({'error': 'ids must be a list of integers'}), 400
+        if up_to is not None and (not isinstance(up_to, int) or isinstance(up_to, bool)):
+            return jsonify({'error': 'up_to must be an integer'}), 400
+        
+        q = Notification.query.filter(Notification.user_id == user_id, Notification.is_read == False)
+        if ids is not None:
+            q = q.filter(Notification.id.in_(ids))
+        elif up_to is not None:
+            q = q.filter(Notification.id <= up_to)
+        updated = q.update({'is_read': True}, synchronize_session=False)
+        adjust_unread_counts({user_id: -updated})
+        db.session.commit()
+        return jsonify({'success': True, 'updated': updated, 'unread': get_unread_count(user_id)})
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/notifications/<int:notif_id>/read', methods=['PUT'])
 def mark_notification_as_read(notif_id):
     try:
-        n = Notification.query.get_or_404(notif_id)
-        n.is_read = True
+        n = Notification.query.with_entities(Notification.id, Notification.user_id).filter_by(id=notif_id).first()
+        if not n:
+            return jsonify({'error': 'Not found'}), 404
+        updated = Notification.query.filter_by(id=notif_id, is_read=False) \
+            .update({'is_read': True}, synchronize_session=False)
+        adjust_unread_counts({n.user_id: -updated})
         db.session.commit()
         return jsonify({'success': True})
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/notifications/<int:user_id>/stream', methods=['GET'])
+@limiter.exempt
+def stream_notifications(user_id):
+    """
+    Server-Sent Events stream of new notifications for a user
+    
+    Reconnects send Last-Event-ID (or ?last_event_id=) and receive every
+    notification with a larger id before live events resume. A first
+    connection starts from the user's newest notification.
+    """
+    raw_cursor = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    cursor = int(raw_cursor) if raw_cursor and raw_cursor.isdigit() else None
+    
+    # Subscribe before reading the backlog so nothing committed in between is lost
+    subscription = notification_hub.subscribe(user_id)
+    try:
+        backlog, cursor, resync = notification_backlog(user_id, cursor)
+    except Exception as e:
+        subscription.close()
+        return jsonify({'error': str(e)}), 500
+    
+    metrics.inc('sse_connections_total', resumed=str(raw_cursor is not None).lower())
+    return Response(
+        notification_event_stream(subscription, backlog, cursor, resync),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+# Dashboard rollups
+# =================
+# Dashboards read per-day totals from the rollup_* tables (lib/db/rollups.py)
+# instead of aggregating jobs, payments and reviews on every request.
+# worker.py refreshes them every ROLLUP_REFRESH_SECONDS when those tables'
+# versions moved, `flask refresh-rollups` does the same from a scheduler and
+# `flask rebuild-rollups` recomputes them from scratch. With a worker running,
+# dashboard requests only read; where none runs (a lone web service), a
+# dashboard request refreshes them itself once the last refresh is older than
+# ROLLUP_REFRESH_SECONDS. A refresh bumps the rollup tables' versions, which
+# the dashboard ETag covers.
+ROLLUP_SOURCES = ('jobs', 'payments', 'reviews')
+ROLLUP_TABLES = tuple(rollups.tables)
+DASHBOARD_DAYS = int(os.environ.get('DASHBOARD_DAYS', 30))
+ROLLUP_REFRESH_SECONDS = float(os.environ.get('ROLLUP_REFRESH_SECONDS', 60))
+_rollup_lock = threading.Lock()
+_rollup_versions = {}
+
+def refresh_rollups():
+    """Bring the rollups up to date if jobs/payments/reviews changed since the last refresh"""
+    versions = {name: version for name, (version, _) in get_table_versions(ROLLUP_SOURCES).items()}
+    if versions == _rollup_versions:
+        return None
+    with _rollup_lock:
+        if versions == _rollup_versions:
+            return None
+        started = time.perf_counter()
+        with db.engine.begin() as connection:
+            refreshed = rollups.refresh(connection)
+            bump_refreshed_rollups(connection, refreshed)
+        metrics.observe('rollup_refresh_seconds', time.perf_counter() - started)
+        _rollup_versions.clear()
+        _rollup_versions.update(versions)
+    return refreshed
+
+def bump_refreshed_rollups(connection, refreshed):
+    """Bump the versions of the rollups a refresh changed (None = rebuilt, 0 = untouched)"""
+    bump_table_versions(connection, [name for name, days in refreshed.items() if days != 0])
+
+def refresh_stale_rollups():
+    """refresh_rollups() if no refresh ran in the last ROLLUP_REFRESH_SECONDS (e.g. no worker.py)"""
+    refreshed_at = rollups.last_refreshed(db.session.connection())
+    if refreshed_at is None or datetime.utcnow() - refreshed_at > timedelta(seconds=ROLLUP_REFRESH_SECONDS):
+        return refresh_rollups()
+    return None
+
+metrics.describe('rollup_refresh_seconds', 'Time spent refreshing the dashboard rollup tables')
+
+def dashboard_since():
+    """First day of the dashboard window (DASHBOARD_DAYS days ending today, UTC)"""
+    return datetime.utcnow().date() - timedelta(days=DASHBOARD_DAYS - 1)
+
+def rollup_job_totals():
+    """All-time job counts per status from rollup_jobs_daily"""
+    daily = rollups.tables['rollup_jobs_daily']
+    rows = db.session.execute(db.select(daily.c.status, db.func.sum(daily.c.jobs)).group_by(daily.c.status)).all()
+    return {status: int(count) for status, count in rows}
+
+def rollup_daily_series(since):
+    """Jobs created and completed-payment revenue per day since `since`"""
+    jobs, earnings = rollups.tables['rollup_jobs_daily'], rollups.tables['rollup_earnings_daily']
+    created = dict(db.session.execute(
+        db.select(jobs.c.day, db.func.sum(jobs.c.jobs)).where(jobs.c.day >= since).group_by(jobs.c.day)).all())
+    revenue = dict(db.session.execute(
+        db.select(earnings.c.day, db.func.sum(earnings.c.amount)).where(earnings.c.day >= since)
+        .group_by(earnings.c.day)).all())
+    days = [since + timedelta(days=offset) for offset in range((datetime.utcnow().date() - since).days + 1)]
+    return [{'date': day.isoformat(), 'jobs_created': int(created.get(day, 0)),
+             'revenue': round(revenue.get(day, 0.0), 2)} for day in days]
+
+def rollup_fundi_totals(fundi_id, since):
+    """Completed-payment earnings and reviews for one fundi since `since`"""
+    earnings, reviews = rollups.tables['rollup_earnings_daily'], rollups.tables['rollup_reviews_daily']
+    payments, amount = db.session.execute(
+        db.select(db.func.coalesce(db.func.sum(earnings.c.payments), 0), db.func.coalesce(db.func.sum(earnings.c.amount), 0.0))
+        .where(earnings.c.fundi_id == fundi_id, earnings.c.day >= since)).one()
+    count, rating_sum = db.session.execute(
+        db.select(db.func.coalesce(db.func.sum(reviews.c.reviews), 0), db.func.coalesce(db.func.sum(reviews.c.rating_sum), 0))
+        .where(reviews.c.fundi_id == fundi_id, reviews.c.day >= since)).one()
+    return {'days': DASHBOARD_DAYS, 'payments': int(payments), 'earnings': round(amount, 2),
+            'reviews': int(count), 'average_rating': round(rating_sum / count, 2) if count else None}
+
 @app.route('/api/dashboard/<role>/<int:user_id>', methods=['GET'])
+@conditional('users', 'fundis', 'jobs', 'payments', 'reviews', *ROLLUP_TABLES, vary=lambda: datetime.utcnow().date())
 def get_dashboard_data(role, user_id):
     """Role-based dashboard datasets"""
     try:
         if role == 'admin':
+            refresh_stale_rollups()
+            job_totals = rollup_job_totals()
             totals = {
                 'clients': User.query.filter_by(role='client').count(),
                 'fundis': User.query.filter_by(role='fundi').count(),
                 'admins': User.query.filter_by(role='admin').count(),
-                'jobs_pending': Job.query.filter_by(status='pending').count(),
-                'jobs_assigned': Job.query.filter_by(status='assigned').count(),
-                'jobs_completed': Job.query.filter_by(status='completed').count()
+                'jobs_pending': job_totals.get('pending', 0),
+                'jobs_assigned': job_totals.get('assigned', 0),
+                'jobs_completed': job_totals.get('completed', 0)
             }
-            latest_users = User.query.order_by(User.created_at.desc()).limit(5).all()
-            latest_jobs = Job.query.order_by(Job.created_at.desc()).limit(5).all()
+            latest_users = User.query.with_entities(User.id, User.username, User.role).order_by(User.created_at.desc()).limit(5).all()
+            latest_jobs = Job.query.with_entities(Job.id, Job.title, Job.status).order_by(Job.created_at.desc()).limit(5).all()
             return jsonify({
                 'totals': totals,
                 'latest_users': [{'id': u.id, 'username': u.username, 'role': u.role} for u in latest_users],
-                'latest_jobs': [{'id': j.id, 'title': j.title, 'status': j.status} for j in latest_jobs]
+                'latest_jobs': [{'id': j.id, 'title': j.title, 'status': j.status} for j in latest_jobs],
+                'jobs_by_status': job_totals,
+                'daily': rollup_daily_series(dashboard_since())
             })
         elif role == 'client':
-            available_fundis = Fundi.query.filter_by(is_available=True).order_by(Fundi.rating.desc()).limit(10).all()
-            my_jobs = Job.query.filter_by(client_id=user_id).order_by(Job.created_at.desc()).limit(10).all()
+            available_fundis = (
+                Fundi.query.join(User, Fundi.user_id == User.id)
+                .with_entities(Fundi.id, User.username, Fundi.specialization, Fundi.location, Fundi.rating)
+                .filter(Fundi.is_available == True)
+                .order_by(Fundi.rating.desc()).limit(10).all()
+            )
+            my_jobs = Job.query.with_entities(Job.id, Job.title, Job.status).filter_by(client_id=user_id).order_by(Job.created_at.desc()).limit(10).all()
             return jsonify({
-                'available_fundis': [{'id': f.id, 'username': f.user.username, 'specialization': f.specialization, 'location': f.location, 'rating': f.rating} for f in available_fundis],
+                'available_fundis': [{'id': f.id, 'username': f.username, 'specialization': f.specialization, 'location': f.location, 'rating': f.rating} for f in available_fundis],
                 'my_jobs': [{'id': j.id, 'title': j.title, 'status': j.status} for j in my_jobs]
             })
         elif role == 'fundi':
-            my_profile = Fundi.query.filter_by(user_id=user_id).first()
-            my_jobs = Job.query.filter_by(fundi_id=my_profile.id).order_by(Job.created_at.desc()).limit(10).all() if my_profile else []
-            matching_jobs = Job.query.filter_by(status='pending').all()
-            if my_profile:
-                matching_jobs = [j for j in matching_jobs if (my_profile.location.lower() in j.location.lower())]
+            refresh_stale_rollups()
+            my_profile = Fundi.query.with_entities(Fundi.id, Fundi.location, Fundi.latitude, Fundi.longitude).filter_by(user_id=user_id).first()
+            my_jobs = Job.query.with_entities(Job.id, Job.title, Job.status).filter_by(fundi_id=my_profile.id).order_by(Job.created_at.desc()).limit(10).all() if my_profile else []
+            matching_q = Job.query.with_entities(Job.id, Job.title, Job.status, Job.location).filter_by(status='pending')
+            distances = {}
+            if my_profile and geo.valid_coordinates(my_profile.latitude, my_profile.longitude):
+                # The 10 closest pending jobs within FUNDI_JOB_RADIUS_KM, via the geohash index
+                hits = nearest(db.session, Job.__table__, my_profile.latitude, my_profile.longitude, k=10,
+                               where=(Job.status == 'pending',), max_radius_km=FUNDI_JOB_RADIUS_KM)
+                distances = dict(hits)
+                by_id = {j.id: j for j in matching_q.filter(Job.id.in_(list(distances))).all()} if hits else {}
+                matching_jobs = [by_id[job_id] for job_id, _ in hits if job_id in by_id]
+            else:
+                # Location matching happens in SQL so only the 10 rows we return are loaded
+                if my_profile:
+                    matching_q = matching_q.filter(Job.location.ilike(f"%{my_profile.location}%"))
+                matching_jobs = matching_q.limit(10).all()
             return jsonify({
                 'my_jobs': [{'id': j.id, 'title': j.title, 'status': j.status} for j in my_jobs],
-                'matching_jobs': [{'id': j.id, 'title': j.title, 'status': j.status, 'location': j.location} for j in matching_jobs[:10]]
+                'matching_jobs': [{'id': j.id, 'title': j.title, 'status': j.status, 'location': j.location,
+                                   'distance_km': distances.get(j.id)} for j in matching_jobs],
+                'recent': rollup_fundi_totals(my_profile.id, dashboard_since()) if my_profile else None
             })
         else:
             return jsonify({'error': 'Invalid role'}), 400
@@ -718,6 +2119,119 @@ def get_payments():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Analytics endpoints
+# ===================
+# Reports are computed by lib/analytics.py on NumPy column arrays streamed from
+# payments/jobs. start/end are inclusive YYYY-MM-DD days; revenue counts
+# completed payments only.
+def analytics_window():
+    """(start, end) datetimes from ?start=&end=, end made exclusive"""
+    start = analytics.parse_day(request.args.get('start'))
+    end = analytics.parse_day(request.args.get('end'))
+    if start and end and end < start:
+        raise ValueError('end is before start')
+    return start, end + timedelta(days=1) if end else None
+
+def analytics_percentiles():
+    """Percentiles from ?percentiles=50,90,99 (default analytics.DEFAULT_PERCENTILES)"""
+    raw = request.args.get('percentiles')
+    if not raw:
+        return analytics.DEFAULT_PERCENTILES
+    try:
+        percentiles = tuple(float(p) if '.' in p else int(p) for p in raw.split(','))
+    except ValueError:
+        raise ValueError('percentiles must be a comma-separated list of numbers')
+    if not all(0 <= p <= 100 for p in percentiles):
+        raise ValueError('percentiles must be between 0 and 100')
+    return percentiles
+
+@app.route('/api/analytics/summary', methods=['GET'])
+@conditional('payments', 'jobs')
+def get_analytics_summary():
+    """Revenue, payment and job totals plus completion times for a period"""
+    try:
+        start, end = analytics_window()
+        return jsonify(analytics.summary(db.session, start, end))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analytics/earnings', methods=['GET'])
+@conditional('payments', 'fundis', 'users')
+def get_analytics_earnings():
+    """Top-earning fundis (?limit=20, max 500)"""
+    try:
+        start, end = analytics_window()
+        limit = max(1, min(request.args.get('limit', 20, type=int), 500))
+        earnings = analytics.earnings_by_fundi(db.session, start, end, limit=limit)
+        names = {}
+        if earnings:
+            names = dict(Fundi.query.join(User, Fundi.user_id == User.id)
+                         .with_entities(Fundi.id, User.username)
+                         .filter(Fundi.id.in_([e['fundi_id'] for e in earnings])).all())
+        return jsonify([dict(e, username=names.get(e['fundi_id'])) for e in earnings])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analytics/categories', methods=['GET'])
+@conditional('payments', 'jobs', 'categories')
+def get_analytics_categories():
+    """Revenue per job category"""
+    try:
+        start, end = analytics_window()
+        return jsonify([dict(row, category=category_name(row['category_id']))
+                        for row in analytics.revenue_by_category(db.session, start, end)])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analytics/completion-times', methods=['GET'])
+@conditional('jobs', 'categories')
+def get_analytics_completion_times():
+    """Hours from job request to completion (?percentiles=50,90,99)"""
+    try:
+        start, end = analytics_window()
+        report = analytics.completion_time_percentiles(db.session, analytics_percentiles(), start, end)
+        return jsonify({
+            'overall': report['overall'],
+            'by_category': [dict(stats, category_id=category_id, category=category_name(category_id))
+                            for category_id, stats in report['by_category'].items()]
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# job_status_events rows are written in the same transactions as the job
+# changes, so the jobs version covers them
+@app.route('/api/analytics/stage-latencies', methods=['GET'])
+@conditional('jobs')
+def get_analytics_stage_latencies():
+    """Hours between lifecycle statuses, per stage (?percentiles=50,90,99); the window is on the later status"""
+    try:
+        start, end = analytics_window()
+        return jsonify(analytics.stage_latencies(db.session, analytics_percentiles(), start, end))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Not @conditional: the default window moves with the date, not with the tables
+@app.route('/api/analytics/daily', methods=['GET'])
+def get_analytics_daily():
+    """Jobs created/completed and revenue per day (default: the last 30 days)"""
+    try:
+        start, end = analytics_window()
+        return jsonify(analytics.daily_series(db.session, start, end))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # Authentication endpoints
 @app.route('/api/auth/login', methods=['POST'])
 @limiter.limit("5 per minute")
@@ -820,6 +2334,18 @@ def google_auth():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Cache statistics
+@app.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Hit/miss statistics for the in-process reference cache"""
+    return jsonify(reference_cache.stats())
+
+# Metrics endpoint (Prometheus text format)
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Expose in-process metrics for scraping"""
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
 # Health check endpoint
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -835,6 +2361,157 @@ def not_found(error):
 def internal_error(error):
     return jsonify({'error': 'Internal server error'}), 500
 
+# Maintenance commands (run with: flask --app flask_backend_template <command>)
+@app.cli.command('prune-notifications')
+@click.option('--days', default=30, show_default=True, help='Keep read notifications newer than this')
+@click.option('--batch-size', default=1000, show_default=True, help='Rows deleted per transaction')
+def prune_notifications_command(days, batch_size):
+    """Delete old read notifications in batches"""
+    deleted = prune_read_notifications(older_than_days=days, batch_size=batch_size)
+    click.echo(f"Pruned {deleted} read notifications older than {days} days")
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Create (if needed) and repopulate the fundi full-text search index"""
+    with db.engine.begin() as connection:
+        indexed = rebuild_search_index(connection)
+    click.echo(f"Indexed {indexed} fundis")
+
+@app.cli.command('backfill-geo')
+@click.option('--batch-size', default=1000, show_default=True, help='Rows updated per transaction')
+def backfill_geo_command(batch_size):
+    """Fill missing fundi/job coordinates from town names and (re)compute geohashes"""
+    for model in (Fundi, Job):
+        table = model.__table__
+        updated, last_id = 0, 0
+        while True:
+            with db.engine.begin() as connection:
+                rows = connection.execute(
+                    db.select(table.c.id, table.c.location, table.c.latitude, table.c.longitude)
+                    .where(table.c.geohash.is_(None), table.c.id > last_id)
+                    .order_by(table.c.id).limit(batch_size)
+                ).all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+                changes = []
+                for row in rows:
+                    latitude, longitude = row.latitude, row.longitude
+                    if not geo.valid_coordinates(latitude, longitude):
+                        latitude, longitude = geo.geocode_town(row.location) or (None, None)
+                    if latitude is not None:
+                        changes.append({'row_id': row.id, 'latitude': latitude, 'longitude': longitude,
+                                        'geohash': geo.encode(latitude, longitude)})
+                if changes:
+                    connection.execute(
+                        table.update().where(table.c.id == bindparam('row_id'))
+                        .values(latitude=bindparam('latitude'), longitude=bindparam('longitude'),
+                                geohash=bindparam('geohash')),
+                        changes
+                    )
+                    bump_table_versions(connection, [table.name])
+                updated += len(changes)
+        click.echo(f"{table.name}: located {updated} rows")
+
+def report_rollup_mismatches(report):
+    """Echo a rollups.verify() report; returns True when everything matches"""
+    for name, mismatches in report.items():
+        click.echo(f"{name}: {'OK' if not mismatches else f'{len(mismatches)} mismatched rows'}")
+        for key, stored, fresh in mismatches[:10]:
+            click.echo(f"  {key}: rollup={stored} source={fresh}")
+    return not any(report.values())
+
+@app.cli.command('refresh-rollups')
+@click.option('--verify', is_flag=True, help='Compare the rollups with the source tables afterwards, exit 1 on mismatch')
+def refresh_rollups_command(verify):
+    """Recompute the dashboard rollups for days changed since the last refresh"""
+    with db.engine.begin() as connection:
+        refreshed = rollups.refresh(connection)
+        bump_refreshed_rollups(connection, refreshed)
+    for name, days in refreshed.items():
+        click.echo(f"{name}: {'rebuilt' if days is None else f'{days} days recomputed'}")
+    if verify:
+        with db.engine.connect() as connection:
+            if not report_rollup_mismatches(rollups.verify(connection)):
+                raise SystemExit(1)
+
+@app.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """Recompute every dashboard rollup from the source tables"""
+    with db.engine.begin() as connection:
+        written = rollups.rebuild(connection)
+        bump_table_versions(connection, ROLLUP_TABLES)
+    for name, rows in written.items():
+        click.echo(f"{name}: {rows} rows")
+
+@app.cli.command('verify-rollups')
+def verify_rollups_command():
+    """Compare every rollup with a fresh aggregation of jobs/payments/reviews"""
+    with db.engine.connect() as connection:
+        if not report_rollup_mismatches(rollups.verify(connection)):
+            raise SystemExit(1)
+
+@app.cli.command('dispatch-outbox')
+@click.option('--batch-size', default=OUTBOX_BATCH_SIZE, show_default=True, help='Events delivered per transaction')
+@click.option('--loop', is_flag=True, help='Keep polling instead of exiting once the outbox is drained')
+def dispatch_outbox_command(batch_size, loop):
+    """Deliver pending outbox events (notification fan-out)"""
+    while True:
+        totals = dispatch_outbox(batch_size=batch_size)
+        if totals['claimed'] or not loop:
+            click.echo(f"Delivered {totals['delivered']}, retrying {totals['retried']}, gave up on {totals['dead']}")
+        if not loop:
+            break
+        time.sleep(OUTBOX_POLL_SECONDS)
+
+@app.cli.command('prune-outbox')
+@click.option('--days', default=7, show_default=True, help='Keep delivered events newer than this')
+def prune_outbox_command(days):
+    """Delete delivered outbox events"""
+    with db.engine.begin() as connection:
+        deleted = outbox.prune(connection, datetime.utcnow() - timedelta(days=days))
+    click.echo(f"Pruned {deleted} delivered outbox events older than {days} days")
+
+@app.cli.command('prune-idempotency-keys')
+def prune_idempotency_keys_command():
+    """Delete expired idempotency keys"""
+    with db.engine.begin() as connection:
+        deleted = idempotency.prune(connection)
+    click.echo(f"Pruned {deleted} expired idempotency keys")
+
+@app.cli.command('backfill-status-events')
+def backfill_status_events_command():
+    """Derive creation/completion status events for jobs that have no history"""
+    with db.engine.begin() as connection:
+        inserted = job_events.backfill(connection, Job.__table__)
+        bump_table_versions(connection, ['jobs'])  # stage-latencies is cached on the jobs version
+    click.echo(f"Inserted {inserted} job status events")
+
+@app.cli.command('run-tasks')
+@click.option('--queue', 'queues', multiple=True, help='Queue to drain (default: every registered queue)')
+def run_tasks_command(queues):
+    """Run due background tasks in this process until the queues are empty"""
+    queues = list(queues) or sorted({spec['queue'] for spec in tasks.registry.values()})
+    ran = task_worker({queue: 1 for queue in queues}).drain()
+    click.echo(f"Ran {ran} tasks")
+    with db.engine.connect() as connection:
+        for (queue, status), count in sorted(tasks.depth(connection).items()):
+            click.echo(f"  {queue}: {count} {status}")
+
+@app.cli.command('prune-tasks')
+@click.option('--days', default=7, show_default=True, help='Keep finished tasks newer than this')
+def prune_tasks_command(days):
+    """Delete finished background tasks"""
+    with db.engine.begin() as connection:
+        deleted = tasks.prune(connection, datetime.utcnow() - timedelta(days=days))
+    click.echo(f"Pruned {deleted} finished tasks older than {days} days")
+
+@app.cli.command('rebuild-unread-counters')
+def rebuild_unread_counters_command():
+    """Recompute per-user unread notification counters"""
+    users = rebuild_unread_counters()
+    click.echo(f"Rebuilt unread counters for {users} users")
+
 def create_app():
     """Application factory pattern for deployment"""
     return app
@@ -0,0 +1,118 @@
+# gunicorn.conf.py at repo root
+"""
+FundiMatch - Gunicorn Configuration
+===================================
+
+Loaded by `gunicorn -c gunicorn.conf.py asgi:app` with
+GUNICORN_WORKER_CLASS=uvicorn (Procfile, render.yaml), or by
+`gunicorn -c gunicorn.conf.py wsgi:app` for the plain WSGI app.
+Every setting can be overridden from the environment:
+
+    WEB_CONCURRENCY            workers (default: 2 x CPUs + 1, at most GUNICORN_MAX_WORKERS)
+    GUNICORN_MAX_WORKERS       cap for the CPU-based default (8)
+    GUNICORN_WORKER_CLASS      sync | gthread | gevent | uvicorn (gthread; uvicorn serves asgi:app)
+    GUNICORN_THREADS           threads per gthread worker (4)
+    GUNICORN_WORKER_CONNECTIONS  concurrent clients per gevent worker (1000)
+    GUNICORN_PRELOAD           import the app once in the master before forking (true)
+    GUNICORN_TIMEOUT           seconds before a silent worker is killed (30)
+    GUNICORN_GRACEFUL_TIMEOUT  seconds a worker gets to finish on restart (30)
+    GUNICORN_KEEPALIVE         keep-alive seconds for idle client connections (5)
+    GUNICORN_MAX_REQUESTS      recycle a worker after this many requests, 0 = never (1000)
+    GUNICORN_MAX_REQUESTS_JITTER  random extra requests so workers do not recycle together (100)
+    GUNICORN_ACCESS_LOG        access log path, '-' for stdout (off)
+    PORT                       port to bind (5000)
+
+Preloading imports Flask, SQLAlchemy, numpy and the models once in the
+master, so forked workers share those pages copy-on-write instead of each
+holding a private copy. gc.freeze() before forking keeps the collector from
+touching (and so copying) them. Anything that must not cross a fork - the
+database connection pool above all - is reset in post_fork.
+
+gthread is the default for wsgi:app: a request waiting on Google token
+verification holds a thread, not the whole worker. A notification stream
+holds its thread for up to SSE_MAX_DURATION_SECONDS, though, so a few open
+tabs can use up a gthread worker; the deployment therefore runs asgi:app on
+uvicorn workers, where an idle stream is a parked coroutine. gevent needs
+`pip install gevent` (and psycogreen for PostgreSQL); this file patches the
+standard library before the app is preloaded.
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import gc
+import multiprocessing
+import os
+import sys
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread').lower()
+if worker_class not in ('sync', 'gthread', 'gevent', 'uvicorn'):
+    raise ValueError(f"GUNICORN_WORKER_CLASS must be sync, gthread, gevent or uvicorn, not '{worker_class}'")
+worker_kind = worker_class
+if worker_class == 'uvicorn':
+    worker_class = 'uvicorn.workers.UvicornWorker'
+
+if worker_class == 'gevent':
+    # Patch before the preloaded app creates any locks, sockets or threads
+    from gevent import monkey
+    monkey.patch_all()
+    try:
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+    except ImportError:
+        pass
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+
+max_workers = _env_int('GUNICORN_MAX_WORKERS', 8)
+workers = _env_int('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, max_workers))
+threads = _env_int('GUNICORN_THREADS', 4) if worker_class == 'gthread' else 1
+worker_connections = _env_int('GUNICORN_WORKER_CONNECTIONS', 1000)
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '5000')}")
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+timeout = _env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+
+# Worker heartbeats go to a file; keep it off a possibly slow container disk
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def when_ready(server):
+    """Runs in the master after the app is (pre)loaded, before the first fork"""
+    if preload_app:
+        # Move everything allocated so far out of the collector's reach so
+        # the first collection in a worker does not copy the shared pages
+        gc.collect()
+        gc.freeze()
+    server.log.info("FundiMatch: %s %s worker(s)%s, preload=%s, max_requests=%s+%s",
+                    workers, worker_kind, f" x {threads} threads" if worker_kind == 'gthread' else '',
+                    preload_app, max_requests, max_requests_jitter)
+
+
+def post_fork(server, worker):
+    """Reset per-process state inherited from the master"""
+    backend = sys.modules.get('flask_backend_template')
+    if backend is None:
+        return  # not preloaded - the worker imports the app itself
+    # Connections opened in the master must not be shared between workers;
+    # close=False leaves them to the master instead of closing its sockets
+    with backend.app.app_context():
+        backend.db.engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    """The worker has the app loaded and is about to accept requests"""
+    worker.log.info("Worker ready (pid: %s)", worker.pid)
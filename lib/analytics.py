@@ -0,0 +1,359 @@
+"""
+FundiMatch - Earnings and Job Analytics
+=======================================
+
+Admin reporting over the payments and jobs tables: per-fundi earnings,
+per-category revenue, completion-time percentiles, per-stage latencies
+(from job_status_events) and daily time series.
+Shared by the Flask backend (/api/analytics/*) and the CLI statistics
+report.
+
+How it stays fast on large tables:
+- Each report selects only the columns it needs and streams them in
+  chunks of ANALYTICS_CHUNK_SIZE rows (server-side cursors on PostgreSQL)
+- Every chunk becomes one NumPy array per column and is folded into the
+  result with vectorized operations (bincount, argsort, percentile); no
+  ORM objects or per-row Python loops
+- Per-key totals are bincount arrays indexed by id, so memory grows with
+  the largest id, not the row count. Percentiles keep one float per
+  completed job
+
+Tables are referenced by name here, so the module works with both the
+Flask-SQLAlchemy and the CLI model sets.
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import os
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+
+import numpy as np
+from sqlalchemy import column, func, select, table
+
+from job_states import STAGES
+from metrics import metrics
+
+PAYMENTS = table('payments', column('id'), column('amount'), column('status'),
+                 column('fundi_id'), column('job_id'), column('created_at'))
+JOBS = table('jobs', column('id'), column('status'), column('category_id'),
+             column('created_at'), column('completed_at'))
+STATUS_EVENTS = table('job_status_events', column('job_id'), column('to_status'), column('at'))
+
+CHUNK_SIZE = int(os.environ.get('ANALYTICS_CHUNK_SIZE', 50000))
+DEFAULT_PERCENTILES = (50, 90, 99)
+DEFAULT_DAYS = 30
+MAX_DAYS = 3660
+# Payments that count as revenue
+REVENUE_STATUS = 'completed'
+
+ONE_DAY = np.timedelta64(1, 'D')
+ONE_HOUR = np.timedelta64(1, 'h')
+
+
+def parse_day(text):
+    """
+    Parse a YYYY-MM-DD query value
+    ==============================
+
+    Returns:
+        datetime: Midnight of that day, or None for an empty value
+
+    Raises:
+        ValueError: For anything else
+    """
+    if not text:
+        return None
+    try:
+        return datetime.strptime(text, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f"Invalid date '{text}' (expected YYYY-MM-DD)")
+
+
+def _window(stmt, created_at, start, end):
+    if start is not None:
+        stmt = stmt.where(created_at >= start)
+    if end is not None:
+        stmt = stmt.where(created_at < end)
+    return stmt
+
+
+def iter_columns(bind, stmt, dtypes, chunk_size=None):
+    """
+    Stream a SELECT as chunks of NumPy column arrays
+    ================================================
+
+    Args:
+        bind: Session or Connection
+        stmt: SELECT whose columns are in the same order as dtypes
+        dtypes (dict): Column name -> NumPy dtype. Floats turn NULL into
+                       nan and datetime64 turns it into NaT
+        chunk_size (int): Rows per chunk (default ANALYTICS_CHUNK_SIZE)
+
+    Yields:
+        dict: Column name -> ndarray, one dict per chunk
+    """
+    chunk_size = chunk_size or CHUNK_SIZE
+    result = bind.execute(stmt.execution_options(stream_results=True, yield_per=chunk_size))
+    for rows in result.partitions(chunk_size):
+        yield {name: np.array(values, dtype=dtype)
+               for (name, dtype), values in zip(dtypes.items(), zip(*rows))}
+
+
+class KeyedTotals:
+    """
+    Running Sum and Count per Integer Key
+    =====================================
+
+    Arrays indexed directly by key (fundi id, category id), grown as larger
+    keys show up.
+    """
+
+    def __init__(self):
+        self.sums = np.zeros(0)
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def add(self, keys, values):
+        if not keys.size:
+            return
+        size = max(int(keys.max()) + 1, self.sums.size)
+        self.sums = np.pad(self.sums, (0, size - self.sums.size)) + np.bincount(keys, weights=values, minlength=size)
+        self.counts = np.pad(self.counts, (0, size - self.counts.size)) + np.bincount(keys, minlength=size)
+
+    def rows(self):
+        """(keys, sums, counts) for keys seen at least once, largest sum first"""
+        keys = np.flatnonzero(self.counts)
+        order = np.argsort(-self.sums[keys], kind='stable')
+        keys = keys[order]
+        return keys, self.sums[keys], self.counts[keys]
+
+
+def _timed(report):
+    """Record how long each report takes in analytics_report_seconds"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.observe('analytics_report_seconds', time.perf_counter() - started, report=report)
+        return wrapper
+    return decorator
+
+
+@_timed('earnings')
+def earnings_by_fundi(bind, start=None, end=None, limit=None, chunk_size=None):
+    """
+    Revenue per fundi
+    =================
+
+    Args:
+        bind: Session or Connection
+        start (datetime), end (datetime): Payment created_at window [start, end)
+        limit (int): Keep only the top earners
+
+    Returns:
+        list: {'fundi_id', 'total', 'payments', 'average'} dicts, highest total first
+    """
+    stmt = select(PAYMENTS.c.fundi_id, PAYMENTS.c.amount).where(PAYMENTS.c.status == REVENUE_STATUS)
+    totals = KeyedTotals()
+    for chunk in iter_columns(bind, _window(stmt, PAYMENTS.c.created_at, start, end),
+                              {'fundi_id': np.int64, 'amount': np.float64}, chunk_size):
+        totals.add(chunk['fundi_id'], chunk['amount'])
+    keys, sums, counts = totals.rows()
+    keys, sums, counts = keys[:limit], sums[:limit], counts[:limit]
+    averages = sums / counts
+    return [{'fundi_id': int(k), 'total': round(float(s), 2), 'payments': int(c), 'average': round(float(a), 2)}
+            for k, s, c, a in zip(keys, sums, counts, averages)]
+
+
+@_timed('categories')
+def revenue_by_category(bind, start=None, end=None, chunk_size=None):
+    """
+    Revenue per job category
+    ========================
+
+    Returns:
+        list: {'category_id', 'revenue', 'payments', 'average'} dicts,
+              highest revenue first
+    """
+    stmt = select(JOBS.c.category_id, PAYMENTS.c.amount) \
+        .select_from(PAYMENTS.join(JOBS, JOBS.c.id == PAYMENTS.c.job_id)) \
+        .where(PAYMENTS.c.status == REVENUE_STATUS)
+    totals = KeyedTotals()
+    for chunk in iter_columns(bind, _window(stmt, PAYMENTS.c.created_at, start, end),
+                              {'category_id': np.int64, 'amount': np.float64}, chunk_size):
+        totals.add(chunk['category_id'], chunk['amount'])
+    keys, sums, counts = totals.rows()
+    return [{'category_id': int(k), 'revenue': round(float(s), 2), 'payments': int(c),
+             'average': round(float(s / c), 2)} for k, s, c in zip(keys, sums, counts)]
+
+
+def _distribution(hours, percentiles):
+    if not hours.size:
+        return {'count': 0, 'mean_hours': None, **{f'p{p}': None for p in percentiles}}
+    values = np.percentile(hours, percentiles)
+    return {'count': int(hours.size), 'mean_hours': round(float(hours.mean()), 2),
+            **{f'p{p}': round(float(v), 2) for p, v in zip(percentiles, values)}}
+
+
+@_timed('completion_times')
+def completion_time_percentiles(bind, percentiles=DEFAULT_PERCENTILES, start=None, end=None, chunk_size=None):
+    """
+    How long jobs take from request to completion
+    =============================================
+
+    Args:
+        bind: Session or Connection
+        percentiles (tuple): Percentiles to report (0-100)
+        start (datetime), end (datetime): completed_at window [start, end)
+
+    Returns:
+        dict: {'overall': {...}, 'by_category': {category_id: {...}}} where
+              each entry has count, mean_hours and p<N> in hours
+    """
+    stmt = select(JOBS.c.category_id, JOBS.c.created_at, JOBS.c.completed_at) \
+        .where(JOBS.c.status == 'completed', JOBS.c.completed_at.isnot(None))
+    categories, hours = [], []
+    for chunk in iter_columns(bind, _window(stmt, JOBS.c.completed_at, start, end),
+                              {'category_id': np.int64, 'created_at': 'datetime64[us]',
+                               'completed_at': 'datetime64[us]'}, chunk_size):
+        categories.append(chunk['category_id'])
+        hours.append((chunk['completed_at'] - chunk['created_at']) / ONE_HOUR)
+    categories = np.concatenate(categories) if categories else np.zeros(0, dtype=np.int64)
+    hours = np.concatenate(hours) if hours else np.zeros(0)
+
+    # Group by category with one sort instead of a mask per category
+    order = np.argsort(categories, kind='stable')
+    categories, hours = categories[order], hours[order]
+    keys, starts = np.unique(categories, return_index=True)
+    groups = np.split(hours, starts[1:]) if keys.size else []
+    return {
+        'overall': _distribution(hours, percentiles),
+        'by_category': {int(k): _distribution(g, percentiles) for k, g in zip(keys, groups)},
+    }
+
+
+@_timed('stage_latencies')
+def stage_latencies(bind, percentiles=DEFAULT_PERCENTILES, start=None, end=None, chunk_size=None):
+    """
+    How long jobs spend between lifecycle statuses
+    ==============================================
+
+    For each stage in job_states.STAGES (e.g. pending -> assigned), the
+    hours between a job entering the first status and entering the second.
+    Each stage is one join over job_status_events: the (to_status, at,
+    job_id) index range-scans the jobs that reached the later status in the
+    window, and the (job_id, to_status, at) index finds when each of them
+    entered the earlier one, both without touching the table.
+
+    Args:
+        bind: Session or Connection
+        percentiles (tuple): Percentiles to report (0-100)
+        start (datetime), end (datetime): Window [start, end) on the later status
+
+    Returns:
+        dict: stage name -> {'from', 'to', 'count', 'mean_hours', 'p<N>'}
+    """
+    reached = STATUS_EVENTS.alias('reached')
+    entered = STATUS_EVENTS.alias('entered')
+    report = {}
+    for name, from_status, to_status in STAGES:
+        stmt = select(entered.c.at, reached.c.at) \
+            .select_from(reached.join(entered, entered.c.job_id == reached.c.job_id)) \
+            .where(reached.c.to_status == to_status, entered.c.to_status == from_status,
+                   entered.c.at <= reached.c.at)
+        hours = [(chunk['reached_at'] - chunk['entered_at']) / ONE_HOUR
+                 for chunk in iter_columns(bind, _window(stmt, reached.c.at, start, end),
+                                           {'entered_at': 'datetime64[us]', 'reached_at': 'datetime64[us]'},
+                                           chunk_size)]
+        hours = np.concatenate(hours) if hours else np.zeros(0)
+        report[name] = {'from': from_status, 'to': to_status, **_distribution(hours, percentiles)}
+    return report
+
+
+def _per_day(bind, stmt, origin, days, chunk_size, weighted=False):
+    """
+    Per-day row counts (and sums of the second column when weighted) over
+    [origin, origin + days); stmt selects the timestamp first
+    """
+    dtypes = {'at': 'datetime64[us]', 'weight': np.float64} if weighted else {'at': 'datetime64[us]'}
+    counts, sums = np.zeros(days, dtype=np.int64), np.zeros(days)
+    for chunk in iter_columns(bind, stmt, dtypes, chunk_size):
+        index = ((chunk['at'] - origin) // ONE_DAY).astype(np.int64)
+        counts += np.bincount(index, minlength=days)[:days]
+        if weighted:
+            sums += np.bincount(index, weights=chunk['weight'], minlength=days)[:days]
+    return counts, sums
+
+
+@_timed('daily')
+def daily_series(bind, start=None, end=None, chunk_size=None):
+    """
+    Jobs created/completed and revenue per day
+    ==========================================
+
+    Args:
+        bind: Session or Connection
+        start (datetime): First day (default: DEFAULT_DAYS before end)
+        end (datetime): Day after the last one (default: tomorrow)
+
+    Returns:
+        list: {'date', 'jobs_created', 'jobs_completed', 'payments', 'revenue'}
+              dicts, one per day, oldest first
+    """
+    if end is None:
+        end = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    if start is None:
+        start = end - timedelta(days=DEFAULT_DAYS)
+    days = (end - start).days
+    if days <= 0 or days > MAX_DAYS:
+        raise ValueError(f"Date range must cover 1 to {MAX_DAYS} days")
+    origin = np.datetime64(start, 'us')
+
+    created, _ = _per_day(bind, _window(select(JOBS.c.created_at), JOBS.c.created_at, start, end),
+                          origin, days, chunk_size)
+    completed, _ = _per_day(bind, _window(select(JOBS.c.completed_at).where(JOBS.c.status == 'completed'),
+                                          JOBS.c.completed_at, start, end),
+                            origin, days, chunk_size)
+    paid = select(PAYMENTS.c.created_at, PAYMENTS.c.amount).where(PAYMENTS.c.status == REVENUE_STATUS)
+    payments, revenue = _per_day(bind, _window(paid, PAYMENTS.c.created_at, start, end),
+                                 origin, days, chunk_size, weighted=True)
+
+    dates = origin.astype('datetime64[D]') + np.arange(days)
+    return [{'date': str(d), 'jobs_created': int(c), 'jobs_completed': int(k),
+             'payments': int(p), 'revenue': round(float(r), 2)}
+            for d, c, k, p, r in zip(dates, created, completed, payments, revenue)]
+
+
+def summary(bind, start=None, end=None, chunk_size=None):
+    """
+    Headline numbers for a period
+    =============================
+
+    Returns:
+        dict: revenue, payments, average_payment, earning_fundis,
+              jobs_created, jobs_completed and completion-time percentiles
+    """
+    earnings = earnings_by_fundi(bind, start, end, chunk_size=chunk_size)
+    revenue = sum(e['total'] for e in earnings)
+    payments = sum(e['payments'] for e in earnings)
+    jobs_created = bind.execute(
+        _window(select(func.count()).select_from(JOBS), JOBS.c.created_at, start, end)
+    ).scalar()
+    times = completion_time_percentiles(bind, start=start, end=end, chunk_size=chunk_size)['overall']
+    return {
+        'revenue': round(revenue, 2),
+        'payments': payments,
+        'average_payment': round(revenue / payments, 2) if payments else None,
+        'earning_fundis': len(earnings),
+        'jobs_created': jobs_created,
+        'jobs_completed': times['count'],
+        'completion_hours': {key: value for key, value in times.items() if key != 'count'},
+    }
+
+
+metrics.describe('analytics_report_seconds', 'Time spent computing analytics reports')
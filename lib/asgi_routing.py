@@ -0,0 +1,267 @@
+"""
+FundiMatch - Minimal ASGI Routing
+=================================
+
+Just enough ASGI to serve a handful of async endpoints next to the Flask
+app: a path router, a request object, buffered and streaming responses,
+and an application that falls back to another ASGI app (the Flask app
+behind a WSGI adapter) for every route it does not own.
+
+Behaviour:
+- Routes use Flask-style patterns: /api/notifications/<int:user_id>/stream
+- HEAD is answered by the GET handler without a body
+- Buffered responses are gzip/brotli-compressed like the WSGI middleware
+  (lib/compression.py) when the client accepts it and the body is large
+  enough; streamed responses are compressed chunk by chunk with a flush
+- A streaming response stops (and its generator is closed) as soon as the
+  client disconnects, so idle streams do not outlive their connection
+- Lifespan startup/shutdown hooks run here; the fallback app never sees them
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import asyncio
+import json
+import logging
+import re
+from urllib.parse import parse_qsl, urlsplit, urlunsplit
+
+from werkzeug.datastructures import MultiDict
+
+from compression import StreamCompressor, choose_encoding, compress_body
+
+logger = logging.getLogger(__name__)
+
+_CONVERTERS = {'int': (r'\d+', int), 'string': (r'[^/]+', str)}
+
+
+def async_database_url(url):
+    """
+    The async-driver form of a database URL
+    =======================================
+
+    sqlite:// -> sqlite+aiosqlite://, postgresql:// -> postgresql+asyncpg://.
+    asyncpg spells libpq's sslmode as ssl, so that query option is renamed.
+    """
+    if url.startswith('postgres://'):
+        url = url.replace('postgres://', 'postgresql://', 1)
+    scheme, rest = url.split('://', 1)
+    dialect = scheme.split('+', 1)[0]
+    if dialect == 'sqlite':
+        return f'sqlite+aiosqlite://{rest}'
+    if dialect == 'postgresql':
+        parts = urlsplit(f'postgresql+asyncpg://{rest}')
+        query = '&'.join(('ssl=' + value) if key == 'sslmode' else f'{key}={value}'
+                         for key, value in parse_qsl(parts.query, keep_blank_values=True))
+        return urlunsplit(parts._replace(query=query))
+    raise ValueError(f"No async driver configured for {dialect} databases")
+
+
+class Request:
+    """The parts of an ASGI HTTP scope the handlers use"""
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.method = scope['method']
+        self.path = scope['path']
+        self.query_string = scope.get('query_string', b'').decode('latin-1')
+        self.args = MultiDict(parse_qsl(self.query_string, keep_blank_values=True))
+        self.headers = {name.decode('latin-1').lower(): value.decode('latin-1')
+                        for name, value in scope.get('headers', [])}
+
+    @property
+    def full_path(self):
+        """Path plus query string, formatted like Flask's request.full_path"""
+        return f'{self.path}?{self.query_string}'
+
+
+class Response:
+    """A buffered response"""
+
+    def __init__(self, body=b'', status=200, headers=None, content_type=None):
+        self.body = body.encode('utf-8') if isinstance(body, str) else body
+        self.status = status
+        self.headers = dict(headers or {})
+        if content_type:
+            self.headers['Content-Type'] = content_type
+
+
+class StreamingResponse(Response):
+    """A response whose body comes from an async iterator of str/bytes chunks"""
+
+    def __init__(self, chunks, status=200, headers=None, content_type=None):
+        super().__init__(b'', status, headers, content_type)
+        self.chunks = chunks
+
+
+def json_response(data, status=200, headers=None):
+    """A compact JSON response, like Flask's jsonify"""
+    return Response(json.dumps(data, separators=(',', ':')) + '\n', status, headers, 'application/json')
+
+
+class Router:
+    """Method + path pattern -> handler"""
+
+    def __init__(self):
+        self.routes = []
+
+    def add(self, pattern, handler, methods=('GET',)):
+        regex, converters = '', {}
+        for literal, converter, name in re.findall(r'([^<]*)(?:<(?:(\w+):)?(\w+)>)?', pattern):
+            regex += re.escape(literal)
+            if name:
+                expression, cast = _CONVERTERS[converter or 'string']
+                regex += f'(?P<{name}>{expression})'
+                converters[name] = cast
+        self.routes.append((re.compile(regex + '$'), frozenset(methods), converters, handler))
+
+    def route(self, pattern, methods=('GET',)):
+        """Decorator form of add()"""
+        def decorator(handler):
+            self.add(pattern, handler, methods)
+            return handler
+        return decorator
+
+    def match(self, method, path):
+        """(handler, params) for a request, or (None, None)"""
+        method = 'GET' if method == 'HEAD' else method
+        for regex, methods, converters, handler in self.routes:
+            found = regex.match(path)
+            if found and method in methods:
+                return handler, {name: converters[name](value) for name, value in found.groupdict().items()}
+        return None, None
+
+
+class ASGIApp:
+    """
+    Router-first ASGI Application
+    =============================
+
+    Args:
+        router (Router): Async endpoints served directly
+        fallback: ASGI app for everything the router does not match
+        headers (dict): Extra headers on every routed response (security headers)
+        allowed_origins (list): CORS origins echoed back on routed responses
+        compression (dict): min_size/level/brotli_quality, or None to disable
+        on_startup, on_shutdown (list): Coroutine functions run on lifespan events
+    """
+
+    def __init__(self, router, fallback, headers=None, allowed_origins=(), compression=None,
+                 on_startup=(), on_shutdown=()):
+        self.router = router
+        self.fallback = fallback
+        self.headers = dict(headers or {})
+        self.allowed_origins = set(allowed_origins)
+        self.compression = compression
+        self.on_startup = list(on_startup)
+        self.on_shutdown = list(on_shutdown)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http':
+            return await self.fallback(scope, receive, send)
+        handler, params = self.router.match(scope['method'], scope['path'])
+        if handler is None:
+            return await self.fallback(scope, receive, send)
+
+        request = Request(scope)
+        try:
+            response = await handler(request, **params)
+        except Exception as e:
+            logger.exception("Unhandled error in %s", scope['path'])
+            response = json_response({'error': str(e)}, 500)
+        await self._send(request, response, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            hooks = {'lifespan.startup': self.on_startup, 'lifespan.shutdown': self.on_shutdown}.get(message['type'])
+            if hooks is None:
+                continue
+            event = message['type'].split('.', 1)[1]
+            try:
+                for hook in hooks:
+                    await hook()
+            except Exception as e:
+                await send({'type': f'lifespan.{event}.failed', 'message': str(e)})
+                return
+            await send({'type': f'lifespan.{event}.complete'})
+            if event == 'shutdown':
+                return
+
+    def _response_headers(self, request, response):
+        headers = dict(self.headers, **response.headers)
+        origin = request.headers.get('origin')
+        if origin and origin in self.allowed_origins:
+            headers['Access-Control-Allow-Origin'] = origin
+            headers['Vary'] = 'Origin'
+        return headers
+
+    def _encoding(self, request, response, size=None):
+        if not self.compression or response.status in (204, 304) or 'Content-Encoding' in response.headers:
+            return None
+        content_type = response.headers.get('Content-Type', '')
+        if not (content_type.startswith('application/json') or content_type.startswith('text/')):
+            return None
+        if size is not None and size < self.compression.get('min_size', 1024):
+            return None
+        return choose_encoding(request.headers.get('accept-encoding'))
+
+    async def _send(self, request, response, receive, send):
+        headers = self._response_headers(request, response)
+        head_only = request.method == 'HEAD'
+        if isinstance(response, StreamingResponse):
+            encoding = self._encoding(request, response)
+            if encoding:
+                headers['Content-Encoding'] = encoding
+                headers['Vary'] = ', '.join(filter(None, [headers.get('Vary'), 'Accept-Encoding']))
+            await send({'type': 'http.response.start', 'status': response.status, 'headers': _encode(headers)})
+            if head_only:
+                await send({'type': 'http.response.body', 'body': b''})
+                return await response.chunks.aclose()
+            return await self._stream(response.chunks, encoding, receive, send)
+
+        body = response.body
+        encoding = self._encoding(request, response, len(body))
+        if encoding:
+            body = compress_body(body, encoding, self.compression.get('level', 6),
+                                 self.compression.get('brotli_quality', 4))
+            headers['Content-Encoding'] = encoding
+            headers['Vary'] = ', '.join(filter(None, [headers.get('Vary'), 'Accept-Encoding']))
+        headers['Content-Length'] = str(len(body))
+        await send({'type': 'http.response.start', 'status': response.status, 'headers': _encode(headers)})
+        await send({'type': 'http.response.body', 'body': b'' if head_only else body})
+
+    async def _stream(self, chunks, encoding, receive, send):
+        compressor = StreamCompressor(encoding, self.compression.get('level', 6),
+                                      self.compression.get('brotli_quality', 4)) if encoding else None
+
+        async def pump():
+            async for chunk in chunks:
+                data = chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+                if compressor:
+                    data = compressor.compress(data, flush=True)
+                await send({'type': 'http.response.body', 'body': data, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': compressor.finish() if compressor else b''})
+
+        async def wait_for_disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+
+        streaming = asyncio.ensure_future(pump())
+        watching = asyncio.ensure_future(wait_for_disconnect())
+        try:
+            await asyncio.wait({streaming, watching}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (streaming, watching):
+                task.cancel()
+            await asyncio.gather(streaming, watching, return_exceptions=True)
+            await chunks.aclose()
+        if not streaming.cancelled() and streaming.exception() is not None:
+            logger.error("Stream failed", exc_info=streaming.exception())
+
+
+def _encode(headers):
+    return [(name.lower().encode('latin-1'), str(value).encode('latin-1')) for name, value in headers.items()]
@@ -0,0 +1,118 @@
+"""
+FundiMatch - Reference Data Cache
+=================================
+
+A small in-process, read-through cache for near-static reference data such
+as job categories. It is shared by the Flask backend and the CLI helpers.
+
+How entries stay fresh:
+- Each entry remembers the version it was loaded at. Callers that can read
+  a cheap version number (the backend's table_versions rows) pass it in, and
+  a different version forces a reload - this works across gunicorn workers.
+- Callers without a version (the CLI) rely on explicit invalidate() calls
+  when they write, plus a TTL so changes made by other processes show up.
+
+Cached values should be plain data (tuples, dicts, SQLAlchemy Row objects),
+never ORM instances bound to a session.
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import os
+import threading
+import time
+
+from metrics import metrics
+
+
+class ReferenceCache:
+    """
+    Versioned Read-Through Cache
+    ============================
+
+    Stores one value per key together with the version and time it was
+    loaded. Hit/miss counts are kept locally and in the metrics registry.
+    """
+
+    def __init__(self, name, ttl=300):
+        """
+        Args:
+            name (str): Cache name used in metrics labels
+            ttl (float): Seconds before an entry is reloaded (None = never)
+        """
+        self.name = name
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key, loader, version=None):
+        """
+        Return the cached value for key, loading it on a miss
+        =====================================================
+
+        Args:
+            key (str): Cache key
+            loader (callable): Zero-argument function returning the fresh value
+            version (optional): Current version of the underlying data
+
+        Returns:
+            The cached or freshly loaded value
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_version, loaded_at, value = entry
+                expired = self.ttl is not None and now - loaded_at > self.ttl
+                if entry_version == version and not expired:
+                    self.hits += 1
+                    metrics.inc('reference_cache_requests_total', cache=self.name, result='hit')
+                    return value
+
+        # Load outside the lock so a slow query never blocks other readers
+        value = loader()
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (version, now, value)
+        metrics.inc('reference_cache_requests_total', cache=self.name, result='miss')
+        return value
+
+    def invalidate(self, key=None):
+        """Drop one key, or every key when key is None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+            self.invalidations += 1
+        metrics.inc('reference_cache_invalidations_total', cache=self.name)
+
+    def stats(self):
+        """
+        Return hit/miss statistics
+        ==========================
+
+        Returns:
+            dict: hits, misses, hit_rate, invalidations and number of keys
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'name': self.name,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+                'invalidations': self.invalidations,
+                'size': len(self._entries),
+            }
+
+
+metrics.describe('reference_cache_requests_total', 'Reference cache lookups by result (hit/miss)')
+metrics.describe('reference_cache_invalidations_total', 'Reference cache invalidations')
+
+# Shared cache for categories and other reference data
+reference_cache = ReferenceCache('reference', ttl=float(os.environ.get('REFERENCE_CACHE_TTL', 300)))
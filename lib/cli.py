@@ -8,10 +8,11 @@ import sys
 from helpers import (
     list_fundis, create_fundi_profile, delete_fundi, search_fundis,
     list_jobs, create_job, delete_job, update_job_status,
-    view_job_details, assign_job_to_fundi, list_jobs_by_status, seed_sample_data,
-    create_user, list_users, delete_user, list_categories, create_category
+    view_job_details, assign_job_to_fundi, suggest_fundis, list_jobs_by_status, seed_sample_data,
+    show_analytics_report,
+    create_user, list_users, delete_user, list_categories, create_category, get_category
 )
-from db.models import get_session, User, Fundi, Job, Category
+from db.models import session_scope, User, Fundi, Job, Category
 
 
 def print_welcome():
@@ -39,6 +40,7 @@ def print_menu():
     print("10) View Job Details")
     print("11) Assign Job to Fundi")
     print("12) List Categories")
+    print("13) Analytics Report")
     print("S) Seed Sample Data")
     print("0) Exit")
     print("-" * 30)
@@ -104,17 +106,15 @@ def handle_create_user():
     
     role = role_map[role_choice]
     
-    # Get database session and create user
-    session = get_session()
+    # One unit of work for the new user
     try:
-        user = create_user(session, username=username, email=email, password=password, phone=phone, role=role)
-        if user:
-            print(f"✅ User created successfully!")
-            print(f"   ID: {user.id} | Username: {user.username} | Role: {user.role}")
+        with session_scope() as session:
+            user = create_user(session, username=username, email=email, password=password, phone=phone, role=role)
+            if user:
+                print(f"✅ User created successfully!")
+                print(f"   ID: {user.id} | Username: {user.username} | Role: {user.role}")
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
-    finally:
-        session.close()
 
 
 def handle_list_users():
@@ -122,13 +122,11 @@ def handle_list_users():
     print("\n👥 ALL USERS")
     print("-" * 50)
     
-    session = get_session()
     try:
-        list_users(session)
+        with session_scope(read_only=True) as session:
+            list_users(session)
     except Exception as e:
         print(f"❌ Error: {e}")
-    finally:
-        session.close()
 
 
 def handle_create_fundi_profile():
@@ -137,74 +135,72 @@ def handle_create_fundi_profile():
     print("-" * 30)
     
     # First, show available users with fundi role
-    session = get_session()
     try:
-        fundi_users = User.find_by_role(session, 'fundi')
-        if not fundi_users:
-            print("❌ No users with 'fundi' role found. Please create a fundi user first.")
-            return
-        
-        print("Available fundi users:")
-        for user in fundi_users:
-            print(f"ID: {user.id} | {user.username} | {user.email}")
-        
-        user_id = get_number("Enter user ID to create fundi profile: ")
-        if user_id is None:
-            return
-        
-        # Check if user exists and is a fundi
-        user = User.find_by_id(session, user_id)
-        if not user or user.role != 'fundi':
-            print("❌ User not found or not a fundi")
-            return
-        
-        specialization = get_input("Enter specialization (e.g., plumbing, electrical): ")
-        if not specialization:
-            print("❌ Specialization cannot be empty")
-            return
-        
-        experience = get_input("Enter experience (e.g., 5 years): ")
-        if not experience:
-            print("❌ Experience cannot be empty")
-            return
-        
-        hourly_rate_input = get_input("Enter hourly rate (KES): ")
-        if not hourly_rate_input:
-            print("❌ Hourly rate cannot be empty")
-            return
-        
-        try:
-            hourly_rate = float(hourly_rate_input)
-        except ValueError:
-            print("❌ Hourly rate must be a number")
-            return
-        
-        location = get_input("Enter location: ")
-        if not location:
-            print("❌ Location cannot be empty")
-            return
-        
-        bio = get_input("Enter bio (optional): ")
-        
-        # Create fundi profile
-        fundi = create_fundi_profile(
-            session, 
-            user_id=user_id,
-            specialization=specialization,
-            experience=experience,
-            hourly_rate=hourly_rate,
-            location=location,
-            bio=bio
-        )
-        
-        if fundi:
-            print(f"✅ Fundi profile created successfully!")
-            print(f"   ID: {fundi.id} | User: {user.username} | Specialization: {fundi.specialization}")
+        with session_scope() as session:
+            fundi_users = User.find_by_role(session, 'fundi')
+            if not fundi_users:
+                print("❌ No users with 'fundi' role found. Please create a fundi user first.")
+                return
+            
+            print("Available fundi users:")
+            for user in fundi_users:
+                print(f"ID: {user.id} | {user.username} | {user.email}")
+            
+            user_id = get_number("Enter user ID to create fundi profile: ")
+            if user_id is None:
+                return
+            
+            # Check if user exists and is a fundi
+            user = User.find_by_id(session, user_id)
+            if not user or user.role != 'fundi':
+                print("❌ User not found or not a fundi")
+                return
             
+            specialization = get_input("Enter specialization (e.g., plumbing, electrical): ")
+            if not specialization:
+                print("❌ Specialization cannot be empty")
+                return
+            
+            experience = get_input("Enter experience (e.g., 5 years): ")
+            if not experience:
+                print("❌ Experience cannot be empty")
+                return
+            
+            hourly_rate_input = get_input("Enter hourly rate (KES): ")
+            if not hourly_rate_input:
+                print("❌ Hourly rate cannot be empty")
+                return
+            
+            try:
+                hourly_rate = float(hourly_rate_input)
+            except ValueError:
+                print("❌ Hourly rate must be a number")
+                return
+            
+            location = get_input("Enter location: ")
+            if not location:
+                print("❌ Location cannot be empty")
+                return
+            
+            bio = get_input("Enter bio (optional): ")
+            
+            # Create fundi profile
+            fundi = create_fundi_profile(
+                session, 
+                user_id=user_id,
+                specialization=specialization,
+                experience=experience,
+                hourly_rate=hourly_rate,
+                location=location,
+                bio=bio
+            )
+            
+            if fundi:
+                print(f"✅ Fundi profile created successfully!")
+                print(f"   ID: {fundi.id} | User: {user.username} | Specialization: {fundi.specialization}")
+                
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
-    finally:
-        session.close()
 
 
 def handle_list_fundis():
@@ -212,13 +208,11 @@ def handle_list_fundis():
     print("\n👷 ALL FUNDIS")
     print("-" * 50)
     
-    session = get_session()
     try:
-        list_fundis(session)
+        with session_scope(read_only=True) as session:
+            list_fundis(session)
     except Exception as e:
         print(f"❌ Error: {e}")
-    finally:
-        session.close()
 
 
 def handle_search_fundis():
@@ -226,20 +220,24 @@ def handle_search_fundis():
     print("\n🔍 SEARCH FUNDIS")
     print("-" * 30)
     
+    keywords = get_input("Enter keywords, e.g. 'plumber nairobi' (or press Enter to skip): ")
     specialization = get_input("Enter specialization to search (or press Enter to skip): ")
     location = get_input("Enter location to search (or press Enter to skip): ")
     
-    if not specialization and not location:
+    if not keywords and not specialization and not location:
         print("❌ Please provide at least one search criteria")
         return
     
-    session = get_session()
     try:
-        search_fundis(session, specialization=specialization, location=location)
+        with session_scope(read_only=True) as session:
+            offset = 0
+            while search_fundis(session, specialization=specialization, location=location,
+                                keywords=keywords, offset=offset):
+                if get_input("Show more results? (y/N): ").lower() != 'y':
+                    break
+                offset += 20
     except Exception as e:
         print(f"❌ Error: {e}")
-    finally:
-        session.close()
 
 
 def handle_delete_fundi():
@@ -251,17 +249,15 @@ def handle_delete_fundi():
     if fundi_id is None:
         return
     
-    session = get_session()
     try:
-        success = delete_fundi(session, fundi_id)
-        if success:
-            print(f"✅ Fundi with ID {fundi_id} deleted successfully!")
-        else:
-            print(f"❌ Failed to delete fundi with ID {fundi_id}")
+        with session_scope() as session:
+            success = delete_fundi(session, fundi_id)
+            if success:
+                print(f"✅ Fundi with ID {fundi_id} deleted successfully!")
+            else:
+                print(f"❌ Failed to delete fundi with ID {fundi_id}")
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
-    finally:
-        session.close()
 
 
 def handle_create_job():
@@ -270,76 +266,74 @@ def handle_create_job():
     print("-" * 30)
     
     # Show available categories
-    session = get_session()
     try:
-        categories = list_categories(session)
-        if not categories:
-            print("❌ No categories found. Please create categories first.")
-            return
-        
-        # Show available clients
-        clients = User.find_by_role(session, 'client')
-        if not clients:
-            print("❌ No clients found. Please create client users first.")
-            return
-        
-        print("Available clients:")
-        for client in clients:
-            print(f"ID: {client.id} | {client.username} | {client.email}")
-        
-        client_id = get_number("Enter client ID: ")
-        if client_id is None:
-            return
-        
-        # Check if client exists
-        client = User.find_by_id(session, client_id)
-        if not client or client.role != 'client':
-            print("❌ Client not found")
-            return
-        
-        title = get_input("Enter job title: ")
-        if not title:
-            print("❌ Title cannot be empty")
-            return
-        
-        description = get_input("Enter job description: ")
-        if not description:
-            print("❌ Description cannot be empty")
-            return
-        
-        location = get_input("Enter job location: ")
-        if not location:
-            print("❌ Location cannot be empty")
-            return
-        
-        category_id = get_number("Enter category ID: ")
-        if category_id is None:
-            return
-        
-        # Check if category exists
-        category = session.query(Category).filter(Category.id == category_id).first()
-        if not category:
-            print("❌ Category not found")
-            return
-        
-        # Create job
-        job = create_job(
-            session, 
-            title=title,
-            description=description,
-            location=location,
-            client_id=client_id,
-            category_id=category_id
-        )
-        
-        if job:
-            print(f"✅ Job created successfully!")
-            print(f"   ID: {job.id} | Title: {job.title} | Status: {job.status}")
+        with session_scope() as session:
+            categories = list_categories(session)
+            if not categories:
+                print("❌ No categories found. Please create categories first.")
+                return
+            
+            # Show available clients
+            clients = User.find_by_role(session, 'client')
+            if not clients:
+                print("❌ No clients found. Please create client users first.")
+                return
+            
+            print("Available clients:")
+            for client in clients:
+                print(f"ID: {client.id} | {client.username} | {client.email}")
+            
+            client_id = get_number("Enter client ID: ")
+            if client_id is None:
+                return
+            
+            # Check if client exists
+            client = User.find_by_id(session, client_id)
+            if not client or client.role != 'client':
+                print("❌ Client not found")
+                return
             
+            title = get_input("Enter job title: ")
+            if not title:
+                print("❌ Title cannot be empty")
+                return
+            
+            description = get_input("Enter job description: ")
+            if not description:
+                print("❌ Description cannot be empty")
+                return
+            
+            location = get_input("Enter job location: ")
+            if not location:
+                print("❌ Location cannot be empty")
+                return
+            
+            category_id = get_number("Enter category ID: ")
+            if category_id is None:
+                return
+            
+            # Check if category exists
+            category = get_category(session, category_id)
+            if not category:
+                print("❌ Category not found")
+                return
+            
+            # Create job
+            job = create_job(
+                session, 
+                title=title,
+                description=description,
+                location=location,
+                client_id=client_id,
+                category_id=category_id
+            )
+            
+            if job:
+                print(f"✅ Job created successfully!")
+                print(f"   ID: {job.id} | Title: {job.title} | Status: {job.status}")
+                
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
-    finally:
-        session.close()
 
 
 def handle_list_jobs():
@@ -347,13 +341,11 @@ def handle_list_jobs():
     print("\n📋 ALL JOBS")
     print("-" * 50)
     
-    session = get_session()
     try:
-        list_jobs(session)
+        with session_scope(read_only=True) as session:
+            list_jobs(session)
     except Exception as e:
         print(f"❌ Error: {e}")
-    finally:
-        session.close()
 
 
 def handle_update_job_status():
@@ -381,17 +373,15 @@ def handle_update_job_status():
     
     status = status_map[status_choice]
     
-    session = get_session()
     try:
-        success = update_job_status(session, job_id, status)
-        if success:
-            print(f"✅ Job status updated successfully!")
-        else:
-            print(f"❌ Failed to update job status")
+        with session_scope() as session:
+            success = update_job_status(session, job_id, status)
+            if success:
+                print(f"✅ Job status updated successfully!")
+            else:
+                print(f"❌ Failed to update job status")
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
-    finally:
-        session.close()
 
 
 def handle_view_job_details():
@@ -403,13 +393,11 @@ def handle_view_job_details():
     if job_id is None:
         return
     
-    session = get_session()
     try:
-        view_job_details(session, job_id)
+        with session_scope(read_only=True) as session:
+            view_job_details(session, job_id)
     except Exception as e:
         print(f"❌ Error: {e}")
-    finally:
-        session.close()
 
 
 def handle_assign_job():
@@ -418,42 +406,41 @@ def handle_assign_job():
     print("-" * 30)
     
     # Show pending jobs first
-    session = get_session()
     try:
-        pending_jobs = list_jobs_by_status(session, "pending")
-        if not pending_jobs:
-            print("📭 No pending jobs available for assignment")
-            return
-        
-        # Show available fundis
-        available_fundis = Fundi.find_available(session)
-        if not available_fundis:
-            print("📭 No available fundis found")
-            return
-        
-        print("Available fundis:")
-        for fundi in available_fundis:
-            print(f"ID: {fundi.id} | {fundi.user.username} | {fundi.specialization}")
-        
-        job_id = get_number("Enter job ID to assign: ")
-        if job_id is None:
-            return
-        
-        fundi_id = get_number("Enter fundi ID to assign to: ")
-        if fundi_id is None:
-            return
-        
-        # Try to assign job
-        success = assign_job_to_fundi(session, job_id, fundi_id)
-        if success:
-            print(f"✅ Job assigned successfully!")
-        else:
-            print(f"❌ Failed to assign job")
+        with session_scope() as session:
+            if not list_jobs_by_status(session, "pending"):
+                print("📭 No pending jobs available for assignment")
+                return
+            
+            job_id = get_number("Enter job ID to assign: ")
+            if job_id is None:
+                return
+            
+            # Suggest the best-ranked available fundis for this job
+            matches = suggest_fundis(session, job_id)
+            if not matches:
+                return
             
+            choice = get_input(f"Enter fundi ID to assign to (Enter for top match #{matches[0].fundi_id}, 'q' to quit): ")
+            if choice.lower() == 'q':
+                return
+            if not choice:
+                fundi_id = matches[0].fundi_id
+            elif choice.isdigit():
+                fundi_id = int(choice)
+            else:
+                print("❌ Please enter a valid fundi ID")
+                return
+            
+            # Try to assign job
+            success = assign_job_to_fundi(session, job_id, fundi_id)
+            if success:
+                print(f"✅ Job assigned successfully!")
+            else:
+                print(f"❌ Failed to assign job")
+                
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
-    finally:
-        session.close()
 
 
 def handle_list_categories():
@@ -461,13 +448,24 @@ def handle_list_categories():
     print("\n📂 JOB CATEGORIES")
     print("-" * 30)
     
-    session = get_session()
     try:
-        list_categories(session)
+        with session_scope(read_only=True) as session:
+            list_categories(session)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+
+
+def handle_analytics_report():
+    """Handle printing the earnings and job analytics report"""
+    days = get_number("Days to cover (e.g. 30): ")
+    if not days or days < 1:
+        days = 30
+    
+    try:
+        with session_scope(read_only=True) as session:
+            show_analytics_report(session, days=days)
     except Exception as e:
         print(f"❌ Error: {e}")
-    finally:
-        session.close()
 
 
 def handle_seed_data():
@@ -480,13 +478,11 @@ def handle_seed_data():
         print("❌ Seeding cancelled")
         return
     
-    session = get_session()
     try:
-        seed_sample_data(session)
+        with session_scope() as session:
+            seed_sample_data(session)
     except Exception as e:
         print(f"❌ Error seeding data: {e}")
-    finally:
-        session.close()
 
 
 def main():
@@ -495,7 +491,7 @@ def main():
     
     while True:
         print_menu()
-        choice = get_input("Select option (0-12, S): ").upper()
+        choice = get_input("Select option (0-13, S): ").upper()
         
         if choice == "0":
             print("\n👋 Thank you for using FundiMatch CLI!")
@@ -525,10 +521,12 @@ def main():
             handle_assign_job()
         elif choice == "12":
             handle_list_categories()
+        elif choice == "13":
+            handle_analytics_report()
         elif choice == "S":
             handle_seed_data()
         else:
-            print("❌ Invalid option. Please select 0-12 or S")
+            print("❌ Invalid option. Please select 0-13 or S")
 
 
 if __name__ == "__main__":
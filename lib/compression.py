@@ -0,0 +1,260 @@
+"""
+FundiMatch - Response Compression Middleware
+============================================
+
+WSGI middleware that gzip- or brotli-compresses responses for clients that
+send Accept-Encoding. It wraps any WSGI app (the Flask backend installs it on
+app.wsgi_app).
+
+Behaviour:
+- Buffered responses (with Content-Length) are only compressed when they are
+  at least min_size bytes - tiny JSON bodies are cheaper to send as-is
+- Streamed/chunked responses (no Content-Length, e.g. generators or SSE) are
+  compressed incrementally and flushed after every chunk, so clients still
+  receive each chunk as soon as it is produced
+- Brotli is used when the optional `brotli` package is installed and the
+  client prefers it; gzip otherwise
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import zlib
+
+from metrics import metrics
+
+try:
+    import brotli
+except ImportError:  # brotli is optional - gzip is always available
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'application/json', 'text/', 'application/javascript', 'application/xml', 'image/svg+xml',
+)
+
+
+def parse_accept_encoding(header):
+    """
+    Parse an Accept-Encoding header into {encoding: q}
+    =================================================
+
+    Args:
+        header (str): Raw header value, e.g. "gzip, br;q=0.9"
+
+    Returns:
+        dict: Lower-cased encodings mapped to their quality values
+    """
+    accepted = {}
+    for part in (header or '').split(','):
+        token, _, params = part.strip().partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token] = quality
+    return accepted
+
+
+def choose_encoding(header, brotli_enabled=True):
+    """Pick 'br', 'gzip' or None for an Accept-Encoding header"""
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*', 0.0)
+    candidates = []
+    if brotli is not None and brotli_enabled:
+        candidates.append(('br', accepted.get('br', wildcard)))
+    candidates.append(('gzip', accepted.get('gzip', wildcard)))
+    best, quality = max(candidates, key=lambda item: item[1])
+    return best if quality > 0 else None
+
+
+class StreamCompressor:
+    """
+    Incremental Compressor
+    ======================
+
+    Wraps zlib (gzip container) or brotli behind one interface so a body can
+    be compressed chunk by chunk with a flush after each chunk.
+    """
+
+    def __init__(self, encoding, level=6, brotli_quality=4):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31 -> gzip header and trailer around a raw deflate stream
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data, flush=False):
+        """Compress one chunk; flush=True emits everything buffered so far"""
+        if self.encoding == 'br':
+            out = self._compressor.process(data)
+            return out + self._compressor.flush() if flush else out
+        out = self._compressor.compress(data)
+        return out + self._compressor.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self):
+        """Finish the stream and return the trailing bytes"""
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+def compress_body(data, encoding, level=6, brotli_quality=4):
+    """Compress a complete body in one call"""
+    compressor = StreamCompressor(encoding, level, brotli_quality)
+    return compressor.compress(data) + compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    WSGI Compression Middleware
+    ===========================
+
+    Args:
+        app: The WSGI application to wrap
+        min_size (int): Smallest buffered body (bytes) worth compressing
+        level (int): gzip level 1-9
+        brotli_quality (int): brotli quality 0-11
+        use_brotli (bool): Offer brotli when the package is installed
+    """
+
+    def __init__(self, app, min_size=1024, level=6, brotli_quality=4, use_brotli=True):
+        self.app = app
+        self.min_size = min_size
+        self.level = level
+        self.brotli_quality = brotli_quality
+        self.use_brotli = use_brotli
+
+    def __call__(self, environ, start_response):
+        encoding = choose_encoding(environ.get('HTTP_ACCEPT_ENCODING'), self.use_brotli)
+        if encoding is None or environ.get('REQUEST_METHOD') == 'HEAD':
+            return self.app(environ, start_response)
+
+        captured = {}
+
+        def capture_start_response(status, headers, exc_info=None):
+            captured['status'] = status
+            captured['headers'] = headers
+            captured['exc_info'] = exc_info
+            return captured.setdefault('written', []).append
+
+        app_iter = self.app(environ, capture_start_response)
+        iterator = iter(app_iter)
+        pending = []
+        # start_response may be deferred until the first chunk is produced
+        while 'status' not in captured:
+            try:
+                pending.append(next(iterator))
+            except StopIteration:
+                break
+        pending = captured.get('written', []) + pending
+        if 'status' not in captured:
+            # The app never started a response; hand back what it produced and
+            # let the server report that, as it would without this middleware
+            return self._passthrough(pending, iterator, app_iter)
+
+        status = captured['status']
+        headers = captured['headers']
+        if not self._should_compress(status, headers):
+            start_response(status, headers, captured['exc_info'])
+            return self._passthrough(pending, iterator, app_iter)
+
+        length = self._header(headers, 'Content-Length')
+        if length is not None:
+            body = b''.join(pending) + b''.join(iterator)
+            self._close(app_iter)
+            if len(body) < self.min_size:
+                start_response(status, headers, captured['exc_info'])
+                return [body]
+            compressed = compress_body(body, encoding, self.level, self.brotli_quality)
+            self._count(encoding, len(body), len(compressed))
+            start_response(status, self._compressed_headers(headers, encoding, len(compressed)), captured['exc_info'])
+            return [compressed]
+
+        start_response(status, self._compressed_headers(headers, encoding, None), captured['exc_info'])
+        return self._stream(encoding, pending, iterator, app_iter)
+
+    def _should_compress(self, status, headers):
+        code = int(status.split(' ', 1)[0])
+        if code < 200 or code in (204, 206, 304):
+            return False
+        if self._header(headers, 'Content-Encoding'):
+            return False
+        content_type = (self._header(headers, 'Content-Type') or '').lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def _compressed_headers(self, headers, encoding, length):
+        skip = {'content-length', 'content-encoding', 'etag'}
+        new_headers = [(k, v) for k, v in headers if k.lower() not in skip]
+        etag = self._header(headers, 'ETag')
+        if etag:
+            # The encoded body differs byte-wise, so a strong validator must become weak
+            new_headers.append(('ETag', etag if etag.startswith('W/') else 'W/' + etag))
+        vary = self._header(headers, 'Vary')
+        if not vary:
+            new_headers.append(('Vary', 'Accept-Encoding'))
+        elif 'accept-encoding' not in vary.lower():
+            new_headers = [(k, v) for k, v in new_headers if k.lower() != 'vary']
+            new_headers.append(('Vary', vary + ', Accept-Encoding'))
+        new_headers.append(('Content-Encoding', encoding))
+        if length is not None:
+            new_headers.append(('Content-Length', str(length)))
+        return new_headers
+
+    def _stream(self, encoding, pending, iterator, app_iter):
+        compressor = StreamCompressor(encoding, self.level, self.brotli_quality)
+        size_in = size_out = 0
+        try:
+            for chunk in pending:
+                out = compressor.compress(chunk, flush=True)
+                size_in, size_out = size_in + len(chunk), size_out + len(out)
+                yield out
+            for chunk in iterator:
+                if not chunk:
+                    continue
+                out = compressor.compress(chunk, flush=True)
+                size_in, size_out = size_in + len(chunk), size_out + len(out)
+                yield out
+            tail = compressor.finish()
+            size_out += len(tail)
+            yield tail
+        finally:
+            self._count(encoding, size_in, size_out)
+            self._close(app_iter)
+
+    def _passthrough(self, pending, iterator, app_iter):
+        try:
+            for chunk in pending:
+                yield chunk
+            for chunk in iterator:
+                yield chunk
+        finally:
+            self._close(app_iter)
+
+    @staticmethod
+    def _count(encoding, size_in, size_out):
+        metrics.inc('compression_bytes_total', size_in, encoding=encoding, direction='in')
+        metrics.inc('compression_bytes_total', size_out, encoding=encoding, direction='out')
+
+    @staticmethod
+    def _header(headers, name):
+        name = name.lower()
+        for key, value in headers:
+            if key.lower() == name:
+                return value
+        return None
+
+    @staticmethod
+    def _close(app_iter):
+        close = getattr(app_iter, 'close', None)
+        if close:
+            close()
+
+
+metrics.describe('compression_bytes_total', 'Response bytes before (in) and after (out) compression')
@@ -29,7 +29,8 @@ from pathlib import Path
 # Add the lib directory to Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from models import get_session, User, Fundi, Category, Job, Review, Payment
+from models import session_scope, job_events, User, Fundi, Category, Job, Review, Payment
+from cache import reference_cache
 
 
 class AutoSync:
@@ -150,175 +151,176 @@ class AutoSync:
             self.logger.error("❌ Failed to load data from db.json")
             return False
         
-        # Get database session
-        session = get_session()
-        
         try:
-            # Clear existing data
-            self.logger.info("🧹 Clearing existing data...")
-            session.query(Payment).delete()
-            session.query(Review).delete()
-            session.query(Job).delete()
-            session.query(Fundi).delete()
-            session.query(User).delete()
-            session.query(Category).delete()
-            session.commit()
-            
-            # Create categories
-            self.logger.info("📂 Creating categories...")
-            categories_data = data.get('categories', [])
-            categories = {}
-            
-            for cat_data in categories_data:
-                category = Category(
-                    name=cat_data['name'],
-                    description=cat_data['description'],
-                    icon=cat_data['icon']
-                )
-                session.add(category)
-                session.commit()
-                categories[cat_data['name']] = category
-            
-            # Create users
-            self.logger.info("👥 Creating users...")
-            users_data = data.get('users', [])
-            users = {}
-            
-            for user_data in users_data:
-                user = User(
-                    username=user_data['username'],
-                    email=user_data['email'],
-                    password=user_data['password'],
-                    phone=user_data['phone'],
-                    role=user_data['role'],
-                    is_active=user_data['is_active'],
-                    created_at=datetime.fromisoformat(user_data['created_at'].replace('Z', '+00:00'))
-                )
-                session.add(user)
-                session.commit()
-                users[user_data['email']] = user
-            
-            # Create fundi users and profiles
-            self.logger.info("🛠️ Creating fundi profiles...")
-            fundis_data = data.get('fundis', [])
-            fundis = {}
-            
-            for fundi_data in fundis_data:
-                # Create user if doesn't exist
-                if fundi_data['email'] not in users:
+            with session_scope() as session:
+                # Clear and rebuild in one transaction, so readers never see empty tables
+                self.logger.info("🧹 Clearing existing data...")
+                session.query(Payment).delete()
+                session.query(Review).delete()
+                job_events.delete(session.connection())  # SQLite reuses job ids
+                session.query(Job).delete()
+                session.query(Fundi).delete()
+                session.query(User).delete()
+                session.query(Category).delete()
+                
+                # Create categories
+                self.logger.info("📂 Creating categories...")
+                categories_data = data.get('categories', [])
+                categories = {}
+                
+                for cat_data in categories_data:
+                    category = Category(
+                        name=cat_data['name'],
+                        description=cat_data['description'],
+                        icon=cat_data['icon']
+                    )
+                    session.add(category)
+                    session.flush()
+                    categories[cat_data['name']] = category
+                
+                # Create users
+                self.logger.info("👥 Creating users...")
+                users_data = data.get('users', [])
+                users = {}
+                
+                for user_data in users_data:
                     user = User(
-                        username=fundi_data['username'],
-                        email=fundi_data['email'],
-                        password=fundi_data['password'],
-                        phone=fundi_data['phone'],
-                        role=fundi_data['role'],
-                        is_active=fundi_data['is_active'],
-                        created_at=datetime.fromisoformat(fundi_data['created_at'].replace('Z', '+00:00'))
+                        username=user_data['username'],
+                        email=user_data['email'],
+                        password=user_data['password'],
+                        phone=user_data['phone'],
+                        role=user_data['role'],
+                        is_active=user_data['is_active'],
+                        created_at=datetime.fromisoformat(user_data['created_at'].replace('Z', '+00:00'))
                     )
                     session.add(user)
-                    session.commit()
-                    users[fundi_data['email']] = user
+                    session.flush()
+                    users[user_data['email']] = user
                 
-                # Create fundi profile
-                user = users[fundi_data['email']]
-                fundi = Fundi(
-                    user_id=user.id,
-                    specialization=fundi_data['specialization'],
-                    experience=fundi_data['experience'],
-                    hourly_rate=fundi_data['hourly_rate'],
-                    location=fundi_data['location'],
-                    bio=fundi_data['bio'],
-                    rating=fundi_data['rating'],
-                    is_available=fundi_data['is_available'],
-                    created_at=datetime.fromisoformat(fundi_data['created_at'].replace('Z', '+00:00'))
-                )
-                session.add(fundi)
-                session.commit()
-                fundis[fundi_data['email']] = fundi
-            
-            # Create jobs
-            self.logger.info("📋 Creating jobs...")
-            jobs_data = data.get('bookings', [])
-            jobs = {}
-            
-            for job_data in jobs_data:
-                # Find client and fundi
-                client = None
-                if job_data['client_id'] == 1:
-                    client = users.get('test@example.com')
-                elif job_data['client_id'] == 2:
-                    client = users.get('john@example.com')
+                # Create fundi users and profiles
+                self.logger.info("🛠️ Creating fundi profiles...")
+                fundis_data = data.get('fundis', [])
+                fundis = {}
                 
-                fundi = None
-                if job_data.get('fundi_id'):
-                    fundi_obj = session.query(Fundi).filter(Fundi.id == job_data['fundi_id']).first()
-                    if fundi_obj:
-                        fundi = fundi_obj
+                for fundi_data in fundis_data:
+                    # Create user if doesn't exist
+                    if fundi_data['email'] not in users:
+                        user = User(
+                            username=fundi_data['username'],
+                            email=fundi_data['email'],
+                            password=fundi_data['password'],
+                            phone=fundi_data['phone'],
+                            role=fundi_data['role'],
+                            is_active=fundi_data['is_active'],
+                            created_at=datetime.fromisoformat(fundi_data['created_at'].replace('Z', '+00:00'))
+                        )
+                        session.add(user)
+                        session.flush()
+                        users[fundi_data['email']] = user
+                    
+                    # Create fundi profile
+                    user = users[fundi_data['email']]
+                    fundi = Fundi(
+                        user_id=user.id,
+                        specialization=fundi_data['specialization'],
+                        experience=fundi_data['experience'],
+                        hourly_rate=fundi_data['hourly_rate'],
+                        location=fundi_data['location'],
+                        bio=fundi_data['bio'],
+                        rating=fundi_data['rating'],
+                        is_available=fundi_data['is_available'],
+                        created_at=datetime.fromisoformat(fundi_data['created_at'].replace('Z', '+00:00'))
+                    )
+                    session.add(fundi)
+                    session.flush()
+                    fundis[fundi_data['email']] = fundi
                 
-                # Find category
-                category = categories.get(job_data['service_type'])
-                if not category:
-                    continue
+                # Create jobs
+                self.logger.info("📋 Creating jobs...")
+                jobs_data = data.get('bookings', [])
+                jobs = {}
                 
-                # Map status
-                status_mapping = {
-                    'confirmed': 'assigned',
-                    'pending': 'pending',
-                    'completed': 'completed'
-                }
-                status = status_mapping.get(job_data['status'], 'pending')
+                for job_data in jobs_data:
+                    # Find client and fundi
+                    client = None
+                    if job_data['client_id'] == 1:
+                        client = users.get('test@example.com')
+                    elif job_data['client_id'] == 2:
+                        client = users.get('john@example.com')
+                    
+                    fundi = None
+                    if job_data.get('fundi_id'):
+                        fundi_obj = session.query(Fundi).filter(Fundi.id == job_data['fundi_id']).first()
+                        if fundi_obj:
+                            fundi = fundi_obj
+                    
+                    # Find category
+                    category = categories.get(job_data['service_type'])
+                    if not category:
+                        continue
+                    
+                    # Map status
+                    status_mapping = {
+                        'confirmed': 'assigned',
+                        'pending': 'pending',
+                        'completed': 'completed'
+                    }
+                    status = status_mapping.get(job_data['status'], 'pending')
+                    
+                    job = Job(
+                        title=job_data['description'],
+                        description=job_data['description'],
+                        location=job_data['location'],
+                        status=status,
+                        priority='medium',
+                        budget=job_data.get('total_amount'),
+                        hourly_rate=job_data.get('hourly_rate'),
+                        estimated_hours=job_data.get('estimated_hours'),
+                        total_amount=job_data.get('total_amount'),
+                        client_id=client.id if client else 1,
+                        fundi_id=fundi.id if fundi else None,
+                        category_id=category.id,
+                        created_at=datetime.fromisoformat(job_data['created_at'].replace('Z', '+00:00')),
+                        scheduled_date=datetime.fromisoformat(job_data['scheduled_date'].replace('Z', '+00:00')) if job_data.get('scheduled_date') else None
+                    )
+                    session.add(job)
+                    session.flush()
+                    jobs[job_data['id']] = job
+                
+                # Status history for the imported jobs (creation at created_at)
+                job_events.backfill(session.connection(), Job.__table__)
+                
+                # Create reviews and payments (simplified)
+                self.logger.info("⭐ Creating reviews and payments...")
+                reviews_data = data.get('reviews', [])
+                payments_data = data.get('payments', [])
+                
+                # Process reviews and payments (simplified for auto-sync)
+                for review_data in reviews_data:
+                    # Simplified review creation
+                    pass
+                
+                for payment_data in payments_data:
+                    # Simplified payment creation
+                    pass
                 
-                job = Job(
-                    title=job_data['description'],
-                    description=job_data['description'],
-                    location=job_data['location'],
-                    status=status,
-                    priority='medium',
-                    budget=job_data.get('total_amount'),
-                    hourly_rate=job_data.get('hourly_rate'),
-                    estimated_hours=job_data.get('estimated_hours'),
-                    total_amount=job_data.get('total_amount'),
-                    client_id=client.id if client else 1,
-                    fundi_id=fundi.id if fundi else None,
-                    category_id=category.id,
-                    created_at=datetime.fromisoformat(job_data['created_at'].replace('Z', '+00:00')),
-                    scheduled_date=datetime.fromisoformat(job_data['scheduled_date'].replace('Z', '+00:00')) if job_data.get('scheduled_date') else None
-                )
-                session.add(job)
+                # Commit all changes
                 session.commit()
-                jobs[job_data['id']] = job
-            
-            # Create reviews and payments (simplified)
-            self.logger.info("⭐ Creating reviews and payments...")
-            reviews_data = data.get('reviews', [])
-            payments_data = data.get('payments', [])
-            
-            # Process reviews and payments (simplified for auto-sync)
-            for review_data in reviews_data:
-                # Simplified review creation
-                pass
-            
-            for payment_data in payments_data:
-                # Simplified payment creation
-                pass
-            
-            # Commit all changes
-            session.commit()
-            
-            # Update sync time
-            self.last_sync_time = datetime.now()
-            
-            self.logger.info("✅ Automatic sync completed successfully!")
-            self.logger.info(f"📊 Synced: {len(users)} users, {len(fundis)} fundis, {len(categories)} categories, {len(jobs)} jobs")
-            
-            return True
-            
+                
+                # Categories were rebuilt - drop cached reference data
+                reference_cache.invalidate()
+                
+                # Update sync time
+                self.last_sync_time = datetime.now()
+                
+                self.logger.info("✅ Automatic sync completed successfully!")
+                self.logger.info(f"📊 Synced: {len(users)} users, {len(fundis)} fundis, {len(categories)} categories, {len(jobs)} jobs")
+                
+                return True
+                
         except Exception as e:
             self.logger.error(f"❌ Error during sync: {str(e)}")
-            session.rollback()
             return False
-        finally:
-            session.close()
     
     def start_watching(self):
         """
@@ -0,0 +1,157 @@
+"""
+FundiMatch - Idempotency Keys
+=============================
+
+Clients on flaky mobile networks retry POSTs whose response they never saw.
+With an `Idempotency-Key` header the retry gets the stored response of the
+first attempt instead of creating a second job (and a second notification
+fan-out).
+
+Each key is a row in idempotency_keys, unique per (scope, key) where the
+scope is the method and path. A request:
+
+1. claims its key with an INSERT committed on its own, before the view runs.
+   The primary key makes the claim atomic: of two concurrent duplicates
+   exactly one insert succeeds
+2. runs the view, then stores the status and body on the claimed row
+   (5xx responses release the key instead, so the retry runs again)
+
+A request whose key is already claimed gets:
+- the stored response, if the first request finished
+- 'in_progress', if it is still running (the caller answers 409)
+- 'mismatch', if the same key came with a different body (422)
+
+Keys expire after IDEMPOTENCY_TTL_SECONDS (default 24 h). A claim left in
+progress for IDEMPOTENCY_LOCK_SECONDS (a worker killed mid-request) can be
+taken over, so a crash never blocks a key until it expires.
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, Table, Text, and_, or_, select
+from sqlalchemy.exc import IntegrityError
+
+from metrics import metrics
+
+TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', 24 * 3600))
+LOCK_SECONDS = int(os.environ.get('IDEMPOTENCY_LOCK_SECONDS', 60))
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(body):
+    """SHA-256 of a request body; JSON is canonicalised so key order and spacing don't matter"""
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True, separators=(',', ':')).encode('utf-8')
+    except ValueError:
+        pass
+    return hashlib.sha256(body).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Idempotency Key Table Bound to a MetaData
+    =========================================
+
+    Args:
+        metadata: The model MetaData; idempotency_keys is added to it so
+                  create_all() creates it
+        ttl_seconds (int): How long a finished response is replayed
+        lock_seconds (int): How long an unfinished claim blocks duplicates
+    """
+
+    def __init__(self, metadata, ttl_seconds=TTL_SECONDS, lock_seconds=LOCK_SECONDS):
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.lock = timedelta(seconds=lock_seconds)
+        self.table = Table(
+            'idempotency_keys', metadata,
+            Column('scope', String(100), primary_key=True),  # e.g. 'POST /api/bookings'
+            Column('key', String(MAX_KEY_LENGTH), primary_key=True),
+            Column('request_hash', String(64), nullable=False),
+            Column('status_code', Integer, nullable=True),  # NULL while the first request runs
+            Column('content_type', String(100), nullable=True),
+            Column('response_body', Text, nullable=True),
+            Column('response_hash', String(64), nullable=True),
+            Column('locked_at', DateTime, nullable=False),
+            Column('expires_at', DateTime, nullable=False),
+            Index('ix_idempotency_keys_expires_at', 'expires_at'),
+        )
+
+    def claim(self, engine, scope, key, request_hash, now=None):
+        """
+        Claim a key, or find out what happened to the request that did
+        ===============================================================
+
+        Args:
+            engine: Engine the claim is committed through (not the request's session)
+            scope (str): Method and path the key belongs to
+            key (str): The client's Idempotency-Key
+            request_hash (str): request_fingerprint() of the body
+            now (datetime): Claim time (default utcnow)
+
+        Returns:
+            tuple: ('claimed', None), ('replay', row), ('in_progress', row) or ('mismatch', row)
+        """
+        now = now or datetime.utcnow()
+        keys = self.table
+        values = dict(scope=scope, key=key, request_hash=request_hash, locked_at=now, expires_at=now + self.ttl)
+        try:
+            with engine.begin() as connection:
+                connection.execute(keys.insert().values(**values))
+            return 'claimed', None
+        except IntegrityError:
+            pass
+
+        with engine.begin() as connection:
+            # Take over an expired key or an abandoned claim in one conditional UPDATE,
+            # so two retries racing for it cannot both win
+            taken = connection.execute(
+                keys.update().where(
+                    keys.c.scope == scope, keys.c.key == key,
+                    or_(keys.c.expires_at <= now,
+                        and_(keys.c.status_code.is_(None), keys.c.locked_at <= now - self.lock,
+                             keys.c.request_hash == request_hash))
+                ).values(status_code=None, content_type=None, response_body=None, response_hash=None, **values)
+            ).rowcount
+            if taken:
+                return 'claimed', None
+            row = connection.execute(
+                select(keys).where(keys.c.scope == scope, keys.c.key == key)
+            ).first()
+        if row is None:
+            # Released between our insert and the lookup - try again
+            return self.claim(engine, scope, key, request_hash, now)
+        if row.request_hash != request_hash:
+            return 'mismatch', row
+        if row.status_code is None:
+            return 'in_progress', row
+        return 'replay', row
+
+    def complete(self, engine, scope, key, status_code, content_type, body):
+        """Store the response of a claimed key"""
+        keys = self.table
+        with engine.begin() as connection:
+            connection.execute(keys.update().where(keys.c.scope == scope, keys.c.key == key).values(
+                status_code=status_code, content_type=content_type, response_body=body,
+                response_hash=hashlib.sha256(body.encode('utf-8')).hexdigest()
+            ))
+
+    def release(self, engine, scope, key):
+        """Forget a claimed key so a retry runs the request again"""
+        keys = self.table
+        with engine.begin() as connection:
+            connection.execute(keys.delete().where(keys.c.scope == scope, keys.c.key == key))
+
+    def prune(self, connection, now=None):
+        """Delete expired keys; returns rows deleted"""
+        keys = self.table
+        return connection.execute(keys.delete().where(keys.c.expires_at <= (now or datetime.utcnow()))).rowcount
+
+
+metrics.describe('idempotency_requests_total',
+                 'Requests with an Idempotency-Key (stored, replayed, in_progress, mismatch, released)')
@@ -0,0 +1,111 @@
+"""
+FundiMatch - Job Status History
+===============================
+
+job_status_events is an append-only log of every status a job enters:
+creation (from_status NULL -> pending), assignment, start, completion and
+cancellation. Rows are only ever inserted, in the same transaction as the
+job write that caused them, with one executemany INSERT per request.
+
+Indexes (both covering for the stage latency joins in lib/analytics.py,
+so neither side of a join reads the table itself):
+- (job_id, to_status, at)   - when a job entered a status, and a job's
+                              history
+- (to_status, at, job_id)   - "every job that entered X between A and B"
+                              as a range scan, the driving side of the joins
+
+Jobs created before this table existed have no events; `flask
+backfill-status-events` derives creation and completion events for them
+from jobs.created_at / completed_at. Deleting jobs must delete their events
+too (delete()): SQLite reuses the ids of deleted rows, so a new job would
+otherwise inherit an old job's history.
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, Table, and_, exists, literal, select
+
+
+class JobStatusEvents:
+    """
+    Status Event Table Bound to a MetaData
+    ======================================
+
+    Args:
+        metadata: The model MetaData; job_status_events is added to it so
+                  create_all() creates it
+    """
+
+    def __init__(self, metadata):
+        self.table = Table(
+            'job_status_events', metadata,
+            Column('id', Integer, primary_key=True),
+            Column('job_id', Integer, nullable=False),
+            Column('from_status', String(20), nullable=True),  # NULL for the creation event
+            Column('to_status', String(20), nullable=False),
+            Column('at', DateTime, nullable=False, default=datetime.utcnow),
+            Index('ix_job_status_events_job_status_at', 'job_id', 'to_status', 'at'),
+            Index('ix_job_status_events_status_at_job', 'to_status', 'at', 'job_id'),
+        )
+
+    def record(self, connection, events, at=None):
+        """
+        Append status events
+        ====================
+
+        Args:
+            connection: Connection of the transaction making the job writes
+            events (list): (job_id, from_status, to_status) tuples
+            at (datetime): When they happened (default utcnow)
+        """
+        if not events:
+            return
+        at = at or datetime.utcnow()
+        connection.execute(self.table.insert(), [
+            {'job_id': job_id, 'from_status': from_status, 'to_status': to_status, 'at': at}
+            for job_id, from_status, to_status in events
+        ])
+
+    def history(self, connection, job_id):
+        """A job's events, oldest first"""
+        events = self.table
+        return connection.execute(
+            select(events.c.from_status, events.c.to_status, events.c.at)
+            .where(events.c.job_id == job_id).order_by(events.c.at, events.c.id)
+        ).all()
+
+    def delete(self, connection, job_ids=None):
+        """Delete the events of the given jobs, or all events"""
+        events = self.table
+        stmt = events.delete()
+        if job_ids is not None:
+            stmt = stmt.where(events.c.job_id.in_(list(job_ids)))
+        connection.execute(stmt)
+
+    def backfill(self, connection, jobs):
+        """
+        Derive creation/completion events for jobs that have none
+        =========================================================
+
+        Args:
+            connection: Connection inside a transaction
+            jobs: The jobs Table
+
+        Returns:
+            int: Events inserted
+        """
+        events = self.table
+        no_history = ~exists().where(events.c.job_id == jobs.c.id)
+        columns = [events.c.job_id, events.c.from_status, events.c.to_status, events.c.at]
+        created = connection.execute(events.insert().from_select(columns, select(
+            jobs.c.id, literal(None, String(20)), literal('pending', String(20)), jobs.c.created_at
+        ).where(no_history))).rowcount
+        # Only jobs whose single event is the creation event just written
+        only_created = ~exists().where(and_(events.c.job_id == jobs.c.id, events.c.to_status != 'pending'))
+        completed = connection.execute(events.insert().from_select(columns, select(
+            jobs.c.id, literal('pending', String(20)), literal('completed', String(20)), jobs.c.completed_at
+        ).where(jobs.c.status == 'completed', jobs.c.completed_at.isnot(None), only_created))).rowcount
+        return created + completed
@@ -0,0 +1,135 @@
+"""
+FundiMatch CLI - List Queries
+=============================
+
+One joined column projection per CLI list (users, fundis, jobs, reviews,
+payments), shared by the interactive lists in lib/helpers.py and the
+scriptable commands in lib/fundimatch.py.
+
+Why projections:
+- Each list is a single SELECT that joins in the names it shows (client,
+  fundi, category, job title). The old lists loaded ORM objects with
+  .all() and then hit a lazy relationship per row, one extra query each
+- fetch() streams the result with yield_per, so rows reach the screen as
+  soon as the first batch is read and memory stays flat for any table size
+- Ordered by primary key, so --limit/--offset pages are stable
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+from collections import namedtuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+
+from db.models import Category, Fundi, Job, Payment, Review, User
+
+# Rows fetched per round trip while streaming
+STREAM_BATCH = 1000
+
+# stmt: the SELECT; columns: (name, table width) per selected column
+Listing = namedtuple('Listing', ['stmt', 'columns'])
+
+
+def users(role=None):
+    """Users, optionally of one role"""
+    stmt = select(User.id, User.username, User.email, User.role, User.is_active).order_by(User.id)
+    if role:
+        stmt = stmt.where(User.role == role)
+    return Listing(stmt, [('id', 6), ('username', 20), ('email', 30), ('role', 8), ('active', 6)])
+
+
+def fundis(available_only=False, specialization=None):
+    """Fundis with their username"""
+    stmt = select(Fundi.id, User.username, Fundi.specialization, Fundi.location, Fundi.hourly_rate,
+                  Fundi.rating, Fundi.is_available) \
+        .select_from(Fundi) \
+        .outerjoin(User, User.id == Fundi.user_id) \
+        .order_by(Fundi.id)
+    if available_only:
+        stmt = stmt.where(Fundi.is_available.is_(True))
+    if specialization:
+        stmt = stmt.where(Fundi.specialization.ilike(f"%{specialization}%"))
+    return Listing(stmt, [('id', 6), ('username', 15), ('specialization', 15), ('location', 15),
+                          ('rate_kes', 9), ('rating', 6), ('available', 9)])
+
+
+def jobs(status=None, client_id=None, fundi_id=None):
+    """Jobs with their client's username and category name"""
+    stmt = select(Job.id, Job.title, User.username, Job.fundi_id, Category.name, Job.status,
+                  Job.location, Job.created_at) \
+        .select_from(Job) \
+        .outerjoin(User, User.id == Job.client_id) \
+        .outerjoin(Category, Category.id == Job.category_id) \
+        .order_by(Job.id)
+    if status:
+        stmt = stmt.where(Job.status == status)
+    if client_id:
+        stmt = stmt.where(Job.client_id == client_id)
+    if fundi_id:
+        stmt = stmt.where(Job.fundi_id == fundi_id)
+    return Listing(stmt, [('id', 6), ('title', 25), ('client', 15), ('fundi_id', 8), ('category', 12),
+                          ('status', 12), ('location', 15), ('created_at', 19)])
+
+
+def _job_client_fundi(model):
+    """(job title, client username, fundi username) joined onto a review or payment"""
+    client, fundi_user = aliased(User), aliased(User)
+
+    def joins(stmt):
+        return stmt \
+            .outerjoin(Job, Job.id == model.job_id) \
+            .outerjoin(client, client.id == model.client_id) \
+            .outerjoin(Fundi, Fundi.id == model.fundi_id) \
+            .outerjoin(fundi_user, fundi_user.id == Fundi.user_id)
+    return (Job.title, client.username, fundi_user.username), joins
+
+
+def reviews(fundi_id=None, client_id=None):
+    """Reviews with job title, client and fundi usernames"""
+    names, joins = _job_client_fundi(Review)
+    stmt = joins(select(Review.id, *names, Review.rating, Review.created_at).select_from(Review)) \
+        .order_by(Review.id)
+    if fundi_id:
+        stmt = stmt.where(Review.fundi_id == fundi_id)
+    if client_id:
+        stmt = stmt.where(Review.client_id == client_id)
+    return Listing(stmt, [('id', 6), ('job', 25), ('client', 15), ('fundi', 15), ('rating', 6),
+                          ('created_at', 19)])
+
+
+def payments(client_id=None, fundi_id=None):
+    """Payments with job title, client and fundi usernames"""
+    names, joins = _job_client_fundi(Payment)
+    stmt = joins(select(Payment.id, *names, Payment.amount, Payment.payment_method, Payment.status,
+                        Payment.created_at).select_from(Payment)) \
+        .order_by(Payment.id)
+    if client_id:
+        stmt = stmt.where(Payment.client_id == client_id)
+    if fundi_id:
+        stmt = stmt.where(Payment.fundi_id == fundi_id)
+    return Listing(stmt, [('id', 6), ('job', 25), ('client', 15), ('fundi', 15), ('amount_kes', 10),
+                          ('method', 8), ('status', 10), ('created_at', 19)])
+
+
+def fetch(session, listing, limit=None, offset=None):
+    """
+    Stream a listing's rows
+    =======================
+
+    Args:
+        session: Database session
+        listing (Listing): From one of the functions above
+        limit (int): At most this many rows
+        offset (int): Skip this many rows first
+
+    Returns:
+        Result: Iterates rows, fetching STREAM_BATCH at a time
+    """
+    stmt = listing.stmt
+    if offset:
+        stmt = stmt.offset(offset)
+    if limit:
+        stmt = stmt.limit(limit)
+    return session.execute(stmt.execution_options(yield_per=STREAM_BATCH))
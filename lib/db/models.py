@@ -12,18 +12,36 @@ Key Concepts Demonstrated:
 - Database migrations and schema management
 - CRUD operations with proper error handling
 
+Model methods add and flush but never commit: the caller owns the
+transaction (usually a session_scope() per CLI action), so several writes
+can share one commit. create_many() adds a whole batch with one flush.
+
 Author: Gibson Giteru
 Class: Moringa School Phase 3
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, Float, ForeignKey, Boolean, DateTime, Text
+from sqlalchemy import create_engine, event, update, Column, Integer, String, Float, ForeignKey, Boolean, DateTime, Text
 from sqlalchemy.orm import relationship, sessionmaker, declarative_base
 from sqlalchemy.sql import func
+from contextlib import contextmanager
 from datetime import datetime
+import os
+
+from cache import reference_cache
+from db.search_index import ensure_search_index
+from db.schema import add_missing_columns
+from db.rollups import Rollups
+from db.job_events import JobStatusEvents
+from db.table_versions import TableVersions
+from db.outbox import Outbox
+from db.task_queue import TaskQueue
+from job_states import check_status_change
+import geo
 
 # Database Configuration
 # Using SQLite for development - easy to set up and portable
-DATABASE_URL = "sqlite:///fundimatch.db"
+# (FUNDIMATCH_DATABASE_URL points scripts and benchmarks at another database)
+DATABASE_URL = os.environ.get("FUNDIMATCH_DATABASE_URL", "sqlite:///fundimatch.db")
 
 # Create database engine - this is our connection to the database
 engine = create_engine(DATABASE_URL, echo=False)
@@ -31,8 +49,27 @@ engine = create_engine(DATABASE_URL, echo=False)
 # Session factory - creates database sessions for transactions
 SessionLocal = sessionmaker(autoflush=False, bind=engine)
 
+
+class BulkCreateMixin:
+    """
+    Batch Inserts Shared by Every Model
+    ===================================
+
+    Mixed into Base, so each model gets create_many(). Models that write more
+    than their own rows (Job records its creation events) override it.
+    """
+
+    @classmethod
+    def create_many(cls, session, rows):
+        """Create an instance per dict in rows with one flush"""
+        objects = [cls(**row) for row in rows]
+        session.add_all(objects)
+        session.flush()
+        return objects
+
+
 # Base class for all our models - provides common functionality
-Base = declarative_base()
+Base = declarative_base(cls=BulkCreateMixin)
 
 
 class User(Base):
@@ -78,10 +115,10 @@ class User(Base):
     
     @classmethod
     def create(cls, session, **kwargs):
-        """Create a new user and save to database"""
+        """Create a new user (flushed, so it has an id; the caller commits)"""
         user = cls(**kwargs)
         session.add(user)
-        session.commit()
+        session.flush()
         return user
     
     @classmethod
@@ -131,6 +168,9 @@ class Fundi(Base):
     experience = Column(String(50), nullable=False)       # e.g., "5 years", "10+ years"
     hourly_rate = Column(Float, nullable=False)           # Rate in local currency
     location = Column(String(100), nullable=False)        # Service area
+    latitude = Column(Float, nullable=True)               # Optional exact position
+    longitude = Column(Float, nullable=True)
+    geohash = Column(String(12), nullable=True, index=True)  # Kept in step by geo.sync_geohash
     bio = Column(Text, nullable=True)                      # Professional description
     
     # Performance metrics
@@ -156,10 +196,10 @@ class Fundi(Base):
     
     @classmethod
     def create(cls, session, **kwargs):
-        """Create a new fundi profile"""
+        """Create a new fundi profile (flushed; the caller commits)"""
         fundi = cls(**kwargs)
         session.add(fundi)
-        session.commit()
+        session.flush()
         return fundi
     
     @classmethod
@@ -178,9 +218,9 @@ class Fundi(Base):
         return session.query(cls).filter(cls.is_available == True).all()
     
     def update_rating(self, session, new_rating):
-        """Update fundi rating"""
+        """Update fundi rating (flushed; the caller commits)"""
         self.rating = new_rating
-        session.commit()
+        session.flush()
         return self
 
 
@@ -210,6 +250,14 @@ class Category(Base):
     
     def __repr__(self):
         return f"<Category(id={self.id}, name='{self.name}')>"
+    
+    @classmethod
+    def create(cls, session, **kwargs):
+        """Create a new category (flushed; the caller commits)"""
+        category = cls(**kwargs)
+        session.add(category)
+        session.flush()
+        return category
 
 
 class Job(Base):
@@ -236,6 +284,9 @@ class Job(Base):
     title = Column(String(200), nullable=False)
     description = Column(Text, nullable=False)
     location = Column(String(200), nullable=False)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    geohash = Column(String(12), nullable=True, index=True)
     
     # Job status and timeline
     status = Column(String(20), default="pending", nullable=False)  # pending, assigned, in_progress, completed, cancelled
@@ -248,10 +299,15 @@ class Job(Base):
     total_amount = Column(Float, nullable=True)
     
     # Timestamps
-    created_at = Column(DateTime, default=func.now(), nullable=False)
+    created_at = Column(DateTime, default=func.now(), nullable=False, index=True)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=True, index=True)
     scheduled_date = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
     
+    # Optimistic concurrency: bumped on every write, and flushes/assignments
+    # only apply to the version they read
+    version = Column(Integer, default=0, server_default="0", nullable=False)
+    
     # Foreign keys and relationships
     client_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     fundi_id = Column(Integer, ForeignKey("fundis.id"), nullable=True)
@@ -263,17 +319,27 @@ class Job(Base):
     category = relationship("Category", back_populates="jobs")
     reviews = relationship("Review", back_populates="job")
     
+    __mapper_args__ = {"version_id_col": version}
+    
     def __repr__(self):
         return f"<Job(id={self.id}, title='{self.title}', status='{self.status}')>"
     
     @classmethod
     def create(cls, session, **kwargs):
-        """Create a new job"""
+        """Create a new job and its creation event (flushed; the caller commits)"""
         job = cls(**kwargs)
         session.add(job)
-        session.commit()
+        session.flush()
+        job_events.record(session.connection(), [(job.id, None, job.status)])
         return job
     
+    @classmethod
+    def create_many(cls, session, rows):
+        """Create a job per dict in rows, and their creation events, with one flush and one INSERT"""
+        jobs = super().create_many(session, rows)
+        job_events.record(session.connection(), [(job.id, None, job.status) for job in jobs])
+        return jobs
+    
     @classmethod
     def get_all(cls, session):
         """Get all jobs"""
@@ -295,18 +361,37 @@ class Job(Base):
         return session.query(cls).filter(cls.fundi_id == fundi_id).all()
     
     def assign_to_fundi(self, session, fundi_id):
-        """Assign job to a fundi"""
-        self.fundi_id = fundi_id
-        self.status = "assigned"
-        session.commit()
-        return self
+        """
+        Assign job to a fundi if it is still pending at the version loaded
+        
+        A single conditional UPDATE, so of two concurrent assignments only
+        one succeeds once committed by the caller. Returns True if this one
+        matched.
+        """
+        assigned = session.execute(
+            update(Job)
+            .where(Job.id == self.id, Job.status == "pending", Job.version == self.version)
+            .values(fundi_id=fundi_id, status="assigned", version=Job.version + 1, updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if assigned:
+            job_events.record(session.connection(), [(self.id, "pending", "assigned")])
+        session.expire(self)  # the next access reloads the winner's values
+        return assigned == 1
     
     def update_status(self, session, new_status):
-        """Update job status"""
+        """
+        Update job status (flushed; the caller commits)
+        
+        Raises InvalidTransition if job_states does not allow the change,
+        including a move to assigned (use assign_to_fundi, which sets the fundi).
+        """
+        check_status_change(self.status, new_status)
+        job_events.record(session.connection(), [(self.id, self.status, new_status)])
         self.status = new_status
         if new_status == "completed":
             self.completed_at = func.now()
-        session.commit()
+        session.flush()
         return self
 
     @classmethod
@@ -343,7 +428,8 @@ class Review(Base):
     fundi_id = Column(Integer, ForeignKey("fundis.id"), nullable=False)
     
     # Timestamps
-    created_at = Column(DateTime, default=func.now(), nullable=False)
+    created_at = Column(DateTime, default=func.now(), nullable=False, index=True)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=True, index=True)
     
     # Relationships
     job = relationship("Job", back_populates="reviews")
@@ -352,6 +438,14 @@ class Review(Base):
     
     def __repr__(self):
         return f"<Review(id={self.id}, rating={self.rating}, job_id={self.job_id})>"
+    
+    @classmethod
+    def create(cls, session, **kwargs):
+        """Create a new review (flushed; the caller commits)"""
+        review = cls(**kwargs)
+        session.add(review)
+        session.flush()
+        return review
 
 
 class Payment(Base):
@@ -384,7 +478,8 @@ class Payment(Base):
     fundi_id = Column(Integer, ForeignKey("fundis.id"), nullable=False)
     
     # Timestamps
-    created_at = Column(DateTime, default=func.now(), nullable=False)
+    created_at = Column(DateTime, default=func.now(), nullable=False, index=True)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=True, index=True)
     
     # Relationships
     job = relationship("Job")
@@ -393,6 +488,102 @@ class Payment(Base):
     
     def __repr__(self):
         return f"<Payment(id={self.id}, amount={self.amount}, status='{self.status}')>"
+    
+    @classmethod
+    def create(cls, session, **kwargs):
+        """Record a new payment (flushed; the caller commits)"""
+        payment = cls(**kwargs)
+        session.add(payment)
+        session.flush()
+        return payment
+
+
+# Reference cache invalidation
+# ============================
+# Category writes mark the session; the shared reference cache is dropped once
+# the transaction ends so readers never cache rows that were rolled back.
+@event.listens_for(SessionLocal, "after_flush")
+def _mark_reference_writes(session, flush_context):
+    changed = list(session.new) + list(session.dirty) + list(session.deleted)
+    if any(isinstance(obj, Category) for obj in changed):
+        session.info["reference_dirty"] = True
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _mark_reference_bulk_writes(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and mapper.class_ is Category:
+            orm_execute_state.session.info["reference_dirty"] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+@event.listens_for(SessionLocal, "after_soft_rollback")
+def _invalidate_reference_cache(session, *args):
+    if session.info.pop("reference_dirty", False):
+        reference_cache.invalidate()
+
+
+# Located models
+# ==============
+# Fundis and jobs get coordinates from the town gazetteer when none are given,
+# and their geohash column follows latitude/longitude.
+for _located in (Fundi, Job):
+    event.listen(_located, "before_insert", geo.sync_geohash)
+    event.listen(_located, "before_update", geo.sync_geohash)
+
+
+# Daily rollups
+# =============
+# Dashboard tables refreshed from jobs/payments/reviews. Deleted rows have no
+# updated_at left to find, so their days are queued for the next refresh.
+rollups = Rollups(Base.metadata)
+
+# Status history
+# ==============
+# Append-only log of job status changes (lib/db/job_events.py), written by
+# Job.create / assign_to_fundi / update_status.
+job_events = JobStatusEvents(Base.metadata)
+
+# Table versions
+# ==============
+# The same counters the Flask backend uses for ETags and rollup gating
+# (lib/db/table_versions.py); CLI commits bump them too, so a write made here
+# invalidates the web app's cached responses.
+table_versions = TableVersions(Base.metadata)
+table_versions.track(SessionLocal)
+
+# Outbox and background tasks
+# ===========================
+# The web app's outbox_events and background_tasks tables. CLI writes enqueue
+# the same events and tasks as the web endpoints; the Flask outbox dispatcher
+# and worker.py deliver and run them on their next poll.
+outbox = Outbox(Base.metadata)
+tasks = TaskQueue(Base.metadata)
+tasks.declare('refresh_fundi_stats')
+
+
+@event.listens_for(SessionLocal, "before_flush")
+def _queue_deleted_rollup_days(session, flush_context, instances):
+    if session.deleted:
+        rollups.mark_deleted_days(session.connection(), session.deleted)
+
+
+# Additive schema upgrades
+# ========================
+# create_all() skips existing tables, so new nullable columns and indexes are
+# added to them here.
+@event.listens_for(Base.metadata, "after_create")
+def _upgrade_schema(target, connection, **kw):
+    add_missing_columns(connection, target)
+
+
+# Fundi full-text search index
+# ============================
+# Created alongside the tables; database triggers keep it in sync afterwards.
+@event.listens_for(Base.metadata, "after_create")
+def _create_search_index(target, connection, **kw):
+    ensure_search_index(connection)
 
 
 def get_session():
@@ -409,6 +600,50 @@ def get_session():
     return SessionLocal()
 
 
+@contextmanager
+def session_scope(read_only=False, expire_on_commit=None):
+    """
+    One unit of work per CLI action
+    ===============================
+    
+    Opens a fresh session, commits it when the block finishes (or rolls it
+    back if the block raises) and always closes it. Each action starts with
+    an empty identity map, so a long admin session doesn't keep every row it
+    ever touched, and nothing it reads is older than the action itself
+    (auto_sync may have rebuilt the tables in between).
+    
+    Everything written inside the block commits together, so a batch of
+    writes costs one commit.
+    
+    Args:
+        read_only (bool): Roll back instead of committing. The loaded
+                          objects are detached first (a rollback would
+                          expire them), so their loaded attributes can
+                          still be printed after the block
+        expire_on_commit (bool): Override the expiry rule, e.g. False for a
+                                 write whose objects are used after the block
+                                 (the logged-in user)
+    
+    Yields:
+        Session: The action's session
+    """
+    if expire_on_commit is None:
+        expire_on_commit = not read_only
+    session = SessionLocal(expire_on_commit=expire_on_commit)
+    try:
+        yield session
+        if read_only:
+            session.expunge_all()
+            session.rollback()
+        else:
+            session.commit()
+    except BaseException:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
 # Database initialization
 # This creates all tables when the models are imported
 # In production, you would use Alembic migrations instead
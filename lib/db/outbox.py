@@ -0,0 +1,215 @@
+"""
+FundiMatch - Transactional Outbox
+=================================
+
+Side effects of a write (notification fan-out, pushes, e-mails) are recorded
+as rows in outbox_events inside the same transaction as the write itself,
+and a dispatcher carries them out afterwards. A request therefore commits
+once: either the job change and its events are both stored, or neither is.
+
+Dispatching:
+- dispatch_batch() claims up to batch_size due events (oldest first), runs
+  the handler registered for each topic and commits once for the batch
+- Events of one topic are handed to their handler together, so a handler
+  can load shared data (e.g. the admin user ids) once per batch
+- If a topic's handler fails, its events are retried one by one inside
+  savepoints; only the failing events are rescheduled, with exponential
+  backoff, and given up after OUTBOX_MAX_ATTEMPTS
+- PostgreSQL dispatchers skip rows locked by another dispatcher
+  (FOR UPDATE SKIP LOCKED). On SQLite the claim UPDATE detects a dispatcher
+  that got there first and the batch is simply retried
+
+Delivery is at-least-once: a handler can run again after a crash between
+its work and the commit, so handlers should tolerate repeats.
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import json
+import logging
+import os
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, Table, Text, func, select
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', 100))
+MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 8))
+RETRY_BASE_SECONDS = float(os.environ.get('OUTBOX_RETRY_BASE_SECONDS', 5))
+RETRY_MAX_SECONDS = 3600
+
+
+def retry_delay(attempts):
+    """Seconds to wait before attempt number attempts + 1"""
+    return min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+
+
+class Outbox:
+    """
+    Outbox Table Bound to a MetaData
+    ================================
+
+    Args:
+        metadata: The model MetaData; outbox_events is added to it so
+                  create_all() creates it
+        max_attempts (int): Deliveries tried before an event is given up
+    """
+
+    def __init__(self, metadata, max_attempts=MAX_ATTEMPTS):
+        self.max_attempts = max_attempts
+        self.table = Table(
+            'outbox_events', metadata,
+            Column('id', Integer, primary_key=True),
+            Column('topic', String(50), nullable=False),
+            Column('payload', Text, nullable=False),  # JSON
+            Column('created_at', DateTime, nullable=False, default=datetime.utcnow),
+            Column('available_at', DateTime, nullable=False, default=datetime.utcnow),
+            Column('attempts', Integer, nullable=False, default=0),
+            Column('last_error', Text, nullable=True),
+            Column('processed_at', DateTime, nullable=True),
+            # Due events are found by (processed_at IS NULL, available_at <= now)
+            Index('ix_outbox_events_due', 'processed_at', 'available_at'),
+        )
+
+    def enqueue(self, session, topic, **payload):
+        """
+        Record an event in the session's current transaction
+        ===================================================
+
+        Args:
+            session: The session making the write the event belongs to
+            topic (str): Handler name, e.g. 'job_created'
+            **payload: JSON-serialisable event data
+        """
+        now = datetime.utcnow()
+        session.connection().execute(self.table.insert().values(
+            topic=topic, payload=json.dumps(payload), created_at=now, available_at=now, attempts=0
+        ))
+        session.info['outbox_enqueued'] = session.info.get('outbox_enqueued', 0) + 1
+
+    def enqueue_many(self, session, topic, payloads):
+        """
+        Record many events of one topic with a single executemany INSERT
+        ================================================================
+
+        Args:
+            session: The session making the write the events belong to
+            topic (str): Handler name, e.g. 'job_assigned'
+            payloads (list): JSON-serialisable dicts, one per event
+        """
+        if not payloads:
+            return
+        now = datetime.utcnow()
+        session.connection().execute(self.table.insert(), [
+            dict(topic=topic, payload=json.dumps(payload), created_at=now, available_at=now, attempts=0)
+            for payload in payloads
+        ])
+        session.info['outbox_enqueued'] = session.info.get('outbox_enqueued', 0) + len(payloads)
+
+    def dispatch_batch(self, session, handlers, batch_size=BATCH_SIZE, now=None):
+        """
+        Deliver one batch of due events and commit
+        ==========================================
+
+        Args:
+            session: Session the handlers write through
+            handlers (dict): topic -> callable(list of payload dicts)
+            batch_size (int): Events claimed per batch
+            now (datetime): Dispatch time (default utcnow)
+
+        Returns:
+            dict: claimed / delivered / retried / dead counts
+        """
+        now = now or datetime.utcnow()
+        events = self.table
+        stats = {'claimed': 0, 'delivered': 0, 'retried': 0, 'dead': 0}
+        connection = session.connection()
+        rows = connection.execute(
+            select(events.c.id, events.c.topic, events.c.payload, events.c.attempts, events.c.created_at)
+            .where(events.c.processed_at.is_(None), events.c.attempts < self.max_attempts,
+                   events.c.available_at <= now)
+            .order_by(events.c.id).limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not rows:
+            session.rollback()
+            return stats
+
+        ids = [row.id for row in rows]
+        claimed = connection.execute(
+            events.update().where(events.c.id.in_(ids), events.c.processed_at.is_(None)).values(processed_at=now)
+        ).rowcount
+        if claimed != len(ids):
+            # Another dispatcher delivered some of these first
+            session.rollback()
+            return stats
+        stats['claimed'] = claimed
+
+        by_topic = OrderedDict()
+        for row in rows:
+            by_topic.setdefault(row.topic, []).append(row)
+
+        failures = []
+        for topic, batch in by_topic.items():
+            handler = handlers.get(topic)
+            if handler is None:
+                failures.extend((row, f"No handler for topic '{topic}'") for row in batch)
+                continue
+            try:
+                with session.begin_nested():
+                    handler([json.loads(row.payload) for row in batch])
+                delivered = batch
+            except Exception:
+                # Find the events that fail on their own
+                delivered = []
+                for row in batch:
+                    try:
+                        with session.begin_nested():
+                            handler([json.loads(row.payload)])
+                        delivered.append(row)
+                    except Exception as e:
+                        failures.append((row, f"{type(e).__name__}: {e}"))
+            for row in delivered:
+                metrics.inc('outbox_events_total', topic=topic, result='delivered')
+                metrics.observe('outbox_delivery_lag_seconds', (now - row.created_at).total_seconds(), topic=topic)
+            stats['delivered'] += len(delivered)
+
+        for row, error in failures:
+            attempts = row.attempts + 1
+            dead = attempts >= self.max_attempts
+            connection.execute(events.update().where(events.c.id == row.id).values(
+                processed_at=None, attempts=attempts, last_error=error[:2000],
+                available_at=now + timedelta(seconds=retry_delay(attempts))
+            ))
+            result = 'dead' if dead else 'retried'
+            stats[result] += 1
+            metrics.inc('outbox_events_total', topic=row.topic, result=result)
+            log = logger.error if dead else logger.warning
+            log("Outbox event %s (%s) failed on attempt %s: %s", row.id, row.topic, attempts, error)
+
+        session.commit()
+        return stats
+
+    def pending_count(self, connection):
+        """Events still waiting for delivery (not counting given-up ones)"""
+        events = self.table
+        return connection.execute(
+            select(func.count()).select_from(events)
+            .where(events.c.processed_at.is_(None), events.c.attempts < self.max_attempts)
+        ).scalar()
+
+    def prune(self, connection, older_than):
+        """Delete delivered events processed before older_than; returns rows deleted"""
+        events = self.table
+        return connection.execute(
+            events.delete().where(events.c.processed_at.isnot(None), events.c.processed_at < older_than)
+        ).rowcount
+
+
+metrics.describe('outbox_events_total', 'Outbox events handled (delivered, retried or dead = given up)')
+metrics.describe('outbox_delivery_lag_seconds', 'Time from an outbox event being written to its delivery')
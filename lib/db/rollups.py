@@ -0,0 +1,302 @@
+"""
+FundiMatch - Daily Rollup Tables
+================================
+
+Pre-aggregated per-day tables that dashboards read instead of scanning the
+full jobs, payments and reviews tables. Shared by the Flask backend and the
+CLI.
+
+Rollups (one row per day and key):
+- rollup_jobs_daily      day x category_id x status -> jobs, amount
+                         (by job created_at; amount is total_amount)
+- rollup_earnings_daily  day x fundi_id -> payments, amount
+                         (completed payments, by payment created_at)
+- rollup_reviews_daily   day x fundi_id -> reviews, rating_sum
+                         (by review created_at)
+
+How refreshing works:
+- Source rows carry an indexed updated_at column. refresh() finds the days
+  touched by rows updated since the rollup's watermark and recomputes those
+  days from the source table; everything else is left alone
+- Recomputing a day is idempotent, so each refresh rescans a short overlap
+  (ROLLUP_OVERLAP_SECONDS) before the watermark. That catches transactions
+  that were still open during the last refresh
+- ORM deletes record the deleted row's day in rollup_dirty_days (see
+  mark_deleted_days), and the next refresh recomputes it
+- A rollup with no watermark yet is rebuilt from scratch; rebuild() does
+  this for all of them and verify() compares every rollup with a fresh
+  aggregation of its source table
+
+Run refresh() from a scheduled job (flask refresh-rollups, or the loop in
+worker.py); the dashboards only refresh them when no such job has run
+recently.
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import os
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import (Column, Date, DateTime, Float, Integer, PrimaryKeyConstraint, String, Table,
+                        and_, column, delete, func, insert, or_, select, table)
+from sqlalchemy.dialects import postgresql, sqlite
+
+# Rescan this much before the watermark on every refresh
+OVERLAP_SECONDS = float(os.environ.get('ROLLUP_OVERLAP_SECONDS', 300))
+
+# Source tables, referenced by name so both model sets can use this module
+JOBS = table('jobs', column('id'), column('category_id'), column('status'), column('total_amount'),
+             column('created_at'), column('updated_at'))
+PAYMENTS = table('payments', column('id'), column('fundi_id'), column('status'), column('amount'),
+                 column('created_at'), column('updated_at'))
+REVIEWS = table('reviews', column('id'), column('fundi_id'), column('rating'),
+                column('created_at'), column('updated_at'))
+
+# name: rollup table; source: source table; keys: grouping columns besides day;
+# measures: (column, aggregate, SQL type); where: extra source filter
+RollupSpec = namedtuple('RollupSpec', ['name', 'source', 'keys', 'measures', 'where'])
+
+SPECS = (
+    RollupSpec('rollup_jobs_daily', JOBS, (('category_id', Integer), ('status', String(20))),
+               (('jobs', lambda s: func.count(), Integer),
+                ('amount', lambda s: func.coalesce(func.sum(s.c.total_amount), 0.0), Float)),
+               None),
+    RollupSpec('rollup_earnings_daily', PAYMENTS, (('fundi_id', Integer),),
+               (('payments', lambda s: func.count(), Integer),
+                ('amount', lambda s: func.coalesce(func.sum(s.c.amount), 0.0), Float)),
+               lambda s: s.c.status == 'completed'),
+    RollupSpec('rollup_reviews_daily', REVIEWS, (('fundi_id', Integer),),
+               (('reviews', lambda s: func.count(), Integer),
+                ('rating_sum', lambda s: func.coalesce(func.sum(s.c.rating), 0), Integer)),
+               None),
+)
+
+SOURCE_TABLES = {spec.source.name for spec in SPECS}
+
+
+def _as_date(value):
+    """SQLite returns date() as 'YYYY-MM-DD' text, PostgreSQL as a date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _day_ranges(days):
+    """Merge days into contiguous [first, last + 1) ranges"""
+    ranges = []
+    for day in sorted(days):
+        if ranges and ranges[-1][1] == day:
+            ranges[-1][1] = day + timedelta(days=1)
+        else:
+            ranges.append([day, day + timedelta(days=1)])
+    return ranges
+
+
+def _insert_ignore(connection, target, rows):
+    """INSERT ... ON CONFLICT DO NOTHING on SQLite and PostgreSQL"""
+    dialect = connection.dialect.name
+    if dialect == 'postgresql':
+        stmt = postgresql.insert(target).on_conflict_do_nothing()
+    elif dialect == 'sqlite':
+        stmt = sqlite.insert(target).on_conflict_do_nothing()
+    else:
+        stmt = insert(target).prefix_with('IGNORE')
+    connection.execute(stmt, rows)
+
+
+class Rollups:
+    """
+    Rollup Tables Bound to a MetaData
+    =================================
+
+    Args:
+        metadata: The model MetaData; the rollup, state and dirty-day
+                  tables are added to it so create_all() creates them
+    """
+
+    def __init__(self, metadata):
+        self.tables = {}
+        for spec in SPECS:
+            self.tables[spec.name] = Table(
+                spec.name, metadata,
+                Column('day', Date, nullable=False),
+                *[Column(name, type_, nullable=False) for name, type_ in spec.keys],
+                *[Column(name, type_, nullable=False, default=0) for name, _, type_ in spec.measures],
+                PrimaryKeyConstraint('day', *[name for name, _ in spec.keys]),
+            )
+        self.state = Table(
+            'rollup_state', metadata,
+            Column('name', String(50), primary_key=True),
+            Column('watermark', DateTime, nullable=True),
+            Column('refreshed_at', DateTime, nullable=True),
+        )
+        self.dirty = Table(
+            'rollup_dirty_days', metadata,
+            Column('source', String(50), primary_key=True),
+            Column('day', Date, primary_key=True),
+        )
+
+    # ------------------------------------------------------------------
+    # Aggregation
+    # ------------------------------------------------------------------
+
+    def _aggregate(self, spec, ranges=None):
+        """SELECT day, keys..., measures... FROM source [WHERE day in ranges] GROUP BY day, keys"""
+        source = spec.source
+        day = func.date(source.c.created_at)
+        keys = [source.c[name] for name, _ in spec.keys]
+        stmt = select(day.label('day'), *keys,
+                      *[aggregate(source).label(name) for name, aggregate, _ in spec.measures]) \
+            .group_by(day, *keys)
+        if spec.where is not None:
+            stmt = stmt.where(spec.where(source))
+        if ranges:
+            stmt = stmt.where(or_(*[and_(source.c.created_at >= datetime.combine(low, datetime.min.time()),
+                                         source.c.created_at < datetime.combine(high, datetime.min.time()))
+                                    for low, high in ranges]))
+        return stmt
+
+    def _recompute(self, connection, spec, ranges=None):
+        """Replace the rollup rows for the given day ranges (all rows when None)"""
+        target = self.tables[spec.name]
+        remove = delete(target)
+        if ranges:
+            remove = remove.where(or_(*[and_(target.c.day >= low, target.c.day < high) for low, high in ranges]))
+        connection.execute(remove)
+        names = ['day'] + [name for name, _ in spec.keys] + [name for name, _, _ in spec.measures]
+        connection.execute(insert(target).from_select(names, self._aggregate(spec, ranges)))
+
+    def _lock_state(self, connection, name):
+        """Fetch (and lock, on PostgreSQL) the state row, creating it if missing"""
+        _insert_ignore(connection, self.state, [{'name': name, 'watermark': None, 'refreshed_at': None}])
+        return connection.execute(
+            select(self.state.c.watermark, self.state.c.refreshed_at)
+            .where(self.state.c.name == name).with_for_update()
+        ).first()
+
+    def _save_state(self, connection, name, watermark, now):
+        connection.execute(self.state.update().where(self.state.c.name == name)
+                           .values(watermark=watermark, refreshed_at=now))
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def rebuild(self, connection, now=None):
+        """
+        Recompute every rollup from its source table
+        ============================================
+
+        Args:
+            connection: Connection inside a transaction
+            now (datetime): New watermark (default utcnow)
+
+        Returns:
+            dict: Rollup name -> rows written
+        """
+        now = now or datetime.utcnow()
+        written = {}
+        for spec in SPECS:
+            self._lock_state(connection, spec.name)
+            self._recompute(connection, spec)
+            self._save_state(connection, spec.name, now, now)
+            written[spec.name] = connection.execute(select(func.count()).select_from(self.tables[spec.name])).scalar()
+        connection.execute(delete(self.dirty))
+        return written
+
+    def refresh(self, connection, now=None):
+        """
+        Bring every rollup up to date incrementally
+        ===========================================
+
+        Only days touched by source rows updated since the watermark (or
+        marked dirty by deletes) are recomputed.
+
+        Args:
+            connection: Connection inside a transaction
+            now (datetime): New watermark (default utcnow)
+
+        Returns:
+            dict: Rollup name -> number of days recomputed (None = rebuilt)
+        """
+        now = now or datetime.utcnow()
+        refreshed = {}
+        dirty = {}
+        for source, day in connection.execute(select(self.dirty.c.source, self.dirty.c.day)):
+            dirty.setdefault(source, set()).add(_as_date(day))
+
+        for spec in SPECS:
+            state = self._lock_state(connection, spec.name)
+            if state.watermark is None:
+                self._recompute(connection, spec)
+                self._save_state(connection, spec.name, now, now)
+                refreshed[spec.name] = None
+                continue
+            source = spec.source
+            since = state.watermark - timedelta(seconds=OVERLAP_SECONDS)
+            days = {_as_date(day) for day, in connection.execute(
+                select(func.date(source.c.created_at)).distinct()
+                .where(source.c.updated_at >= since, source.c.updated_at < now)
+            )}
+            days |= dirty.get(source.name, set())
+            if days:
+                self._recompute(connection, spec, _day_ranges(days))
+            self._save_state(connection, spec.name, now, now)
+            refreshed[spec.name] = len(days)
+
+        if dirty:
+            connection.execute(delete(self.dirty))
+        return refreshed
+
+    def mark_deleted_days(self, connection, objects):
+        """
+        Record the days of deleted source rows for the next refresh
+        ===========================================================
+
+        Call from a before_flush listener with session.deleted (the rows
+        still exist then, so created_at can be loaded).
+        """
+        rows = {(obj.__table__.name, obj.created_at.date()) for obj in objects
+                if getattr(obj, '__table__', None) is not None and obj.__table__.name in SOURCE_TABLES
+                and obj.created_at is not None}
+        if rows:
+            _insert_ignore(connection, self.dirty, [{'source': source, 'day': day} for source, day in rows])
+
+    def verify(self, connection):
+        """
+        Compare every rollup with a fresh aggregation of its source
+        ==========================================================
+
+        Returns:
+            dict: Rollup name -> list of (key, rollup values, source values)
+                  for rows that differ; empty lists mean everything matches
+        """
+        report = {}
+        for spec in SPECS:
+            width = 1 + len(spec.keys)
+
+            def keyed(rows):
+                return {(_as_date(row[0]),) + tuple(row[1:width]): tuple(row[width:]) for row in rows}
+
+            target = self.tables[spec.name]
+            stored = keyed(connection.execute(select(*target.columns)))
+            fresh = keyed(connection.execute(self._aggregate(spec)))
+            mismatches = []
+            for key in sorted(set(stored) | set(fresh), key=repr):
+                a, b = stored.get(key), fresh.get(key)
+                if a is None or b is None or any(abs((x or 0) - (y or 0)) > 1e-6 for x, y in zip(a, b)):
+                    mismatches.append((key, a, b))
+            report[spec.name] = mismatches
+        return report
+
+    def last_refreshed(self, connection):
+        """Oldest refreshed_at across the rollups (None if any was never built)"""
+        rows = connection.execute(select(self.state.c.name, self.state.c.refreshed_at)).all()
+        stamps = {name: refreshed_at for name, refreshed_at in rows}
+        if any(stamps.get(spec.name) is None for spec in SPECS):
+            return None
+        return min(stamps[spec.name] for spec in SPECS)
@@ -0,0 +1,68 @@
+"""
+FundiMatch - Additive Schema Upgrades
+=====================================
+
+create_all() only creates missing tables; it never adds columns or indexes
+to tables that already exist. add_missing_columns() fills that gap for the
+additive changes this project makes (new nullable columns such as
+latitude/longitude/geohash, NOT NULL columns with a server default such as
+jobs.version, and new indexes), so existing SQLite files and PostgreSQL
+databases pick them up on the next start.
+
+It never drops or alters existing columns - anything beyond "add" still
+needs a real migration.
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import logging
+
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+
+def add_missing_columns(connection, metadata):
+    """
+    Add columns and indexes the models declare but the database lacks
+    ================================================================
+
+    Args:
+        connection: SQLAlchemy Connection inside a transaction
+        metadata: The MetaData holding the model tables
+
+    Returns:
+        list: "table.column" / "table.index" names that were added
+    """
+    inspector = inspect(connection)
+    existing = set(inspector.get_table_names())
+    preparer = connection.dialect.identifier_preparer
+    added = []
+    for table in metadata.sorted_tables:
+        if table.name not in existing:
+            continue
+        present = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in present:
+                continue
+            if not column.nullable and column.server_default is None:
+                logger.warning("Cannot add NOT NULL column %s.%s without a default - migrate it by hand",
+                               table.name, column.name)
+                continue
+            column_spec = f"{preparer.quote(column.name)} {column.type.compile(dialect=connection.dialect)}"
+            if column.server_default is not None:
+                # Existing rows get the default, so a NOT NULL column can be added too
+                default = connection.dialect.ddl_compiler(connection.dialect, None).get_column_default_string(column)
+                column_spec += f" DEFAULT {default}" + ("" if column.nullable else " NOT NULL")
+            connection.execute(text(f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {column_spec}"))
+            added.append(f"{table.name}.{column.name}")
+
+        indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in indexes:
+                index.create(connection, checkfirst=True)
+                added.append(f"{table.name}.{index.name}")
+    if added:
+        logger.info("Schema upgraded: added %s", ", ".join(added))
+    return added
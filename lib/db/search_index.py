@@ -0,0 +1,394 @@
+"""
+FundiMatch - Fundi Full-Text Search Index
+=========================================
+
+Ranked full-text search over fundis (username, specialization, location and
+bio), shared by the Flask backend and the CLI.
+
+How it works per database:
+- SQLite: an FTS5 table `fundi_search` whose rowid is the fundi id, ranked
+  with bm25() using per-column weights
+- PostgreSQL: a `fundi_search` table holding a weighted tsvector (GIN index)
+  plus a short text body with a pg_trgm index for typo-tolerant fallback
+  matches, ranked with ts_rank_cd()
+- Anything else (or an index that could not be created): unranked LIKE
+  filters, same as before
+
+The index is kept in sync by database triggers on `fundis` (insert, update,
+delete) and on `users.username`, so ORM writes, bulk inserts and db.json
+syncs are all covered. ensure_search_index() creates everything idempotently
+and backfills an empty index; rebuild_search_index() repopulates it.
+
+Queries are word prefixes: "plumb nai" finds plumbers in Nairobi. Field
+filters ({'specialization': 'plumb'}) restrict a term to one column.
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import re
+from collections import namedtuple
+
+from sqlalchemy import inspect, text
+
+SEARCH_FIELDS = ('username', 'specialization', 'location', 'bio')
+MAX_TERMS = 8
+
+# bm25 column weights (SQLite) - same order as SEARCH_FIELDS
+FTS5_WEIGHTS = (2.0, 4.0, 3.0, 1.0)
+# tsvector weight labels (PostgreSQL) - A ranks highest
+PG_WEIGHT_LABELS = {'specialization': 'A', 'location': 'B', 'username': 'C', 'bio': 'D'}
+
+SearchPage = namedtuple('SearchPage', ['items', 'has_more', 'backend'])
+SearchPage.__doc__ = "items: [(fundi_id, score)] best first; has_more: another page exists; backend: fts5/postgres/like"
+
+# Engines whose index has been checked: engine url -> backend name
+_backends = {}
+
+
+# ============================================================================
+# SCHEMA
+# ============================================================================
+
+SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS fundi_search USING fts5(
+        username, specialization, location, bio,
+        tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS fundi_search_ai AFTER INSERT ON fundis BEGIN
+        INSERT INTO fundi_search (rowid, username, specialization, location, bio)
+        VALUES (new.id, (SELECT username FROM users WHERE id = new.user_id),
+                new.specialization, new.location, coalesce(new.bio, ''));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS fundi_search_au
+    AFTER UPDATE OF user_id, specialization, location, bio ON fundis BEGIN
+        DELETE FROM fundi_search WHERE rowid = old.id;
+        INSERT INTO fundi_search (rowid, username, specialization, location, bio)
+        VALUES (new.id, (SELECT username FROM users WHERE id = new.user_id),
+                new.specialization, new.location, coalesce(new.bio, ''));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS fundi_search_ad AFTER DELETE ON fundis BEGIN
+        DELETE FROM fundi_search WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS fundi_search_user_au AFTER UPDATE OF username ON users BEGIN
+        UPDATE fundi_search SET username = new.username
+        WHERE rowid IN (SELECT id FROM fundis WHERE user_id = new.id);
+    END""",
+]
+
+SQLITE_BACKFILL = """
+    INSERT INTO fundi_search (rowid, username, specialization, location, bio)
+    SELECT f.id, u.username, f.specialization, f.location, coalesce(f.bio, '')
+    FROM fundis f LEFT JOIN users u ON u.id = f.user_id
+"""
+
+# One expression builds the document for both the trigger and the backfill
+PG_DOCUMENT = """
+    setweight(to_tsvector('simple', coalesce(f.specialization, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(f.location, '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce(u.username, '')), 'C') ||
+    setweight(to_tsvector('simple', coalesce(f.bio, '')), 'D')
+"""
+PG_BODY = "lower(concat_ws(' ', u.username, f.specialization, f.location))"
+
+PG_DDL = [
+    """CREATE TABLE IF NOT EXISTS fundi_search (
+        fundi_id INTEGER PRIMARY KEY REFERENCES fundis (id) ON DELETE CASCADE,
+        document tsvector NOT NULL,
+        body TEXT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_fundi_search_document ON fundi_search USING GIN (document)",
+    f"""CREATE OR REPLACE FUNCTION fundi_search_refresh(fid INTEGER) RETURNS void AS $$
+        INSERT INTO fundi_search (fundi_id, document, body)
+        SELECT f.id, {PG_DOCUMENT}, {PG_BODY}
+        FROM fundis f LEFT JOIN users u ON u.id = f.user_id
+        WHERE f.id = fid
+        ON CONFLICT (fundi_id) DO UPDATE SET document = EXCLUDED.document, body = EXCLUDED.body;
+    $$ LANGUAGE sql""",
+    """CREATE OR REPLACE FUNCTION fundi_search_fundis_trigger() RETURNS trigger AS $$
+    BEGIN
+        PERFORM fundi_search_refresh(NEW.id);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql""",
+    """CREATE OR REPLACE FUNCTION fundi_search_users_trigger() RETURNS trigger AS $$
+    BEGIN
+        PERFORM fundi_search_refresh(f.id) FROM fundis f WHERE f.user_id = NEW.id;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql""",
+    "DROP TRIGGER IF EXISTS fundi_search_sync ON fundis",
+    """CREATE TRIGGER fundi_search_sync
+    AFTER INSERT OR UPDATE OF user_id, specialization, location, bio ON fundis
+    FOR EACH ROW EXECUTE FUNCTION fundi_search_fundis_trigger()""",
+    "DROP TRIGGER IF EXISTS fundi_search_user_sync ON users",
+    """CREATE TRIGGER fundi_search_user_sync AFTER UPDATE OF username ON users
+    FOR EACH ROW EXECUTE FUNCTION fundi_search_users_trigger()""",
+]
+
+PG_TRIGRAM_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_fundi_search_body_trgm ON fundi_search USING GIN (body gin_trgm_ops)",
+]
+
+PG_BACKFILL = f"""
+    INSERT INTO fundi_search (fundi_id, document, body)
+    SELECT f.id, {PG_DOCUMENT}, {PG_BODY}
+    FROM fundis f LEFT JOIN users u ON u.id = f.user_id
+"""
+
+
+def _dialect_name(bind):
+    """Dialect name for a Connection, Engine or Session"""
+    dialect = getattr(bind, 'dialect', None) or bind.get_bind().dialect
+    return dialect.name
+
+
+def _engine_key(bind):
+    engine = getattr(bind, 'engine', None) or bind.get_bind().engine
+    return str(engine.url)
+
+
+def ensure_search_index(connection):
+    """
+    Create the search index, triggers and backfill (idempotent)
+    ==========================================================
+
+    Safe to run on every start-up; it is hooked to metadata create_all by
+    both model sets. Requires the fundis and users tables to exist.
+
+    Args:
+        connection: SQLAlchemy Connection inside a transaction
+
+    Returns:
+        str: The search backend now in use ('fts5', 'postgres' or 'like')
+    """
+    name = connection.dialect.name
+    tables = inspect(connection).get_table_names()
+    if 'fundis' not in tables or 'users' not in tables:
+        return 'like'
+
+    if name == 'sqlite':
+        try:
+            for statement in SQLITE_DDL:
+                connection.execute(text(statement))
+        except Exception:
+            # SQLite compiled without FTS5 - keep using LIKE filters
+            _backends[_engine_key(connection)] = 'like'
+            return 'like'
+        backfill = SQLITE_BACKFILL
+    elif name == 'postgresql':
+        for statement in PG_DDL:
+            connection.execute(text(statement))
+        for statement in PG_TRIGRAM_DDL:
+            # pg_trgm may need privileges we do not have; the index still works without it
+            try:
+                with connection.begin_nested():
+                    connection.execute(text(statement))
+            except Exception:
+                break
+        backfill = PG_BACKFILL
+    else:
+        _backends[_engine_key(connection)] = 'like'
+        return 'like'
+
+    indexed = connection.execute(text("SELECT count(*) FROM fundi_search")).scalar()
+    if not indexed and connection.execute(text("SELECT count(*) FROM fundis")).scalar():
+        connection.execute(text(backfill))
+
+    backend = 'fts5' if name == 'sqlite' else 'postgres'
+    _backends[_engine_key(connection)] = backend
+    return backend
+
+
+def rebuild_search_index(connection):
+    """
+    Repopulate the index from the fundis table
+    =========================================
+
+    Returns:
+        int: Number of fundis indexed
+    """
+    backend = ensure_search_index(connection)
+    if backend == 'like':
+        return 0
+    connection.execute(text("DELETE FROM fundi_search"))
+    connection.execute(text(SQLITE_BACKFILL if backend == 'fts5' else PG_BACKFILL))
+    return connection.execute(text("SELECT count(*) FROM fundi_search")).scalar()
+
+
+def search_backend(bind):
+    """
+    Which search implementation a database uses
+    ==========================================
+
+    Args:
+        bind: Session, Connection or Engine
+
+    Returns:
+        str: 'fts5', 'postgres' or 'like'
+    """
+    key = _engine_key(bind)
+    if key not in _backends:
+        name = _dialect_name(bind)
+        tables = inspect(bind.connection() if hasattr(bind, 'get_bind') else bind).get_table_names()
+        if 'fundi_search' not in tables:
+            _backends[key] = 'like'
+        else:
+            _backends[key] = {'sqlite': 'fts5', 'postgresql': 'postgres'}.get(name, 'like')
+    return _backends[key]
+
+
+# ============================================================================
+# QUERIES
+# ============================================================================
+
+def tokenize(query):
+    """Split free text into at most MAX_TERMS lower-case word tokens"""
+    return re.findall(r'\w+', (query or '').lower())[:MAX_TERMS]
+
+
+def _fts5_match(query, fields):
+    """Build an FTS5 MATCH expression of prefix terms (all must match)"""
+    parts = [f'"{token}"*' for token in tokenize(query)]
+    for field, value in (fields or {}).items():
+        terms = ' '.join(f'"{token}"*' for token in tokenize(value))
+        if terms:
+            parts.append(f'{field} : ({terms})')
+    return ' AND '.join(parts)
+
+
+def _pg_tsquery(query, fields):
+    """Build a to_tsquery() string of prefix terms, field terms pinned to their weight"""
+    parts = [f'{token}:*' for token in tokenize(query)]
+    for field, value in (fields or {}).items():
+        parts.extend(f'{token}:*{PG_WEIGHT_LABELS[field]}' for token in tokenize(value))
+    return ' & '.join(parts)
+
+
+def _validate_fields(fields):
+    fields = {k: v for k, v in (fields or {}).items() if v}
+    unknown = set(fields) - set(SEARCH_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown search field(s): {', '.join(sorted(unknown))}")
+    return fields
+
+
+def search_fundi_ids(bind, query=None, fields=None, limit=20, offset=0, available_only=False):
+    """
+    Ranked fundi search
+    ===================
+
+    Args:
+        bind: Session or Connection to query with
+        query (str): Free text matched against every indexed field
+        fields (dict): Extra terms restricted to one field, e.g.
+                       {'specialization': 'plumb', 'location': 'nairobi'}
+        limit (int): Page size
+        offset (int): Rows to skip
+        available_only (bool): Only fundis with is_available set
+
+    Returns:
+        SearchPage: Matching fundi ids with scores (higher is better)
+    """
+    fields = _validate_fields(fields)
+    if not tokenize(query) and not any(tokenize(v) for v in fields.values()):
+        return SearchPage([], False, search_backend(bind))
+
+    backend = search_backend(bind)
+    params = {'limit': limit + 1, 'offset': offset}
+    available = " AND f.is_available = :available" if available_only else ""
+    if available_only:
+        params['available'] = True
+
+    if backend == 'fts5':
+        weights = ', '.join(str(w) for w in FTS5_WEIGHTS)
+        params['match'] = _fts5_match(query, fields)
+        sql = f"""
+            SELECT s.rowid AS fundi_id, -bm25(fundi_search, {weights}) AS score
+            FROM fundi_search s JOIN fundis f ON f.id = s.rowid
+            WHERE fundi_search MATCH :match{available}
+            ORDER BY bm25(fundi_search, {weights}), s.rowid
+            LIMIT :limit OFFSET :offset
+        """
+        rows = bind.execute(text(sql), params).all()
+    elif backend == 'postgres':
+        params['tsquery'] = _pg_tsquery(query, fields)
+        sql = f"""
+            SELECT s.fundi_id, ts_rank_cd(s.document, q) AS score
+            FROM fundi_search s JOIN fundis f ON f.id = s.fundi_id,
+                 to_tsquery('simple', :tsquery) q
+            WHERE s.document @@ q{available}
+            ORDER BY score DESC, s.fundi_id
+            LIMIT :limit OFFSET :offset
+        """
+        rows = bind.execute(text(sql), params).all()
+        if not rows and offset == 0 and query and not fields:
+            rows = _pg_fuzzy(bind, query, params, available)
+    else:
+        rows = _like_search(bind, query, fields, params, available)
+
+    items = [(row.fundi_id, float(row.score)) for row in rows[:limit]]
+    return SearchPage(items, len(rows) > limit, backend)
+
+
+def match_subquery(bind, query=None, fields=None):
+    """
+    Index-backed id filter for existing list queries
+    ===============================================
+
+    Returns a SELECT of matching fundi ids to use as Fundi.id.in_(...), or
+    None when the database has no index (callers keep their LIKE filters).
+    """
+    fields = _validate_fields(fields)
+    backend = search_backend(bind)
+    if backend == 'fts5':
+        match = _fts5_match(query, fields)
+        if match:
+            return text("SELECT rowid FROM fundi_search WHERE fundi_search MATCH :match") \
+                .bindparams(match=match)
+    elif backend == 'postgres':
+        tsquery = _pg_tsquery(query, fields)
+        if tsquery:
+            return text("SELECT fundi_id FROM fundi_search WHERE document @@ to_tsquery('simple', :tsquery)") \
+                .bindparams(tsquery=tsquery)
+    return None
+
+
+def _pg_fuzzy(bind, query, params, available):
+    """Trigram similarity fallback for misspelled queries (needs pg_trgm)"""
+    try:
+        with bind.begin_nested():
+            return bind.execute(text(f"""
+                SELECT s.fundi_id, similarity(s.body, :raw) AS score
+                FROM fundi_search s JOIN fundis f ON f.id = s.fundi_id
+                WHERE s.body % :raw{available}
+                ORDER BY score DESC, s.fundi_id
+                LIMIT :limit OFFSET :offset
+            """), dict(params, raw=query.lower())).all()
+    except Exception:
+        return []
+
+
+def _like_search(bind, query, fields, params, available):
+    """Unranked LIKE fallback: every term must appear in some field (or its own field)"""
+    columns = {
+        'username': 'u.username', 'specialization': 'f.specialization',
+        'location': 'f.location', 'bio': 'f.bio',
+    }
+    clauses = []
+    for i, token in enumerate(tokenize(query)):
+        params[f't{i}'] = f'%{token}%'
+        clauses.append('(' + ' OR '.join(f'lower({c}) LIKE :t{i}' for c in columns.values()) + ')')
+    for field, value in fields.items():
+        for j, token in enumerate(tokenize(value)):
+            params[f'{field}{j}'] = f'%{token}%'
+            clauses.append(f'lower({columns[field]}) LIKE :{field}{j}')
+    sql = f"""
+        SELECT f.id AS fundi_id, f.rating AS score
+        FROM fundis f LEFT JOIN users u ON u.id = f.user_id
+        WHERE {' AND '.join(clauses)}{available}
+        ORDER BY f.rating DESC, f.id
+        LIMIT :limit OFFSET :offset
+    """
+    return bind.execute(text(sql), params).all()
@@ -18,7 +18,7 @@ from datetime import datetime
 # Add the lib directory to Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from models import get_session, User, Fundi, Category, Job, Review, Payment
+from models import session_scope, job_events, User, Fundi, Category, Job, Review, Payment
 
 
 def load_json_data():
@@ -61,256 +61,256 @@ def seed_database():
         print("❌ Failed to load data from db.json")
         return False
     
-    # Get database session
-    session = get_session()
-    
     try:
-        # Clear existing data (optional - comment out if you want to keep existing data)
-        print("🧹 Clearing existing data...")
-        session.query(Payment).delete()
-        session.query(Review).delete()
-        session.query(Job).delete()
-        session.query(Fundi).delete()
-        session.query(User).delete()
-        session.query(Category).delete()
-        session.commit()
-        print("✅ Existing data cleared")
-        
-        # Create categories
-        print("📂 Creating categories...")
-        categories_data = data.get('categories', [])
-        categories = {}
-        
-        for cat_data in categories_data:
-            category = Category(
-                name=cat_data['name'],
-                description=cat_data['description'],
-                icon=cat_data['icon']
-            )
-            session.add(category)
-            session.commit()  # Commit to get the ID
-            categories[cat_data['name']] = category
-            print(f"  ✅ Created category: {category.name}")
-        
-        # Create users from users array
-        print("👥 Creating users...")
-        users_data = data.get('users', [])
-        users = {}
-        
-        for user_data in users_data:
-            user = User(
-                username=user_data['username'],
-                email=user_data['email'],
-                password=user_data['password'],
-                phone=user_data['phone'],
-                role=user_data['role'],
-                is_active=user_data['is_active'],
-                created_at=datetime.fromisoformat(user_data['created_at'].replace('Z', '+00:00'))
-            )
-            session.add(user)
-            session.commit()  # Commit to get the ID
-            users[user_data['email']] = user
-            print(f"  ✅ Created user: {user.username} ({user.role})")
-        
-        # Create fundi users from fundis data
-        print("👥 Creating fundi users...")
-        fundis_data = data.get('fundis', [])
-        
-        for fundi_data in fundis_data:
-            # Check if user already exists
-            if fundi_data['email'] not in users:
+        with session_scope() as session:
+            # Clear existing data (optional - comment out if you want to keep existing data).
+            # It is only committed together with the new rows below.
+            print("🧹 Clearing existing data...")
+            session.query(Payment).delete()
+            session.query(Review).delete()
+            job_events.delete(session.connection())  # SQLite reuses job ids
+            session.query(Job).delete()
+            session.query(Fundi).delete()
+            session.query(User).delete()
+            session.query(Category).delete()
+            print("✅ Existing data cleared")
+            
+            # Create categories
+            print("📂 Creating categories...")
+            categories_data = data.get('categories', [])
+            categories = {}
+            
+            for cat_data in categories_data:
+                category = Category(
+                    name=cat_data['name'],
+                    description=cat_data['description'],
+                    icon=cat_data['icon']
+                )
+                session.add(category)
+                session.flush()  # Flush to get the ID
+                categories[cat_data['name']] = category
+                print(f"  ✅ Created category: {category.name}")
+            
+            # Create users from users array
+            print("👥 Creating users...")
+            users_data = data.get('users', [])
+            users = {}
+            
+            for user_data in users_data:
                 user = User(
-                    username=fundi_data['username'],
-                    email=fundi_data['email'],
-                    password=fundi_data['password'],
-                    phone=fundi_data['phone'],
-                    role=fundi_data['role'],
-                    is_active=fundi_data['is_active'],
-                    created_at=datetime.fromisoformat(fundi_data['created_at'].replace('Z', '+00:00'))
+                    username=user_data['username'],
+                    email=user_data['email'],
+                    password=user_data['password'],
+                    phone=user_data['phone'],
+                    role=user_data['role'],
+                    is_active=user_data['is_active'],
+                    created_at=datetime.fromisoformat(user_data['created_at'].replace('Z', '+00:00'))
                 )
                 session.add(user)
-                session.commit()  # Commit to get the ID
-                users[fundi_data['email']] = user
-                print(f"  ✅ Created fundi user: {user.username} ({user.role})")
-        
-        # Create fundi profiles
-        print("🛠️ Creating fundi profiles...")
-        fundis = {}
-        
-        for fundi_data in fundis_data:
-            # Find the corresponding user
-            user = users.get(fundi_data['email'])
-            if not user:
-                print(f"  ⚠️  User not found for fundi: {fundi_data['email']}")
-                continue
+                session.flush()  # Flush to get the ID
+                users[user_data['email']] = user
+                print(f"  ✅ Created user: {user.username} ({user.role})")
             
-            fundi = Fundi(
-                user_id=user.id,
-                specialization=fundi_data['specialization'],
-                experience=fundi_data['experience'],
-                hourly_rate=fundi_data['hourly_rate'],
-                location=fundi_data['location'],
-                bio=fundi_data['bio'],
-                rating=fundi_data['rating'],
-                is_available=fundi_data['is_available'],
-                created_at=datetime.fromisoformat(fundi_data['created_at'].replace('Z', '+00:00'))
-            )
-            session.add(fundi)
-            session.commit()  # Commit to get the ID
-            fundis[fundi_data['email']] = fundi
-            print(f"  ✅ Created fundi profile: {user.username} ({fundi.specialization})")
-        
-        # Create jobs
-        print("📋 Creating jobs...")
-        jobs_data = data.get('bookings', [])  # Note: bookings in db.json are jobs in CLI
-        jobs = {}
-        
-        for job_data in jobs_data:
-            # Find client by ID (map to users)
-            client = None
-            if job_data['client_id'] == 1:
-                client = users.get('test@example.com')
-            elif job_data['client_id'] == 2:
-                client = users.get('john@example.com')
+            # Create fundi users from fundis data
+            print("👥 Creating fundi users...")
+            fundis_data = data.get('fundis', [])
+            
+            for fundi_data in fundis_data:
+                # Check if user already exists
+                if fundi_data['email'] not in users:
+                    user = User(
+                        username=fundi_data['username'],
+                        email=fundi_data['email'],
+                        password=fundi_data['password'],
+                        phone=fundi_data['phone'],
+                        role=fundi_data['role'],
+                        is_active=fundi_data['is_active'],
+                        created_at=datetime.fromisoformat(fundi_data['created_at'].replace('Z', '+00:00'))
+                    )
+                    session.add(user)
+                    session.flush()  # Flush to get the ID
+                    users[fundi_data['email']] = user
+                    print(f"  ✅ Created fundi user: {user.username} ({user.role})")
+            
+            # Create fundi profiles
+            print("🛠️ Creating fundi profiles...")
+            fundis = {}
             
-            # Find fundi by ID
-            fundi = None
-            if job_data.get('fundi_id'):
-                fundi_obj = session.query(Fundi).filter(Fundi.id == job_data['fundi_id']).first()
-                if fundi_obj:
-                    fundi = fundi_obj
+            for fundi_data in fundis_data:
+                # Find the corresponding user
+                user = users.get(fundi_data['email'])
+                if not user:
+                    print(f"  ⚠️  User not found for fundi: {fundi_data['email']}")
+                    continue
+                
+                fundi = Fundi(
+                    user_id=user.id,
+                    specialization=fundi_data['specialization'],
+                    experience=fundi_data['experience'],
+                    hourly_rate=fundi_data['hourly_rate'],
+                    location=fundi_data['location'],
+                    bio=fundi_data['bio'],
+                    rating=fundi_data['rating'],
+                    is_available=fundi_data['is_available'],
+                    created_at=datetime.fromisoformat(fundi_data['created_at'].replace('Z', '+00:00'))
+                )
+                session.add(fundi)
+                session.flush()  # Flush to get the ID
+                fundis[fundi_data['email']] = fundi
+                print(f"  ✅ Created fundi profile: {user.username} ({fundi.specialization})")
             
-            # Find category by name
-            category = categories.get(job_data['service_type'])
-            if not category:
-                print(f"  ⚠️  Category not found: {job_data['service_type']}")
-                continue
+            # Create jobs
+            print("📋 Creating jobs...")
+            jobs_data = data.get('bookings', [])  # Note: bookings in db.json are jobs in CLI
+            jobs = {}
             
-            # Map status
-            status_mapping = {
-                'confirmed': 'assigned',
-                'pending': 'pending',
-                'completed': 'completed'
-            }
-            status = status_mapping.get(job_data['status'], 'pending')
+            for job_data in jobs_data:
+                # Find client by ID (map to users)
+                client = None
+                if job_data['client_id'] == 1:
+                    client = users.get('test@example.com')
+                elif job_data['client_id'] == 2:
+                    client = users.get('john@example.com')
+                
+                # Find fundi by ID
+                fundi = None
+                if job_data.get('fundi_id'):
+                    fundi_obj = session.query(Fundi).filter(Fundi.id == job_data['fundi_id']).first()
+                    if fundi_obj:
+                        fundi = fundi_obj
+                
+                # Find category by name
+                category = categories.get(job_data['service_type'])
+                if not category:
+                    print(f"  ⚠️  Category not found: {job_data['service_type']}")
+                    continue
+                
+                # Map status
+                status_mapping = {
+                    'confirmed': 'assigned',
+                    'pending': 'pending',
+                    'completed': 'completed'
+                }
+                status = status_mapping.get(job_data['status'], 'pending')
+                
+                job = Job(
+                    title=job_data['description'],
+                    description=job_data['description'],
+                    location=job_data['location'],
+                    status=status,
+                    priority='medium',
+                    budget=job_data.get('total_amount'),
+                    hourly_rate=job_data.get('hourly_rate'),
+                    estimated_hours=job_data.get('estimated_hours'),
+                    total_amount=job_data.get('total_amount'),
+                    client_id=client.id if client else 1,  # Default to first user if mapping fails
+                    fundi_id=fundi.id if fundi else None,
+                    category_id=category.id,
+                    created_at=datetime.fromisoformat(job_data['created_at'].replace('Z', '+00:00')),
+                    scheduled_date=datetime.fromisoformat(job_data['scheduled_date'].replace('Z', '+00:00')) if job_data.get('scheduled_date') else None
+                )
+                session.add(job)
+                session.flush()  # Flush to get the ID
+                jobs[job_data['id']] = job
+                print(f"  ✅ Created job: {job.title}")
             
-            job = Job(
-                title=job_data['description'],
-                description=job_data['description'],
-                location=job_data['location'],
-                status=status,
-                priority='medium',
-                budget=job_data.get('total_amount'),
-                hourly_rate=job_data.get('hourly_rate'),
-                estimated_hours=job_data.get('estimated_hours'),
-                total_amount=job_data.get('total_amount'),
-                client_id=client.id if client else 1,  # Default to first user if mapping fails
-                fundi_id=fundi.id if fundi else None,
-                category_id=category.id,
-                created_at=datetime.fromisoformat(job_data['created_at'].replace('Z', '+00:00')),
-                scheduled_date=datetime.fromisoformat(job_data['scheduled_date'].replace('Z', '+00:00')) if job_data.get('scheduled_date') else None
-            )
-            session.add(job)
-            session.commit()  # Commit to get the ID
-            jobs[job_data['id']] = job
-            print(f"  ✅ Created job: {job.title}")
-        
-        # Create reviews
-        print("⭐ Creating reviews...")
-        reviews_data = data.get('reviews', [])
-        
-        for review_data in reviews_data:
-            # Find the job
-            job = jobs.get(review_data['booking_id'])
-            if not job:
-                print(f"  ⚠️  Job not found for review: {review_data['booking_id']}")
-                continue
+            # Status history for the imported jobs: a creation event at each
+            # job's created_at (and completion at completed_at, when known)
+            job_events.backfill(session.connection(), Job.__table__)
             
-            # Find client and fundi by ID mapping
-            client = None
-            if review_data['client_id'] == 1:
-                client = users.get('test@example.com')
+            # Create reviews
+            print("⭐ Creating reviews...")
+            reviews_data = data.get('reviews', [])
             
-            fundi = None
-            if review_data['fundi_id'] == 1:
-                fundi = fundis.get('fundi@example.com')
-            elif review_data['fundi_id'] == 4:
-                fundi = fundis.get('sam@example.com')
+            for review_data in reviews_data:
+                # Find the job
+                job = jobs.get(review_data['booking_id'])
+                if not job:
+                    print(f"  ⚠️  Job not found for review: {review_data['booking_id']}")
+                    continue
+                
+                # Find client and fundi by ID mapping
+                client = None
+                if review_data['client_id'] == 1:
+                    client = users.get('test@example.com')
+                
+                fundi = None
+                if review_data['fundi_id'] == 1:
+                    fundi = fundis.get('fundi@example.com')
+                elif review_data['fundi_id'] == 4:
+                    fundi = fundis.get('sam@example.com')
+                
+                if not client or not fundi:
+                    print(f"  ⚠️  Client or fundi not found for review")
+                    continue
+                
+                review = Review(
+                    job_id=job.id,
+                    client_id=client.id,
+                    fundi_id=fundi.id,
+                    rating=review_data['rating'],
+                    comment=review_data['comment'],
+                    created_at=datetime.fromisoformat(review_data['created_at'].replace('Z', '+00:00'))
+                )
+                session.add(review)
+                print(f"  ✅ Created review: {review.rating} stars")
             
-            if not client or not fundi:
-                print(f"  ⚠️  Client or fundi not found for review")
-                continue
+            # Create payments
+            print("💰 Creating payments...")
+            payments_data = data.get('payments', [])
             
-            review = Review(
-                job_id=job.id,
-                client_id=client.id,
-                fundi_id=fundi.id,
-                rating=review_data['rating'],
-                comment=review_data['comment'],
-                created_at=datetime.fromisoformat(review_data['created_at'].replace('Z', '+00:00'))
-            )
-            session.add(review)
-            print(f"  ✅ Created review: {review.rating} stars")
-        
-        # Create payments
-        print("💰 Creating payments...")
-        payments_data = data.get('payments', [])
-        
-        for payment_data in payments_data:
-            # Find the job
-            job = jobs.get(payment_data['booking_id'])
-            if not job:
-                print(f"  ⚠️  Job not found for payment: {payment_data['booking_id']}")
-                continue
+            for payment_data in payments_data:
+                # Find the job
+                job = jobs.get(payment_data['booking_id'])
+                if not job:
+                    print(f"  ⚠️  Job not found for payment: {payment_data['booking_id']}")
+                    continue
+                
+                # Find client and fundi by ID mapping
+                client = None
+                if payment_data['client_id'] == 1:
+                    client = users.get('test@example.com')
+                
+                fundi = None
+                if payment_data['fundi_id'] == 1:
+                    fundi = fundis.get('fundi@example.com')
+                elif payment_data['fundi_id'] == 4:
+                    fundi = fundis.get('sam@example.com')
+                
+                if not client or not fundi:
+                    print(f"  ⚠️  Client or fundi not found for payment")
+                    continue
+                
+                payment = Payment(
+                    job_id=job.id,
+                    client_id=client.id,
+                    fundi_id=fundi.id,
+                    amount=payment_data['amount'],
+                    payment_method=payment_data['payment_method'],
+                    transaction_id=payment_data['transaction_id'],
+                    status=payment_data['status'],
+                    created_at=datetime.fromisoformat(payment_data['created_at'].replace('Z', '+00:00'))
+                )
+                session.add(payment)
+                print(f"  ✅ Created payment: KES {payment.amount}")
             
-            # Find client and fundi by ID mapping
-            client = None
-            if payment_data['client_id'] == 1:
-                client = users.get('test@example.com')
+            # Commit all changes
+            session.commit()
             
-            fundi = None
-            if payment_data['fundi_id'] == 1:
-                fundi = fundis.get('fundi@example.com')
-            elif payment_data['fundi_id'] == 4:
-                fundi = fundis.get('sam@example.com')
+            print("\n🎉 Database seeding completed successfully!")
+            print("\n📊 Summary:")
+            print(f"  👥 Users: {len(users)}")
+            print(f"  🛠️ Fundis: {len(fundis)}")
+            print(f"  📂 Categories: {len(categories)}")
+            print(f"  📋 Jobs: {len(jobs)}")
+            print(f"  ⭐ Reviews: {len(reviews_data)}")
+            print(f"  💰 Payments: {len(payments_data)}")
             
-            if not client or not fundi:
-                print(f"  ⚠️  Client or fundi not found for payment")
-                continue
+            return True
             
-            payment = Payment(
-                job_id=job.id,
-                client_id=client.id,
-                fundi_id=fundi.id,
-                amount=payment_data['amount'],
-                payment_method=payment_data['payment_method'],
-                transaction_id=payment_data['transaction_id'],
-                status=payment_data['status'],
-                created_at=datetime.fromisoformat(payment_data['created_at'].replace('Z', '+00:00'))
-            )
-            session.add(payment)
-            print(f"  ✅ Created payment: KES {payment.amount}")
-        
-        # Commit all changes
-        session.commit()
-        
-        print("\n🎉 Database seeding completed successfully!")
-        print("\n📊 Summary:")
-        print(f"  👥 Users: {len(users)}")
-        print(f"  🛠️ Fundis: {len(fundis)}")
-        print(f"  📂 Categories: {len(categories)}")
-        print(f"  📋 Jobs: {len(jobs)}")
-        print(f"  ⭐ Reviews: {len(reviews_data)}")
-        print(f"  💰 Payments: {len(payments_data)}")
-        
-        return True
-        
     except Exception as e:
         print(f"❌ Error seeding database: {str(e)}")
-        session.rollback()
         return False
-    finally:
-        session.close()
 
 
 def create_default_admin():
@@ -320,35 +320,31 @@ def create_default_admin():
     
     This function creates a default admin user for testing purposes.
     """
-    session = get_session()
-    
     try:
-        # Check if admin exists
-        admin = User.find_by_email(session, "admin@fundi.com")
-        if admin:
-            print("✅ Admin user already exists")
-            return
-        
-        # Create default admin
-        admin = User(
-            username="admin",
-            email="admin@fundi.com",
-            password="TEMP_PASSWORD_CHANGE_IN_PRODUCTION",
-            phone="+254700000002",
-            role="admin",
-            is_active=True
-        )
-        session.add(admin)
-        session.commit()
-        print("✅ Default admin user created")
-        print("  📧 Email: admin@fundi.com")
-        print("  🔑 Password: TEMP_PASSWORD_CHANGE_IN_PRODUCTION")
-        
+        with session_scope() as session:
+            # Check if admin exists
+            admin = User.find_by_email(session, "admin@fundi.com")
+            if admin:
+                print("✅ Admin user already exists")
+                return
+            
+            # Create default admin
+            admin = User(
+                username="admin",
+                email="admin@fundi.com",
+                password="TEMP_PASSWORD_CHANGE_IN_PRODUCTION",
+                phone="+254700000002",
+                role="admin",
+                is_active=True
+            )
+            session.add(admin)
+            session.commit()
+            print("✅ Default admin user created")
+            print("  📧 Email: admin@fundi.com")
+            print("  🔑 Password: TEMP_PASSWORD_CHANGE_IN_PRODUCTION")
+            
     except Exception as e:
         print(f"❌ Error creating admin: {str(e)}")
-        session.rollback()
-    finally:
-        session.close()
 
 
 def main():
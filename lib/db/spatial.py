@@ -0,0 +1,100 @@
+"""
+FundiMatch - Geohash Spatial Queries
+====================================
+
+Radius and nearest-neighbour queries over any table with `id`, `latitude`,
+`longitude` and an indexed `geohash` column (fundis and jobs). Shared by
+the Flask backend and the CLI.
+
+How a radius query runs:
+1. Cover the circle's bounding box with at most 16 geohash cells, at the
+   finest precision that allows it (see geo.covering_cells)
+2. Fetch rows in those cells with indexed string range scans
+   (geohash >= 'kzf0' AND geohash < 'kzf0{')
+3. Compute exact haversine distances in Python, drop rows outside the
+   radius and sort
+
+Nearest-neighbour queries run radius queries with a growing radius until
+k rows fall inside it, so the answer is exact and only nearby rows are
+read. Each step sizes the next radius from the density it just saw.
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import math
+
+from sqlalchemy import and_, or_, select
+
+import geo
+
+# First radius tried by nearest(); dense city centres rarely need a second pass
+INITIAL_KNN_RADIUS_KM = 1.0
+
+
+def _cells_clause(column, cells):
+    """OR of range scans, one per geohash cell ('' means every located row)"""
+    if cells == ['']:
+        return column.isnot(None)
+    return or_(*[and_(column >= low, column < high) for low, high in map(geo.prefix_range, cells)])
+
+
+def _search(bind, table, latitude, longitude, radius_km, where):
+    """(distance, id) pairs within radius_km, sorted; and whether every row was scanned"""
+    cells = geo.covering_cells(latitude, longitude, radius_km)
+    stmt = select(table.c.id, table.c.latitude, table.c.longitude) \
+        .where(_cells_clause(table.c.geohash, cells), *where)
+    hits = []
+    for row in bind.execute(stmt):
+        distance = geo.haversine_km(latitude, longitude, row.latitude, row.longitude)
+        if distance <= radius_km:
+            hits.append((distance, row.id))
+    hits.sort()
+    return hits, cells == ['']
+
+
+def within_radius(bind, table, latitude, longitude, radius_km, where=(), limit=None):
+    """
+    Rows within radius_km of a point, nearest first
+    ===============================================
+
+    Args:
+        bind: Session or Connection
+        table: SQLAlchemy Table (e.g. Fundi.__table__)
+        latitude (float), longitude (float): Search centre
+        radius_km (float): Search radius
+        where (tuple): Extra filter clauses on the table
+        limit (int, optional): Maximum rows to return
+
+    Returns:
+        list: (id, distance_km) pairs sorted by distance
+    """
+    hits, _ = _search(bind, table, latitude, longitude, radius_km, where)
+    return [(row_id, round(distance, 3)) for distance, row_id in hits[:limit]]
+
+
+def nearest(bind, table, latitude, longitude, k=10, where=(), max_radius_km=None):
+    """
+    The k rows closest to a point (exact kNN)
+    =========================================
+
+    Args:
+        bind: Session or Connection
+        table: SQLAlchemy Table with id/latitude/longitude/geohash columns
+        latitude (float), longitude (float): Search centre
+        k (int): Number of rows wanted
+        where (tuple): Extra filter clauses on the table
+        max_radius_km (float, optional): Never return rows further away
+
+    Returns:
+        list: (id, distance_km) pairs sorted by distance
+    """
+    limit_km = max_radius_km or math.inf
+    radius_km = min(INITIAL_KNN_RADIUS_KM, limit_km)
+    while True:
+        hits, scanned_all = _search(bind, table, latitude, longitude, radius_km, where)
+        if len(hits) >= k or scanned_all or radius_km >= limit_km:
+            return [(row_id, round(distance, 3)) for distance, row_id in hits[:k]]
+        # Found n rows in area ~r^2: about r * sqrt(k / n) should hold k
+        growth = 1.5 * math.sqrt(k / len(hits)) if hits else 4.0
+        radius_km = min(radius_km * max(growth, 2.0), limit_km)
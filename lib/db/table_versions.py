@@ -0,0 +1,147 @@
+"""
+FundiMatch - Table Versions
+===========================
+
+A version counter per table, used as a cheap cache validator: the Flask
+read endpoints build their ETag/Last-Modified from it, the reference
+caches compare it, and the rollup refresh only runs when a source table's
+version moved. Shared by the Flask backend and the CLI, so a write from
+either one invalidates the other's caches.
+
+How writes are counted:
+- track() registers listeners on a session factory. Flushes and bulk ORM
+  statements (query.update(), session.execute(update(...)), Core inserts
+  through the session) record the tables they touch in session.info
+- When the outermost transaction ends after a commit, those tables are
+  bumped with one upsert in a short transaction of their own. Writers never
+  hold the shared version rows while their own transaction is open, so
+  concurrent writers to the same table don't queue behind each other's row
+  lock. Releasing a SAVEPOINT (begin_nested) commits nothing yet, so it
+  bumps nothing either
+- A rollback of the outermost transaction discards the recorded tables. A
+  rolled-back SAVEPOINT keeps them: bumping a table that didn't change only
+  costs its readers one refetch
+
+The price of bumping after the commit: a reader between the commit and the
+bump sees the new rows under the old version, and the next request gets a
+new validator. If a process dies in that window the version stays behind
+until the next write to the table.
+
+Writes that don't go through a tracked session (raw connections in CLI
+commands, migrations) call bump() themselves; Core writes on a tracked
+session's connection call mark() so they are bumped with its commit.
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String, Table, event, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+PENDING_KEY = 'table_versions_pending'
+COMMITTED_KEY = 'table_versions_committed'
+
+
+def upsert_increment(connection, table, key, column, rows, overwrite=()):
+    """
+    Insert rows, or add their `column` value to the existing row with the same key
+    =============================================================================
+
+    Uses a single INSERT ... ON CONFLICT DO UPDATE (executemany) on SQLite and
+    PostgreSQL, falling back to UPDATE-then-INSERT elsewhere. Columns listed in
+    overwrite take the incoming value on conflict.
+    """
+    if not rows:
+        return
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert = (sqlite.insert if dialect == 'sqlite' else postgresql.insert)(table)
+        set_ = {column: table.c[column] + insert.excluded[column]}
+        set_.update({name: insert.excluded[name] for name in overwrite})
+        connection.execute(insert.on_conflict_do_update(index_elements=[table.c[key]], set_=set_), rows)
+        return
+    for row in rows:
+        values = {column: table.c[column] + row[column]}
+        values.update({name: row[name] for name in overwrite})
+        result = connection.execute(table.update().where(table.c[key] == row[key]).values(**values))
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row))
+
+
+class TableVersions:
+    """
+    Version Table Bound to a MetaData
+    =================================
+
+    Args:
+        metadata: The model MetaData; table_versions is added to it so
+                  create_all() creates it
+    """
+
+    def __init__(self, metadata):
+        self.table = Table(
+            'table_versions', metadata,
+            Column('resource', String(50), primary_key=True),  # table name
+            Column('version', Integer, default=0, nullable=False),
+            Column('updated_at', DateTime, default=datetime.utcnow, nullable=False),
+        )
+
+    def bump(self, connection, tables):
+        """Increment the version row of each table name on the given connection"""
+        names = sorted(set(tables) - {self.table.name})
+        now = datetime.utcnow()
+        upsert_increment(connection, self.table, 'resource', 'version',
+                         [{'resource': name, 'version': 1, 'updated_at': now} for name in names],
+                         overwrite=('updated_at',))
+
+    def get(self, connection, tables):
+        """Return {table: (version, updated_at)} for the given table names"""
+        rows = connection.execute(
+            select(self.table.c.resource, self.table.c.version, self.table.c.updated_at)
+            .where(self.table.c.resource.in_(tables)))
+        found = {row.resource: (row.version, row.updated_at) for row in rows}
+        return {name: found.get(name, (0, None)) for name in tables}
+
+    def mark(self, session, tables):
+        """Record table names to bump when the session's transaction commits"""
+        session.info.setdefault(PENDING_KEY, set()).update(tables)
+
+    def track(self, sessions):
+        """
+        Bump the tables written through a session factory
+        =================================================
+
+        Args:
+            sessions: A sessionmaker, scoped_session or Session class
+        """
+        @event.listens_for(sessions, 'after_flush')
+        def record_flush(session, flush_context):
+            self.mark(session, {obj.__table__.name
+                                for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+                                if hasattr(obj, '__table__')})
+
+        @event.listens_for(sessions, 'do_orm_execute')
+        def record_bulk_write(orm_execute_state):
+            # Bulk query.update()/delete() and Core inserts bypass the flush
+            if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+                table = getattr(orm_execute_state.statement, 'table', None)
+                if table is not None:
+                    self.mark(orm_execute_state.session, [table.name])
+
+        @event.listens_for(sessions, 'after_commit')
+        def record_commit(session):
+            # Also fires when a SAVEPOINT is released; only the real commit counts
+            if not session.in_nested_transaction():
+                session.info[COMMITTED_KEY] = True
+
+        @event.listens_for(sessions, 'after_transaction_end')
+        def bump_committed(session, transaction):
+            # The outermost transaction has ended and given its connection back
+            if transaction.parent is not None:
+                return
+            tables = session.info.pop(PENDING_KEY, None)
+            if session.info.pop(COMMITTED_KEY, False) and tables:
+                with session.get_bind().begin() as connection:
+                    self.bump(connection, tables)
@@ -0,0 +1,381 @@
+"""
+FundiMatch - Background Task Queue
+==================================
+
+A small database-backed job queue for work that should not run inside a
+request. Tasks are rows in background_tasks, written in the caller's
+transaction, and run by worker processes (worker.py, the Procfile
+`worker:` entry) started alongside gunicorn.
+
+Key Concepts:
+- Tasks are registered by name with @tasks.task('name', queue='default')
+  and enqueued with tasks.enqueue(session, 'name', **payload)
+- Claiming is one UPDATE ... WHERE id IN (SELECT ... LIMIT n) statement
+  that stamps a claim token. On PostgreSQL the inner SELECT uses
+  FOR UPDATE SKIP LOCKED so concurrent workers never wait on each other;
+  SQLite holds its database write lock for the whole statement, which
+  gives the same one-claimer-per-row guarantee
+- A claimed task holds a lease (locked_until). Tasks whose worker died are
+  put back in the queue once their lease expires
+- Failures are retried with exponential backoff up to max_attempts, then
+  kept with status 'dead' and the last error for inspection
+- A task's own writes and its 'done' mark commit in one transaction, so a
+  task that finished is never run again; a crash before that commit
+  re-runs it, so tasks should be safe to repeat
+- Each Worker runs a fixed number of threads per queue (per-queue
+  concurrency) and records queue latency and run time metrics
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, Table, Text, func, select
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE = 'default'
+MAX_ATTEMPTS = int(os.environ.get('TASK_MAX_ATTEMPTS', 5))
+RETRY_BASE_SECONDS = float(os.environ.get('TASK_RETRY_BASE_SECONDS', 10))
+RETRY_MAX_SECONDS = 3600
+LEASE_SECONDS = float(os.environ.get('TASK_LEASE_SECONDS', 300))
+POLL_SECONDS = float(os.environ.get('TASK_POLL_SECONDS', 1.0))
+
+
+def retry_delay(attempts):
+    """Seconds to wait before attempt number attempts + 1"""
+    return min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+
+
+def parse_concurrency(spec):
+    """
+    Parse a "queue:threads,queue:threads" string
+    ============================================
+
+    Example: "default:4,notifications:2" -> {'default': 4, 'notifications': 2}.
+    A queue without a count gets one thread.
+    """
+    concurrency = {}
+    for part in (spec or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, count = part.partition(':')
+        threads = int(count) if count else 1
+        if threads < 1:
+            raise ValueError(f"Queue '{name}' needs at least one thread")
+        concurrency[name.strip()] = threads
+    return concurrency
+
+
+class TaskQueue:
+    """
+    Task Table and Registry Bound to a MetaData
+    ===========================================
+
+    Args:
+        metadata: The model MetaData; background_tasks is added to it so
+                  create_all() creates it
+    """
+
+    def __init__(self, metadata):
+        self.registry = {}
+        self.table = Table(
+            'background_tasks', metadata,
+            Column('id', Integer, primary_key=True),
+            Column('queue', String(50), nullable=False, default=DEFAULT_QUEUE),
+            Column('name', String(100), nullable=False),
+            Column('payload', Text, nullable=False),  # JSON keyword arguments
+            Column('status', String(20), nullable=False, default='queued'),
+            Column('attempts', Integer, nullable=False, default=0),
+            Column('max_attempts', Integer, nullable=False, default=MAX_ATTEMPTS),
+            Column('run_at', DateTime, nullable=False, default=datetime.utcnow),
+            Column('created_at', DateTime, nullable=False, default=datetime.utcnow),
+            Column('started_at', DateTime, nullable=True),
+            Column('finished_at', DateTime, nullable=True),
+            Column('locked_by', String(100), nullable=True),
+            Column('locked_until', DateTime, nullable=True),
+            Column('claim_token', String(32), nullable=True, index=True),
+            Column('last_error', Text, nullable=True),
+            # Claims walk (queue, status, run_at) in index order
+            Index('ix_background_tasks_claim', 'queue', 'status', 'run_at'),
+        )
+
+    # ------------------------------------------------------------------
+    # Producing
+    # ------------------------------------------------------------------
+
+    def task(self, name, queue=DEFAULT_QUEUE, max_attempts=MAX_ATTEMPTS):
+        """Decorator registering fn(**payload) as task `name` on `queue`"""
+        def decorator(fn):
+            self.registry[name] = {'fn': fn, 'queue': queue, 'max_attempts': max_attempts}
+            return fn
+        return decorator
+
+    def declare(self, name, queue=DEFAULT_QUEUE, max_attempts=MAX_ATTEMPTS):
+        """Register task `name` for enqueueing only; another process's registry runs it"""
+        self.registry[name] = {'fn': None, 'queue': queue, 'max_attempts': max_attempts}
+
+    def enqueue(self, session, name, delay=0, **payload):
+        """
+        Add a task in the session's current transaction
+        ===============================================
+
+        Args:
+            session: The session whose commit should publish the task
+            name (str): Registered task name
+            delay (float): Seconds before the task may run
+            **payload: JSON-serialisable keyword arguments for the task
+        """
+        spec = self.registry.get(name)
+        if spec is None:
+            raise KeyError(f"Unknown task '{name}'")
+        now = datetime.utcnow()
+        session.connection().execute(self.table.insert().values(
+            queue=spec['queue'], name=name, payload=json.dumps(payload), status='queued', attempts=0,
+            max_attempts=spec['max_attempts'], run_at=now + timedelta(seconds=delay), created_at=now
+        ))
+
+    def enqueue_many(self, session, name, payloads, delay=0):
+        """Add one task per payload dict with a single executemany INSERT"""
+        spec = self.registry.get(name)
+        if spec is None:
+            raise KeyError(f"Unknown task '{name}'")
+        if not payloads:
+            return
+        now = datetime.utcnow()
+        session.connection().execute(self.table.insert(), [
+            dict(queue=spec['queue'], name=name, payload=json.dumps(payload), status='queued', attempts=0,
+                 max_attempts=spec['max_attempts'], run_at=now + timedelta(seconds=delay), created_at=now)
+            for payload in payloads
+        ])
+
+    # ------------------------------------------------------------------
+    # Consuming
+    # ------------------------------------------------------------------
+
+    def claim(self, connection, queue, worker_id, limit=1, lease_seconds=LEASE_SECONDS, now=None):
+        """
+        Claim up to `limit` due tasks from a queue
+        =========================================
+
+        Args:
+            connection: Connection inside a short transaction of its own
+
+        Returns:
+            list: Claimed rows (id, name, payload, attempts, max_attempts, run_at)
+        """
+        now = now or datetime.utcnow()
+        tasks = self.table
+        token = uuid.uuid4().hex
+        due = (
+            select(tasks.c.id)
+            .where(tasks.c.queue == queue, tasks.c.status == 'queued', tasks.c.run_at <= now)
+            .order_by(tasks.c.run_at, tasks.c.id).limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        claimed = connection.execute(
+            tasks.update().where(tasks.c.id.in_(due), tasks.c.status == 'queued').values(
+                status='running', claim_token=token, locked_by=worker_id, started_at=now,
+                locked_until=now + timedelta(seconds=lease_seconds), attempts=tasks.c.attempts + 1
+            )
+        ).rowcount
+        if not claimed:
+            return []
+        return connection.execute(
+            select(tasks.c.id, tasks.c.queue, tasks.c.name, tasks.c.payload, tasks.c.attempts,
+                   tasks.c.max_attempts, tasks.c.run_at)
+            .where(tasks.c.claim_token == token).order_by(tasks.c.id)
+        ).all()
+
+    def complete(self, connection, task_id, now=None):
+        """Mark a claimed task done"""
+        self._update(connection, task_id, status='done', finished_at=now or datetime.utcnow(),
+                          locked_until=None, claim_token=None, last_error=None)
+
+    def fail(self, connection, task, error, now=None):
+        """
+        Record a failed attempt
+        =======================
+
+        The task is queued again after retry_delay(attempts), or marked
+        'dead' once it has used max_attempts.
+
+        Returns:
+            str: 'retried' or 'dead'
+        """
+        now = now or datetime.utcnow()
+        dead = task.attempts >= task.max_attempts
+        self._update(
+            connection, task.id, status='dead' if dead else 'queued', last_error=str(error)[:2000],
+            finished_at=now if dead else None, locked_until=None, claim_token=None,
+            run_at=now if dead else now + timedelta(seconds=retry_delay(task.attempts))
+        )
+        return 'dead' if dead else 'retried'
+
+    def _update(self, connection, task_id, **values):
+        connection.execute(self.table.update().where(self.table.c.id == task_id).values(**values))
+
+    def recover_expired(self, connection, now=None):
+        """Requeue running tasks whose lease ran out (their worker died); returns rows requeued"""
+        now = now or datetime.utcnow()
+        tasks = self.table
+        expired = (tasks.c.status == 'running', tasks.c.locked_until < now)
+        requeued = connection.execute(
+            tasks.update().where(*expired, tasks.c.attempts < tasks.c.max_attempts)
+            .values(status='queued', claim_token=None, locked_until=None, run_at=now,
+                    last_error='Lease expired before the task finished')
+        ).rowcount
+        connection.execute(
+            tasks.update().where(*expired, tasks.c.attempts >= tasks.c.max_attempts)
+            .values(status='dead', claim_token=None, locked_until=None, finished_at=now,
+                    last_error='Lease expired before the task finished')
+        )
+        return requeued
+
+    def depth(self, connection):
+        """{(queue, status): count} for unfinished and dead tasks"""
+        tasks = self.table
+        rows = connection.execute(
+            select(tasks.c.queue, tasks.c.status, func.count())
+            .where(tasks.c.status.in_(('queued', 'running', 'dead')))
+            .group_by(tasks.c.queue, tasks.c.status)
+        ).all()
+        return {(queue, status): count for queue, status, count in rows}
+
+    def prune(self, connection, older_than):
+        """Delete done tasks finished before older_than; returns rows deleted"""
+        tasks = self.table
+        return connection.execute(
+            tasks.delete().where(tasks.c.status == 'done', tasks.c.finished_at < older_than)
+        ).rowcount
+
+
+class Worker:
+    """
+    Runs Claimed Tasks on Per-Queue Thread Pools
+    ============================================
+
+    Args:
+        tasks (TaskQueue): Queue and task registry
+        engine: Engine used for claims and failure records
+        session_factory: Returns the session task code writes through;
+                         the task's 'done' mark commits with it
+        concurrency (dict): {queue: threads}
+        context: Optional callable returning a context manager each task
+                 runs in (e.g. Flask's app.app_context)
+        worker_id (str): Shown in locked_by (default host:pid)
+    """
+
+    def __init__(self, tasks, engine, session_factory, concurrency=None, context=None, worker_id=None,
+                 poll_seconds=POLL_SECONDS, lease_seconds=LEASE_SECONDS):
+        self.tasks = tasks
+        self.engine = engine
+        self.session_factory = session_factory
+        self.concurrency = concurrency or {DEFAULT_QUEUE: 1}
+        self.context = context or nullcontext
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.stopping = threading.Event()
+        self.threads = []
+
+    def run_one(self, queue):
+        """Claim and run one task from `queue`; returns False when none was due"""
+        with self.engine.begin() as connection:
+            claimed = self.tasks.claim(connection, queue, self.worker_id, limit=1, lease_seconds=self.lease_seconds)
+        if not claimed:
+            return False
+        task = claimed[0]
+        started = datetime.utcnow()
+        metrics.observe('task_wait_seconds', max((started - task.run_at).total_seconds(), 0), queue=queue)
+        clock = time.perf_counter()
+        spec = self.tasks.registry.get(task.name)
+        with self.context():
+            session = self.session_factory()
+            try:
+                if spec is None or spec['fn'] is None:
+                    raise LookupError(f"No task registered as '{task.name}'")
+                spec['fn'](**json.loads(task.payload))
+                self.tasks.complete(session.connection(), task.id)
+                session.commit()
+                result = 'done'
+            except Exception as e:
+                session.rollback()
+                logger.warning("Task %s (%s) failed on attempt %s: %s", task.id, task.name, task.attempts, e)
+                with self.engine.begin() as connection:
+                    result = self.tasks.fail(connection, task, f"{type(e).__name__}: {e}")
+        metrics.observe('task_run_seconds', time.perf_counter() - clock, queue=queue, task=task.name)
+        metrics.inc('tasks_total', queue=queue, task=task.name, result=result)
+        return True
+
+    def drain(self, queues=None):
+        """Run due tasks in the calling thread until the queues are empty; returns tasks run"""
+        ran = 0
+        for queue in queues or self.concurrency:
+            while self.run_one(queue):
+                ran += 1
+        return ran
+
+    def _loop(self, queue):
+        while not self.stopping.is_set():
+            try:
+                ran = self.run_one(queue)
+            except Exception:
+                logger.exception("Worker loop error on queue %s", queue)
+                ran = False
+            if not ran:
+                self.stopping.wait(self.poll_seconds)
+
+    def _recover_loop(self):
+        while not self.stopping.wait(self.lease_seconds / 4):
+            try:
+                with self.engine.begin() as connection:
+                    requeued = self.tasks.recover_expired(connection)
+                if requeued:
+                    logger.warning("Requeued %s tasks with expired leases", requeued)
+            except Exception:
+                logger.exception("Lease recovery failed")
+
+    def start(self):
+        """Start the queue threads and the lease recovery thread"""
+        self.stopping.clear()
+        targets = [(self._recover_loop, (), 'task-recovery')]
+        for queue, threads in self.concurrency.items():
+            targets += [(self._loop, (queue,), f'task-{queue}-{n}') for n in range(threads)]
+        for target, args, name in targets:
+            thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self, timeout=None):
+        """Ask the threads to finish their current task and wait for them"""
+        self.stopping.set()
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+
+def record_depth(tasks, depth, registry):
+    """Collector body: set task_queue_depth{queue,status} gauges from a tasks.depth() result"""
+    queues = {spec['queue'] for spec in tasks.registry.values()} | {queue for queue, _ in depth}
+    for queue in queues:
+        for status in ('queued', 'running', 'dead'):
+            registry.set_gauge('task_queue_depth', depth.get((queue, status), 0), queue=queue, status=status)
+
+
+metrics.describe('task_queue_depth', 'Background tasks per queue and status (queued, running, dead)')
+metrics.describe('task_wait_seconds', 'Time from a task becoming due to a worker starting it')
+metrics.describe('task_run_seconds', 'Background task run time')
+metrics.describe('tasks_total', 'Background tasks finished (done, retried or dead)')
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+FundiMatch - Scriptable Command Line
+====================================
+
+Non-interactive subcommands for admin work and shell scripts, next to the
+interactive menus in main.py and cli.py:
+
+    python lib/fundimatch.py jobs list --status pending --format csv
+    python lib/fundimatch.py jobs assign assignments.csv     # job_id,fundi_id
+    python lib/fundimatch.py jobs status - < changes.csv     # job_id,status
+    python lib/fundimatch.py fundis list --available --format jsonl
+    python lib/fundimatch.py users list --role client
+    python lib/fundimatch.py payments list --fundi 3 --limit 20 --offset 40
+    python lib/fundimatch.py report summary --days 30 --format jsonl
+
+Why it starts fast:
+- Only the standard library and job_states are imported up front. Each
+  command imports what it needs when it runs, so --help and usage errors
+  never load SQLAlchemy, and only report commands load NumPy
+  (lib/analytics.py)
+- List commands run the joined SELECTs in lib/db/listings.py with
+  yield_per and write each row as soon as it is fetched (lib/render.py);
+  no ORM objects, no lazy loads per row, and memory stays flat
+- Batch commands read CSV rows from a file or stdin ('-') and apply
+  BATCH_SIZE rows per transaction: one SELECT for the batch's jobs, one
+  conditional UPDATE per row and one INSERT for the status events. One
+  result row per input row is written as each batch commits
+
+The database is fundimatch.db in the working directory, or
+FUNDIMATCH_DATABASE_URL (also set by --db).
+
+Exit status: 0 on success, 1 if any batch row failed, 2 for usage errors.
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import argparse
+import csv
+import os
+import sys
+from itertools import islice
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from job_states import STATUSES  # noqa: E402  (plain Python, no database imports)
+
+BATCH_SIZE = 500
+
+# List command -> the arguments passed to its lib/db/listings.py function
+FILTERS = {
+    'jobs': ('status', 'client_id', 'fundi_id'),
+    'fundis': ('available_only', 'specialization'),
+    'users': ('role',),
+    'reviews': ('fundi_id', 'client_id'),
+    'payments': ('client_id', 'fundi_id'),
+}
+
+RESULT_COLUMNS = [('line', 6), ('job_id', 8), ('status', 12), ('result', 7), ('message', 45)]
+
+
+class UsageError(Exception):
+    """Bad input that should stop the command with exit status 2"""
+
+
+def _positive_int(text):
+    """argparse type for counts that must be at least 1"""
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{text}'")
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+
+def _non_negative_int(text):
+    """argparse type for counts that may be 0"""
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{text}'")
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"must be at least 0, got {value}")
+    return value
+
+
+# =============================================================================
+# LIST COMMANDS
+# =============================================================================
+
+def _list(name):
+    """A command handler streaming one of the lib/db/listings.py queries"""
+    def handler(args):
+        from db import listings
+        from db.models import session_scope
+        from render import write_rows
+
+        filters = {key: getattr(args, key) for key in FILTERS[name]}
+        with session_scope(read_only=True) as session:
+            listing = getattr(listings, name)(**filters)
+            write_rows(listings.fetch(session, listing, args.limit, args.offset), listing.columns, args.format)
+        return 0
+    return handler
+
+
+# =============================================================================
+# BATCH COMMANDS
+# =============================================================================
+
+def _read_csv(path, fields):
+    """
+    Open a CSV of batch rows
+    ========================
+
+    The file and its header are checked before anything is written, so a
+    bad path or header fails with no partial output.
+
+    Args:
+        path (str): CSV file, or '-' for stdin; the first line is a header
+        fields (list): Required columns, returned in this order
+
+    Returns:
+        generator: (line number, values) for each row
+
+    Raises:
+        UsageError: If the file cannot be opened or lacks a column
+    """
+    try:
+        stream = sys.stdin if path == '-' else open(path, newline='')
+    except OSError as e:
+        raise UsageError(f"Cannot read {path}: {e.strerror}")
+    reader = csv.DictReader(stream)
+    if any(field not in (reader.fieldnames or []) for field in fields):
+        stream.close()
+        raise UsageError(f"{path} needs a header line with the column(s): {', '.join(fields)}")
+
+    def rows():
+        with stream:
+            for row in reader:
+                yield reader.line_num, [(row.get(field) or '').strip() for field in fields]
+    return rows()
+
+
+def _int(text, name):
+    try:
+        return int(text)
+    except ValueError:
+        raise ValueError(f"{name} must be a whole number, got '{text}'")
+
+
+def _move_jobs(session, changes):
+    """
+    Apply one batch of status changes
+    =================================
+
+    Each change is (line, job_id, new_status, fundi_id, error). The batch's
+    jobs are read with one SELECT; each change is then a conditional UPDATE
+    on the status and version that were read, the same optimistic check as
+    Job.assign_to_fundi, so a job changed by someone else since is reported
+    instead of overwritten. Rows of the same job later in the batch see the
+    earlier rows' result.
+
+    Like the web bulk endpoints, the batch also enqueues a job_assigned or
+    job_status_changed outbox event per applied row and a
+    refresh_fundi_stats task per fundi involved, in the same transaction.
+
+    Returns:
+        list: (line, job_id, status, 'ok' | 'error', message) per change
+    """
+    from sqlalchemy import func, select, update
+    from db.models import Fundi, Job, job_events, outbox, tasks
+    from job_states import ASSIGNED, check_transition
+
+    job_ids = {job_id for _, job_id, _, _, error in changes if not error}
+    jobs, details = {}, {}
+    for row in session.execute(select(Job.id, Job.status, Job.version, Job.fundi_id, Job.title, Job.client_id)
+                               .where(Job.id.in_(job_ids))):
+        jobs[row.id] = (row.status, row.version)
+        details[row.id] = {'title': row.title, 'client_id': row.client_id, 'fundi_id': row.fundi_id}
+    fundi_ids = {fundi_id for _, _, _, fundi_id, error in changes if fundi_id and not error}
+    fundis = dict(session.execute(
+        select(Fundi.id, Fundi.is_available).where(Fundi.id.in_(fundi_ids))).all()) if fundi_ids else {}
+
+    events, results = [], []
+    notices = {'job_assigned': [], 'job_status_changed': []}
+    stats_fundis = set()
+    for line, job_id, new_status, fundi_id, error in changes:
+        try:
+            if error:
+                raise ValueError(error)
+            if job_id not in jobs:
+                raise ValueError(f"Job {job_id} not found")
+            if fundi_id is not None:
+                if fundi_id not in fundis:
+                    raise ValueError(f"Fundi {fundi_id} not found")
+                if not fundis[fundi_id]:
+                    raise ValueError(f"Fundi {fundi_id} is not available")
+            current, version = jobs[job_id]
+            check_transition(current, new_status)
+
+            values = {'status': new_status, 'version': Job.version + 1, 'updated_at': func.now()}
+            if fundi_id is not None:
+                values['fundi_id'] = fundi_id
+            if new_status == 'completed':
+                values['completed_at'] = func.now()
+            matched = session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == current, Job.version == version)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if not matched:
+                raise ValueError("Job was changed by another request")
+            jobs[job_id] = (new_status, version + 1)
+            events.append((job_id, current, new_status))
+            job = details[job_id]
+            stats_fundis.update((job['fundi_id'], fundi_id))
+            if fundi_id is not None:
+                job['fundi_id'] = fundi_id
+            notice = {'job_id': job_id, 'title': job['title'], 'client_id': job['client_id'],
+                      'fundi_id': job['fundi_id']}
+            if new_status == ASSIGNED:
+                notices['job_assigned'].append(notice)
+            else:
+                notices['job_status_changed'].append(dict(notice, status=new_status))
+            results.append((line, job_id, new_status, 'ok', ''))
+        except ValueError as e:  # includes InvalidTransition
+            results.append((line, job_id, new_status, 'error', str(e)))
+    job_events.record(session.connection(), events)
+    for topic, payloads in notices.items():
+        outbox.enqueue_many(session, topic, payloads)
+    tasks.enqueue_many(session, 'refresh_fundi_stats',
+                       [{'fundi_id': fundi_id} for fundi_id in sorted(stats_fundis - {None})])
+    return results
+
+
+def _run_batch(args, changes):
+    """Apply changes BATCH_SIZE at a time, one transaction each, streaming results"""
+    from db.models import session_scope
+    from render import write_rows
+
+    failed = 0
+
+    def results():
+        nonlocal failed
+        while True:
+            chunk = list(islice(changes, args.batch_size))
+            if not chunk:
+                return
+            with session_scope() as session:
+                batch = _move_jobs(session, chunk)
+            failed += sum(1 for result in batch if result[3] == 'error')
+            yield from batch
+
+    done = write_rows(results(), RESULT_COLUMNS, args.format)
+    print(f"{'❌' if failed else '✅'} {done - failed} of {done} rows applied", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def assign_jobs(args):
+    rows = _read_csv(args.file, ['job_id', 'fundi_id'])
+
+    def changes():
+        for line, (job_id, fundi_id) in rows:
+            try:
+                yield line, _int(job_id, 'job_id'), 'assigned', _int(fundi_id, 'fundi_id'), None
+            except ValueError as e:
+                yield line, job_id, 'assigned', None, str(e)
+    return _run_batch(args, changes())
+
+
+def update_statuses(args):
+    rows = _read_csv(args.file, ['job_id', 'status'])
+
+    def changes():
+        for line, (job_id, status) in rows:
+            error = "Use 'jobs assign' to assign jobs to a fundi" if status == 'assigned' else None
+            try:
+                yield line, _int(job_id, 'job_id'), status, None, error
+            except ValueError as e:
+                yield line, job_id, status, None, str(e)
+    return _run_batch(args, changes())
+
+
+# =============================================================================
+# REPORTS
+# =============================================================================
+
+def report(args):
+    from datetime import datetime, timedelta
+    import analytics
+    from db.models import session_scope
+    from render import write_rows
+
+    try:
+        start, end = analytics.parse_day(args.start), analytics.parse_day(args.end)
+    except ValueError:
+        raise UsageError("--start and --end must be dates like 2026-01-31")
+    if start and end and end < start:
+        raise UsageError("--end is before --start")
+    # --end is inclusive, like end= on /api/analytics/*; the queries want the day after
+    if args.days:
+        end = end or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        start = end - timedelta(days=args.days - 1)
+    end = end + timedelta(days=1) if end else None
+
+    with session_scope(read_only=True) as session:
+        if args.name == 'summary':
+            summary = analytics.summary(session, start, end)
+            hours = summary.pop('completion_hours')
+            rows = [dict(summary, **{f'completion_{key}': value for key, value in hours.items()})]
+        elif args.name == 'daily':
+            rows = analytics.daily_series(session, start, end)
+        elif args.name == 'earnings':
+            rows = analytics.earnings_by_fundi(session, start, end, limit=args.limit)
+        else:
+            rows = [dict(stage=name, **stage)
+                    for name, stage in analytics.stage_latencies(session, start=start, end=end).items()]
+
+    if rows:
+        columns = [(key, max(len(key), *(len(str(row[key])) for row in rows))) for key in rows[0]]
+        write_rows((tuple(row.values()) for row in rows), columns, args.format)
+    return 0
+
+
+# =============================================================================
+# ARGUMENT PARSING
+# =============================================================================
+
+def build_parser():
+    """
+    The fundimatch command tree
+    ===========================
+
+    Returns:
+        ArgumentParser: Subcommands set func to their handler
+    """
+    parser = argparse.ArgumentParser(prog='fundimatch', description='FundiMatch admin commands for scripts')
+    parser.add_argument('--db', help='Database URL (default: sqlite:///fundimatch.db in the working directory)')
+    groups = parser.add_subparsers(dest='group', metavar='{jobs,fundis,users,reviews,payments,report}',
+                                   required=True)
+
+    def output(command, listing=True):
+        command.add_argument('--format', choices=('table', 'csv', 'jsonl'), default='table')
+        if listing:
+            command.add_argument('--limit', type=_positive_int, help='Stop after this many rows')
+            command.add_argument('--offset', type=_non_negative_int, help='Skip this many rows first')
+
+    def batch(command, columns):
+        command.add_argument('file', help=f"CSV file with a header line and the columns {columns}; '-' for stdin")
+        command.add_argument('--batch-size', type=_positive_int, default=BATCH_SIZE, help='Rows per transaction')
+        output(command, listing=False)
+
+    jobs = groups.add_parser('jobs', help='List jobs or change many at once').add_subparsers(
+        dest='command', metavar='{list,assign,status}', required=True)
+    command = jobs.add_parser('list', help='Stream jobs')
+    command.add_argument('--status', choices=STATUSES)
+    command.add_argument('--client', dest='client_id', type=int, help='Client user id')
+    command.add_argument('--fundi', dest='fundi_id', type=int, help='Fundi id')
+    output(command)
+    command.set_defaults(func=_list('jobs'))
+    command = jobs.add_parser('assign', help='Assign pending jobs to fundis from CSV')
+    batch(command, 'job_id,fundi_id')
+    command.set_defaults(func=assign_jobs)
+    command = jobs.add_parser('status', help='Change job statuses from CSV')
+    batch(command, 'job_id,status')
+    command.set_defaults(func=update_statuses)
+
+    fundis = groups.add_parser('fundis', help='List fundis').add_subparsers(
+        dest='command', metavar='{list}', required=True)
+    command = fundis.add_parser('list', help='Stream fundis')
+    command.add_argument('--available', dest='available_only', action='store_true', help='Only fundis taking work')
+    command.add_argument('--specialization')
+    output(command)
+    command.set_defaults(func=_list('fundis'))
+
+    users = groups.add_parser('users', help='List users').add_subparsers(
+        dest='command', metavar='{list}', required=True)
+    command = users.add_parser('list', help='Stream users')
+    command.add_argument('--role', choices=('admin', 'client', 'fundi'))
+    output(command)
+    command.set_defaults(func=_list('users'))
+
+    for name in ('reviews', 'payments'):
+        group = groups.add_parser(name, help=f'List {name}').add_subparsers(
+            dest='command', metavar='{list}', required=True)
+        command = group.add_parser('list', help=f'Stream {name}')
+        command.add_argument('--client', dest='client_id', type=int, help='Client user id')
+        command.add_argument('--fundi', dest='fundi_id', type=int, help='Fundi id')
+        output(command)
+        command.set_defaults(func=_list(name))
+
+    command = groups.add_parser('report', help='Analytics reports')
+    command.add_argument('name', choices=('summary', 'daily', 'earnings', 'stages'))
+    command.add_argument('--start', help='First day, YYYY-MM-DD')
+    command.add_argument('--end', help='Last day (inclusive), YYYY-MM-DD')
+    command.add_argument('--days', type=_positive_int, help='The last N days, up to --end or today')
+    command.add_argument('--limit', type=_positive_int, help='Top N fundis (earnings)')
+    output(command, listing=False)
+    command.set_defaults(func=report)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.db:
+        os.environ['FUNDIMATCH_DATABASE_URL'] = args.db
+    try:
+        return args.func(args)
+    except UsageError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    except BrokenPipeError:
+        # Output piped into head & co. that stopped reading; point stdout at
+        # devnull so the interpreter's final flush doesn't fail as well
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
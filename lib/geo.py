@@ -0,0 +1,226 @@
+"""
+FundiMatch - Geohash and Distance Helpers
+=========================================
+
+Pure-Python location maths shared by the Flask backend, the CLI and the
+spatial queries in db/spatial.py.
+
+Key Concepts:
+- A geohash turns (latitude, longitude) into a short base-32 string. Points
+  whose hashes share a prefix are in the same grid cell, so "everything in
+  this cell" is a plain string range scan on an ordinary B-tree index - it
+  works the same on SQLite and PostgreSQL.
+- A radius query covers the circle's bounding box with a handful of cells
+  (covering_cells) and scans only those, then filters by exact distance.
+- Rows without coordinates fall back to a small gazetteer of town centres,
+  so existing free-text locations ("Nairobi, Kilimani") still get a rough
+  position.
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import math
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+DECODE = {c: i for i, c in enumerate(BASE32)}
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = EARTH_RADIUS_KM * math.pi / 180  # along a meridian, on the haversine sphere
+# Stored hash length - precision 9 cells are about 5 m across
+STORED_PRECISION = 9
+
+# Approximate town centres used when a row has no coordinates of its own
+TOWN_COORDINATES = {
+    'nairobi': (-1.2864, 36.8172),
+    'mombasa': (-4.0435, 39.6682),
+    'kisumu': (-0.0917, 34.7680),
+    'nakuru': (-0.3031, 36.0800),
+    'eldoret': (0.5143, 35.2698),
+    'thika': (-1.0333, 37.0693),
+    'machakos': (-1.5177, 37.2634),
+    'nyeri': (-0.4201, 36.9476),
+    'kiambu': (-1.1714, 36.8356),
+    'kitale': (1.0157, 35.0062),
+    'malindi': (-3.2192, 40.1169),
+    'garissa': (-0.4532, 39.6461),
+    'kakamega': (0.2827, 34.7519),
+    'meru': (0.0463, 37.6559),
+    'naivasha': (-0.7172, 36.4310),
+    'kericho': (-0.3689, 35.2863),
+    'embu': (-0.5310, 37.4506),
+    'lamu': (-2.2717, 40.9020),
+}
+
+
+def encode(latitude, longitude, precision=STORED_PRECISION):
+    """
+    Encode a coordinate as a geohash
+    ================================
+
+    Args:
+        latitude (float): -90..90
+        longitude (float): -180..180
+        precision (int): Number of characters
+
+    Returns:
+        str: The geohash
+    """
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars = []
+    bits = 0
+    value = 0
+    even = True  # bits alternate longitude, latitude, longitude, ...
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if longitude >= mid:
+                value = (value << 1) | 1
+                lng_lo = mid
+            else:
+                value <<= 1
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if latitude >= mid:
+                value = (value << 1) | 1
+                lat_lo = mid
+            else:
+                value <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+
+def decode_bounds(geohash):
+    """Return (lat_lo, lat_hi, lng_lo, lng_hi) of a geohash cell"""
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    even = True
+    for char in geohash:
+        value = DECODE[char]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lng_lo + lng_hi) / 2
+                lng_lo, lng_hi = (mid, lng_hi) if bit else (lng_lo, mid)
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                lat_lo, lat_hi = (mid, lat_hi) if bit else (lat_lo, mid)
+            even = not even
+    return lat_lo, lat_hi, lng_lo, lng_hi
+
+
+def cell_size_degrees(precision):
+    """(height, width) in degrees of a cell at this precision"""
+    lng_bits = (5 * precision + 1) // 2
+    lat_bits = (5 * precision) // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    Latitude/longitude box containing every point within radius_km
+    ==============================================================
+
+    Returns:
+        tuple: (south, north, west, east) in degrees; west/east may run
+               past +-180 and are wrapped by the caller
+    """
+    dlat = radius_km / KM_PER_DEGREE
+    # Longitude degrees shrink towards the poles, so size the box at the
+    # highest latitude it reaches
+    widest = math.cos(math.radians(min(89.9, abs(latitude) + dlat)))
+    dlng = min(180.0, radius_km / (KM_PER_DEGREE * widest))
+    return max(-90.0, latitude - dlat), min(90.0, latitude + dlat), longitude - dlng, longitude + dlng
+
+
+def covering_cells(latitude, longitude, radius_km, max_cells=16):
+    """
+    Geohash cells that together contain the circle around a point
+    =============================================================
+
+    Picks the finest precision at which the circle's bounding box spans at
+    most max_cells cells and lists those cells. Returns [''] (every cell)
+    when even the coarsest grid needs more.
+    """
+    south, north, west, east = bounding_box(latitude, longitude, radius_km)
+    if east - west >= 360:
+        return ['']
+    for precision in range(STORED_PRECISION, 0, -1):
+        height, width = cell_size_degrees(precision)
+        row0, col0 = math.floor((south + 90) / height), math.floor((west + 180) / width)
+        rows = min(math.floor((north + 90) / height), (1 << ((5 * precision) // 2)) - 1) - row0 + 1
+        cols = math.floor((east + 180) / width) - col0 + 1
+        if rows * cols <= max_cells:
+            break
+    else:
+        return ['']
+    cells = []
+    for row in range(rows):
+        lat = (row0 + row + 0.5) * height - 90
+        for col in range(cols):
+            lng = ((col0 + col + 0.5) * width) % 360 - 180
+            cell = encode(lat, lng, precision)
+            if cell not in cells:  # a box spanning nearly 360 degrees can wrap onto itself
+                cells.append(cell)
+    return cells
+
+
+def prefix_range(prefix):
+    """[low, high) string bounds matching every hash that starts with prefix"""
+    return prefix, prefix + '{'  # '{' sorts right after 'z', the last base-32 digit
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def geocode_town(text):
+    """Coordinates of the first known town named in a free-text location"""
+    text = (text or '').lower()
+    for town, coordinates in TOWN_COORDINATES.items():
+        if town in text:
+            return coordinates
+    return None
+
+
+def valid_coordinates(latitude, longitude):
+    """True when both values are present and in range"""
+    return (latitude is not None and longitude is not None
+            and -90 <= latitude <= 90 and -180 <= longitude <= 180)
+
+
+def sync_geohash(mapper, connection, target):
+    """
+    ORM before_insert/before_update listener for located models
+    ==========================================================
+
+    Fills missing coordinates from the town gazetteer and keeps the
+    geohash column in step with latitude/longitude. When only the
+    location text changes, the coordinates are re-derived from it.
+    """
+    from sqlalchemy import inspect  # the rest of this module has no SQLAlchemy dependency
+    attrs = inspect(target).attrs
+    moved = attrs.location.history.has_changes() and not (
+        attrs.latitude.history.has_changes() or attrs.longitude.history.has_changes())
+    if moved or target.latitude is None or target.longitude is None:
+        coordinates = geocode_town(target.location)
+        if coordinates:
+            target.latitude, target.longitude = coordinates
+        elif moved:
+            target.latitude = target.longitude = None
+    if valid_coordinates(target.latitude, target.longitude):
+        target.geohash = encode(target.latitude, target.longitude)
+    else:
+        target.geohash = None
@@ -13,12 +13,48 @@ Key Functions:
 - Review and payment management
 - Data seeding and utility functions
 
+Write helpers flush their changes but don't commit. The caller owns the
+transaction (the CLI wraps each action in session_scope()), so one action
+is one commit however many rows it touches.
+
 Author: Gibson Giteru
 Class: Moringa School Phase 3
 """
 
-from datetime import datetime
-from db.models import User, Fundi, Job, Category, Review, Payment
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from db.models import User, Fundi, Job, Category, Review, Payment, job_events, rollups, table_versions
+from db import listings
+from cache import reference_cache
+from db.search_index import search_fundi_ids
+from matching import MatchIndex, job_spec, match_index_cache
+import analytics
+from job_states import InvalidTransition
+from render import write_rows
+
+
+# ============================================================================
+# LIST RENDERING
+# ============================================================================
+
+def _show_listing(session, listing, title, noun, limit=None, offset=None, fmt='table', empty=None):
+    """
+    Stream a list query to the screen
+    =================================
+    
+    Rows are printed as they are fetched (lib/db/listings.py, lib/render.py),
+    so long lists start at once and are never held in memory. Tables pause
+    every page on a terminal; CSV and JSON lines are printed without any
+    title or totals so they can be redirected to a file.
+    
+    Returns:
+        int: Number of rows printed
+    """
+    rows = listings.fetch(session, listing, limit, offset)
+    count = write_rows(rows, listing.columns, fmt, title=title, paged=True)
+    if fmt == 'table':
+        print(f"\n📊 Listed: {count} {noun}" if count else f"📭 {empty or 'No ' + noun + ' found'}")
+    return count
 
 
 # ============================================================================
@@ -99,40 +135,32 @@ def authenticate_user(session, email, password):
         return None
 
 
-def list_users(session, role=None):
+def list_users(session, role=None, limit=None, offset=None, fmt='table'):
     """
     List all users or users by role
     ==============================
     
-    This function displays all users or filters by role.
+    This function streams users (or one role) as a paged table, CSV or
+    JSON lines (see _show_listing).
     
     Args:
         session: Database session
         role (str, optional): Filter by user role
+        limit (int, optional): Show at most this many
+        offset (int, optional): Skip this many first
+        fmt (str): 'table', 'csv' or 'jsonl'
+        
+    Returns:
+        int: Number of users listed
     """
     try:
-        if role:
-            users = User.find_by_role(session, role)
-        else:
-            users = User.get_all(session)
-        
-        if not users:
-            print(f"📭 No users found{' for role ' + role if role else ''}")
-            return
-        
-        print(f"\n👥 USERS{' (' + role.upper() + ')' if role else ''}")
-        print("-" * 60)
-        print(f"{'ID':<5} {'Username':<15} {'Email':<25} {'Role':<10} {'Status':<8}")
-        print("-" * 60)
-        
-        for user in users:
-            status = "Active" if user.is_active else "Inactive"
-            print(f"{user.id:<5} {user.username:<15} {user.email:<25} {user.role:<10} {status:<8}")
-        
-        print(f"\n📊 Total: {len(users)} users")
+        return _show_listing(session, listings.users(role), f"\n👥 USERS{' (' + role.upper() + ')' if role else ''}",
+                             "users", limit, offset, fmt,
+                             empty=f"No users found{' for role ' + role if role else ''}")
         
     except Exception as e:
         print(f"❌ Error listing users: {str(e)}")
+        return 0
 
 
 def delete_user(session, user_id):
@@ -163,7 +191,7 @@ def delete_user(session, user_id):
         
         # Delete user (this will cascade to related data)
         session.delete(user)
-        session.commit()
+        session.flush()
         print(f"✅ User '{user.username}' deleted successfully!")
         return True
         
@@ -221,68 +249,73 @@ def create_fundi_profile(session, **kwargs):
         return None
 
 
-def list_fundis(session, available_only=False):
+def list_fundis(session, available_only=False, limit=None, offset=None, fmt='table'):
     """
     List all fundis or available fundis only
     =======================================
     
-    This function displays fundis with their key information.
+    This function streams fundis with their username in one joined query.
     
     Args:
         session: Database session
         available_only (bool): Show only available fundis
+        limit (int, optional): Show at most this many
+        offset (int, optional): Skip this many first
+        fmt (str): 'table', 'csv' or 'jsonl'
+        
+    Returns:
+        int: Number of fundis listed
     """
     try:
-        if available_only:
-            fundis = Fundi.find_available(session)
-        else:
-            fundis = Fundi.get_all(session)
-        
-        if not fundis:
-            print("📭 No fundis found")
-            return
-        
-        print(f"\n🛠️ FUNDIS{' (Available Only)' if available_only else ''}")
-        print("-" * 80)
-        print(f"{'ID':<5} {'Name':<15} {'Specialization':<15} {'Location':<15} {'Rate':<10} {'Rating':<8} {'Status':<10}")
-        print("-" * 80)
-        
-        for fundi in fundis:
-            user = fundi.user
-            status = "Available" if fundi.is_available else "Busy"
-            print(f"{fundi.id:<5} {user.username:<15} {fundi.specialization:<15} {fundi.location:<15} KES{fundi.hourly_rate:<9} {fundi.rating:<8} {status:<10}")
-        
-        print(f"\n📊 Total: {len(fundis)} fundis")
+        return _show_listing(session, listings.fundis(available_only),
+                             f"\n🛠️ FUNDIS{' (Available Only)' if available_only else ''}", "fundis",
+                             limit, offset, fmt)
         
     except Exception as e:
         print(f"❌ Error listing fundis: {str(e)}")
+        return 0
 
 
-def search_fundis(session, specialization=None, location=None):
+def search_fundis(session, specialization=None, location=None, keywords=None, limit=20, offset=0):
     """
-    Search fundis by specialization or location
-    =========================================
+    Search fundis by keywords, specialization or location
+    ====================================================
     
-    This function allows searching for fundis based on criteria.
+    Uses the full-text search index, so results are ranked best match
+    first and terms match word prefixes ("plumb" finds "Plumbing").
+    Keywords are matched against name, specialization, location and bio.
+    With no criteria at all every fundi is listed.
     
     Args:
         session: Database session
         specialization (str, optional): Search by specialization
         location (str, optional): Search by location
+        keywords (str, optional): Free-text search across all fields
+        limit (int): Results per page
+        offset (int): Results to skip (for the next page)
+        
+    Returns:
+        bool: True if more results are available after this page
     """
     try:
-        query = session.query(Fundi)
-        
-        if specialization:
-            query = query.filter(Fundi.specialization.ilike(f"%{specialization}%"))
-        if location:
-            query = query.filter(Fundi.location.ilike(f"%{location}%"))
-        
-        fundis = query.all()
+        if not (specialization or location or keywords):
+            fundis = session.query(Fundi).order_by(Fundi.id).offset(offset).limit(limit + 1).all()
+            has_more = len(fundis) > limit
+            fundis = fundis[:limit]
+        else:
+            page = search_fundi_ids(
+                session, keywords,
+                fields={'specialization': specialization, 'location': location},
+                limit=limit, offset=offset
+            )
+            has_more = page.has_more
+            ids = [fundi_id for fundi_id, _ in page.items]
+            by_id = {f.id: f for f in session.query(Fundi).filter(Fundi.id.in_(ids)).all()} if ids else {}
+            fundis = [by_id[fundi_id] for fundi_id in ids if fundi_id in by_id]
         
         if not fundis:
             print("📭 No fundis found matching your criteria")
-            return
+            return False
         
         print(f"\n🔍 SEARCH RESULTS")
         print("-" * 80)
@@ -293,10 +326,12 @@ def search_fundis(session, specialization=None, location=None):
             user = fundi.user
             print(f"{fundi.id:<5} {user.username:<15} {fundi.specialization:<15} {fundi.location:<15} KES{fundi.hourly_rate:<9} {fundi.rating:<8}")
         
-        print(f"\n📊 Found: {len(fundis)} fundis")
+        print(f"\n📊 Showing {offset + 1}-{offset + len(fundis)}{' (more available)' if has_more else ''}")
+        return has_more
         
     except Exception as e:
         print(f"❌ Error searching fundis: {str(e)}")
+        return False
 
 
 def view_fundi_details(session, fundi_id):
@@ -369,7 +404,7 @@ def update_fundi_availability(session, fundi_id, is_available):
             return False
         
         fundi.is_available = is_available
-        session.commit()
+        session.flush()
         
         status = "available" if is_available else "unavailable"
         print(f"✅ Fundi {fundi.user.username} is now {status}")
@@ -409,7 +444,7 @@ def delete_fundi(session, fundi_id):
         
         # Delete fundi profile
         session.delete(fundi)
-        session.commit()
+        session.flush()
         print(f"✅ Fundi '{fundi.user.username}' deleted successfully!")
         return True
         
@@ -450,7 +485,7 @@ def create_job(session, **kwargs):
             raise ValueError("Client not found")
         
         # Check if category exists
-        category = session.query(Category).filter(Category.id == kwargs['category_id']).first()
+        category = get_category(session, kwargs['category_id'])
         if not category:
             raise ValueError("Category not found")
         
@@ -465,44 +500,35 @@ def create_job(session, **kwargs):
         return None
 
 
-def list_jobs(session, status=None):
+def list_jobs(session, status=None, limit=None, offset=None, fmt='table'):
     """
     List all jobs or jobs by status
     ==============================
     
-    This function displays jobs with their key information.
+    This function streams jobs with their client and category names in
+    one joined query.
     
     Args:
         session: Database session
         status (str, optional): Filter by job status
+        limit (int, optional): Show at most this many
+        offset (int, optional): Skip this many first
+        fmt (str): 'table', 'csv' or 'jsonl'
+        
+    Returns:
+        int: Number of jobs listed
     """
     try:
-        if status:
-            jobs = Job.find_by_status(session, status)
-        else:
-            jobs = Job.get_all(session)
-        
-        if not jobs:
-            print("📭 No jobs found")
-            return
-        
-        print(f"\n📋 JOBS{' (' + status.upper() + ')' if status else ''}")
-        print("-" * 90)
-        print(f"{'ID':<5} {'Title':<25} {'Client':<15} {'Category':<12} {'Status':<12} {'Location':<15}")
-        print("-" * 90)
-        
-        for job in jobs:
-            client = job.client
-            category = job.category
-            print(f"{job.id:<5} {job.title:<25} {client.username:<15} {category.name:<12} {job.status:<12} {job.location:<15}")
-        
-        print(f"\n📊 Total: {len(jobs)} jobs")
+        return _show_listing(session, listings.jobs(status=status),
+                             f"\n📋 JOBS{' (' + status.upper() + ')' if status else ''}", "jobs",
+                             limit, offset, fmt)
         
     except Exception as e:
         print(f"❌ Error listing jobs: {str(e)}")
+        return 0
 
 
-def list_jobs_by_status(session, status=None, client_id=None, fundi_id=None):
+def list_jobs_by_status(session, status=None, client_id=None, fundi_id=None, limit=None, offset=None, fmt='table'):
     """
     List jobs with various filters
     ==============================
@@ -514,37 +540,20 @@ def list_jobs_by_status(session, status=None, client_id=None, fundi_id=None):
         status (str, optional): Filter by status
         client_id (int, optional): Filter by client ID
         fundi_id (int, optional): Filter by fundi ID
+        limit (int, optional): Show at most this many
+        offset (int, optional): Skip this many first
+        fmt (str): 'table', 'csv' or 'jsonl'
+        
+    Returns:
+        int: Number of jobs listed
     """
     try:
-        query = session.query(Job)
-        
-        if status:
-            query = query.filter(Job.status == status)
-        if client_id:
-            query = query.filter(Job.client_id == client_id)
-        if fundi_id:
-            query = query.filter(Job.fundi_id == fundi_id)
-        
-        jobs = query.all()
-        
-        if not jobs:
-            print("📭 No jobs found matching your criteria")
-            return
-        
-        print(f"\n📋 JOBS")
-        print("-" * 90)
-        print(f"{'ID':<5} {'Title':<25} {'Client':<15} {'Category':<12} {'Status':<12} {'Location':<15}")
-        print("-" * 90)
-        
-        for job in jobs:
-            client = job.client
-            category = job.category
-            print(f"{job.id:<5} {job.title:<25} {client.username:<15} {category.name:<12} {job.status:<12} {job.location:<15}")
-        
-        print(f"\n📊 Found: {len(jobs)} jobs")
+        return _show_listing(session, listings.jobs(status, client_id, fundi_id), "\n📋 JOBS", "jobs",
+                             limit, offset, fmt, empty="No jobs found matching your criteria")
         
     except Exception as e:
         print(f"❌ Error listing jobs: {str(e)}")
+        return 0
 
 
 def assign_job_to_fundi(session, job_id, fundi_id):
@@ -585,8 +594,10 @@ def assign_job_to_fundi(session, job_id, fundi_id):
             print("❌ Fundi is not available")
             return False
         
-        # Assign job
-        job.assign_to_fundi(session, fundi_id)
+        # Assign job - conditional on the job still being pending at the version read above
+        if not job.assign_to_fundi(session, fundi_id):
+            print("❌ Job was assigned by someone else in the meantime")
+            return False
         print(f"✅ Job '{job.title}' assigned to {fundi.user.username}!")
         return True
         
@@ -596,6 +607,85 @@ def assign_job_to_fundi(session, job_id, fundi_id):
         return False
 
 
+def get_match_index(session):
+    """
+    Matching candidate lists, cached for MATCH_INDEX_TTL seconds
+    ===========================================================
+    
+    Args:
+        session: Database session
+        
+    Returns:
+        MatchIndex: Available fundis bucketed for fast ranking
+    """
+    def load():
+        rows = session.query(
+            Fundi.id, Fundi.specialization, Fundi.location, Fundi.hourly_rate,
+            Fundi.rating, Fundi.total_jobs, Fundi.completed_jobs, Fundi.latitude, Fundi.longitude
+        ).filter(Fundi.is_available == True).all()
+        return MatchIndex.build(rows)
+    return match_index_cache.get('fundis', load)
+
+
+def suggest_fundis(session, job_id, k=5):
+    """
+    Show the best available fundis for a job
+    =======================================
+    
+    Fundis are ranked by specialization, location, rating, completed
+    jobs and how well their rate fits the job. Fundis already booked on
+    the job's scheduled day are left out.
+    
+    Args:
+        session: Database session
+        job_id (int): ID of the job to match
+        k (int): Number of suggestions
+        
+    Returns:
+        list: Match tuples (fundi_id, score, parts), best first
+    """
+    try:
+        job = Job.find_by_id(session, job_id)
+        if not job:
+            print("❌ Job not found")
+            return []
+        
+        busy = set()
+        if job.scheduled_date:
+            day = datetime(job.scheduled_date.year, job.scheduled_date.month, job.scheduled_date.day)
+            busy = {row.fundi_id for row in session.query(Job.fundi_id).filter(
+                Job.id != job.id,
+                Job.fundi_id.isnot(None),
+                Job.status.in_(("assigned", "in_progress")),
+                Job.scheduled_date >= day,
+                Job.scheduled_date < day + timedelta(days=1)
+            ).all()}
+        
+        category = get_category(session, job.category_id)
+        matches = get_match_index(session).top_k(
+            job_spec(job, category.name if category else None), k=k, exclude=busy
+        )
+        if not matches:
+            print("📭 No available fundis to suggest")
+            return []
+        
+        fundis = {f.id: f for f in session.query(Fundi).filter(Fundi.id.in_([m.fundi_id for m in matches])).all()}
+        print(f"\n🎯 BEST MATCHES FOR '{job.title}'")
+        print("-" * 88)
+        print(f"{'#':<3} {'ID':<6} {'Name':<15} {'Specialization':<15} {'Location':<15} {'Rate':<11} {'Rating':<7} {'Score':<6}")
+        print("-" * 88)
+        for rank, match in enumerate(matches, 1):
+            fundi = fundis.get(match.fundi_id)
+            if fundi:
+                print(f"{rank:<3} {fundi.id:<6} {fundi.user.username:<15} {fundi.specialization:<15} "
+                      f"{fundi.location:<15} KES{fundi.hourly_rate:<8} {fundi.rating:<7} {match.score:<6}")
+        return matches
+        
+    except Exception as e:
+        print(f"❌ Error matching fundis: {str(e)}")
+        return []
+
+
 def update_job_status(session, job_id, new_status):
     """
     Update job status
@@ -617,14 +707,12 @@ def update_job_status(session, job_id, new_status):
             print("❌ Job not found")
             return False
         
-        # Validate status
-        valid_statuses = ["pending", "assigned", "in_progress", "completed", "cancelled"]
-        if new_status not in valid_statuses:
-            print(f"❌ Invalid status. Must be one of: {', '.join(valid_statuses)}")
+        # Validate the status change against the job lifecycle
+        try:
+            job.update_status(session, new_status)
+        except InvalidTransition as e:
+            print(f"❌ {e}")
             return False
-        
-        # Update status
-        job.update_status(session, new_status)
         print(f"✅ Job '{job.title}' status updated to '{new_status}'!")
         return True
         
@@ -713,7 +801,8 @@ def delete_job(session, job_id):
         
         # Delete job
         session.delete(job)
-        session.commit()
+        session.flush()
+        job_events.delete(session.connection(), [job.id])
         print(f"✅ Job '{job.title}' deleted successfully!")
         return True
         
@@ -727,6 +816,45 @@ def delete_job(session, job_id):
 # CATEGORY MANAGEMENT FUNCTIONS
 # ============================================================================
 
+def get_cached_categories(session):
+    """
+    Get all categories from the shared reference cache
+    =================================================
+    
+    Categories rarely change, so they are read once and served from memory
+    until a category write (or the cache TTL) invalidates them.
+    
+    Args:
+        session: Database session used on a cache miss
+        
+    Returns:
+        list: Category rows with id, name, description and icon
+    """
+    return reference_cache.get(
+        'categories',
+        lambda: session.query(Category.id, Category.name, Category.description, Category.icon)
+                       .order_by(Category.id).all()
+    )
+
+
+def get_category(session, category_id):
+    """
+    Find a category by ID using the reference cache
+    ==============================================
+    
+    Args:
+        session: Database session
+        category_id (int): ID of the category
+        
+    Returns:
+        Row: The category row, or None if it does not exist
+    """
+    for category in get_cached_categories(session):
+        if category.id == category_id:
+            return category
+    return None
+
+
 def create_category(session, name, description=None, icon=None):
     """
     Create a new job category
@@ -753,13 +881,7 @@ def create_category(session, name, description=None, icon=None):
             raise ValueError("Category with this name already exists")
         
         # Create category
-        category = Category(
-            name=name,
-            description=description,
-            icon=icon
-        )
-        session.add(category)
-        session.commit()
+        category = Category.create(session, name=name, description=description, icon=icon)
         
         print(f"✅ Category '{category.name}' created successfully!")
         return category
@@ -781,10 +903,10 @@ def list_categories(session):
         session: Database session
         
     Returns:
-        list: List of category objects
+        list: List of category rows (id, name, description, icon)
     """
     try:
-        categories = session.query(Category).all()
+        categories = get_cached_categories(session)
         
         if not categories:
             print("📭 No categories found")
@@ -841,7 +963,7 @@ def delete_category(session, category_id):
         
         # Delete category
         session.delete(category)
-        session.commit()
+        session.flush()
         print(f"✅ Category '{category.name}' deleted successfully!")
         return True
         
@@ -885,25 +1007,14 @@ def create_review(session, job_id, client_id, fundi_id, rating, comment=None):
         if job.status != "completed":
             raise ValueError("Can only review completed jobs")
         
-        # Create review
-        review = Review(
-            job_id=job_id,
-            client_id=client_id,
-            fundi_id=fundi_id,
-            rating=rating,
-            comment=comment
-        )
-        session.add(review)
-        session.commit()
-        
-        # Update fundi rating
+        # Create review and update the fundi's rating in the same transaction
+        review = Review.create(session, job_id=job_id, client_id=client_id, fundi_id=fundi_id,
+                               rating=rating, comment=comment)
         fundi = session.query(Fundi).filter(Fundi.id == fundi_id).first()
         if fundi:
-            # Calculate new average rating
-            reviews = session.query(Review).filter(Review.fundi_id == fundi_id).all()
-            total_rating = sum(r.rating for r in reviews)
-            new_rating = total_rating / len(reviews)
-            fundi.update_rating(session, new_rating)
+            # New average rating, including the review just flushed
+            new_rating = session.query(func.avg(Review.rating)).filter(Review.fundi_id == fundi_id).scalar()
+            fundi.update_rating(session, float(new_rating))
         
         print(f"✅ Review created successfully!")
         return review
@@ -914,47 +1025,32 @@ def create_review(session, job_id, client_id, fundi_id, rating, comment=None):
         return None
 
 
-def list_reviews(session, fundi_id=None, client_id=None):
+def list_reviews(session, fundi_id=None, client_id=None, limit=None, offset=None, fmt='table'):
     """
     List reviews with optional filtering
     ===================================
     
-    This function displays reviews with optional filtering.
+    This function streams reviews with the job title and both usernames
+    in one joined query.
     
     Args:
         session: Database session
         fundi_id (int, optional): Filter by fundi ID
         client_id (int, optional): Filter by client ID
+        limit (int, optional): Show at most this many
+        offset (int, optional): Skip this many first
+        fmt (str): 'table', 'csv' or 'jsonl'
+        
+    Returns:
+        int: Number of reviews listed
     """
     try:
-        query = session.query(Review)
-        
-        if fundi_id:
-            query = query.filter(Review.fundi_id == fundi_id)
-        if client_id:
-            query = query.filter(Review.client_id == client_id)
-        
-        reviews = query.all()
-        
-        if not reviews:
-            print("📭 No reviews found")
-            return
-        
-        print(f"\n⭐ REVIEWS")
-        print("-" * 80)
-        print(f"{'ID':<5} {'Job':<25} {'Client':<15} {'Fundi':<15} {'Rating':<8} {'Date':<12}")
-        print("-" * 80)
-        
-        for review in reviews:
-            job = review.job
-            client = review.client
-            fundi = review.fundi.user
-            print(f"{review.id:<5} {job.title:<25} {client.username:<15} {fundi.username:<15} {review.rating:<8} {review.created_at.strftime('%Y-%m-%d'):<12}")
-        
-        print(f"\n📊 Total: {len(reviews)} reviews")
+        return _show_listing(session, listings.reviews(fundi_id, client_id), "\n⭐ REVIEWS", "reviews",
+                             limit, offset, fmt)
         
     except Exception as e:
         print(f"❌ Error listing reviews: {str(e)}")
+        return 0
 
 
 def create_payment(session, job_id, client_id, fundi_id, amount, payment_method, transaction_id=None):
@@ -981,16 +1077,8 @@ def create_payment(session, job_id, client_id, fundi_id, amount, payment_method,
             raise ValueError("Payment amount must be positive")
         
         # Create payment
-        payment = Payment(
-            job_id=job_id,
-            client_id=client_id,
-            fundi_id=fundi_id,
-            amount=amount,
-            payment_method=payment_method,
-            transaction_id=transaction_id
-        )
-        session.add(payment)
-        session.commit()
+        payment = Payment.create(session, job_id=job_id, client_id=client_id, fundi_id=fundi_id,
+                                 amount=amount, payment_method=payment_method, transaction_id=transaction_id)
         
         print(f"✅ Payment of KES {amount} recorded successfully!")
         return payment
@@ -1001,47 +1089,113 @@ def create_payment(session, job_id, client_id, fundi_id, amount, payment_method,
         return None
 
 
-def list_payments(session, client_id=None, fundi_id=None):
+def list_payments(session, client_id=None, fundi_id=None, limit=None, offset=None, fmt='table'):
     """
     List payments with optional filtering
     ====================================
     
-    This function displays payments with optional filtering.
+    This function streams payments with the job title and both usernames
+    in one joined query.
     
     Args:
         session: Database session
         client_id (int, optional): Filter by client ID
         fundi_id (int, optional): Filter by fundi ID
+        limit (int, optional): Show at most this many
+        offset (int, optional): Skip this many first
+        fmt (str): 'table', 'csv' or 'jsonl'
+        
+    Returns:
+        int: Number of payments listed
     """
     try:
-        query = session.query(Payment)
-        
-        if client_id:
-            query = query.filter(Payment.client_id == client_id)
-        if fundi_id:
-            query = query.filter(Payment.fundi_id == fundi_id)
+        return _show_listing(session, listings.payments(client_id, fundi_id), "\n💰 PAYMENTS", "payments",
+                             limit, offset, fmt)
         
-        payments = query.all()
-        
-        if not payments:
-            print("📭 No payments found")
-            return
+    except Exception as e:
+        print(f"❌ Error listing payments: {str(e)}")
+        return 0
+
+
+def get_job_status_totals(session):
+    """
+    Count jobs per status from the daily rollups
+    ===========================================
+    
+    Refreshes the rollup tables first (only days changed since the last
+    refresh are recomputed), then sums rollup_jobs_daily per status instead
+    of loading every job.
+    
+    Args:
+        session: Database session
         
-        print(f"\n💰 PAYMENTS")
-        print("-" * 80)
-        print(f"{'ID':<5} {'Job':<25} {'Client':<15} {'Fundi':<15} {'Amount':<12} {'Status':<10}")
-        print("-" * 80)
+    Returns:
+        dict: {status: job count}
+    """
+    refreshed = rollups.refresh(session.connection())
+    # Bumped on commit, so the web dashboards' ETags move with the rollups
+    table_versions.mark(session, [name for name, days in refreshed.items() if days != 0])
+    daily = rollups.tables['rollup_jobs_daily']
+    rows = session.execute(select(daily.c.status, func.sum(daily.c.jobs)).group_by(daily.c.status)).all()
+    return {status: int(count) for status, count in rows}
+
+
+def show_analytics_report(session, days=30):
+    """
+    Print an earnings and job throughput report
+    ==========================================
+    
+    Covers the last `days` days: headline totals, top earners, revenue per
+    category, completion times and a per-day breakdown.
+    
+    Args:
+        session: Database session
+        days (int): Length of the reporting period
         
-        for payment in payments:
-            job = payment.job
-            client = payment.client
-            fundi = payment.fundi.user
-            print(f"{payment.id:<5} {job.title:<25} {client.username:<15} {fundi.username:<15} KES{payment.amount:<11} {payment.status:<10}")
+    Returns:
+        dict: The summary numbers, or None on error
+    """
+    try:
+        end = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        start = end - timedelta(days=days)
+        summary = analytics.summary(session, start, end)
         
-        print(f"\n📊 Total: {len(payments)} payments")
+        print(f"\n📈 ANALYTICS - LAST {days} DAYS")
+        print("-" * 60)
+        print(f"💰 Revenue:         KES {summary['revenue']:,.2f} from {summary['payments']} payments")
+        if summary['average_payment'] is not None:
+            print(f"   Average payment: KES {summary['average_payment']:,.2f}")
+        print(f"🛠️  Earning fundis:  {summary['earning_fundis']}")
+        print(f"📋 Jobs created:    {summary['jobs_created']}   completed: {summary['jobs_completed']}")
+        hours = summary['completion_hours']
+        if hours['p50'] is not None:
+            print(f"⏱️  Completion time: median {hours['p50']}h, p90 {hours['p90']}h, p99 {hours['p99']}h")
+        
+        earners = analytics.earnings_by_fundi(session, start, end, limit=5)
+        if earners:
+            names = dict(session.query(Fundi.id, User.username).join(User, Fundi.user_id == User.id)
+                         .filter(Fundi.id.in_([e['fundi_id'] for e in earners])).all())
+            print(f"\n🏆 TOP EARNERS")
+            print(f"{'ID':<6} {'Name':<20} {'Payments':<10} {'Total (KES)':>14}")
+            for e in earners:
+                print(f"{e['fundi_id']:<6} {names.get(e['fundi_id'], '-'):<20} {e['payments']:<10} {e['total']:>14,.2f}")
+        
+        categories = analytics.revenue_by_category(session, start, end)
+        if categories:
+            names = {c.id: c.name for c in get_cached_categories(session)}
+            print(f"\n🏷️  REVENUE BY CATEGORY")
+            for row in categories:
+                print(f"{names.get(row['category_id'], 'Unknown'):<20} {row['payments']:<8} KES {row['revenue']:>14,.2f}")
+        
+        print(f"\n📅 DAILY")
+        print(f"{'Date':<12} {'Created':>8} {'Completed':>10} {'Revenue (KES)':>16}")
+        for day in analytics.daily_series(session, start, end)[-14:]:
+            print(f"{day['date']:<12} {day['jobs_created']:>8} {day['jobs_completed']:>10} {day['revenue']:>16,.2f}")
+        return summary
         
     except Exception as e:
-        print(f"❌ Error listing payments: {str(e)}")
+        print(f"❌ Error building analytics report: {str(e)}")
+        return None
 
 
 # ============================================================================
@@ -1059,53 +1213,38 @@ def seed_sample_data(session):
     try:
         print("🌱 Seeding database with sample data...")
         
-        # Create categories
-        categories = [
-            Category(name="Plumbing", description="Water and drainage systems", icon="faucet"),
-            Category(name="Electrical", description="Electrical installations and repairs", icon="bolt"),
-            Category(name="Carpentry", description="Woodwork and furniture", icon="hammer"),
-            Category(name="Painting", description="Interior and exterior painting", icon="paint-brush"),
-            Category(name="Cleaning", description="House and office cleaning", icon="broom")
-        ]
-        
-        for category in categories:
-            session.add(category)
-        session.commit()
+        # One flush per model; the whole seed commits once, in the caller
+        Category.create_many(session, [
+            dict(name="Plumbing", description="Water and drainage systems", icon="faucet"),
+            dict(name="Electrical", description="Electrical installations and repairs", icon="bolt"),
+            dict(name="Carpentry", description="Woodwork and furniture", icon="hammer"),
+            dict(name="Painting", description="Interior and exterior painting", icon="paint-brush"),
+            dict(name="Cleaning", description="House and office cleaning", icon="broom")
+        ])
         print("✅ Categories created")
         
         # Create users
-        users = [
-                User(username="admin", email="admin@example.com", password="TEMP_PASSWORD_CHANGE_IN_PRODUCTION", phone="+254700000002", role="admin"),
-    User(username="john_doe", email="client@example.com", password="TEMP_PASSWORD_CHANGE_IN_PRODUCTION", phone="+254700000001", role="client"),
-    User(username="testfundi", email="fundi@example.com", password="TEMP_PASSWORD_CHANGE_IN_PRODUCTION", phone="+254711111111", role="fundi"),
-    User(username="electrician_mike", email="mike@example.com", password="TEMP_PASSWORD_CHANGE_IN_PRODUCTION", phone="+254711111112", role="fundi")
-        ]
-        
-        for user in users:
-            session.add(user)
-        session.commit()
+        User.create_many(session, [
+            dict(username="admin", email="admin@example.com", password="TEMP_PASSWORD_CHANGE_IN_PRODUCTION", phone="+254700000002", role="admin"),
+            dict(username="john_doe", email="client@example.com", password="TEMP_PASSWORD_CHANGE_IN_PRODUCTION", phone="+254700000001", role="client"),
+            dict(username="testfundi", email="fundi@example.com", password="TEMP_PASSWORD_CHANGE_IN_PRODUCTION", phone="+254711111111", role="fundi"),
+            dict(username="electrician_mike", email="mike@example.com", password="TEMP_PASSWORD_CHANGE_IN_PRODUCTION", phone="+254711111112", role="fundi")
+        ])
         print("✅ Users created")
         
         # Create fundi profiles
-        fundis = [
-            Fundi(user_id=3, specialization="Plumbing", experience="5 years", hourly_rate=1500, location="Nairobi", bio="Experienced plumber"),
-            Fundi(user_id=4, specialization="Electrical", experience="8 years", hourly_rate=2000, location="Mombasa", bio="Certified electrician")
-        ]
-        
-        for fundi in fundis:
-            session.add(fundi)
-        session.commit()
+        Fundi.create_many(session, [
+            dict(user_id=3, specialization="Plumbing", experience="5 years", hourly_rate=1500, location="Nairobi", bio="Experienced plumber"),
+            dict(user_id=4, specialization="Electrical", experience="8 years", hourly_rate=2000, location="Mombasa", bio="Certified electrician")
+        ])
         print("✅ Fundi profiles created")
         
-        # Create jobs
-        jobs = [
-            Job(title="Fix leaking kitchen sink", description="Kitchen sink is leaking", location="Nairobi, Westlands", client_id=2, category_id=1, status="pending"),
-            Job(title="Install security lights", description="Install motion sensor lights", location="Mombasa, Nyali", client_id=2, category_id=2, status="assigned", fundi_id=2)
-        ]
-        
-        for job in jobs:
-            session.add(job)
-        session.commit()
+        # Create jobs (with their creation events)
+        jobs = Job.create_many(session, [
+            dict(title="Fix leaking kitchen sink", description="Kitchen sink is leaking", location="Nairobi, Westlands", client_id=2, category_id=1, status="pending"),
+            dict(title="Install security lights", description="Install motion sensor lights", location="Mombasa, Nyali", client_id=2, category_id=2, status="pending")
+        ])
+        jobs[1].assign_to_fundi(session, 2)
         print("✅ Jobs created")
         
         print("🎉 Sample data seeding completed!")
@@ -1132,12 +1271,12 @@ def clear_database(session):
         # Delete all data in reverse order of dependencies
         session.query(Payment).delete()
         session.query(Review).delete()
+        job_events.delete(session.connection())
         session.query(Job).delete()
         session.query(Fundi).delete()
         session.query(User).delete()
         session.query(Category).delete()
         
-        session.commit()
         print("✅ Database cleared successfully!")
         
     except Exception as e:
@@ -0,0 +1,81 @@
+"""
+FundiMatch - Job Status State Machine
+=====================================
+
+The allowed job lifecycle, shared by the Flask backend and the CLI:
+
+    pending -> assigned -> in_progress -> completed
+       |          |            |
+       +----------+------------+--------> cancelled
+
+completed and cancelled are final. assigned is only entered through an
+assignment, which sets the job's fundi in the same UPDATE; a plain status
+change to assigned would leave a job "assigned" to nobody, so status
+updates check with check_status_change(). Every accepted transition is also
+written to job_status_events (lib/db/job_events.py) in the same
+transaction, so reports can measure how long jobs spend in each stage.
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+STATUSES = ('pending', 'assigned', 'in_progress', 'completed', 'cancelled')
+
+TRANSITIONS = {
+    'pending': ('assigned', 'cancelled'),
+    'assigned': ('in_progress', 'cancelled'),
+    'in_progress': ('completed', 'cancelled'),
+    'completed': (),
+    'cancelled': (),
+}
+
+INITIAL = 'pending'
+# Entered only by assigning a fundi, never by a plain status change
+ASSIGNED = 'assigned'
+
+# Reported stage latencies: (name, status entered first, status entered later)
+STAGES = (
+    ('time_to_assign', 'pending', 'assigned'),
+    ('time_to_start', 'assigned', 'in_progress'),
+    ('time_to_finish', 'in_progress', 'completed'),
+    ('time_to_complete', 'pending', 'completed'),
+)
+
+
+class InvalidTransition(ValueError):
+    """A status change the state machine does not allow"""
+
+    def __init__(self, current, new, needs_fundi=False):
+        self.current, self.new = current, new
+        if new not in TRANSITIONS:
+            message = f"Unknown status '{new}'. Must be one of: {', '.join(STATUSES)}"
+        elif needs_fundi:
+            message = "Jobs become assigned by assigning a fundi to them, not by a status change"
+        elif not TRANSITIONS.get(current):
+            message = f"Job is {current}; its status can no longer change"
+        else:
+            message = f"Cannot move a job from {current} to {new} (allowed: {', '.join(TRANSITIONS[current])})"
+        super().__init__(message)
+
+    @property
+    def unknown_status(self):
+        return self.new not in TRANSITIONS
+
+
+def can_transition(current, new):
+    """True if a job in status current may move to new"""
+    return new in TRANSITIONS.get(current, ())
+
+
+def check_transition(current, new):
+    """Raise InvalidTransition unless current -> new is allowed"""
+    if not can_transition(current, new):
+        raise InvalidTransition(current, new)
+
+
+def check_status_change(current, new):
+    """check_transition for status updates; moving to assigned needs an assignment"""
+    if new == ASSIGNED:
+        raise InvalidTransition(current, new, needs_fundi=True)
+    check_transition(current, new)
+
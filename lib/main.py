@@ -27,7 +27,7 @@ from datetime import datetime
 # Add the lib directory to Python path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from db.models import get_session, User, Fundi, Job, Category, Review, Payment
+from db.models import session_scope, User, Fundi, Job, Category, Review, Payment
 from helpers import (
     # User management functions
     create_user, authenticate_user, list_users, delete_user,
@@ -44,7 +44,8 @@ from helpers import (
     create_category, list_categories, delete_category,
     
     # Review and payment functions
-    create_review, list_reviews, create_payment, list_payments,
+    create_review, list_reviews, create_payment, list_payments, show_analytics_report,
+    get_job_status_totals,
     
     # Utility functions
     seed_sample_data, clear_database, export_data, import_data
@@ -60,7 +61,8 @@ class FundiMatchCLI:
     - User authentication and session management
     - Menu system and navigation
     - Input validation and error handling
-    - Database session management
+    - Database session management (one session_scope() per action, so
+      nothing is cached between actions)
     
     Demonstrates:
     - Object-oriented programming principles
@@ -71,15 +73,12 @@ class FundiMatchCLI:
     
     def __init__(self):
         """Initialize the CLI application"""
+        # Detached User loaded at login; each action opens its own session
         self.current_user = None
-        self.session = None
         self.running = True
         
-        # Initialize database session
-        self.session = get_session()
-        
         print("🚀 Initializing FundiMatch CLI...")
-        print("📊 Database connection established")
+        print("📊 Database ready (one session per action)")
     
     def print_welcome(self):
         """
@@ -241,7 +240,9 @@ class FundiMatchCLI:
             return
         
         # Attempt to authenticate user
-        user = authenticate_user(self.session, email, password)
+        # Not expired on exit, so the user stays readable after the session closes
+        with session_scope(read_only=True) as session:
+            user = authenticate_user(session, email, password)
         if user:
             self.current_user = user
             print(f"✅ Welcome back, {user.username}!")
@@ -284,16 +285,17 @@ class FundiMatchCLI:
             print("❌ Phone number cannot be empty")
             return
         
-        # Create user
+        # Create user (kept readable after its session closes, for the auto-login)
         try:
-            user = create_user(
-                self.session, 
-                username=username,
-                email=email,
-                password=password,
-                phone=phone,
-                role=user_type
-            )
+            with session_scope(expire_on_commit=False) as session:
+                user = create_user(
+                    session, 
+                    username=username,
+                    email=email,
+                    password=password,
+                    phone=phone,
+                    role=user_type
+                )
             
             if user:
                 print(f"✅ {user_type.title()} account created successfully!")
@@ -350,15 +352,16 @@ class FundiMatchCLI:
         
         # Create fundi profile
         try:
-            fundi = create_fundi_profile(
-                self.session,
-                user_id=user.id,
-                specialization=specialization,
-                experience=experience,
-                hourly_rate=hourly_rate,
-                location=location,
-                bio=bio
-            )
+            with session_scope() as session:
+                fundi = create_fundi_profile(
+                    session,
+                    user_id=user.id,
+                    specialization=specialization,
+                    experience=experience,
+                    hourly_rate=hourly_rate,
+                    location=location,
+                    bio=bio
+                )
             
             if fundi:
                 print("✅ Fundi profile created successfully!")
@@ -383,12 +386,15 @@ class FundiMatchCLI:
         Clean up resources before exiting
         ================================
         
-        This method ensures proper cleanup of database sessions
-        and other resources when the application exits.
+        Sessions are closed at the end of each action, so only the
+        logged-in user is left to forget.
         """
-        if self.session:
-            self.session.close()
-            print("🔒 Database session closed")
+        self.current_user = None
+    
+    def read(self, helper, *args, **kwargs):
+        """Run a read-only helper in its own session"""
+        with session_scope(read_only=True) as session:
+            return helper(session, *args, **kwargs)
     
     def run(self):
         """
@@ -418,9 +424,9 @@ class FundiMatchCLI:
                     elif choice == "3":
                         self.handle_register("fundi")
                     elif choice == "4":
-                        list_fundis(self.session)
+                        self.read(list_fundis)
                     elif choice == "5":
-                        list_categories(self.session)
+                        self.read(list_categories)
                     elif choice == "0":
                         self.running = False
                     else:
@@ -456,9 +462,9 @@ class FundiMatchCLI:
         elif choice == "4":
             self.handle_manage_categories()
         elif choice == "5":
-            list_reviews(self.session)
+            self.read(list_reviews)
         elif choice == "6":
-            list_payments(self.session)
+            self.read(list_payments)
         elif choice == "7":
             self.show_system_statistics()
         elif choice == "8":
@@ -473,17 +479,17 @@ class FundiMatchCLI:
     def handle_client_choice(self, choice):
         """Handle client menu choices"""
         if choice == "1":
-            search_fundis(self.session)
+            self.handle_search_fundis()
         elif choice == "2":
             self.handle_create_job()
         elif choice == "3":
-            list_jobs_by_status(self.session, client_id=self.current_user.id)
+            self.read(list_jobs_by_status, client_id=self.current_user.id)
         elif choice == "4":
             self.handle_view_job_status()
         elif choice == "5":
             self.handle_create_review()
         elif choice == "6":
-            list_payments(self.session, client_id=self.current_user.id)
+            self.read(list_payments, client_id=self.current_user.id)
         elif choice == "7":
             self.handle_update_profile()
         elif choice == "8":
@@ -496,19 +502,19 @@ class FundiMatchCLI:
     def handle_fundi_choice(self, choice):
         """Handle fundi menu choices"""
         if choice == "1":
-            list_jobs_by_status(self.session, fundi_id=self.current_user.id)
+            self.read(list_jobs_by_status, fundi_id=self.current_user.id)
         elif choice == "2":
             self.handle_update_job_status()
         elif choice == "3":
             self.handle_update_availability()
         elif choice == "4":
-            list_reviews(self.session, fundi_id=self.current_user.id)
+            self.read(list_reviews, fundi_id=self.current_user.id)
         elif choice == "5":
-            list_payments(self.session, fundi_id=self.current_user.id)
+            self.read(list_payments, fundi_id=self.current_user.id)
         elif choice == "6":
             self.handle_update_profile()
         elif choice == "7":
-            list_jobs_by_status(self.session, status="pending")
+            self.read(list_jobs_by_status, status="pending")
         elif choice == "8":
             self.handle_logout()
         elif choice == "0":
@@ -519,6 +525,18 @@ class FundiMatchCLI:
     # Additional handler methods would go here...
     # For brevity, I'll include just a few key ones
     
+    def handle_search_fundis(self):
+        """Handle ranked fundi search for clients"""
+        print("\n🔍 SEARCH FUNDIS")
+        print("-" * 30)
+        keywords = self.get_user_input("Enter keywords, e.g. 'plumber nairobi' (Enter to list all): ")
+        
+        offset = 0
+        while self.read(search_fundis, keywords=keywords or None, offset=offset):
+            if self.get_user_input("Show more results? (y/N): ").lower() != 'y':
+                break
+            offset += 20
+    
     def handle_create_job(self):
         """Handle job creation for clients"""
         print("\n📋 CREATE JOB REQUEST")
@@ -540,7 +558,7 @@ class FundiMatchCLI:
             return
         
         # Get available categories
-        categories = list_categories(self.session)
+        categories = self.read(list_categories)
         if not categories:
             print("❌ No categories available")
             return
@@ -551,19 +569,20 @@ class FundiMatchCLI:
             return
         
         try:
-            job = create_job(
-                self.session,
-                title=title,
-                description=description,
-                location=location,
-                client_id=self.current_user.id,
-                category_id=category_id
-            )
-            
-            if job:
-                print("✅ Job request created successfully!")
-            else:
-                print("❌ Failed to create job request")
+            with session_scope() as session:
+                job = create_job(
+                    session,
+                    title=title,
+                    description=description,
+                    location=location,
+                    client_id=self.current_user.id,
+                    category_id=category_id
+                )
+                
+                if job:
+                    print("✅ Job request created successfully!")
+                else:
+                    print("❌ Failed to create job request")
                 
         except Exception as e:
             print(f"❌ Error creating job: {str(e)}")
@@ -574,27 +593,32 @@ class FundiMatchCLI:
         print("-" * 30)
         
         try:
-            # Count users by role
-            clients = User.find_by_role(self.session, "client")
-            fundis = User.find_by_role(self.session, "fundi")
-            admins = User.find_by_role(self.session, "admin")
-            
-            # Count jobs by status
-            pending_jobs = Job.find_by_status(self.session, "pending")
-            assigned_jobs = Job.find_by_status(self.session, "assigned")
-            completed_jobs = Job.find_by_status(self.session, "completed")
-            
-            print(f"👥 Users:")
-            print(f"   Clients: {len(clients)}")
-            print(f"   Fundis: {len(fundis)}")
-            print(f"   Admins: {len(admins)}")
-            print(f"   Total: {len(clients) + len(fundis) + len(admins)}")
-            
-            print(f"\n📋 Jobs:")
-            print(f"   Pending: {len(pending_jobs)}")
-            print(f"   Assigned: {len(assigned_jobs)}")
-            print(f"   Completed: {len(completed_jobs)}")
-            print(f"   Total: {len(pending_jobs) + len(assigned_jobs) + len(completed_jobs)}")
+            # Not read-only: the job totals refresh the rollup tables first
+            with session_scope() as session:
+                # Count users by role
+                clients = User.find_by_role(session, "client")
+                fundis = User.find_by_role(session, "fundi")
+                admins = User.find_by_role(session, "admin")
+                
+                # Count jobs by status (from the daily rollups)
+                job_totals = get_job_status_totals(session)
+                pending_jobs = job_totals.get("pending", 0)
+                assigned_jobs = job_totals.get("assigned", 0)
+                completed_jobs = job_totals.get("completed", 0)
+                
+                print(f"👥 Users:")
+                print(f"   Clients: {len(clients)}")
+                print(f"   Fundis: {len(fundis)}")
+                print(f"   Admins: {len(admins)}")
+                print(f"   Total: {len(clients) + len(fundis) + len(admins)}")
+                
+                print(f"\n📋 Jobs:")
+                print(f"   Pending: {pending_jobs}")
+                print(f"   Assigned: {assigned_jobs}")
+                print(f"   Completed: {completed_jobs}")
+                print(f"   Total: {pending_jobs + assigned_jobs + completed_jobs}")
+                
+                show_analytics_report(session)
             
         except Exception as e:
             print(f"❌ Error loading statistics: {str(e)}")
@@ -0,0 +1,216 @@
+"""
+FundiMatch - Fundi Matching Engine
+==================================
+
+Ranks available fundis for a job. Shared by the Flask backend
+(GET /api/bookings/<id>/matches) and the CLI assign flow.
+
+Each candidate gets a score between 0 and 1 made of five parts:
+- specialization  - exact category match 1.0, partial match 0.5
+- location        - distance-based when the job and fundi both have
+                    coordinates (1.0 on site, 0 at MATCH_RADIUS_KM), else
+                    the fundi's area appears in the job location
+- rating          - rating / 5
+- completion      - completed / total jobs, smoothed so newcomers score 0.5
+- rate fit        - 1.0 at or under the job's hourly target, falling to 0
+                    at twice the target (0.5 when the job has no target)
+
+How it stays fast over 100k fundis:
+- MatchIndex is built once from plain rows and cached per fundis-table
+  version (backend) or for MATCH_INDEX_TTL seconds (CLI)
+- Candidates are bucketed by (specialization, location) and each bucket is
+  sorted by its job-independent part (rating + completion)
+- A query walks buckets best-first and stops reading a bucket as soon as
+  even a perfect rate fit could not beat the current k-th best, so most
+  candidates are never scored
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import heapq
+import os
+from collections import namedtuple
+
+import geo
+from cache import ReferenceCache
+
+WEIGHTS = {
+    'specialization': 0.35,
+    'location': 0.25,
+    'rating': 0.15,
+    'completion': 0.10,
+    'rate_fit': 0.15,
+}
+
+# Distance at which the location part drops to zero
+MATCH_RADIUS_KM = float(os.environ.get('MATCH_RADIUS_KM', 25))
+
+# Job-side inputs; build with JobSpec(...) or job_spec() from a Job row
+JobSpec = namedtuple('JobSpec', ['category', 'location', 'hourly_rate', 'budget', 'estimated_hours',
+                                 'scheduled_date', 'latitude', 'longitude'], defaults=(None, None))
+
+# One ranked result; parts holds the weighted score components
+Match = namedtuple('Match', ['fundi_id', 'score', 'parts'])
+
+# Columns the index needs, in this order (see MatchIndex.build)
+CANDIDATE_FIELDS = ('id', 'specialization', 'location', 'hourly_rate', 'rating', 'total_jobs', 'completed_jobs',
+                    'latitude', 'longitude')
+
+# Built indexes; the backend keys them on the fundis table version
+match_index_cache = ReferenceCache('match_index', ttl=float(os.environ.get('MATCH_INDEX_TTL', 60)))
+
+
+def _norm(text):
+    return (text or '').strip().lower()
+
+
+def job_spec(job, category_name):
+    """Build a JobSpec from any object with Job's columns"""
+    return JobSpec(category_name, job.location, job.hourly_rate, job.budget,
+                   job.estimated_hours, job.scheduled_date,
+                   getattr(job, 'latitude', None), getattr(job, 'longitude', None))
+
+
+def target_rate(spec):
+    """The job's hourly target: its hourly_rate, else budget / estimated_hours"""
+    if spec.hourly_rate:
+        return spec.hourly_rate
+    if spec.budget and spec.estimated_hours:
+        return spec.budget / spec.estimated_hours
+    return None
+
+
+def specialization_score(category, specialization):
+    """1.0 for the same trade, 0.5 when one name contains the other, else 0"""
+    category, specialization = _norm(category), _norm(specialization)
+    if not category or not specialization:
+        return 0.0
+    if category == specialization:
+        return 1.0
+    if category in specialization or specialization in category:
+        return 0.5
+    return 0.0
+
+
+def location_score(job_location, fundi_location):
+    """1.0 when the fundi's area is named in the job location"""
+    fundi_location = _norm(fundi_location)
+    return 1.0 if fundi_location and fundi_location in _norm(job_location) else 0.0
+
+
+def proximity_score(distance_km, radius_km=MATCH_RADIUS_KM):
+    """1.0 on site, linear down to 0 at radius_km"""
+    return max(0.0, 1.0 - distance_km / radius_km)
+
+
+def rate_fit(rate, target):
+    """1.0 at or below target, linear down to 0 at twice the target"""
+    if not target:
+        return 0.5
+    if rate <= target:
+        return 1.0
+    return max(0.0, 1.0 - (rate - target) / target)
+
+
+def static_score(rating, total_jobs, completed_jobs):
+    """Weighted job-independent part: rating and smoothed completion ratio"""
+    completion = ((completed_jobs or 0) + 1) / ((total_jobs or 0) + 2)
+    return WEIGHTS['rating'] * min(max(rating or 0.0, 0.0), 5.0) / 5.0 + WEIGHTS['completion'] * completion
+
+
+class MatchIndex:
+    """
+    Precomputed Candidate Lists
+    ===========================
+
+    buckets[specialization][location] -> [(static_score, fundi_id,
+    hourly_rate, latitude, longitude)], sorted best first. Only available
+    fundis go in.
+    """
+
+    def __init__(self):
+        self.buckets = {}
+        self.size = 0
+
+    @classmethod
+    def build(cls, rows):
+        """
+        Build an index from candidate rows
+        ==================================
+
+        Args:
+            rows: Iterable of tuples/rows ordered like CANDIDATE_FIELDS
+
+        Returns:
+            MatchIndex: The built index
+        """
+        index = cls()
+        for fundi_id, specialization, location, hourly_rate, rating, total, completed, lat, lng in rows:
+            entry = (static_score(rating, total, completed), fundi_id, hourly_rate or 0.0, lat, lng)
+            by_location = index.buckets.setdefault(_norm(specialization), {})
+            by_location.setdefault(_norm(location), []).append(entry)
+            index.size += 1
+        for by_location in index.buckets.values():
+            for entries in by_location.values():
+                entries.sort(key=lambda e: (-e[0], e[1]))
+        return index
+
+    def top_k(self, spec, k=10, exclude=()):
+        """
+        Best k candidates for a job
+        ===========================
+
+        Args:
+            spec (JobSpec): The job to match
+            k (int): How many matches to return
+            exclude (set): Fundi ids to skip (e.g. busy on the scheduled date)
+
+        Returns:
+            list: Match tuples, best first
+        """
+        target = target_rate(spec)
+        max_rate_part = WEIGHTS['rate_fit'] * (1.0 if target else 0.5)
+        located = geo.valid_coordinates(spec.latitude, spec.longitude)
+
+        # Score every bucket's fixed parts, then visit the most promising first.
+        # With job coordinates the location part depends on each fundi's
+        # distance, so a bucket's bound assumes the full location weight.
+        plans = []
+        for specialization, by_location in self.buckets.items():
+            spec_part = WEIGHTS['specialization'] * specialization_score(spec.category, specialization)
+            for location, entries in by_location.items():
+                text_part = WEIGHTS['location'] * location_score(spec.location, location)
+                loc_bound = WEIGHTS['location'] if located else text_part
+                best_possible = spec_part + loc_bound + entries[0][0] + max_rate_part
+                plans.append((best_possible, spec_part, text_part, loc_bound, entries))
+        plans.sort(key=lambda p: -p[0])
+
+        heap = []  # min-heap of (score, -fundi_id, parts) holding the best k so far
+        for best_possible, spec_part, text_part, loc_bound, entries in plans:
+            if len(heap) == k and best_possible <= heap[0][0]:
+                break  # plans are sorted, so no later bucket can do better
+            for static, fundi_id, hourly_rate, lat, lng in entries:
+                if len(heap) == k and spec_part + loc_bound + static + max_rate_part <= heap[0][0]:
+                    break  # entries are sorted by static score
+                if fundi_id in exclude:
+                    continue
+                loc_part = text_part
+                if located and lat is not None and lng is not None:
+                    distance = geo.haversine_km(spec.latitude, spec.longitude, lat, lng)
+                    loc_part = WEIGHTS['location'] * proximity_score(distance)
+                rate_part = WEIGHTS['rate_fit'] * rate_fit(hourly_rate, target) if target else max_rate_part
+                score = spec_part + loc_part + static + rate_part
+                item = (score, -fundi_id, (spec_part, loc_part, static, rate_part))
+                if len(heap) < k:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+
+        ranked = sorted(heap, reverse=True)
+        return [Match(-neg_id, round(score, 4), {
+            'specialization': round(parts[0], 4),
+            'location': round(parts[1], 4),
+            'rating_and_completion': round(parts[2], 4),
+            'rate_fit': round(parts[3], 4),
+        }) for score, neg_id, parts in ranked]
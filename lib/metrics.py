@@ -0,0 +1,168 @@
+"""
+FundiMatch - In-Process Metrics Registry
+========================================
+
+A tiny, dependency-free metrics registry shared by the Flask backend and the
+CLI tools. It keeps counters, gauges and histograms in memory and renders
+them in the Prometheus text exposition format.
+
+Key Concepts:
+- Counters only go up (requests served, cache hits)
+- Gauges hold a current value (queue depth)
+- Histograms bucket observations (latencies in seconds)
+- Collectors are callables run at scrape time to refresh gauges
+
+Every process (each gunicorn worker, the CLI) has its own registry, so a
+scrape shows the numbers of the worker that answered it.
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import threading
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_key(labels):
+    """Turn a labels dict into a hashable, sorted key"""
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key, extra=None):
+    """Render a label key as {a="1",b="2"} for the exposition format"""
+    pairs = list(key) + list(extra or [])
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{v}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+class MetricsRegistry:
+    """
+    Metrics Registry
+    ================
+
+    Thread-safe store for counters, gauges and histograms keyed by metric
+    name and label values.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._help = {}
+        self._collectors = []
+
+    def describe(self, name, help_text):
+        """Attach a HELP line to a metric name"""
+        self._help[name] = help_text
+
+    def inc(self, name, value=1, **labels):
+        """Increment a counter"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        """Set a gauge to an absolute value"""
+        key = _label_key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        """Record one observation in a histogram"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = {"buckets": buckets, "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(hist["buckets"]):
+                if value <= bound:
+                    hist["counts"][i] += 1
+            hist["sum"] += value
+            hist["count"] += 1
+
+    def register_collector(self, collector):
+        """Register a callable that refreshes gauges right before rendering"""
+        self._collectors.append(collector)
+
+    def get(self, name, **labels):
+        """Return the current value of a counter or gauge (0 if unset)"""
+        key = _label_key(labels)
+        with self._lock:
+            if name in self._counters:
+                return self._counters[name].get(key, 0)
+            return self._gauges.get(name, {}).get(key, 0)
+
+    def snapshot(self):
+        """
+        Return all metric values as plain Python data
+        =============================================
+
+        Returns:
+            dict: {"counters": {...}, "gauges": {...}, "histograms": {...}}
+        """
+        self._run_collectors()
+        with self._lock:
+            return {
+                "counters": {n: {_format_labels(k): v for k, v in s.items()} for n, s in self._counters.items()},
+                "gauges": {n: {_format_labels(k): v for k, v in s.items()} for n, s in self._gauges.items()},
+                "histograms": {
+                    n: {_format_labels(k): {"count": h["count"], "sum": h["sum"]} for k, h in s.items()}
+                    for n, s in self._histograms.items()
+                },
+            }
+
+    def render_prometheus(self):
+        """
+        Render every metric in the Prometheus text exposition format
+        ============================================================
+
+        Returns:
+            str: The exposition text, one sample per line
+        """
+        self._run_collectors()
+        lines = []
+        with self._lock:
+            for kind, store in (("counter", self._counters), ("gauge", self._gauges)):
+                for name in sorted(store):
+                    self._header(lines, name, kind)
+                    for key, value in sorted(store[name].items()):
+                        lines.append(f"{name}{_format_labels(key)} {value}")
+            for name in sorted(self._histograms):
+                self._header(lines, name, "histogram")
+                for key, hist in sorted(self._histograms[name].items()):
+                    for bound, count in zip(hist["buckets"], hist["counts"]):
+                        lines.append(f"{name}_bucket{_format_labels(key, [('le', bound)])} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {hist['count']}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {hist['sum']}")
+                    lines.append(f"{name}_count{_format_labels(key)} {hist['count']}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Drop all recorded values (collectors stay registered)"""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def _header(self, lines, name, kind):
+        if name in self._help:
+            lines.append(f"# HELP {name} {self._help[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    def _run_collectors(self):
+        for collector in list(self._collectors):
+            try:
+                collector(self)
+            except Exception:
+                # A broken collector must never take the metrics endpoint down
+                pass
+
+
+# Process-wide registry used by the backend and the CLI
+metrics = MetricsRegistry()
@@ -0,0 +1,165 @@
+"""
+FundiMatch - Request Profiling and Slow-Query Log
+=================================================
+
+Opt-in instrumentation for where request time goes. The Flask backend turns
+it on with PROFILING_ENABLED=true; when it is off nothing is installed, so
+requests and queries run exactly as before.
+
+What it records:
+- Per request: wall time, time spent in the database, query count and the
+  slowest few statements (a RequestProfile held in a context variable, so
+  it follows the request across threads and greenlets)
+- Per statement: SQLAlchemy before/after_cursor_execute timings on the
+  engine; statements slower than SLOW_QUERY_MS are logged with their
+  duration and parameter-set count, inside or outside a request (workers too)
+
+The caller turns a finished profile into a Server-Timing header
+(server_timing()) and Prometheus histograms (record_request()).
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import contextvars
+import heapq
+import logging
+import os
+import time
+
+from sqlalchemy import event
+
+from metrics import metrics
+
+logger = logging.getLogger('fundimatch.slow_query')
+
+ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() == 'true'
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 100))
+SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', 500))
+TOP_QUERIES = int(os.environ.get('PROFILING_TOP_QUERIES', 3))
+STATEMENT_PREVIEW = 300
+
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+
+_current = contextvars.ContextVar('fundimatch_request_profile', default=None)
+
+
+def _preview(statement):
+    """Collapse whitespace and cut long SQL for logs"""
+    text = ' '.join(statement.split())
+    return text if len(text) <= STATEMENT_PREVIEW else text[:STATEMENT_PREVIEW] + '...'
+
+
+class RequestProfile:
+    """Timings collected for one request"""
+
+    __slots__ = ('started', 'finished', 'db_seconds', 'queries', 'slowest')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished = None
+        self.db_seconds = 0.0
+        self.queries = 0
+        self.slowest = []  # min-heap of (seconds, statement), TOP_QUERIES long
+
+    @property
+    def wall_seconds(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def add_query(self, seconds, statement):
+        self.db_seconds += seconds
+        self.queries += 1
+        if TOP_QUERIES:
+            entry = (seconds, statement)
+            if len(self.slowest) < TOP_QUERIES:
+                heapq.heappush(self.slowest, entry)
+            elif seconds > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, entry)
+
+    def top_queries(self):
+        """[(milliseconds, statement preview)], slowest first"""
+        return [(round(seconds * 1000, 2), _preview(statement))
+                for seconds, statement in sorted(self.slowest, reverse=True)]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('profiling_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stack = conn.info.get('profiling_started')
+    if not stack:
+        return
+    seconds = time.perf_counter() - stack.pop()
+    profile = _current.get()
+    if profile is not None:
+        profile.add_query(seconds, statement)
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        metrics.inc('db_slow_queries_total')
+        rows = len(parameters) if executemany else 1
+        logger.warning("Slow query %.1f ms (%s parameter set%s): %s",
+                       seconds * 1000, rows, '' if rows == 1 else 's', _preview(statement))
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    stack = exception_context.connection.info.get('profiling_started') if exception_context.connection else None
+    if stack:
+        stack.pop()
+
+
+def install(engine):
+    """Attach the query timing listeners to an engine (idempotent)"""
+    if event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        return
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
+
+
+def start_request():
+    """Begin profiling the current request; returns the reset token for finish_request()"""
+    return _current.set(RequestProfile())
+
+
+def finish_request(token):
+    """Stop profiling the current request and return its RequestProfile"""
+    profile = _current.get()
+    _current.reset(token)
+    if profile is not None:
+        profile.finished = time.perf_counter()
+    return profile
+
+
+def current_profile():
+    """The RequestProfile of the running request, or None"""
+    return _current.get()
+
+
+def server_timing(profile):
+    """
+    Format a profile as a Server-Timing header value
+    ================================================
+
+    Example: app;dur=12.4, db;dur=3.1;desc="4 queries"
+    """
+    queries = f"{profile.queries} {'query' if profile.queries == 1 else 'queries'}"
+    return f'app;dur={profile.wall_seconds * 1000:.1f}, db;dur={profile.db_seconds * 1000:.1f};desc="{queries}"'
+
+
+def record_request(profile, endpoint, method, status):
+    """Export a finished request's numbers as histograms and log it if slow"""
+    metrics.observe('http_request_duration_seconds', profile.wall_seconds,
+                    endpoint=endpoint, method=method, status=str(status))
+    metrics.observe('http_request_db_seconds', profile.db_seconds, endpoint=endpoint)
+    metrics.observe('http_request_queries', profile.queries, buckets=QUERY_COUNT_BUCKETS, endpoint=endpoint)
+    if profile.wall_seconds * 1000 >= SLOW_REQUEST_MS:
+        logger.warning("Slow request %s %s: %.1f ms, db %.1f ms in %s queries; slowest: %s",
+                       method, endpoint, profile.wall_seconds * 1000, profile.db_seconds * 1000,
+                       profile.queries, profile.top_queries())
+
+
+metrics.describe('http_request_duration_seconds', 'Request wall time (PROFILING_ENABLED)')
+metrics.describe('http_request_db_seconds', 'Time a request spent in database statements (PROFILING_ENABLED)')
+metrics.describe('http_request_queries', 'Database statements executed per request (PROFILING_ENABLED)')
+metrics.describe('db_slow_queries_total', 'Statements slower than SLOW_QUERY_MS (PROFILING_ENABLED)')
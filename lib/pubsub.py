@@ -0,0 +1,438 @@
+"""
+FundiMatch - Notification Pub/Sub Hub
+=====================================
+
+An in-process publish/subscribe hub used to push new notifications to
+Server-Sent Events streams, with a pluggable broadcast so that a message
+published by one gunicorn worker reaches subscribers held by every worker.
+
+Key Concepts:
+- A subscription is a small bounded queue keyed by a channel (the user id).
+  Publishing to a channel with no local subscribers costs one dict lookup.
+- Messages are (channel, event_id, data) triples. event_id is the
+  notification id, so a reconnecting client can resume from Last-Event-ID.
+- A subscriber that falls too far behind is marked overflowed instead of
+  growing without bound; its stream ends and the client reconnects and
+  resumes from the database.
+
+Broadcast backends (PUBSUB_BACKEND):
+- local    - single process only (tests, one worker and no worker.py)
+- socket   - Unix datagram sockets in PUBSUB_SOCKET_DIR; every worker on the
+             host binds one socket and publishers send to all of them
+- postgres - PostgreSQL LISTEN/NOTIFY on PUBSUB_CHANNEL (multi-host)
+
+Without PUBSUB_BACKEND the hub uses postgres when the database is
+PostgreSQL and socket otherwise. Notifications are published by whichever
+process delivers the outbox (often worker.py), so a process-local hub
+would leave streams in the web workers waiting until they reconnect.
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import asyncio
+import collections
+import json
+import logging
+import os
+import select
+import socket
+import threading
+import time
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+PG_PAYLOAD_LIMIT = 7900
+# Keep datagrams well under the default Linux socket buffer
+SOCKET_PAYLOAD_LIMIT = 60000
+
+
+class Subscription:
+    """
+    One Subscriber's Queue
+    ======================
+
+    Filled by the hub, drained by a single consumer (one SSE stream): a
+    thread blocked in get(), or a coroutine awaiting get_async() on an event
+    loop (the ASGI app), which parks no thread while idle.
+    """
+
+    def __init__(self, hub, channel, max_pending=256):
+        self.hub = hub
+        self.channel = channel
+        self.max_pending = max_pending
+        self.overflowed = False
+        self.closed = False
+        self._queue = collections.deque()
+        self._ready = threading.Event()
+        self._waiter = None  # (loop, future) while get_async() waits
+
+    def put(self, message):
+        """Queue a message (called by the hub)"""
+        if len(self._queue) >= self.max_pending:
+            self.overflowed = True
+        else:
+            self._queue.append(message)
+        self._ready.set()
+        waiter = self._waiter
+        if waiter is not None:
+            loop, future = waiter
+            loop.call_soon_threadsafe(_wake, future)
+
+    def get(self, timeout=None):
+        """
+        Wait for queued messages
+        ========================
+
+        Args:
+            timeout (float): Seconds to wait; None waits forever
+
+        Returns:
+            list: (event_id, data) pairs, empty on timeout
+        """
+        if not self._queue and not self.overflowed:
+            self._ready.wait(timeout)
+        self._ready.clear()
+        messages = []
+        while self._queue:
+            messages.append(self._queue.popleft())
+        return messages
+
+    async def get_async(self, timeout=None):
+        """
+        Wait for queued messages without blocking the event loop
+        ========================================================
+
+        Same contract as get(); put() from any thread wakes the waiting
+        coroutine through loop.call_soon_threadsafe.
+        """
+        if not self._queue and not self.overflowed:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._waiter = (loop, future)
+            try:
+                # put() may have run before the waiter was registered
+                if not self._queue and not self.overflowed:
+                    await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._waiter = None
+        self._ready.clear()
+        messages = []
+        while self._queue:
+            messages.append(self._queue.popleft())
+        return messages
+
+    def close(self):
+        """Unregister from the hub; safe to call more than once"""
+        if not self.closed:
+            self.closed = True
+            self.hub.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class PubSubHub:
+    """
+    Channel -> Subscriptions Hub
+    ============================
+
+    Args:
+        broadcaster: Backend that fans messages out to every process
+                     (None = deliver locally only)
+    """
+
+    def __init__(self, broadcaster=None):
+        self._channels = {}
+        self._lock = threading.Lock()
+        self.broadcaster = broadcaster or LocalBroadcaster()
+
+    def subscribe(self, channel, max_pending=256):
+        """Register a new subscription on a channel"""
+        self.broadcaster.start(self)
+        subscription = Subscription(self, str(channel), max_pending)
+        with self._lock:
+            self._channels.setdefault(subscription.channel, set()).add(subscription)
+        metrics.inc('pubsub_subscriptions_total')
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Remove a subscription (prefer Subscription.close())"""
+        with self._lock:
+            subscribers = self._channels.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[subscription.channel]
+
+    def publish(self, messages):
+        """
+        Publish messages to every process
+        =================================
+
+        Args:
+            messages (list): (channel, event_id, data) triples; data must be
+                             JSON serialisable
+        """
+        messages = [(str(channel), event_id, data) for channel, event_id, data in messages]
+        if messages:
+            metrics.inc('pubsub_messages_total', len(messages), direction='published')
+            self.broadcaster.send(self, messages)
+
+    def deliver(self, messages):
+        """Hand messages to this process's subscribers (called by broadcasters)"""
+        delivered = 0
+        with self._lock:
+            # Copy the sets: subscribers may close while we deliver
+            targets = [(tuple(self._channels.get(str(channel), ())), event_id, data)
+                       for channel, event_id, data in messages]
+        for subscribers, event_id, data in targets:
+            for subscription in subscribers:
+                subscription.put((event_id, data))
+                delivered += 1
+        if delivered:
+            metrics.inc('pubsub_messages_total', delivered, direction='delivered')
+        return delivered
+
+    def subscriber_count(self):
+        """Number of open subscriptions in this process"""
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._channels.values())
+
+    def channel_count(self):
+        """Number of channels with at least one subscriber"""
+        with self._lock:
+            return len(self._channels)
+
+
+def _chunk_payloads(messages, limit):
+    """Split messages into JSON payloads no larger than limit bytes"""
+    batch, size = [], 2
+    for message in messages:
+        encoded = json.dumps(message, separators=(',', ':'), default=str)
+        if len(encoded) + 2 > limit:
+            logger.warning("Dropping pub/sub message for channel %s: %d bytes exceeds %d",
+                           message[0], len(encoded), limit)
+            continue
+        if batch and size + len(encoded) + 1 > limit:
+            yield '[' + ','.join(batch) + ']'
+            batch, size = [], 2
+        batch.append(encoded)
+        size += len(encoded) + 1
+    if batch:
+        yield '[' + ','.join(batch) + ']'
+
+
+class LocalBroadcaster:
+    """Single-process broadcast: publishing is local delivery"""
+
+    name = 'local'
+
+    def start(self, hub):
+        pass
+
+    def send(self, hub, messages):
+        hub.deliver(messages)
+
+
+class SocketBroadcaster:
+    """
+    Unix Datagram Socket Broadcast
+    ==============================
+
+    Each process binds <socket_dir>/<pid>.sock and runs a listener thread.
+    Publishing delivers locally and sends one datagram per payload to every
+    other socket in the directory. Sockets of dead workers are removed the
+    first time a send to them is refused.
+    """
+
+    name = 'socket'
+
+    def __init__(self, socket_dir):
+        self.socket_dir = socket_dir
+        self._sock = None
+        self._path = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def start(self, hub):
+        # Bind lazily and per pid: a socket bound before a fork belongs to the parent
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            os.makedirs(self.socket_dir, exist_ok=True)
+            self._path = os.path.join(self.socket_dir, f'{os.getpid()}.sock')
+            if os.path.exists(self._path):
+                os.unlink(self._path)
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sock.bind(self._path)
+            self._sock = sock
+            self._pid = os.getpid()
+            threading.Thread(target=self._listen, args=(hub, sock), name='pubsub-socket', daemon=True).start()
+
+    def _listen(self, hub, sock):
+        while True:
+            try:
+                payload = sock.recv(SOCKET_PAYLOAD_LIMIT + 1024)
+                hub.deliver(json.loads(payload))
+            except OSError:
+                return
+            except ValueError:
+                logger.warning("Ignoring malformed pub/sub datagram")
+
+    def send(self, hub, messages):
+        self.start(hub)
+        hub.deliver(messages)
+        try:
+            peers = [os.path.join(self.socket_dir, name) for name in os.listdir(self.socket_dir)
+                     if name.endswith('.sock')]
+        except FileNotFoundError:
+            return
+        peers = [path for path in peers if path != self._path]
+        if not peers:
+            return
+        sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            for payload in _chunk_payloads(messages, SOCKET_PAYLOAD_LIMIT):
+                data = payload.encode()
+                for path in list(peers):
+                    try:
+                        sender.sendto(data, path)
+                    except (ConnectionRefusedError, FileNotFoundError):
+                        # The worker that owned this socket has exited
+                        peers.remove(path)
+                        try:
+                            os.unlink(path)
+                        except OSError:
+                            pass
+                    except OSError as e:
+                        logger.warning("Pub/sub send to %s failed: %s", path, e)
+        finally:
+            sender.close()
+
+
+class PostgresBroadcaster:
+    """
+    PostgreSQL LISTEN/NOTIFY Broadcast
+    ==================================
+
+    A listener thread per process holds one dedicated connection that
+    LISTENs on the channel; publishing runs pg_notify on a second
+    autocommit connection. Every process (the publisher included) receives
+    the notification and delivers it to its own subscribers.
+    """
+
+    name = 'postgres'
+
+    def __init__(self, dsn, channel='fundimatch_notifications', reconnect_delay=2.0):
+        self.dsn = dsn
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self._pid = None
+        self._send_conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        import psycopg2  # only needed when this backend is selected
+        conn = psycopg2.connect(self.dsn)
+        conn.autocommit = True
+        return conn
+
+    def start(self, hub):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._send_conn = None
+            threading.Thread(target=self._listen, args=(hub,), name='pubsub-postgres', daemon=True).start()
+
+    def _listen(self, hub):
+        while True:
+            try:
+                conn = self._connect()
+                with conn.cursor() as cur:
+                    cur.execute(f'LISTEN "{self.channel}"')
+                while True:
+                    if select.select([conn], [], [], 30.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        try:
+                            hub.deliver(json.loads(notify.payload))
+                        except ValueError:
+                            logger.warning("Ignoring malformed pub/sub payload")
+            except Exception as e:
+                logger.warning("Pub/sub listener lost its connection (%s); reconnecting", e)
+                time.sleep(self.reconnect_delay)
+
+    def send(self, hub, messages):
+        self.start(hub)
+        payloads = list(_chunk_payloads(messages, PG_PAYLOAD_LIMIT))
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._send_conn is None or self._send_conn.closed:
+                        self._send_conn = self._connect()
+                    with self._send_conn.cursor() as cur:
+                        for payload in payloads:
+                            cur.execute('SELECT pg_notify(%s, %s)', (self.channel, payload))
+                    return
+                except Exception as e:
+                    self._send_conn = None
+                    if attempt:
+                        logger.warning("Pub/sub publish failed: %s", e)
+
+
+def create_hub(backend=None, dsn=None):
+    """
+    Build a hub from configuration
+    ==============================
+
+    Args:
+        backend (str): 'local', 'socket' or 'postgres' (default: PUBSUB_BACKEND
+                       env var, else postgres for a PostgreSQL dsn and
+                       socket for anything else)
+        dsn (str): Database URL for the postgres backend
+
+    Returns:
+        PubSubHub: The configured hub
+    """
+    backend = backend or os.environ.get('PUBSUB_BACKEND')
+    if not backend:
+        backend = 'postgres' if dsn and dsn.startswith('postgresql') else 'socket'
+    backend = backend.lower()
+    if backend == 'socket':
+        socket_dir = os.environ.get('PUBSUB_SOCKET_DIR', '/tmp/fundimatch-pubsub')
+        return PubSubHub(SocketBroadcaster(socket_dir))
+    if backend == 'postgres':
+        if not dsn or not dsn.startswith('postgresql'):
+            raise ValueError("PUBSUB_BACKEND=postgres requires a PostgreSQL DATABASE_URL")
+        # psycopg2 does not understand SQLAlchemy's driver suffix
+        dsn = dsn.replace('postgresql+psycopg2://', 'postgresql://', 1)
+        channel = os.environ.get('PUBSUB_CHANNEL', 'fundimatch_notifications')
+        return PubSubHub(PostgresBroadcaster(dsn, channel))
+    if backend != 'local':
+        raise ValueError(f"Unknown PUBSUB_BACKEND '{backend}'")
+    return PubSubHub()
+
+
+metrics.describe('pubsub_subscriptions_total', 'Pub/sub subscriptions opened')
+metrics.describe('pubsub_messages_total', 'Pub/sub messages published and delivered to local subscribers')
@@ -0,0 +1,100 @@
+"""
+FundiMatch - Streaming Row Output
+=================================
+
+Writes rows to a stream as they arrive, in one of three formats:
+- table  - fixed-width columns (the look of the interactive CLI lists);
+           long values are cut to the column width
+- csv    - header line then one line per row, for spreadsheets and scripts
+- jsonl  - one JSON object per line, for jq and other tools
+
+Rows are written one at a time and never collected, so output starts with
+the first fetched row and memory stays flat however many rows a query
+returns.
+
+Paging: when a table goes to a terminal (stdin and stdout both ttys) and
+the caller asks for it, the output pauses every PAGE_SIZE rows until Enter
+is pressed; 'q' stops the listing there. Piped or redirected output is
+never paged.
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import csv
+import json
+import os
+import sys
+
+FORMATS = ('table', 'csv', 'jsonl')
+
+PAGE_SIZE = int(os.environ.get('FUNDIMATCH_PAGE_SIZE', 40))
+
+
+def _cell(value, width):
+    text = '' if value is None else str(value)
+    if len(text) > width:
+        text = text[:width - 1] + '~'
+    return f"{text:<{width}}"
+
+
+def _more(shown):
+    """Ask whether to show the next page; False on 'q' or end of input"""
+    try:
+        return input(f"-- {shown} shown, Enter for more, q to stop -- ").strip().lower() != 'q'
+    except EOFError:
+        return False
+
+
+def is_terminal(out):
+    return out.isatty() and sys.stdin.isatty()
+
+
+def write_rows(rows, columns, fmt='table', out=None, title=None, paged=False):
+    """
+    Stream rows in the requested format
+    ===================================
+
+    The table header (and title) is only written once the first row
+    arrives, so an empty result writes nothing and the caller can say so.
+
+    Args:
+        rows: Iterable of tuples (e.g. a streamed SQLAlchemy Result)
+        columns (list): (name, width) pairs in row order; width is only
+                        used by the table format
+        fmt (str): 'table', 'csv' or 'jsonl'
+        out: Stream to write to (default sys.stdout)
+        title (str): Line written above a table
+        paged (bool): Pause a table every PAGE_SIZE rows on a terminal
+
+    Returns:
+        int: Number of rows written
+    """
+    out = out or sys.stdout
+    names = [name for name, _ in columns]
+    count = 0
+    if fmt == 'csv':
+        writer = csv.writer(out)
+        writer.writerow(names)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    elif fmt == 'jsonl':
+        for row in rows:
+            out.write(json.dumps(dict(zip(names, row)), default=str) + '\n')
+            count += 1
+    else:
+        widths = [width for _, width in columns]
+        page_size = PAGE_SIZE if paged and is_terminal(out) else None
+        for row in rows:
+            if not count:
+                rule = '-' * (sum(widths) + len(widths) - 1)
+                header = ' '.join(_cell(name.replace('_', ' ').upper(), width) for name, width in columns)
+                out.write((f"{title}\n" if title else '') + f"{rule}\n{header.rstrip()}\n{rule}\n")
+            elif page_size and count % page_size == 0:
+                out.flush()
+                if not _more(count):
+                    break
+            out.write(' '.join(_cell(value, width) for value, width in zip(row, widths)).rstrip() + '\n')
+            count += 1
+    return count
@@ -14,4 +14,44 @@ export const markNotificationAsRead = async (notificationId) => {
   return res.json();
 };
 
+export const getNotificationInbox = async (userId, { limit = 20, before, unreadOnly = false } = {}) => {
+  const params = new URLSearchParams({ limit: String(limit), unread_only: String(unreadOnly) });
+  if (before) params.set('before', String(before));
+  const res = await fetch(`${buildApiUrl('')}/notifications/${userId}/inbox?${params}`);
+  if (!res.ok) throw new Error('Failed to fetch notification inbox');
+  return res.json();
+};
+
+export const getUnreadCount = async (userId) => {
+  const res = await fetch(`${buildApiUrl('')}/notifications/${userId}/unread-count`);
+  if (!res.ok) throw new Error('Failed to fetch unread count');
+  return res.json();
+};
+
+// Mark many notifications read in one request: pass { ids: [...] } or { upTo: id }
+export const markNotificationsAsRead = async (userId, { ids, upTo } = {}) => {
+  const body = ids ? { ids } : upTo ? { up_to: upTo } : {};
+  const res = await fetch(`${buildApiUrl('')}/notifications/${userId}/mark-read`, {
+    method: 'PUT',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(body)
+  });
+  if (!res.ok) throw new Error('Failed to mark notifications as read');
+  return res.json();
+};
 
+// Live notifications over Server-Sent Events. EventSource reconnects on its own
+// and sends Last-Event-ID, so notifications missed while offline are replayed.
+// Returns a function that closes the stream.
+export const subscribeToNotifications = (userId, { onNotification, onResync, onError } = {}) => {
+  const source = new EventSource(`${buildApiUrl('')}/notifications/${userId}/stream`);
+  source.addEventListener('notification', (event) => {
+    if (onNotification) onNotification(JSON.parse(event.data));
+  });
+  // Sent when too much was missed to replay - reload the inbox instead
+  source.addEventListener('resync', () => {
+    if (onResync) onResync();
+  });
+  if (onError) source.onerror = onError;
+  return () => source.close();
+};
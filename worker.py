@@ -0,0 +1,105 @@
+# worker.py at repo root
+"""
+FundiMatch - Background Worker
+==============================
+
+Runs background tasks (see lib/db/task_queue.py) next to the gunicorn web
+process, and drains the notification outbox so fan-out happens here rather
+than in the web workers (set OUTBOX_DISPATCHER=off on the web process).
+It also refreshes the dashboard rollups every ROLLUP_REFRESH_SECONDS, so
+dashboard requests never find them stale and only read.
+
+Usage:
+    python worker.py                                   # queues from TASK_QUEUES
+    python worker.py --queues default:4,reports:1      # threads per queue
+    python worker.py --metrics-port 9100               # Prometheus metrics on :9100/metrics
+    python worker.py --no-rollups                      # refresh rollups from cron instead
+
+Stops cleanly on SIGTERM/SIGINT: running tasks finish, nothing new is claimed.
+
+Author: Gibson Giteru
+Class: Moringa School Phase 3
+"""
+
+import argparse
+import logging
+import os
+import signal
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from flask_backend_template import (app, db, dispatch_outbox, refresh_rollups, task_worker,
+                                    OUTBOX_POLL_SECONDS, ROLLUP_REFRESH_SECONDS)
+from metrics import metrics
+from db.task_queue import parse_concurrency
+
+logger = logging.getLogger('fundimatch.worker')
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = metrics.render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def drain_outbox(stopping):
+    while not stopping.wait(OUTBOX_POLL_SECONDS):
+        try:
+            with app.app_context():
+                dispatch_outbox()
+        except Exception:
+            logger.exception("Outbox dispatch failed")
+
+
+def refresh_rollups_periodically(stopping):
+    while not stopping.wait(ROLLUP_REFRESH_SECONDS):
+        try:
+            with app.app_context():
+                refresh_rollups()
+        except Exception:
+            logger.exception("Rollup refresh failed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FundiMatch background worker")
+    parser.add_argument('--queues', default=os.environ.get('TASK_QUEUES', 'default:2'),
+                        help='Threads per queue, e.g. default:4,reports:1')
+    parser.add_argument('--no-outbox', action='store_true', help='Do not drain the notification outbox')
+    parser.add_argument('--no-rollups', action='store_true', help='Do not refresh the dashboard rollups')
+    parser.add_argument('--metrics-port', type=int, default=int(os.environ.get('WORKER_METRICS_PORT', 0)),
+                        help='Serve Prometheus metrics on this port (0 = off)')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    with app.app_context():
+        db.create_all()
+        worker = task_worker(parse_concurrency(args.queues))
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+
+    worker.start()
+    if not args.no_outbox:
+        threading.Thread(target=drain_outbox, args=(stopping,), name='outbox', daemon=True).start()
+    if not args.no_rollups:
+        threading.Thread(target=refresh_rollups_periodically, args=(stopping,), name='rollups', daemon=True).start()
+    if args.metrics_port:
+        server = ThreadingHTTPServer(('0.0.0.0', args.metrics_port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    logger.info("Worker %s running queues %s", worker.worker_id, worker.concurrency)
+
+    stopping.wait()
+    logger.info("Stopping: waiting for running tasks")
+    worker.stop()
+
+
+if __name__ == "__main__":
+    main()